@@ -5,19 +5,31 @@ import ctypes
 import threading
 from src.core.utils import Colors, detect_proxy_port, recommend_config, ProgressBar
 from src.core.backup import backup_all
+from src.core.mirrors import MIRRORS, print_ranking
 from src.modules.git import set_git_proxy, unset_git_proxy, diagnose_git_github
 from src.modules.python import (
-    set_pip_mirror, set_pip_proxy, unset_pip_config,
+    PIP_MIRRORS, set_pip_mirror, set_pip_proxy, unset_pip_config,
     set_conda_mirror, set_conda_proxy, unset_conda_config, smart_install_requirements
 )
-from src.modules.node import set_node_mirror, set_node_proxy, unset_node_config
-from src.modules.go import set_go_proxy, unset_go_proxy
+from src.modules.node import NPM_REGISTRIES, set_node_mirror, set_node_proxy, unset_node_config
+from src.modules.go import GO_PROXIES, set_go_proxy, unset_go_proxy
 from src.modules.docker import set_docker_mirror
 from src.modules.hosts import update_github_hosts
 from src.modules.proxy_tools import generate_terminal_proxy_commands, generate_lan_proxy_guide
 from src.modules.templates import list_templates, apply_template
 from src.modules.plugins import list_plugins, run_plugin
 from src.modules.updater import check_for_updates
+from src.modules.env_sync import watch_project
+from src.modules.env_registry import gc_envs
+from src.modules.dns_forwarder import run_dns_forwarder, pin_github
+from src.modules.pypi_cache import run_pypi_cache, PYPI_CACHE_PORT
+from src.modules.npm_cache import run_npm_cache, NPM_CACHE_PORT, KEEP_VERSIONS
+from src.modules.registry_cache import run_registry_cache, REGISTRY_CACHE_PORT
+from src.modules.conda_cache import run_conda_cache, CONDA_CACHE_PORT
+from src.modules.go_cache import run_go_cache, GO_CACHE_PORT
+from src.modules.git_cache import clone as git_cache_clone, run_git_cache_refresh
+from src.modules.net_monitor import run_daemon
+from src.modules.local_proxy import run_local_proxy, configure_tools, DEFAULT_PORT as LOCAL_PROXY_PORT
 
 APP_VERSION = "4.0.0"
 
@@ -52,8 +64,121 @@ def _maybe_print_update():
 def main():
     parser = argparse.ArgumentParser(description="全能开发环境网络助手")
     parser.add_argument("--web", action="store_true", help="启动 Web 可视化界面 (推荐)")
+    parser.add_argument("--watch", metavar="PATH", help="监听项目依赖文件变更，并增量同步到已有 .venv / Conda 环境")
+    parser.add_argument("--env-type", choices=["venv", "conda"], help="--watch 的目标环境类型 (默认自动识别)")
+    parser.add_argument("--uninstall-removed", action="store_true", help="--watch 时卸载从依赖文件中删除的包")
+    parser.add_argument("--gc-envs", metavar="DAYS", type=int, help="删除超过 DAYS 天未使用的已登记 venv/conda 环境 (npm 项目目录不会被自动删除)")
+    parser.add_argument("--dry-run", action="store_true", help="--gc-envs 时只列出将被删除的环境")
+    parser.add_argument("--dns", nargs="?", const=0, type=int, metavar="PORT", help="启动本地缓存 DNS 转发 (默认 53，无权限时 5533)")
+    parser.add_argument("--dns-pin-github", action="store_true", help="测速优选 GitHub IP 并固定到本地 DNS 转发的覆盖表")
+    parser.add_argument("--local-proxy", nargs="?", const=LOCAL_PROXY_PORT, type=int, metavar="PORT", help=f"启动本地分流代理 (按域名规则直连/走代理/走镜像，默认端口 {LOCAL_PROXY_PORT})")
+    parser.add_argument("--upstream-port", help="--local-proxy 的上游代理端口 (默认自动检测)")
+    parser.add_argument("--configure-tools", action="store_true", help="--local-proxy 时将 pip/conda/npm 的代理指向本地分流代理")
+    parser.add_argument("--pypi-cache", nargs="?", const=PYPI_CACHE_PORT, type=int, metavar="PORT", help=f"启动 PyPI 本地缓存镜像 (局域网共享，默认端口 {PYPI_CACHE_PORT})")
+    parser.add_argument("--cache-size", type=float, metavar="GB", help="本地缓存镜像的磁盘上限 (GB)")
+    parser.add_argument("--pip-mirror", choices=sorted(PIP_MIRRORS) + ["auto", "local"], help="将 pip 切换到指定镜像 (auto = 当前评分最好的镜像，local = 本地缓存镜像)")
+    parser.add_argument("--npm-cache", nargs="?", const=NPM_CACHE_PORT, type=int, metavar="PORT", help=f"启动 npm 本地缓存镜像 (局域网共享，默认端口 {NPM_CACHE_PORT})")
+    parser.add_argument("--node-mirror", choices=sorted(NPM_REGISTRIES) + ["auto", "local"], help="将 npm/yarn/pnpm 切换到指定镜像 (auto = 当前评分最好的镜像，local = 本地缓存镜像)")
+    parser.add_argument("--registry-cache", nargs="?", const=REGISTRY_CACHE_PORT, type=int, metavar="PORT", help=f"启动 Docker 镜像仓库本地缓存 (默认端口 {REGISTRY_CACHE_PORT})")
+    parser.add_argument("--docker-mirror", choices=["auto", "local"], help="检测 Docker 镜像源并只写入可用的 (local = 本地缓存优先)")
+    parser.add_argument("--conda-cache", nargs="?", const=CONDA_CACHE_PORT, type=int, metavar="PORT", help=f"启动 Conda repodata 预取缓存 (默认端口 {CONDA_CACHE_PORT})")
+    parser.add_argument("--npm-trim", action="store_true", help=f"--npm-cache 时 packument 只保留最近的 {KEEP_VERSIONS} 个版本 (精确锁定更旧版本会失败)")
+    parser.add_argument("--conda-trim", action="store_true", help="--conda-cache 时裁掉已有 .conda 版本的 .tar.bz2 记录，减小 repodata")
+    parser.add_argument("--conda-mirror", choices=sorted(MIRRORS["conda"]) + ["auto", "local"], help="将 conda 切换到指定镜像 (auto = 当前评分最好的镜像，local = 本地缓存镜像)")
+    parser.add_argument("--go-cache", nargs="?", const=GO_CACHE_PORT, type=int, metavar="PORT", help=f"启动 Go 模块代理本地缓存 (GOPROXY 协议，默认端口 {GO_CACHE_PORT})")
+    parser.add_argument("--go-proxy", choices=sorted(GO_PROXIES) + ["auto", "local"], help="设置 GOPROXY (auto = 当前评分最好的代理，local = 本地缓存)")
+    parser.add_argument("--rank-mirrors", nargs="*", choices=sorted(MIRRORS), metavar="ECOSYSTEM", help=f"并发检测并打印各生态镜像的评分排名 ({'/'.join(MIRRORS)}，默认全部)")
+    parser.add_argument("--git-clone", metavar="URL", help="通过本地参考缓存克隆仓库 (只下载缓存中没有的对象)")
+    parser.add_argument("--git-dest", metavar="DIR", help="--git-clone 的目标目录 (默认取仓库名)")
+    parser.add_argument("--dissociate", action="store_true", help="--git-clone 时复制借用的对象，克隆结果不依赖参考缓存")
+    parser.add_argument("--git-cache-refresh", nargs="?", const=0, type=float, metavar="MINUTES", help="更新所有 Git 参考缓存 (给出 MINUTES 则按间隔循环更新)")
+    parser.add_argument("--daemon", action="store_true", help="后台网络监控：持续探测镜像/代理，明显变化时自动切换 pip/conda/npm 配置 (与 --web 同用时在 Web 后台运行)")
+    parser.add_argument("--no-switch", action="store_true", help="--daemon 时只监控不切换配置")
     args = parser.parse_args()
 
+    if args.gc_envs is not None:
+        summary = gc_envs(days=args.gc_envs, dry_run=args.dry_run)
+        verb = "可释放" if args.dry_run else "已释放"
+        for name in summary["deleted"]:
+            print(f"  - {name}")
+        Colors.print_success(f"{len(summary['deleted'])} 个闲置环境，{verb} {summary['freed_bytes'] / 1024 ** 3:.2f} GB")
+        return
+
+    if args.dns_pin_github:
+        pin_github()
+        if args.dns is None:
+            return
+
+    if args.rank_mirrors is not None:
+        print_ranking(args.rank_mirrors)
+        return
+
+    if args.pip_mirror:
+        set_pip_mirror(args.pip_mirror)
+        return
+
+    if args.node_mirror:
+        set_node_mirror(args.node_mirror)
+        return
+
+    if args.docker_mirror:
+        set_docker_mirror(args.docker_mirror)
+        return
+
+    if args.registry_cache is not None:
+        run_registry_cache(args.registry_cache, args.cache_size)
+        return
+
+    if args.npm_cache is not None:
+        run_npm_cache(args.npm_cache, args.cache_size, args.npm_trim)
+        return
+
+    if args.git_clone:
+        git_cache_clone(args.git_clone, args.git_dest, args.dissociate)
+        return
+
+    if args.git_cache_refresh is not None:
+        run_git_cache_refresh(args.git_cache_refresh)
+        return
+
+    if args.go_proxy:
+        set_go_proxy(args.go_proxy)
+        return
+
+    if args.go_cache is not None:
+        run_go_cache(args.go_cache, args.cache_size)
+        return
+
+    if args.conda_mirror:
+        set_conda_mirror(args.conda_mirror)
+        return
+
+    if args.conda_cache is not None:
+        run_conda_cache(args.conda_cache, args.cache_size, args.conda_trim)
+        return
+
+    if args.pypi_cache is not None:
+        run_pypi_cache(args.pypi_cache, args.cache_size)
+        return
+
+    if args.local_proxy is not None:
+        if args.configure_tools:
+            configure_tools(args.local_proxy)
+        run_local_proxy(args.local_proxy, args.upstream_port)
+        return
+
+    if args.dns is not None:
+        run_dns_forwarder(args.dns or None)
+        return
+
+    if args.daemon and not args.web:
+        run_daemon(auto_switch=not args.no_switch)
+        return
+
+    if args.watch:
+        watch_project(args.watch, env_type=args.env_type, uninstall_removed=args.uninstall_removed)
+        return
+
     threading.Thread(target=_maybe_print_update, daemon=True).start()
 
     if args.web:
@@ -66,7 +191,7 @@ def main():
             Colors.print_info("请用 Windows Terminal(管理员) 运行：python main.py --web")
         try:
             from src.web.server import launch_web_ui
-            launch_web_ui()
+            launch_web_ui(monitor=args.daemon)
             return
         except ImportError as e:
             Colors.print_error(f"无法启动 Web 界面: {e}")
@@ -110,7 +235,7 @@ def main():
                     
         elif choice == '2': # Python Menu
             print("\n--- Python 配置 ---")
-            print("1. 镜像模式 (清华源) [推荐]")
+            print("1. 镜像模式 (自动选择评分最好的镜像) [推荐]")
             print("2. 代理模式 (VPN)")
             sub = input("请选择: ").strip()
             if sub == '1':
@@ -123,7 +248,7 @@ def main():
 
         elif choice == '3': # Node Menu
             print("\n--- Node.js 配置 ---")
-            print("1. 镜像模式 (淘宝/腾讯源) [推荐]")
+            print("1. 镜像模式 (自动选择评分最好的镜像) [推荐]")
             print("2. 代理模式 (VPN)")
             sub = input("请选择: ").strip()
             if sub == '1': set_node_mirror()
@@ -134,10 +259,14 @@ def main():
             print("1. Git: 开启 GitHub 智能代理")
             print("2. Go: 设置 GOPROXY")
             print("3. Docker: 设置镜像加速")
+            print("4. Git: 通过本地参考缓存克隆仓库")
             sub = input("请选择: ").strip()
             if sub == '1': set_git_proxy(detect_proxy_port())
             elif sub == '2': set_go_proxy()
             elif sub == '3': set_docker_mirror()
+            elif sub == '4':
+                url = input("仓库地址: ").strip()
+                if url: git_cache_clone(url)
 
         elif choice == '5': # Tools Menu
             print("\n--- 实用工具 ---")
@@ -147,6 +276,7 @@ def main():
             print("4. 更新 GitHub Hosts (解决 DNS 污染)")
             print("5. 获取终端代理命令 (Terminal Proxy)")
             print("6. 局域网代理共享指南 (LAN Sharing)")
+            print("7. 测速优选 GitHub IP 写入 Hosts (本地解析 + TLS 校验)")
             sub = input("请选择: ").strip()
             if sub == '1': backup_all()
             elif sub == '2': smart_install_requirements(detect_proxy_port())
@@ -154,6 +284,7 @@ def main():
             elif sub == '4': update_github_hosts()
             elif sub == '5': generate_terminal_proxy_commands(detect_proxy_port())
             elif sub == '6': generate_lan_proxy_guide(detect_proxy_port())
+            elif sub == '7': update_github_hosts(mode="resolver")
 
         elif choice == '6': # Reset
             backup_all()
@@ -0,0 +1,422 @@
+import io
+import os
+import time
+import shutil
+import hashlib
+import sqlite3
+import threading
+import contextlib
+import http.server
+import socketserver
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+USER_AGENT = "network-booster"
+COPY_CHUNK = 256 * 1024
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        size INTEGER,
+        last_access REAL,
+        pinned INTEGER DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        digest TEXT,
+        content_type TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        fetched_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)",
+    """
+    CREATE TABLE IF NOT EXISTS aliases (
+        alias TEXT PRIMARY KEY,
+        digest TEXT
+    )
+    """,
+)
+
+class CacheStore:
+    """
+    Content-addressed artifact cache under .cache/<name>.
+    Blobs live in blobs/<aa>/<sha256> and are shared by every key with the same content;
+    entries map a key (usually an upstream path) to a blob plus its HTTP validators.
+    Unpinned blobs are evicted least-recently-used first once the store exceeds max_bytes.
+    """
+
+    def __init__(self, name, max_bytes):
+        self.root = Path(".cache") / name
+        self.blob_dir = self.root / "blobs"
+        self.tmp_dir = self.root / "tmp"
+        self.db_path = self.root / "index.db"
+        self.max_bytes = max_bytes
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+        with self._connect() as conn:
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def blob_path(self, digest):
+        return self.blob_dir / digest[:2] / digest
+
+    @contextlib.contextmanager
+    def key_lock(self, key):
+        """Serializes fetches of one key, so concurrent misses download it once."""
+        with self._key_locks_lock:
+            lock, users = self._key_locks.get(key, (threading.Lock(), 0))
+            self._key_locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._key_locks_lock:
+                lock, users = self._key_locks[key]
+                if users <= 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (lock, users - 1)
+
+    def get(self, key):
+        """The entry for key as a dict (digest, path, size, content_type, etag, last_modified, fetched_at) or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT e.digest, b.size, e.content_type, e.etag, e.last_modified, e.fetched_at "
+                "FROM entries e JOIN blobs b ON b.digest = e.digest WHERE e.key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            path = self.blob_path(row[0])
+            if not path.exists():
+                conn.execute("DELETE FROM entries WHERE digest = ?", (row[0],))
+                conn.execute("DELETE FROM blobs WHERE digest = ?", (row[0],))
+                return None
+            conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), row[0]))
+        return {
+            "digest": row[0], "path": path, "size": row[1], "content_type": row[2],
+            "etag": row[3], "last_modified": row[4], "fetched_at": row[5],
+        }
+
+    def get_blob(self, digest):
+        """Path of a blob by digest (for lookups by content hash), or None."""
+        path = self.blob_path(digest)
+        return path if path.exists() else None
+
+    def add_alias(self, alias, digest):
+        """Records another name for a blob, e.g. an upstream checksum ("sha512-..." integrity)."""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO aliases (alias, digest) VALUES (?, ?)", (alias, digest))
+
+    def find_alias(self, alias):
+        """Digest of the blob known under alias, if it is still stored."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT digest FROM aliases WHERE alias = ?", (alias,)).fetchone()
+        return row[0] if row and self.get_blob(row[0]) else None
+
+    def revalidated(self, key, etag=None, last_modified=None):
+        """Marks an entry fresh again after a 304 from upstream."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE entries SET fetched_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (time.time(), etag, last_modified, key),
+            )
+
+    def put_stream(self, key, stream, content_type=None, etag=None, last_modified=None,
+                   pinned=False, expect=None, on_chunk=None):
+        """
+        Stores everything read from `stream` under key, hashing while it is written.
+        expect: optional (hashlib algorithm name, hex digest) checked before the blob is kept.
+        on_chunk(bytes) lets a caller tee the download to a client while it is stored.
+        Returns the new entry (see get).
+        """
+        sha = hashlib.sha256()
+        check = hashlib.new(expect[0]) if expect else None
+        tmp = self.tmp_dir / f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}"
+        size = 0
+        try:
+            with open(tmp, "wb") as f:
+                while True:
+                    chunk = stream.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    sha.update(chunk)
+                    if check:
+                        check.update(chunk)
+                    size += len(chunk)
+                    if on_chunk:
+                        on_chunk(chunk)
+            if check and check.hexdigest() != expect[1]:
+                raise ValueError(f"{key}: {expect[0]} 校验失败")
+            digest = sha.hexdigest()
+            final = self.blob_path(digest)
+            final.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, final)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return self._record(key, digest, size, content_type, etag, last_modified, pinned)
+
+    def put_bytes(self, key, data, **kwargs):
+        return self.put_stream(key, io.BytesIO(data), **kwargs)
+
+    def link(self, key, digest, content_type=None, etag=None, last_modified=None, pinned=False):
+        """Points key at an existing blob (dedupe by content hash without downloading). Returns the entry or None."""
+        path = self.get_blob(digest)
+        if path is None:
+            return None
+        return self._record(key, digest, path.stat().st_size, content_type, etag, last_modified, pinned)
+
+    def _record(self, key, digest, size, content_type, etag, last_modified, pinned):
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO blobs (digest, size, last_access, pinned) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access, pinned = MAX(pinned, excluded.pinned)",
+                (digest, size, now, int(pinned)),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, digest, content_type, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, digest, content_type, etag, last_modified, now),
+            )
+        self.evict()
+        return {
+            "digest": digest, "path": self.blob_path(digest), "size": size, "content_type": content_type,
+            "etag": etag, "last_modified": last_modified, "fetched_at": now,
+        }
+
+    def evict(self):
+        """Removes least recently used unpinned blobs until the store fits max_bytes. Returns bytes freed."""
+        freed = 0
+        with self._write_lock, self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            # Blobs no entry points at any more (replaced index pages) go first
+            for digest, size in conn.execute(
+                "SELECT digest, size FROM blobs WHERE pinned = 0 "
+                "ORDER BY EXISTS(SELECT 1 FROM entries e WHERE e.digest = blobs.digest), last_access"
+            ).fetchall():
+                if total - freed <= self.max_bytes:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    self.blob_path(digest).unlink()
+                conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+                conn.execute("DELETE FROM aliases WHERE digest = ?", (digest,))
+                conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                freed += size
+        return freed
+
+    def stats(self):
+        with self._connect() as conn:
+            blobs, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": entries, "blobs": blobs, "size_bytes": size, "max_bytes": self.max_bytes}
+
+# --- upstream fetching ---
+
+def open_url(url, headers=None, timeout=30, proxy=None):
+    """urlopen with the project user agent; proxy is an http://host:port URL or None for the environment default."""
+    h = {"User-Agent": USER_AGENT}
+    h.update(headers or {})
+    req = urllib.request.Request(url, headers=h)
+    if proxy:
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy, "https": proxy}))
+        return opener.open(req, timeout=timeout)
+    return urllib.request.urlopen(req, timeout=timeout)
+
+def conditional_get(url, entry=None, headers=None, timeout=30, proxy=None):
+    """
+    GET with If-None-Match / If-Modified-Since taken from a cached entry.
+    Returns the open response, or None when upstream answered 304 (the entry is still valid).
+    """
+    h = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            h["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            h["If-Modified-Since"] = entry["last_modified"]
+    try:
+        return open_url(url, h, timeout, proxy)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and entry:
+            return None
+        raise
+
+class Upstreams:
+    """
+    An ordered set of upstream base URLs, fastest first.
+    Latency is measured concurrently against probe_path and re-measured every `remeasure` seconds;
+    a failure pushes an upstream to the back until the next measurement.
+    Each upstream is (base_url, proxy URL or None); probe(upstream) -> seconds or None overrides the check.
+    """
+
+    def __init__(self, upstreams, probe_path="", remeasure=600, timeout=5, probe=None):
+        self.upstreams = list(upstreams)
+        self.probe = probe or self._probe
+        self.probe_path = probe_path
+        self.remeasure = remeasure
+        self.timeout = timeout
+        self._ranked = list(self.upstreams)
+        self._latency = {}
+        self._measured_at = 0
+        self._lock = threading.Lock()
+
+    def _probe(self, upstream):
+        base, proxy = upstream
+        started = time.perf_counter()
+        try:
+            with open_url(base.rstrip("/") + "/" + self.probe_path.lstrip("/"), timeout=self.timeout, proxy=proxy) as resp:
+                resp.read(1024)
+            return time.perf_counter() - started
+        except Exception:
+            return None
+
+    def measure(self):
+        with ThreadPoolExecutor(max_workers=len(self.upstreams) or 1) as pool:
+            results = list(pool.map(self.probe, self.upstreams))
+        latency = {u[0]: r for u, r in zip(self.upstreams, results)}
+        ranked = sorted(self.upstreams, key=lambda u: (latency[u[0]] is None, latency[u[0]] or 0))
+        with self._lock:
+            self._latency, self._ranked, self._measured_at = latency, ranked, time.monotonic()
+        return latency
+
+    def ranked(self):
+        with self._lock:
+            stale = time.monotonic() - self._measured_at > self.remeasure
+        if stale:
+            self.measure()
+        with self._lock:
+            return list(self._ranked)
+
+    def failed(self, upstream):
+        with self._lock:
+            if upstream in self._ranked:
+                self._ranked.remove(upstream)
+                self._ranked.append(upstream)
+
+    def latency(self):
+        with self._lock:
+            return dict(self._latency)
+
+# --- serving ---
+
+class CacheServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Base handler for the pull-through caches: quiet logging and helpers to answer from the store."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_bytes(self, status, body, content_type="text/plain; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_entry(self, entry, headers=None):
+        """Answers from a cached entry; the blob digest doubles as a strong ETag for clients."""
+        etag = f'"{entry["digest"]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", entry.get("content_type") or "application/octet-stream")
+        self.send_header("Content-Length", str(entry["size"]))
+        self.send_header("ETag", etag)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            with open(entry["path"], "rb") as f:
+                try:
+                    # Headers are already flushed (wfile is unbuffered), so the body can go zero-copy
+                    self.connection.sendfile(f)
+                except (AttributeError, OSError):
+                    shutil.copyfileobj(f, self.wfile, COPY_CHUNK)
+
+    def send_error_text(self, status, message):
+        self.send_bytes(status, message.encode("utf-8"))
+
+    def pull_through(self, store, key, fetch, headers=None):
+        """
+        Serves key from the store, or runs fetch(on_start, on_chunk) -> entry or None to download it.
+        Concurrent requests for the key wait for that one download; this client gets it teed
+        while it is stored. fetch calls on_start(content_length, content_type) once upstream answered,
+        and may raise KeyError when every upstream reported the key missing (answered with 404).
+        """
+        entry = store.get(key)
+        if entry is None:
+            state = {"started": False, "client_ok": True, "missing": False}
+
+            def on_start(length, content_type):
+                state["started"] = True
+                self.send_response(200)
+                self.send_header("Content-Type", content_type or "application/octet-stream")
+                if length:
+                    self.send_header("Content-Length", length)
+                else:
+                    self.send_header("Connection", "close")
+                    self.close_connection = True
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+
+            def on_chunk(chunk):
+                # A client that goes away must not abort the download other machines will want
+                if state["client_ok"] and self.command != "HEAD":
+                    try:
+                        self.wfile.write(chunk)
+                    except OSError:
+                        state["client_ok"] = False
+
+            with store.key_lock(key):
+                entry = store.get(key)
+                if entry is None:
+                    try:
+                        entry = fetch(on_start, on_chunk)
+                    except KeyError:
+                        state["missing"] = True
+                    except (OSError, ValueError):
+                        entry = None
+                    if state["started"]:
+                        if entry is None:
+                            self.close_connection = True
+                        return
+        if entry is None and state["missing"]:
+            self.send_error_text(404, "not found upstream")
+        elif entry is None:
+            self.send_error_text(502, "not available from any upstream")
+        else:
+            self.send_entry(entry, headers)
@@ -0,0 +1,229 @@
+import os
+import socket
+import struct
+import base64
+import urllib.request
+
+QTYPE_A = 1
+QTYPE_AAAA = 28
+QTYPE_CNAME = 5
+QTYPE_OPT = 41
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+RCODE_REFUSED = 5
+CLASS_IN = 1
+USER_AGENT = "network-booster"
+
+_HEADER = struct.Struct("!HHHHHH")
+_RR = struct.Struct("!HHIH")
+
+class DNSError(Exception):
+    pass
+
+def encode_name(name):
+    out = b""
+    for label in name.rstrip(".").split("."):
+        try:
+            raw = label.encode("idna")
+        except UnicodeError:
+            raw = b""
+        if not 0 < len(raw) < 64:
+            raise DNSError(f"invalid label in {name!r}")
+        out += bytes([len(raw)]) + raw
+    return out + b"\x00"
+
+def build_query(name, qtype=QTYPE_A, query_id=None):
+    """A standard recursive query for one name. Returns (query_id, wire bytes)."""
+    qid = query_id if query_id is not None else int.from_bytes(os.urandom(2), "big")
+    header = _HEADER.pack(qid, 0x0100, 1, 0, 0, 0)  # RD set
+    return qid, header + encode_name(name) + struct.pack("!HH", qtype, CLASS_IN)
+
+def _read_name(data, offset):
+    """Decodes a possibly compressed name. Returns (name, offset after the name in the original position)."""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSError("truncated name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if jumps > 32:
+                raise DNSError("compression loop")
+            pointer = struct.unpack_from("!H", data, offset)[0] & 0x3FFF
+            if end is None:
+                end = offset + 2
+            offset = pointer
+            jumps += 1
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii", errors="replace"))
+        offset += length
+    return ".".join(labels), (end if end is not None else offset)
+
+def parse_response(data, query_id=None):
+    """
+    Parses a DNS response.
+    Returns: { 'id', 'rcode', 'truncated', 'question': (name, qtype), 'answers': [{name, type, ttl, data}] }
+    A/AAAA data is the address string, CNAME data the target name, other types raw bytes.
+    """
+    if len(data) < _HEADER.size:
+        raise DNSError("short response")
+    qid, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data, 0)
+    if query_id is not None and qid != query_id:
+        raise DNSError("id mismatch")
+    offset = _HEADER.size
+    question = None
+    for _ in range(qdcount):
+        qname, offset = _read_name(data, offset)
+        qtype, _ = struct.unpack_from("!HH", data, offset)
+        offset += 4
+        question = (qname, qtype)
+    answers = []
+    for _ in range(ancount):
+        name, offset = _read_name(data, offset)
+        rtype, rclass, ttl, rdlength = _RR.unpack_from(data, offset)
+        offset += _RR.size
+        rdata = data[offset:offset + rdlength]
+        if rtype == QTYPE_A and rdlength == 4:
+            value = socket.inet_ntop(socket.AF_INET, rdata)
+        elif rtype == QTYPE_AAAA and rdlength == 16:
+            value = socket.inet_ntop(socket.AF_INET6, rdata)
+        elif rtype == QTYPE_CNAME:
+            value = _read_name(data, offset)[0]
+        else:
+            value = rdata
+        answers.append({"name": name, "type": rtype, "ttl": ttl, "data": value})
+        offset += rdlength
+    return {
+        "id": qid,
+        "rcode": flags & 0x000F,
+        "truncated": bool(flags & 0x0200),
+        "question": question,
+        "answers": answers,
+    }
+
+def _skip_question(data, offset):
+    return _read_name(data, offset)[1] + 4
+
+def question_end(data):
+    """Offset just past the question section of a message."""
+    qdcount = _HEADER.unpack_from(data, 0)[2]
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = _skip_question(data, offset)
+    return offset
+
+def read_question(data):
+    """(name, qtype) of the first question of a message."""
+    name, offset = _read_name(data, _HEADER.size)
+    if offset + 4 > len(data):
+        raise DNSError("truncated question")
+    return name, struct.unpack_from("!H", data, offset)[0]
+
+def _record_offsets(data):
+    """Yields (offset of the TTL field, rtype) for every resource record of every section."""
+    _, _, _, ancount, nscount, arcount = _HEADER.unpack_from(data, 0)
+    offset = question_end(data)
+    for _ in range(ancount + nscount + arcount):
+        offset = _read_name(data, offset)[1]
+        rtype, _, _, rdlength = _RR.unpack_from(data, offset)
+        yield offset + 4, rtype
+        offset += _RR.size + rdlength
+
+def min_ttl(data):
+    """Smallest TTL across all records (EDNS OPT excluded), or None when there are none."""
+    ttls = [struct.unpack_from("!I", data, o)[0] for o, rtype in _record_offsets(data) if rtype != QTYPE_OPT]
+    return min(ttls) if ttls else None
+
+def rewrite_response(data, query, elapsed=0):
+    """
+    Adapts a stored response to a new query: takes over the query's id and question section
+    (keeping the client's name casing) and lowers every TTL by `elapsed` seconds.
+    """
+    body = bytearray(data)
+    for offset, rtype in _record_offsets(data):
+        if rtype != QTYPE_OPT:
+            ttl = struct.unpack_from("!I", body, offset)[0]
+            struct.pack_into("!I", body, offset, max(0, ttl - int(elapsed)))
+    head_end = question_end(query)
+    return query[:2] + bytes(body[2:_HEADER.size]) + query[_HEADER.size:head_end] + bytes(body[question_end(data):])
+
+def build_response(query, records=(), rcode=0, ttl=60, truncated=False):
+    """
+    An answer to `query` built locally.
+    records: [(qtype, address)] for A/AAAA answers. `truncated` sets TC so the client retries over TCP.
+    """
+    qid, flags, qdcount = _HEADER.unpack_from(query, 0)[:3]
+    head_end = question_end(query)
+    flags = 0x8000 | 0x0080 | (flags & 0x0100) | (0x0200 if truncated else 0) | rcode
+    header = _HEADER.pack(qid, flags, qdcount, len(records), 0, 0)
+    answers = b""
+    for rtype, address in records:
+        family = socket.AF_INET6 if rtype == QTYPE_AAAA else socket.AF_INET
+        rdata = socket.inet_pton(family, address)
+        answers += b"\xc0\x0c" + _RR.pack(rtype, CLASS_IN, ttl, len(rdata)) + rdata
+    return header + query[_HEADER.size:head_end] + answers
+
+def addresses(response, qtype=QTYPE_A):
+    """[(address, ttl)] of a parsed response."""
+    return [(a["data"], a["ttl"]) for a in response["answers"] if a["type"] == qtype]
+
+def exchange_udp(server, packet, timeout=2.0, port=53):
+    """Sends a wire-format query over UDP. Returns the raw response carrying the same id."""
+    qid = struct.unpack_from("!H", packet, 0)[0]
+    family = socket.AF_INET6 if ":" in server else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(packet, (server, port))
+        while True:
+            data, _ = sock.recvfrom(65535)
+            # Ignore stray datagrams (spoofed or late answers to other queries)
+            if len(data) >= _HEADER.size and struct.unpack_from("!H", data, 0)[0] == qid:
+                return data
+
+def _recv_exact(sock, size):
+    buf = b""
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise DNSError("connection closed")
+        buf += chunk
+    return buf
+
+def read_tcp_message(sock):
+    """One length-prefixed DNS message from a stream socket."""
+    length = struct.unpack("!H", _recv_exact(sock, 2))[0]
+    return _recv_exact(sock, length)
+
+def exchange_tcp(server, packet, timeout=4.0, port=53):
+    """Sends a wire-format query over TCP (used for truncated UDP answers). Returns the raw response."""
+    with socket.create_connection((server, port), timeout=timeout) as sock:
+        sock.sendall(struct.pack("!H", len(packet)) + packet)
+        return read_tcp_message(sock)
+
+def query_udp(server, name, qtype=QTYPE_A, timeout=2.0, port=53):
+    """Asks one resolver over UDP, retrying over TCP when the answer is truncated. Returns the parsed response."""
+    qid, packet = build_query(name, qtype)
+    response = parse_response(exchange_udp(server, packet, timeout, port), qid)
+    if response["truncated"]:
+        return query_tcp(server, name, qtype, timeout, port)
+    return response
+
+def query_tcp(server, name, qtype=QTYPE_A, timeout=4.0, port=53):
+    """Asks one resolver over TCP. Returns the parsed response."""
+    qid, packet = build_query(name, qtype)
+    return parse_response(exchange_tcp(server, packet, timeout, port), qid)
+
+def query_doh(url, name, qtype=QTYPE_A, timeout=4.0):
+    """RFC 8484 DNS-over-HTTPS GET. Returns the parsed response."""
+    _, packet = build_query(name, qtype, query_id=0)  # DoH recommends id 0 for cacheability
+    dns_param = base64.urlsafe_b64encode(packet).rstrip(b"=").decode("ascii")
+    req = urllib.request.Request(
+        f"{url}?dns={dns_param}",
+        headers={"Accept": "application/dns-message", "User-Agent": USER_AGENT},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return parse_response(resp.read())
@@ -0,0 +1,125 @@
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SCAN_WORKERS = 8
+
+def _parallel_walk(root, visit, workers=SCAN_WORKERS, stop_event=None):
+    """
+    Runs visit(dir) -> (value, subdirs) over a directory tree with a thread pool.
+    Yields (dir, value) as directories finish; a parent is always yielded before its children.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(visit, root): root}
+        while pending:
+            if stop_event and stop_event.is_set():
+                for fut in pending:
+                    fut.cancel()
+                raise InterruptedError()
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path = pending.pop(fut)
+                value, subdirs = fut.result()
+                for d in subdirs:
+                    pending[pool.submit(visit, d)] = d
+                yield path, value
+
+def _scan_dir(path, seen, seen_lock):
+    """(bytes of regular files directly in path, subdirectory paths). Hard links are counted once."""
+    size = 0
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_nlink > 1:
+                    # conda hard-links package files from its pkgs cache into every env
+                    key = (st.st_dev, st.st_ino)
+                    with seen_lock:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                size += st.st_size
+    except OSError:
+        pass
+    return size, subdirs
+
+def dir_size(path, workers=SCAN_WORKERS, stop_event=None):
+    """
+    Total size in bytes of a directory tree. Subdirectories are scanned in parallel,
+    which matters for envs with tens of thousands of small files on network or HDD storage.
+    """
+    if not os.path.isdir(path):
+        return 0
+    seen, seen_lock = set(), threading.Lock()
+    visit = lambda d: _scan_dir(d, seen, seen_lock)
+    return sum(size for _, size in _parallel_walk(path, visit, workers, stop_event))
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except PermissionError:
+        # Read-only files (common in Windows site-packages) must be made writable first
+        os.chmod(path, stat.S_IWRITE)
+        os.unlink(path)
+
+def _clear_dir(path, stop_event=None):
+    """Deletes every non-directory entry of path. Returns (bytes actually freed, subdirectory paths)."""
+    freed = 0
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except FileNotFoundError:
+        return 0, []
+    for entry in entries:
+        if stop_event and stop_event.is_set():
+            break
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+                continue
+            st = entry.stat(follow_symlinks=False)
+            _unlink(entry.path)
+        except FileNotFoundError:
+            continue
+        # Removing one name of a hard-linked file frees nothing
+        if st.st_nlink <= 1:
+            freed += st.st_size
+    return freed, subdirs
+
+def remove_tree(path, workers=SCAN_WORKERS, stop_event=None, on_progress=None):
+    """
+    Parallel `shutil.rmtree`: files are unlinked by a pool of workers, directories are
+    removed bottom-up afterwards. on_progress(freed_bytes) is called as directories are cleared.
+    Stopping leaves a partially removed tree that a later call finishes.
+    Returns the number of bytes freed.
+    """
+    if not os.path.lexists(path):
+        return 0
+    if not os.path.isdir(path) or os.path.islink(path):
+        _unlink(path)
+        return 0
+
+    dirs = []
+    freed = 0
+    for d, size in _parallel_walk(path, lambda p: _clear_dir(p, stop_event), workers, stop_event):
+        dirs.append(d)
+        freed += size
+        if on_progress and size:
+            on_progress(size)
+    if stop_event and stop_event.is_set():
+        raise InterruptedError()
+    for d in reversed(dirs):
+        try:
+            os.rmdir(d)
+        except FileNotFoundError:
+            pass
+    return freed
@@ -0,0 +1,195 @@
+import json
+import time
+import threading
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .utils import Colors, echo
+from .cache_store import open_url
+
+# Candidates per ecosystem; the first entry is only used when every probe fails
+MIRRORS = {
+    "pip": {
+        "tsinghua": "https://pypi.tuna.tsinghua.edu.cn/simple",
+        "aliyun": "https://mirrors.aliyun.com/pypi/simple/",
+        "ustc": "https://mirrors.ustc.edu.cn/pypi/simple",
+        "bfsu": "https://mirrors.bfsu.edu.cn/pypi/web/simple",
+        "sjtu": "https://mirror.sjtu.edu.cn/pypi/web/simple",
+        "nju": "https://mirror.nju.edu.cn/pypi/web/simple",
+        "huawei": "https://repo.huaweicloud.com/repository/pypi/simple",
+        "tencent": "https://mirrors.cloud.tencent.com/pypi/simple",
+    },
+    "conda": {
+        "tsinghua": "https://mirrors.tuna.tsinghua.edu.cn/anaconda",
+        "ustc": "https://mirrors.ustc.edu.cn/anaconda",
+        "bfsu": "https://mirrors.bfsu.edu.cn/anaconda",
+        "sjtu": "https://mirror.sjtu.edu.cn/anaconda",
+        "nju": "https://mirror.nju.edu.cn/anaconda",
+    },
+    "npm": {
+        "taobao": "https://registry.npmmirror.com",
+        "tencent": "https://mirrors.cloud.tencent.com/npm/",
+        "huawei": "https://repo.huaweicloud.com/repository/npm/",
+    },
+    "go": {
+        "goproxy.cn": "https://goproxy.cn",
+        "aliyun": "https://mirrors.aliyun.com/goproxy/",
+        "goproxy.io": "https://goproxy.io",
+        "huawei": "https://repo.huaweicloud.com/repository/goproxy/",
+        "tencent": "https://mirrors.cloud.tencent.com/go/",
+    },
+    "docker": {
+        "daocloud": "https://docker.m.daocloud.io",
+        "huecker": "https://huecker.io",
+        "tencent": "https://mirror.ccs.tencentyun.com",
+        "dockerproxy": "https://dockerproxy.net",
+        "nju": "https://docker.nju.edu.cn",
+        "ustc": "https://docker.mirrors.ustc.edu.cn",
+        "163": "https://hub-mirror.c.163.com",
+        "baidu": "https://mirror.baidubce.com",
+    },
+}
+SCORES_PATH = Path(".cache") / "mirror_scores.json"
+PROBE_TIMEOUT = 5
+RANK_MAX_AGE = 600         # scores older than this are re-probed before a mirror is picked
+EWMA_ALPHA = 0.3           # weight of the newest probe in the rolling score
+FAILURE_SECONDS = 10.0     # a failed probe counts as this much latency
+
+_LOCK = threading.Lock()
+
+def _read(base, path, headers=None, limit=None):
+    with open_url(base.rstrip("/") + "/" + path, headers, PROBE_TIMEOUT) as resp:
+        return resp.read(limit) if limit else resp.read()
+
+# Each check fetches something the package manager really needs, not just the front page,
+# and raises when the answer is not what that ecosystem would expect.
+
+def _check_pip(base):
+    if b"pip-" not in _read(base, "pip/", {"Accept": "text/html"}):
+        raise ValueError("pip 页面不完整")
+
+def _check_conda(base):
+    if not _read(base, "pkgs/main/noarch/repodata.json", limit=1024).lstrip().startswith(b"{"):
+        raise ValueError("repodata 不是 JSON")
+
+def _check_npm(base):
+    doc = json.loads(_read(base, "is-number", {"Accept": "application/vnd.npm.install-v1+json"}))
+    if not doc.get("versions"):
+        raise ValueError("packument 不完整")
+
+def _check_go(base):
+    if json.loads(_read(base, "github.com/google/uuid/@v/v1.6.0.info")).get("Version") != "v1.6.0":
+        raise ValueError("模块信息不正确")
+
+def _check_docker(base):
+    try:
+        _read(base, "v2/", limit=1024)
+    except urllib.error.HTTPError as e:
+        # 401 with a token challenge is how a healthy registry greets anonymous clients
+        if e.code != 401:
+            raise
+
+CHECKS = {"pip": _check_pip, "conda": _check_conda, "npm": _check_npm, "go": _check_go, "docker": _check_docker}
+
+def probe(ecosystem, url):
+    """Runs the ecosystem health check once. Returns (latency seconds or None, error or None)."""
+    started = time.perf_counter()
+    try:
+        CHECKS[ecosystem](url)
+        return time.perf_counter() - started, None
+    except Exception as e:
+        return None, str(e)[:120]
+
+def load_scores():
+    try:
+        return json.loads(SCORES_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _save_scores(scores):
+    SCORES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SCORES_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(scores, indent=2), encoding="utf-8")
+    tmp.replace(SCORES_PATH)
+
+def record(ecosystem, url, latency, error=None):
+    """Folds one observation into the rolling score of url (also used by callers with their own probes)."""
+    with _LOCK:
+        scores = load_scores()
+        _update(scores, ecosystem, url, latency, error)
+        _save_scores(scores)
+
+def _update(scores, ecosystem, url, latency, error):
+    sample = FAILURE_SECONDS if latency is None else latency
+    entry = scores.setdefault(ecosystem, {}).get(url)
+    if entry is None:
+        entry = {"score": sample, "failures": 0}
+    else:
+        entry["score"] = EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * entry["score"]
+    entry["ok"] = latency is not None
+    entry["latency"] = latency
+    entry["error"] = error
+    entry["failures"] = 0 if latency is not None else entry.get("failures", 0) + 1
+    entry["checked_at"] = time.time()
+    scores[ecosystem][url] = entry
+
+def measure(ecosystems=None):
+    """Probes every candidate of the given ecosystems concurrently and updates the rolling scores."""
+    jobs = [(eco, url) for eco in (ecosystems or MIRRORS) for url in MIRRORS[eco].values()]
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 32) or 1) as pool:
+        results = list(pool.map(lambda job: probe(*job), jobs))
+    with _LOCK:
+        scores = load_scores()
+        for (eco, url), (latency, error) in zip(jobs, results):
+            _update(scores, eco, url, latency, error)
+        _save_scores(scores)
+    return scores
+
+def rank(ecosystem, max_age=RANK_MAX_AGE):
+    """
+    Candidates of one ecosystem as [{'name', 'url', 'ok', 'score', 'latency', 'error'}],
+    healthy ones first, lowest rolling score first. Re-probes when any score is older than max_age.
+    """
+    scores = load_scores().get(ecosystem, {})
+    now = time.time()
+    if any(now - scores.get(url, {}).get("checked_at", 0) > max_age for url in MIRRORS[ecosystem].values()):
+        scores = measure([ecosystem]).get(ecosystem, {})
+    ranked = []
+    for name, url in MIRRORS[ecosystem].items():
+        s = scores.get(url, {})
+        ranked.append({"name": name, "url": url, "ok": s.get("ok", False), "score": s.get("score"),
+                       "latency": s.get("latency"), "error": s.get("error")})
+    ranked.sort(key=lambda r: (not r["ok"], r["score"] if r["score"] is not None else FAILURE_SECONDS))
+    return ranked
+
+def resolve(ecosystem, source="auto"):
+    """
+    (name, url) to configure: a named catalog entry as requested, otherwise the current best.
+    When nothing passes its health check the first catalog entry is used, with a warning.
+    """
+    catalog = MIRRORS[ecosystem]
+    if source in catalog:
+        return source, catalog[source]
+    if source not in (None, "", "auto"):
+        Colors.print_warning(f"未知的 {ecosystem} 镜像 '{source}'，改为自动选择")
+    ranked = rank(ecosystem)
+    if ranked[0]["ok"]:
+        best = ranked[0]
+        echo(f"  自动选择 {ecosystem} 镜像: {best['name']} ({best['latency'] * 1000:.0f} ms, 综合 {best['score'] * 1000:.0f} ms)")
+        return best["name"], best["url"]
+    name = next(iter(catalog))
+    Colors.print_warning(f"所有 {ecosystem} 镜像检测失败，使用默认镜像 {name}")
+    return name, catalog[name]
+
+def print_ranking(ecosystems=None):
+    """Re-probes and prints the ranking of every ecosystem (`main.py --rank-mirrors`)."""
+    ecosystems = ecosystems or list(MIRRORS)
+    Colors.print_info(f"正在并发检测 {sum(len(MIRRORS[e]) for e in ecosystems)} 个镜像...")
+    measure(ecosystems)
+    for eco in ecosystems:
+        echo(f"\n[{eco}]")
+        for r in rank(eco):
+            if r["ok"]:
+                echo(f"  ✅ {r['name']:<12}{r['url']:<55}{r['latency'] * 1000:6.0f} ms  综合 {r['score'] * 1000:6.0f} ms")
+            else:
+                echo(f"  ❌ {r['name']:<12}{r['url']:<55}{r['error'] or '未检测'}")
@@ -0,0 +1,244 @@
+import re
+import time
+
+_NAME_SPLIT_RE = re.compile(r'[<>=!~;\[\s(]')
+_UNITS = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3}
+
+# pip
+_COLLECTING_RE = re.compile(r'^\s*Collecting\s+(\S+)')
+_DOWNLOADING_RE = re.compile(r'^\s*Downloading\s+(\S+)(?:\s+\(([\d.]+)\s*([kMG]?B)\))?', re.IGNORECASE)
+_CACHED_RE = re.compile(r'^\s*Using cached\s+(\S+)')
+_SATISFIED_RE = re.compile(r'^\s*Requirement already satisfied:\s*(\S+)')
+_INSTALLING_RE = re.compile(r'^\s*Installing collected packages:\s*(.+)$')
+_INSTALLED_RE = re.compile(r'^\s*Successfully installed\s+(.+)$')
+_BAR_RE = re.compile(r'([\d.]+)/([\d.]+)\s*([kMG]?B)\s+([\d.]+)\s*([kMG]?B)/s(?:\s+eta\s+(\S+))?', re.IGNORECASE)
+# `--progress-bar raw` (pip >= 24.1): the only byte counter pip still prints when stdout is a pipe
+_RAW_RE = re.compile(r'^\s*Progress\s+(\d+)\s+of\s+(\d+)\s*$')
+# conda
+_CONDA_PKG_RE = re.compile(r'^\s*(\S+)\s*\|\s*([\d.]+)\s*([kMG]?B)\s*\|[^|]*\|\s*(\d+)%', re.IGNORECASE)
+_CONDA_PHASES = (
+    ('Collecting package metadata', 'resolve', '获取元数据'),
+    ('Solving environment', 'resolve', '求解依赖'),
+    ('Downloading and Extracting Packages', 'download', '下载包'),
+    ('Preparing transaction', 'install', '准备安装'),
+    ('Verifying transaction', 'install', '校验'),
+    ('Executing transaction', 'install', '安装中'),
+)
+
+# Share of the overall bar per phase: resolve -> download -> install
+_PHASE_SPAN = {'resolve': (0, 25), 'download': (25, 80), 'install': (80, 99)}
+
+def canonical_name(requirement):
+    """'Foo_Bar>=1.0' -> 'foo-bar'"""
+    name = _NAME_SPLIT_RE.split(requirement.strip().strip('"\''), 1)[0]
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def is_raw_progress(line):
+    """True for pip's `--progress-bar raw` counter lines ('Progress N of M')."""
+    return bool(_RAW_RE.match(line))
+
+def _to_bytes(value, unit):
+    return float(value) * _UNITS.get(unit.lower(), 1)
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{int(n)} B"
+        n /= 1024.0
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+class InstallProgress:
+    """
+    Turns streamed pip/conda output into a completion estimate.
+    Feed it every output line (or `\\r` progress segment); read `percent`,
+    `rate`, `eta` and `describe()`. `percent` never goes backwards.
+    Piped pip only reports bytes with `--progress-bar raw`; without it a download
+    counts as done when the next line arrives, and no rate or ETA is claimed.
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.phase = 'resolve'
+        self.title = '解析依赖'
+        self.collected = 0
+        self.downloads = {}       # name -> [done_bytes, total_bytes]
+        self.current = None
+        self.metered = set()      # downloads whose bytes were actually reported
+        self.to_install = 0
+        self.installed = False
+        self.satisfied = set()
+        self.installed_names = set()
+        self.conda_pkgs = {}      # name -> [total_bytes, pct]
+        self.percent = 0.0
+        self.rate = 0.0           # bytes/s, smoothed
+        self.started = clock()
+        self.last_activity = self.started
+        self._last_bytes = 0.0
+        self._last_sample = self.started
+
+    # --- feeding ---
+
+    def feed(self, line):
+        line = line.rstrip()
+        if not line:
+            return False
+        before = (self.percent, self.title)
+        bytes_before = self.bytes_done
+        # A redrawn progress bar without new bytes is not activity
+        if self._parse(line) != 'bar' or self.bytes_done > bytes_before:
+            self.last_activity = self.clock()
+        self._sample_rate()
+        self._recompute()
+        return (self.percent, self.title) != before
+
+    def _parse(self, line):
+        m = _RAW_RE.match(line)
+        if m and self.current:
+            self.downloads[self.current] = [float(m.group(1)), float(m.group(2))]
+            self.metered.add(self.current)
+            return 'bar'
+
+        m = _BAR_RE.search(line)
+        if m and self.current:
+            done = _to_bytes(m.group(1), m.group(3))
+            total = _to_bytes(m.group(2), m.group(3))
+            self.downloads[self.current] = [done, total]
+            self.metered.add(self.current)
+            return 'bar'
+
+        m = _COLLECTING_RE.match(line)
+        if m:
+            self.collected += 1
+            self._enter('resolve', f'解析依赖 ({self.collected})')
+            return
+
+        m = _DOWNLOADING_RE.match(line)
+        if m:
+            self._finish_current()
+            name = m.group(1).rsplit('/', 1)[-1]
+            total = _to_bytes(m.group(2), m.group(3)) if m.group(2) else 0.0
+            self.downloads[name] = [0.0, total]
+            self.current = name
+            self._enter('download', f'下载 {name}')
+            return
+
+        m = _SATISFIED_RE.match(line)
+        if m:
+            self.satisfied.add(canonical_name(m.group(1)))
+            self._finish_current()
+            return
+
+        if _CACHED_RE.match(line):
+            self._finish_current()
+            return
+
+        m = _INSTALLING_RE.match(line)
+        if m:
+            self._finish_current()
+            self.to_install = len([p for p in m.group(1).split(',') if p.strip()])
+            self._enter('install', f'安装 {self.to_install} 个包')
+            return
+
+        m = _INSTALLED_RE.match(line)
+        if m:
+            self.installed = True
+            self.installed_names.update(canonical_name(p.rsplit('-', 1)[0]) for p in m.group(1).split())
+            self._enter('install', '安装完成')
+            return
+
+        m = _CONDA_PKG_RE.match(line)
+        if m:
+            self.conda_pkgs[m.group(1)] = [_to_bytes(m.group(2), m.group(3)), int(m.group(4))]
+            self._enter('download', '下载 Conda 包')
+            return
+
+        for marker, phase, title in _CONDA_PHASES:
+            if line.startswith(marker):
+                self._enter(phase, title)
+                return
+
+    def _enter(self, phase, title):
+        order = ('resolve', 'download', 'install')
+        # A new command (e.g. pip after conda) may restart at an earlier phase; keep the later one for the bar
+        if order.index(phase) >= order.index(self.phase):
+            self.phase = phase
+        self.title = title
+
+    def _finish_current(self):
+        if self.current and self.current in self.downloads:
+            d = self.downloads[self.current]
+            d[0] = d[1] = max(d[0], d[1])
+        self.current = None
+
+    # --- metrics ---
+
+    @property
+    def download_quiet(self):
+        """True while pip downloads a file without reporting its bytes (silence is expected then)."""
+        return self.phase == 'download' and self.current is not None and self.current not in self.metered
+
+    @property
+    def bytes_done(self):
+        pip = sum(d[0] for d in self.downloads.values())
+        conda = sum(t * pct / 100.0 for t, pct in self.conda_pkgs.values())
+        return pip + conda
+
+    @property
+    def bytes_total(self):
+        return sum(d[1] for d in self.downloads.values()) + sum(t for t, _ in self.conda_pkgs.values())
+
+    def _sample_rate(self):
+        now = self.clock()
+        elapsed = now - self._last_sample
+        if elapsed < 0.5:
+            return
+        done = self.bytes_done
+        inst = max(0.0, done - self._last_bytes) / elapsed
+        self.rate = inst if self.rate == 0 else 0.7 * self.rate + 0.3 * inst
+        self._last_bytes = done
+        self._last_sample = now
+
+    @property
+    def eta(self):
+        remaining = self.bytes_total - self.bytes_done
+        if self.rate <= 0 or remaining <= 0 or self.download_quiet:
+            return None
+        return remaining / self.rate
+
+    def _recompute(self):
+        lo, hi = _PHASE_SPAN[self.phase]
+        if self.phase == 'resolve':
+            # Package count is unknown while resolving, approach the end of the span asymptotically
+            frac = self.collected / (self.collected + 10.0)
+        elif self.phase == 'download':
+            total = self.bytes_total
+            frac = self.bytes_done / total if total else 0.0
+        else:
+            frac = 1.0 if self.installed else 0.5
+        self.percent = max(self.percent, lo + (hi - lo) * min(1.0, frac))
+
+    def stalled_for(self):
+        """Seconds since the last output line or byte progress."""
+        return self.clock() - self.last_activity
+
+    def describe(self):
+        parts = [self.title]
+        total = self.bytes_total
+        if self.download_quiet:
+            # Only completed files are known; report packages, not bytes
+            done = sum(1 for name, d in self.downloads.items() if name != self.current and d[0] >= d[1])
+            parts.append(f"已下载 {done}/{len(self.downloads)} 个文件")
+            if self.downloads[self.current][1]:
+                parts.append(f"当前文件 {format_bytes(self.downloads[self.current][1])}")
+        elif self.phase == 'download' and total:
+            parts.append(f"{format_bytes(self.bytes_done)}/{format_bytes(total)}")
+            if self.rate > 0:
+                parts.append(f"{format_bytes(self.rate)}/s")
+            eta = self.eta
+            if eta is not None:
+                parts.append(f"剩余 {format_eta(eta)}")
+        return " · ".join(parts)
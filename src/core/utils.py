@@ -5,6 +5,54 @@ import urllib.request
 import time
 import platform
 import os
+import contextlib
+import contextvars
+from .watchdog import StallError
+from .progress import is_raw_progress
+
+# Per-job output channel. Web jobs bind their logger here; the CLI falls back to sys.stdout.
+_OUTPUT = contextvars.ContextVar("output", default=None)
+
+def get_output():
+    return _OUTPUT.get() or sys.stdout
+
+@contextlib.contextmanager
+def output_to(stream):
+    """Routes echo/Colors/run_command output of the current context (thread or task) to `stream`."""
+    token = _OUTPUT.set(stream)
+    try:
+        yield stream
+    finally:
+        _OUTPUT.reset(token)
+
+def echo(*args, sep=" ", end="\n"):
+    """print() replacement that honors the context-local output channel."""
+    out = get_output()
+    out.write(sep.join(str(a) for a in args) + end)
+    if end != "\n":
+        out.flush()
+
+class ContextStdout:
+    """
+    sys.stdout stand-in that forwards writes to the context-local channel.
+    Catches bare print() calls (plugins, third-party code) without swapping
+    the process-global stdout per job.
+    """
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, s):
+        return (_OUTPUT.get() or self.fallback).write(s)
+
+    def flush(self):
+        (_OUTPUT.get() or self.fallback).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+def install_context_stdout():
+    if not isinstance(sys.stdout, ContextStdout):
+        sys.stdout = ContextStdout(sys.stdout)
 
 # ANSI color codes for terminal output
 class Colors:
@@ -19,23 +67,23 @@ class Colors:
 
     @staticmethod
     def print_header(msg):
-        print(f"\n{Colors.HEADER}{Colors.BOLD}=== {msg} ==={Colors.ENDC}")
+        echo(f"\n{Colors.HEADER}{Colors.BOLD}=== {msg} ==={Colors.ENDC}")
 
     @staticmethod
     def print_success(msg):
-        print(f"{Colors.GREEN}✔ {msg}{Colors.ENDC}")
+        echo(f"{Colors.GREEN}✔ {msg}{Colors.ENDC}")
 
     @staticmethod
     def print_info(msg):
-        print(f"{Colors.BLUE}ℹ {msg}{Colors.ENDC}")
+        echo(f"{Colors.BLUE}ℹ {msg}{Colors.ENDC}")
 
     @staticmethod
     def print_warning(msg):
-        print(f"{Colors.WARNING}⚠ {msg}{Colors.ENDC}")
+        echo(f"{Colors.WARNING}⚠ {msg}{Colors.ENDC}")
 
     @staticmethod
     def print_error(msg):
-        print(f"{Colors.FAIL}✘ {msg}{Colors.ENDC}")
+        echo(f"{Colors.FAIL}✘ {msg}{Colors.ENDC}")
 
 class ProgressBar:
     def __init__(self, total, prefix='Progress', suffix='Complete', decimals=1, length=50, fill='█'):
@@ -56,48 +104,180 @@ class ProgressBar:
         percent = ("{0:." + str(self.decimals) + "f}").format(100 * (self.iteration / float(self.total)))
         filled_length = int(self.length * self.iteration // self.total)
         bar = self.fill * filled_length + '-' * (self.length - filled_length)
-        print(f'\r{self.prefix} |{bar}| {percent}% {self.suffix}', end = '\r')
+        echo(f'\r{self.prefix} |{bar}| {percent}% {self.suffix}', end = '\r')
         if self.iteration == self.total: 
-            print()
+            echo("")
 
-def run_command(command, capture_output=True, stream_output=False, stop_event=None):
+def terminate_process(process, timeout=5):
+    """Terminates a shell=True process together with its children (pip under sh/conda run)."""
     try:
-        if stream_output:
-            # Stream output to stdout in real-time while also capturing it
-            process = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT, # Merge stderr to stdout
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                bufsize=1
-            )
-            
-            captured_output = []
-            while True:
-                if stop_event and stop_event.is_set():
-                    process.terminate()
+        if os.name != 'nt':
+            import signal
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if os.name != 'nt':
+            import signal
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+class LineSplitter:
+    """
+    Splits decoded output incrementally.
+    Returns complete lines ('\n' terminated, '\r\n' normalized) and the latest
+    '\r'-terminated segment after them, which is an in-place progress redraw.
+    """
+    def __init__(self):
+        self.pending = ""
+
+    def feed(self, text):
+        data = self.pending + text
+        lines = []
+        progress = None
+        pos = 0
+        n = len(data)
+        while pos < n:
+            nl = data.find('\n', pos)
+            cr = data.find('\r', pos)
+            if nl == -1 and cr == -1:
+                break
+            if cr != -1 and (nl == -1 or cr < nl):
+                if cr + 1 == n:
+                    break  # '\r' at the chunk edge may still turn out to be '\r\n'
+                if data[cr + 1] == '\n':
+                    lines.append(data[pos:cr] + '\n')
+                    progress = None
+                    pos = cr + 2
+                else:
+                    progress = data[pos:cr]
+                    pos = cr + 1
+            else:
+                lines.append(data[pos:nl + 1])
+                progress = None
+                pos = nl + 1
+        self.pending = data[pos:]
+        return lines, progress
+
+    def flush(self):
+        rest, self.pending = self.pending.rstrip('\r'), ""
+        return [rest + '\n'] if rest else []
+
+def _stdout_sink(lines, progress):
+    # One write per batch; progress redraws keep their '\r' so loggers can treat them as in-place updates
+    chunk = "".join(lines)
+    if progress:
+        chunk += progress + "\r"
+    if chunk:
+        out = get_output()
+        out.write(chunk)
+        out.flush()
+
+def stream_command(command, on_output=None, stop_event=None, watchdog=None, poll_interval=0.05, read_size=65536):
+    """
+    Runs a shell command and streams its merged stdout/stderr.
+    Output is read in large chunks from a non-blocking pipe (selectors; a reader
+    thread on Windows where pipes cannot be selected), decoded incrementally and
+    delivered as on_output(lines, progress) batches. stop_event is honored
+    within `poll_interval` even while the child prints nothing.
+    Returns a CompletedProcess with the captured output.
+    """
+    import codecs
+    sink = on_output or _stdout_sink
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, # Merge stderr to stdout
+        bufsize=0,
+        start_new_session=(os.name != 'nt') # own process group so cancellation reaches the children
+    )
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    splitter = LineSplitter()
+    captured = []
+    if watchdog:
+        watchdog.attach(process)
+
+    def deliver(text, final=False):
+        captured.append(text)
+        lines, progress = splitter.feed(text)
+        if final:
+            lines += splitter.flush()
+        if watchdog and (lines or progress):
+            # Whole lines only: a line split across two reads must not be parsed as two broken ones
+            watchdog.feed("".join(lines) + (progress or ""))
+        # pip's raw byte counter arrives several times a second as full lines; pass it on as an
+        # in-place redraw ('\r') so sinks track it without logging thousands of lines
+        lines = [l[:-1] + '\r' if is_raw_progress(l) else l for l in lines]
+        if lines or progress:
+            sink(lines, progress)
+
+    def check_stop():
+        if stop_event and stop_event.is_set():
+            terminate_process(process)
+            raise InterruptedError("Command stopped by user")
+
+    fd = process.stdout.fileno()
+    try:
+        if os.name != 'nt':
+            import selectors
+            os.set_blocking(fd, False)
+            with selectors.DefaultSelector() as sel:
+                sel.register(fd, selectors.EVENT_READ)
+                while True:
+                    check_stop()
+                    if not sel.select(timeout=poll_interval):
+                        continue
                     try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    raise InterruptedError("Command stopped by user")
+                        data = os.read(fd, read_size)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        break
+                    deliver(decoder.decode(data))
+        else:
+            import queue
+            import threading
+            chunks = queue.Queue()
 
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
+            def reader():
+                while True:
+                    data = process.stdout.read1(read_size) if hasattr(process.stdout, 'read1') else process.stdout.read(4096)
+                    chunks.put(data)
+                    if not data:
+                        return
+
+            threading.Thread(target=reader, daemon=True).start()
+            while True:
+                check_stop()
+                try:
+                    data = chunks.get(timeout=poll_interval)
+                except queue.Empty:
+                    continue
+                if not data:
                     break
-                if line:
-                    sys.stdout.write(line) # Stream to parent stdout (which might be captured by server)
-                    sys.stdout.flush()
-                    captured_output.append(line)
-            
-            return_code = process.poll()
-            full_output = "".join(captured_output)
-            
-            # Return a mock CompletedProcess
-            return subprocess.CompletedProcess(args=command, returncode=return_code, stdout=full_output, stderr="")
+                deliver(decoder.decode(data))
+        deliver(decoder.decode(b"", final=True), final=True)
+        return_code = process.wait()
+    finally:
+        if watchdog:
+            watchdog.detach()
+        process.stdout.close()
+
+    full_output = "".join(captured)
+    if watchdog and watchdog.tripped:
+        raise StallError(watchdog.tripped, full_output)
+    return subprocess.CompletedProcess(args=command, returncode=return_code, stdout=full_output, stderr="")
+
+def run_command(command, capture_output=True, stream_output=False, stop_event=None, watchdog=None, on_output=None):
+    try:
+        if stream_output:
+            # Stream output in real-time while also capturing it (stdout might be captured by server)
+            return stream_command(command, on_output=on_output, stop_event=stop_event, watchdog=watchdog)
             
         else:
             result = subprocess.run(
@@ -111,8 +291,10 @@ def run_command(command, capture_output=True, stream_output=False, stop_event=No
                 errors='ignore'
             )
             return result
+    except (InterruptedError, StallError):
+        raise
     except Exception as e:
-        print(f"Command execution failed: {e}")
+        echo(f"Command execution failed: {e}")
         return None
 
 def detect_proxy_port():
@@ -204,8 +386,8 @@ def recommend_config(port):
     t_mirror_str = f"{t_mirror:.0f}ms" if t_mirror != float('inf') else "超时"
     t_proxy_str = f"{t_proxy:.0f}ms" if t_proxy != float('inf') else "超时"
     
-    print(f"  - 镜像源 (直连): {t_mirror_str}")
-    print(f"  - 官方源 (代理): {t_proxy_str}")
+    echo(f"  - 镜像源 (直连): {t_mirror_str}")
+    echo(f"  - 官方源 (代理): {t_proxy_str}")
     
     if t_proxy < t_mirror:
         return 'proxy'
@@ -0,0 +1,102 @@
+import time
+import threading
+from collections import deque
+from .progress import InstallProgress
+
+class StallError(Exception):
+    """Raised by run_command when a StreamWatchdog cancelled the subprocess."""
+    def __init__(self, reason, output=""):
+        super().__init__(reason)
+        self.reason = reason
+        self.output = output
+
+class StreamWatchdog:
+    """
+    Watches a streamed install for stalls.
+    Tracks output lines and download bytes over a sliding window and
+    terminates the attached process when nothing moved for `stall_seconds`
+    or the download rate stays below `min_rate` (bytes/s) for a full window
+    of the current download (the silent resolve phase before it does not count).
+    Piped pip prints nothing while a file downloads unless it reports bytes
+    (`--progress-bar raw`), so that silence is not a stall; a dead connection
+    still ends in pip's own socket timeout and retry lines.
+    """
+    def __init__(self, stall_seconds=90, window_seconds=120, min_rate=20 * 1024, clock=time.monotonic):
+        self.stall_seconds = stall_seconds
+        self.window_seconds = window_seconds
+        self.min_rate = min_rate
+        self.clock = clock
+        self.progress = InstallProgress(clock=clock)
+        self.samples = deque()    # (ts, bytes_done, lines)
+        self.lines = 0
+        self.tripped = None
+        self.process = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def feed(self, text):
+        with self._lock:
+            for seg in text.replace('\r', '\n').split('\n'):
+                if seg.strip():
+                    self.lines += 1
+                    before = self.progress.current
+                    self.progress.feed(seg)
+                    if self.progress.current is not None and self.progress.current != before:
+                        # A new file starts a new rate window
+                        self.samples.clear()
+            self._sample()
+
+    def _sample(self):
+        now = self.clock()
+        self.samples.append((now, self.progress.bytes_done, self.lines))
+        while self.samples and now - self.samples[0][0] > self.window_seconds:
+            self.samples.popleft()
+
+    def rates(self):
+        """Returns (bytes_per_sec, lines_per_sec) over the sliding window."""
+        with self._lock:
+            if len(self.samples) < 2:
+                return 0.0, 0.0
+            (t0, b0, l0), (t1, b1, l1) = self.samples[0], self.samples[-1]
+        span = max(t1 - t0, 1e-6)
+        return (b1 - b0) / span, (l1 - l0) / span
+
+    def check(self):
+        """Returns a stall reason, or None while the stream looks healthy."""
+        with self._lock:
+            idle = self.progress.stalled_for()
+            quiet = self.progress.download_quiet
+            downloading = self.progress.phase == 'download' and self.progress.current is not None and not quiet
+            window_full = bool(self.samples) and self.clock() - self.samples[0][0] >= self.window_seconds * 0.9
+            self._sample()
+        if idle >= self.stall_seconds and not quiet:
+            return f"{int(idle)} 秒无任何进度"
+        if downloading and window_full:
+            rate, _ = self.rates()
+            if rate < self.min_rate:
+                return f"下载速度过低 ({rate / 1024:.1f} KB/s)"
+        return None
+
+    def attach(self, process):
+        """Starts monitoring `process`; it is terminated when the watchdog trips."""
+        self.process = process
+        self.progress.last_activity = self.clock()
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    def detach(self):
+        self._stop.set()
+
+    def _monitor(self):
+        while not self._stop.wait(2):
+            if self.process is None or self.process.poll() is not None:
+                return
+            reason = self.check()
+            if reason:
+                from .utils import terminate_process
+                self.tripped = reason
+                terminate_process(self.process)
+                return
+
+    def finished_packages(self):
+        """Names pip reported as already satisfied or installed so far."""
+        return set(self.progress.satisfied) | set(self.progress.installed_names)
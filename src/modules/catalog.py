@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import threading
+from ..core.utils import Colors
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: only JSON entries are read
+    tomllib = None
+
+CATALOG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "catalog"))
+USER_CATALOG_DIR = os.environ.get("NETWORK_BOOSTER_CATALOG") or os.path.join(os.path.expanduser("~"), ".network-booster", "catalog")
+ENTRY_EXTS = (".json", ".toml")
+TEMPLATE_MODULES = ("python", "node", "git", "go", "docker")
+RELOAD_CHECK_INTERVAL = 1.0
+
+class CatalogError(ValueError):
+    pass
+
+_LOCK = threading.Lock()
+_DIR_CACHE = {}     # dir -> (mtime_ns, {name: path})
+_FILE_CACHE = {}    # path -> (mtime_ns, size, groups stamp, entry or CatalogError)
+_GROUPS = None      # (stamp, groups)
+_VERSIONS = {}      # kind -> (checked_at, stamp)
+_TAGS = {}          # kind -> (stamp, {tag: [name]})
+
+def catalog_dirs():
+    """Built-in catalog first; the user catalog overrides entries and groups of the same name."""
+    return [CATALOG_DIR, USER_CATALOG_DIR]
+
+def _read(path):
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise CatalogError("需要 Python 3.11+ 才能读取 TOML 条目")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+def _list_kind_dir(path):
+    """{entry name: file path} of one catalog directory; re-listed only when the directory changes."""
+    stamp = _stat(path)
+    if stamp is None:
+        return {}
+    with _LOCK:
+        hit = _DIR_CACHE.get(path)
+    if hit and hit[0] == stamp[0]:
+        return hit[1]
+    files = {}
+    with os.scandir(path) as it:
+        for entry in it:
+            stem, ext = os.path.splitext(entry.name)
+            if ext in ENTRY_EXTS and not stem.startswith(".") and entry.is_file():
+                # JSON wins when both formats exist in one directory
+                if stem not in files or ext == ".json":
+                    files[stem] = entry.path
+    with _LOCK:
+        _DIR_CACHE[path] = (stamp[0], files)
+    return files
+
+def _entry_files(kind):
+    files = {}
+    for root in catalog_dirs():
+        files.update(_list_kind_dir(os.path.join(root, kind)))
+    return files
+
+def _groups():
+    """Shared package groups from groups.json/toml, referenced as "@name" in package lists."""
+    global _GROUPS
+    paths = [os.path.join(root, f"groups{ext}") for root in catalog_dirs() for ext in ENTRY_EXTS]
+    stamp = tuple((p, _stat(p)) for p in paths)
+    with _LOCK:
+        if _GROUPS and _GROUPS[0] == stamp:
+            return stamp, _GROUPS[1]
+    groups = {}
+    for p, st in stamp:
+        if st is None:
+            continue
+        try:
+            data = _read(p)
+        except (OSError, ValueError, CatalogError) as e:
+            Colors.print_warning(f"忽略无效的依赖分组文件 {p}: {e}")
+            continue
+        for name, pkgs in data.items():
+            if not isinstance(pkgs, list) or not all(isinstance(x, str) for x in pkgs):
+                Colors.print_warning(f"{p}: 分组 {name} 必须是字符串列表")
+                continue
+            groups[name] = tuple(pkgs)
+    with _LOCK:
+        _GROUPS = (stamp, groups)
+    return stamp, groups
+
+def _expand(pkgs, groups, field):
+    if not isinstance(pkgs, list) or not all(isinstance(x, str) for x in pkgs):
+        raise CatalogError(f"{field} 必须是字符串列表")
+    out = []
+    for pkg in pkgs:
+        items = (pkg,)
+        if pkg.startswith("@"):
+            if pkg[1:] not in groups:
+                raise CatalogError(f"{field} 引用了未定义的分组 {pkg}")
+            items = groups[pkg[1:]]
+        for item in items:
+            if item not in out:
+                out.append(item)
+    return tuple(out)
+
+def _common(name, data):
+    tags = data.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+        raise CatalogError("tags 必须是字符串列表")
+    order = data.get("order", 1000)
+    if not isinstance(order, int):
+        raise CatalogError("order 必须是整数")
+    return {"name": name, "tags": tuple(tags), "order": order}
+
+def _validate_suite(name, data, groups):
+    if not isinstance(data.get("desc"), str):
+        raise CatalogError("缺少 desc")
+    # `packages` serves both pip and conda; pip_base / conda_base override it per installer
+    shared = _expand(data["packages"], groups, "packages") if "packages" in data else None
+    pip_base = _expand(data["pip_base"], groups, "pip_base") if "pip_base" in data else shared
+    conda_base = _expand(data["conda_base"], groups, "conda_base") if "conda_base" in data else shared
+    if pip_base is None and conda_base is None:
+        raise CatalogError("至少需要 packages / pip_base / conda_base 之一")
+    if not isinstance(data.get("torch", False), bool):
+        raise CatalogError("torch 必须是 true/false")
+    return {
+        **_common(name, data),
+        "title": str(data.get("title") or data["desc"]),
+        "desc": data["desc"],
+        "pip_base": pip_base or (),
+        "conda_base": conda_base or (),
+        "torch": data.get("torch", False),
+    }
+
+def _validate_template(name, data, groups):
+    steps = data.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise CatalogError("缺少 steps")
+    parsed = []
+    for step in steps:
+        if not (isinstance(step, list) and len(step) == 2 and all(isinstance(x, str) for x in step)):
+            raise CatalogError(f"无效步骤 {step!r}，应为 [module, mode]")
+        if step[0] not in TEMPLATE_MODULES:
+            raise CatalogError(f"未知模块 {step[0]}")
+        parsed.append(tuple(step))
+    return {
+        **_common(name, data),
+        "label": str(data.get("label") or name),
+        "description": str(data.get("description") or ""),
+        "steps": tuple(parsed),
+    }
+
+KINDS = {
+    "suites": _validate_suite,
+    "templates": _validate_template,
+}
+
+def _load(kind, name, path):
+    """Parses and validates one entry file; cached until the file or the groups change."""
+    stat = _stat(path)
+    groups_stamp, groups = _groups()
+    key = (*stat, groups_stamp) if stat else None
+    with _LOCK:
+        hit = _FILE_CACHE.get(path)
+    if key and hit and hit[:3] == key:
+        result = hit[3]
+    else:
+        try:
+            data = _read(path)
+            if not isinstance(data, dict):
+                raise CatalogError("条目必须是对象")
+            result = KINDS[kind](name, data, groups)
+            result["source"] = path
+        except (OSError, ValueError) as e:
+            result = e if isinstance(e, CatalogError) else CatalogError(str(e))
+            Colors.print_warning(f"忽略无效的目录条目 {path}: {result}")
+        if key:
+            with _LOCK:
+                _FILE_CACHE[path] = (*key, result)
+    if isinstance(result, CatalogError):
+        raise result
+    return result
+
+def get_entry(kind, name):
+    """One validated entry, loaded on first use. Raises KeyError for unknown names and CatalogError for invalid files."""
+    path = _entry_files(kind).get(name)
+    if path is None:
+        raise KeyError(name)
+    return _load(kind, name, path)
+
+def list_entries(kind):
+    """All valid entries of a kind as {name: entry}, ordered by (order, name). Invalid files are skipped."""
+    entries = {}
+    for name, path in _entry_files(kind).items():
+        try:
+            entries[name] = _load(kind, name, path)
+        except CatalogError:
+            continue
+    return dict(sorted(entries.items(), key=lambda kv: (kv[1]["order"], kv[0])))
+
+def version(kind):
+    """
+    Changes whenever an entry file or group file of `kind` changes. Checked at most
+    once per RELOAD_CHECK_INTERVAL so hot paths can key caches on it.
+    """
+    now = time.monotonic()
+    with _LOCK:
+        hit = _VERSIONS.get(kind)
+    if hit and now - hit[0] < RELOAD_CHECK_INTERVAL:
+        return hit[1]
+    files = _entry_files(kind)
+    stamp = (_groups()[0], tuple(sorted((p, _stat(p)) for p in files.values())))
+    with _LOCK:
+        _VERSIONS[kind] = (now, stamp)
+    return stamp
+
+def find_by_tag(kind, tag):
+    """Names of entries carrying `tag`."""
+    stamp = version(kind)
+    with _LOCK:
+        hit = _TAGS.get(kind)
+    if not hit or hit[0] != stamp:
+        index = {}
+        for name, entry in list_entries(kind).items():
+            for t in entry["tags"]:
+                index.setdefault(t, []).append(name)
+        hit = (stamp, index)
+        with _LOCK:
+            _TAGS[kind] = hit
+    return list(hit[1].get(tag, []))
@@ -0,0 +1,254 @@
+import os
+import gzip
+import json
+import time
+import platform
+import threading
+import functools
+import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from ..core.utils import Colors, echo, detect_proxy_port
+from ..core.progress import format_bytes
+from ..core.cache_store import CacheStore, CacheServer, CacheRequestHandler, Upstreams, open_url, conditional_get
+from .python import CONDA_CHANNELS
+from .proxy_tools import get_local_ip
+
+CONDA_CACHE_PORT = 8765
+LISTEN_HOST = "0.0.0.0"
+MAX_BYTES = 30 * 1024 ** 3
+REPODATA_MAX_AGE = 1800      # served without asking upstream for this long
+REFRESH_INTERVAL = 1200      # background prefetch keeps the metadata warm
+PREFETCH_WORKERS = 8
+# Official locations of the mirrored channels, used through the proxy when mirrors fail
+OFFICIAL_CHANNELS = {
+    "pkgs/main": "https://repo.anaconda.com/pkgs/main",
+    "pkgs/free": "https://repo.anaconda.com/pkgs/free",
+    "pkgs/r": "https://repo.anaconda.com/pkgs/r",
+    "cloud/conda-forge": "https://conda.anaconda.org/conda-forge",
+    "cloud/pytorch": "https://conda.anaconda.org/pytorch",
+}
+REPODATA_FILES = ("repodata.json", "repodata.json.zst", "repodata.json.bz2", "current_repodata.json")
+
+def conda_subdir():
+    """The conda platform subdir of this machine, e.g. linux-64 or osx-arm64."""
+    system = {"Windows": "win", "Darwin": "osx"}.get(platform.system(), "linux")
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return f"{system}-arm64" if system == "osx" else f"{system}-aarch64"
+    return f"{system}-64"
+
+def channel_name(url):
+    """'https://mirrors.tuna.tsinghua.edu.cn/anaconda/cloud/conda-forge/' -> 'cloud/conda-forge'."""
+    path = urllib.parse.urlsplit(url).path.strip("/")
+    return path.split("anaconda/", 1)[1] if "anaconda/" in path else "/".join(path.split("/")[-2:])
+
+def local_channel_url(url):
+    base = os.environ.get("NETWORK_BOOSTER_CONDA_CACHE") or f"http://127.0.0.1:{CONDA_CACHE_PORT}"
+    return f"{base.rstrip('/')}/{channel_name(url)}/"
+
+def trim_repodata(data):
+    """Drops .tar.bz2 records that have a .conda twin; conda prefers .conda, so solving is unaffected."""
+    doc = json.loads(data)
+    conda_stems = {name[:-len(".conda")] for name in doc.get("packages.conda", {})}
+    packages = doc.get("packages", {})
+    doc["packages"] = {k: v for k, v in packages.items() if k[:-len(".tar.bz2")] not in conda_stems}
+    return json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
+class CondaCache:
+    def __init__(self, channels=CONDA_CHANNELS, upstream_port=None, max_bytes=MAX_BYTES, trim=False, subdirs=None):
+        self.store = CacheStore("conda", max_bytes)
+        self.trim = trim
+        self.subdirs = subdirs or (conda_subdir(), "noarch")
+        proxy = f"http://127.0.0.1:{upstream_port}" if upstream_port else None
+        self.channels = {}
+        for url in channels:
+            name = channel_name(url)
+            candidates = [(url.rstrip("/"), None)]
+            if proxy and name in OFFICIAL_CHANNELS:
+                candidates.append((OFFICIAL_CHANNELS[name], proxy))
+            self.channels[name] = Upstreams(candidates, probe_path="noarch/repodata.json.zst")
+        self.last_prefetch = None
+
+    def split(self, path):
+        """'/cloud/conda-forge/linux-64/x.conda' -> ('cloud/conda-forge', 'linux-64/x.conda')."""
+        path = path.strip("/")
+        for name in sorted(self.channels, key=len, reverse=True):
+            if path.startswith(name + "/"):
+                return name, path[len(name) + 1:]
+        return None, None
+
+    def repodata(self, channel, rest, force=False):
+        """
+        Returns (entry, encoding) for a repodata file, revalidating it upstream when older than
+        REPODATA_MAX_AGE (or always with force). Plain JSON is stored gzip-encoded.
+        Raises KeyError when upstream does not offer the file.
+        """
+        filename = rest.rsplit("/", 1)[-1]
+        if self.trim and filename != "repodata.json":
+            # Trimmed metadata only exists as JSON; conda falls back to it
+            raise KeyError(rest)
+        gzipped = filename.endswith(".json")
+        key = f"repodata/{channel}/{rest}" + ("@trim" if self.trim else "")
+        entry = self.store.get(key)
+        if entry and not force and time.time() - entry["fetched_at"] < REPODATA_MAX_AGE:
+            return entry, "gzip" if gzipped else None
+        with self.store.key_lock(key):
+            entry = self.store.get(key)
+            if entry and not force and time.time() - entry["fetched_at"] < REPODATA_MAX_AGE:
+                return entry, "gzip" if gzipped else None
+            upstreams = self.channels[channel]
+            ranked = upstreams.ranked()
+            missing = 0
+            for upstream in ranked:
+                base, proxy = upstream
+                headers = {"Accept-Encoding": "gzip"} if gzipped else {}
+                try:
+                    resp = conditional_get(f"{base}/{rest}", entry, headers, timeout=120, proxy=proxy)
+                    if resp is None:
+                        self.store.revalidated(key)
+                        return self.store.get(key), "gzip" if gzipped else None
+                    with resp:
+                        validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+                        if gzipped and (self.trim or resp.headers.get("Content-Encoding") != "gzip"):
+                            body = resp.read()
+                            if resp.headers.get("Content-Encoding") == "gzip":
+                                body = gzip.decompress(body)
+                            if self.trim:
+                                body = trim_repodata(body)
+                            entry = self.store.put_bytes(key, gzip.compress(body, 6), content_type="application/json", **validators)
+                        else:
+                            entry = self.store.put_stream(key, resp, content_type="application/octet-stream"
+                                                          if not gzipped else "application/json", **validators)
+                    return entry, "gzip" if gzipped else None
+                except urllib.error.HTTPError as e:
+                    if e.code == 404:
+                        missing += 1
+                    else:
+                        upstreams.failed(upstream)
+                except (OSError, ValueError, EOFError):
+                    upstreams.failed(upstream)
+            if missing == len(ranked):
+                raise KeyError(rest)
+            return entry, "gzip" if gzipped else None
+
+    def package(self, channel, rest, on_start, on_chunk):
+        """Downloads a package file (immutable) from the fastest upstream of its channel."""
+        upstreams = self.channels[channel]
+        for upstream in upstreams.ranked():
+            base, proxy = upstream
+            try:
+                resp = open_url(f"{base}/{rest}", timeout=120, proxy=proxy)
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    upstreams.failed(upstream)
+                continue
+            except OSError:
+                upstreams.failed(upstream)
+                continue
+            with resp:
+                on_start(resp.headers.get("Content-Length"), "application/octet-stream")
+                return self.store.put_stream(f"pkg/{channel}/{rest}", resp, on_chunk=on_chunk)
+        return None
+
+    def prefetch(self):
+        """
+        Revalidates the repodata of every channel and subdir in parallel (conditional GETs, so
+        unchanged files cost one round trip). Returns {path: 'ok' | 'missing' | error}.
+        """
+        files = ("repodata.json",) if self.trim else ("repodata.json.zst", "repodata.json")
+        jobs = [(ch, f"{sub}/{fn}") for ch in self.channels for sub in self.subdirs for fn in files]
+
+        def run(job):
+            try:
+                entry, _ = self.repodata(*job, force=True)
+                return "ok" if entry else "failed"
+            except KeyError:
+                return "missing"
+            except Exception as e:
+                return str(e)[:80]
+
+        with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as pool:
+            results = dict(zip((f"{ch}/{rest}" for ch, rest in jobs), pool.map(run, jobs)))
+        self.last_prefetch = time.time()
+        return results
+
+    def refresh_loop(self, stop_event):
+        while not stop_event.wait(REFRESH_INTERVAL):
+            self.prefetch()
+
+class _Handler(CacheRequestHandler):
+    cache = None
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if path == "/_stats":
+            body = json.dumps({"store": self.cache.store.stats(), "last_prefetch": self.cache.last_prefetch,
+                               "upstreams": {ch: u.latency() for ch, u in self.cache.channels.items()}})
+            self.send_bytes(200, body.encode("utf-8"), "application/json")
+            return
+        channel, rest = self.cache.split(path)
+        if channel is None or not rest:
+            self.send_error_text(404, "unknown channel")
+        elif rest.rsplit("/", 1)[-1] in REPODATA_FILES:
+            self._repodata(channel, rest)
+        else:
+            self.pull_through(self.cache.store, f"pkg/{channel}/{rest}",
+                              functools.partial(self.cache.package, channel, rest))
+
+    do_HEAD = do_GET
+
+    def _repodata(self, channel, rest):
+        try:
+            entry, encoding = self.cache.repodata(channel, rest)
+        except KeyError:
+            self.send_error_text(404, "not offered by upstream")
+            return
+        if entry is None:
+            self.send_error_text(502, "all upstreams failed")
+            return
+        headers = {"Cache-Control": f"public, max-age={REPODATA_MAX_AGE // 30}"}
+        if encoding == "gzip" and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            headers["Content-Encoding"] = "gzip"
+            self.send_entry(entry, headers)
+        elif encoding == "gzip":
+            with open(entry["path"], "rb") as f:
+                self.send_bytes(200, gzip.decompress(f.read()), "application/json", headers)
+        else:
+            self.send_entry(entry, headers)
+
+def start_conda_cache(port=CONDA_CACHE_PORT, upstream_port=None, max_bytes=MAX_BYTES, trim=False, host=LISTEN_HOST):
+    """Creates the cache server (not yet serving). Returns (server, CondaCache)."""
+    cache = CondaCache(CONDA_CHANNELS, upstream_port, max_bytes, trim)
+    handler = type("CondaCacheHandler", (_Handler,), {"cache": cache})
+    return CacheServer((host, port), handler), cache
+
+def run_conda_cache(port=CONDA_CACHE_PORT, max_gb=None, trim=False):
+    """Foreground entry point for `main.py --conda-cache`."""
+    upstream_port = detect_proxy_port()
+    max_bytes = int(max_gb * 1024 ** 3) if max_gb else MAX_BYTES
+    try:
+        server, cache = start_conda_cache(port, upstream_port, max_bytes, trim)
+    except OSError as e:
+        Colors.print_error(f"Conda 缓存启动失败: {e}")
+        return
+    Colors.print_info(f"正在并行预取 {len(cache.channels)} 个频道的 repodata ({', '.join(cache.subdirs)})...")
+    started = time.time()
+    for path, status in cache.prefetch().items():
+        if status == "ok":
+            echo(f"  ✅ {path}")
+        elif status != "missing":
+            echo(f"  ❌ {path}: {status}")
+    stats = cache.store.stats()
+    Colors.print_success(f"Conda 缓存已启动: http://{get_local_ip()}:{port}/ (预取耗时 {time.time() - started:.1f}s)")
+    Colors.print_info(f"缓存目录: {cache.store.root} ({format_bytes(stats['size_bytes'])} / {format_bytes(max_bytes)})")
+    Colors.print_info("本机使用: python main.py --conda-mirror local")
+    Colors.print_info(f"其他机器: 设置环境变量 NETWORK_BOOSTER_CONDA_CACHE=http://{get_local_ip()}:{port} 后运行同一命令")
+    stop_event = threading.Event()
+    threading.Thread(target=cache.refresh_loop, args=(stop_event,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        stop_event.set()
+        server.server_close()
+        Colors.print_info("Conda 缓存已停止")
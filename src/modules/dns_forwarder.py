@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import platform
+import threading
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from pathlib import Path
+from src.core.utils import Colors, echo
+from src.core import dns
+
+LISTEN_HOST = "127.0.0.1"
+DEFAULT_PORT = 53
+FALLBACK_PORT = 5533     # unprivileged; 5353 would collide with mDNS (Avahi / Bonjour)
+UPSTREAMS = ("223.5.5.5", "119.29.29.29", "114.114.114.114", "8.8.8.8", "1.1.1.1")
+UPSTREAM_TIMEOUT = 2.0
+# Suffixes answered from the cache; everything else is forwarded without caching
+DEV_DOMAINS = (
+    "github.com", "githubusercontent.com", "githubassets.com", "github.io",
+    "pypi.org", "pythonhosted.org", "tsinghua.edu.cn", "aliyun.com",
+    "npmjs.org", "npmjs.com", "npmmirror.com", "yarnpkg.com",
+    "docker.io", "docker.com", "gcr.io", "ghcr.io", "quay.io",
+    "anaconda.org", "anaconda.com", "conda.io",
+    "golang.org", "go.dev", "goproxy.cn", "proxy.golang.org",
+    "pytorch.org", "huggingface.co",
+)
+CACHE_SIZE = 4096
+MIN_TTL = 30          # floor, so chatty tools do not hammer upstreams for TTL=0 records
+MAX_TTL = 3600
+NEGATIVE_TTL = 60
+OVERRIDES_PATH = Path(os.path.expanduser("~")) / ".network-booster" / "dns_overrides.json"
+PIN_TTL = 300
+
+def is_dev_domain(name):
+    name = name.lower().rstrip(".")
+    return any(name == d or name.endswith("." + d) for d in DEV_DOMAINS)
+
+class TTLCache:
+    """LRU of raw responses keyed by (name, qtype); entries expire with the smallest record TTL."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._data = OrderedDict()  # key -> (stored_at, expires_at, response bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return now - item[0], item[2]
+
+    def put(self, key, response, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now, now + ttl, response)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+# --- overrides (the hosts-block equivalent) ---
+
+_OVERRIDES = (None, {})  # (mtime_ns, {name: [ip]})
+_OVERRIDES_LOCK = threading.Lock()
+
+def load_overrides():
+    """{hostname: [ip]} from OVERRIDES_PATH, re-read whenever the file changes."""
+    global _OVERRIDES
+    try:
+        mtime = os.stat(OVERRIDES_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    with _OVERRIDES_LOCK:
+        if _OVERRIDES[0] == mtime:
+            return _OVERRIDES[1]
+    try:
+        with open(OVERRIDES_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        mapping = {k.lower().rstrip("."): (v if isinstance(v, list) else [v]) for k, v in data.items()}
+    except (OSError, ValueError, AttributeError) as e:
+        Colors.print_warning(f"忽略无效的 DNS 覆盖文件 {OVERRIDES_PATH}: {e}")
+        mapping = {}
+    with _OVERRIDES_LOCK:
+        _OVERRIDES = (mtime, mapping)
+    return mapping
+
+def save_overrides(mapping):
+    OVERRIDES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = OVERRIDES_PATH.with_name(OVERRIDES_PATH.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(mapping, f, indent=2, sort_keys=True)
+    os.replace(tmp, OVERRIDES_PATH)
+
+def pin_github():
+    """Pins the fastest TLS-verified GitHub IPs (see hosts_resolver) as overrides."""
+    from src.modules.hosts_resolver import resolve_fastest
+    entries, _ = resolve_fastest()
+    if not entries:
+        Colors.print_error("没有任何候选 IP 通过 TLS 校验，覆盖未更新")
+        return False
+    mapping = dict(load_overrides())
+    mapping.update({host: [ip] for host, ip in entries})
+    save_overrides(mapping)
+    Colors.print_success(f"已固定 {len(entries)} 个 GitHub 域名的解析结果: {OVERRIDES_PATH}")
+    return True
+
+# --- resolution ---
+
+class Forwarder:
+    def __init__(self, upstreams=UPSTREAMS, cache_size=CACHE_SIZE):
+        self.upstreams = tuple(upstreams)
+        self.cache = TTLCache(cache_size)
+        self._pool = ThreadPoolExecutor(max_workers=max(8, len(self.upstreams) * 4))
+
+    def _ask(self, server, packet):
+        data = dns.exchange_udp(server, packet, UPSTREAM_TIMEOUT)
+        if data[3] & 0x0F in (dns.RCODE_SERVFAIL, dns.RCODE_REFUSED):
+            raise dns.DNSError(f"{server} rcode {data[3] & 0x0F}")
+        if data[2] & 0x02:  # TC: the full answer needs TCP
+            data = dns.exchange_tcp(server, packet, UPSTREAM_TIMEOUT)
+        return data
+
+    def forward(self, packet):
+        """Races all upstreams and returns the first usable raw response."""
+        futures = [self._pool.submit(self._ask, s, packet) for s in self.upstreams]
+        try:
+            for fut in as_completed(futures, timeout=UPSTREAM_TIMEOUT + 0.5):
+                try:
+                    return fut.result()
+                except (OSError, dns.DNSError):
+                    continue
+        except FuturesTimeout:
+            pass
+        finally:
+            for fut in futures:
+                fut.cancel()
+        return None
+
+    def resolve(self, query):
+        """Answers one wire-format query. Returns response bytes."""
+        try:
+            name, qtype = dns.read_question(query)
+        except (dns.DNSError, IndexError, ValueError):
+            return None
+        name = name.lower().rstrip(".")
+
+        pinned = load_overrides().get(name)
+        if pinned and qtype in (dns.QTYPE_A, dns.QTYPE_AAAA):
+            want = dns.QTYPE_AAAA if qtype == dns.QTYPE_AAAA else dns.QTYPE_A
+            records = [(want, ip) for ip in pinned if (":" in ip) == (want == dns.QTYPE_AAAA)]
+            return dns.build_response(query, records, ttl=PIN_TTL)
+
+        cacheable = is_dev_domain(name)
+        key = (name, qtype)
+        if cacheable:
+            hit = self.cache.get(key)
+            if hit:
+                elapsed, stored = hit
+                return dns.rewrite_response(stored, query, elapsed)
+
+        response = self.forward(query)
+        if response is None:
+            return dns.build_response(query, rcode=dns.RCODE_SERVFAIL)
+        if cacheable:
+            try:
+                ttl = dns.min_ttl(response)
+                if ttl is None or response[3] & 0x0F == dns.RCODE_NXDOMAIN:
+                    ttl = NEGATIVE_TTL
+                self.cache.put(key, response, min(max(ttl, MIN_TTL), MAX_TTL))
+            except (dns.DNSError, IndexError, ValueError):
+                pass
+        return response
+
+class _UDPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        response = self.server.forwarder.resolve(data)
+        if response is None:
+            return
+        if len(response) > 512 and data[10:12] == b"\x00\x00":
+            # Clients without EDNS (no additional records) only accept 512 bytes over UDP
+            response = dns.build_response(data, truncated=True)
+        sock.sendto(response, self.client_address)
+
+class _TCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.settimeout(10)
+        while True:
+            try:
+                query = dns.read_tcp_message(self.request)
+            except (OSError, dns.DNSError):
+                return
+            response = self.server.forwarder.resolve(query)
+            if response is None:
+                return
+            self.request.sendall(len(response).to_bytes(2, "big") + response)
+
+class _UDPServer(socketserver.ThreadingMixIn, socketserver.UDPServer):
+    daemon_threads = True
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_dns_forwarder(port=None, host=LISTEN_HOST, upstreams=UPSTREAMS):
+    """
+    Starts the UDP and TCP listeners in background threads.
+    Port 53 needs root/admin; without it the forwarder falls back to FALLBACK_PORT.
+    Returns (forwarder, [servers]).
+    """
+    forwarder = Forwarder(upstreams)
+    ports = [port] if port else [DEFAULT_PORT, FALLBACK_PORT]
+    last_error = None
+    for p in ports:
+        try:
+            udp = _UDPServer((host, p), _UDPHandler)
+        except OSError as e:
+            last_error = e
+            continue
+        try:
+            tcp = _TCPServer((host, p), _TCPHandler)
+        except OSError as e:
+            udp.server_close()
+            last_error = e
+            continue
+        servers = [udp, tcp]
+        for server in servers:
+            server.forwarder = forwarder
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return forwarder, servers
+    raise OSError(f"无法监听 DNS 端口 {ports}: {last_error}")
+
+def resolver_config(host, port, system=None):
+    """
+    The lines that point this machine's resolver at the forwarder: [(where, line), ...].
+    Only systemd-resolved and macOS per-domain resolvers accept a port other than 53.
+    """
+    system = system or platform.system()
+    if system == "Linux":
+        if port == DEFAULT_PORT:
+            return [("/etc/resolv.conf", f"nameserver {host}")]
+        return [("/etc/systemd/resolved.conf 的 [Resolve] 段 (systemd 246+，改完 systemctl restart systemd-resolved)",
+                 f"DNS={host}:{port}")]
+    if system == "Darwin":
+        if port == DEFAULT_PORT:
+            return [("终端", f"networksetup -setdnsservers Wi-Fi {host}")]
+        # One file per domain; only these names go to the forwarder
+        return [(f"/etc/resolver/{domain}", f"nameserver {host}\nport {port}") for domain in ("github.com", "githubusercontent.com")]
+    if port == DEFAULT_PORT:
+        return [("管理员终端", f'netsh interface ip set dns name="以太网" static {host}')]
+    return []
+
+def run_dns_forwarder(port=None):
+    """Foreground entry point for `main.py --dns`."""
+    try:
+        forwarder, servers = start_dns_forwarder(port)
+    except OSError as e:
+        Colors.print_error(str(e))
+        return
+    host, bound = servers[0].server_address[:2]
+    Colors.print_success(f"本地 DNS 转发已启动: {host}:{bound} (UDP/TCP)")
+    Colors.print_info(f"上游 (并发竞速): {', '.join(forwarder.upstreams)}")
+    config = resolver_config(host, bound)
+    if bound != DEFAULT_PORT and not port:
+        Colors.print_warning(f"未能监听 53 端口，改用 {bound}；系统级使用请以管理员/root 身份运行")
+    if config:
+        Colors.print_info("将系统解析指向本转发器:")
+        for where, line in config:
+            echo(f"  {where}:")
+            for part in line.split("\n"):
+                echo(f"    {part}")
+    else:
+        Colors.print_warning("当前系统的 DNS 设置不支持非 53 端口，只有能指定端口的工具可以使用")
+    Colors.print_info(f"验证: nslookup -port={bound} github.com {host}")
+    Colors.print_info(f"固定解析 (覆盖): {OVERRIDES_PATH}")
+    try:
+        while True:
+            time.sleep(60)
+            s = forwarder.cache.stats()
+            Colors.print_info(f"缓存条目 {s['entries']}，命中 {s['hits']}，未命中 {s['misses']}")
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        Colors.print_info("DNS 转发已停止")
@@ -1,8 +1,18 @@
 import json
 import os
+import time
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from ..core.utils import Colors
+from ..core.utils import Colors, echo
+from ..core.mirrors import MIRRORS, record
+from .registry_cache import registry_request, local_registry_url, MANIFEST_ACCEPT
+
+# Public mirrors in China come and go; every candidate is probed before it is written
+DOCKER_MIRRORS = list(MIRRORS["docker"].values())
+SAMPLE_IMAGE = "library/alpine"
+SAMPLE_BYTES = 1024 * 1024
+PROBE_TIMEOUT = 8
 
 def get_docker_config_path():
     if platform.system() == "Windows":
@@ -11,23 +21,84 @@ def get_docker_config_path():
         return Path("/etc/docker/daemon.json")
     return None
 
-def set_docker_mirror(source="aliyun"):
-    """Configures Docker registry mirrors."""
-    # Note: This is complex because mirrors often require authentication or are private.
-    # We will use some well-known public mirrors.
-    mirrors = [
-        "https://docker.m.daocloud.io",
-        "https://huecker.io",
-        "https://mirror.ccs.tencentyun.com"
-    ]
-    
+def _pick_platform_manifest(index):
+    for m in index.get("manifests", []):
+        plat = m.get("platform") or {}
+        if plat.get("os") == "linux" and plat.get("architecture") in ("amd64", "arm64"):
+            return m["digest"]
+    return index["manifests"][0]["digest"]
+
+def probe_mirror(url, timeout=PROBE_TIMEOUT):
+    """
+    Checks one mirror the way `docker pull` uses it: /v2/, a manifest of SAMPLE_IMAGE,
+    then the first SAMPLE_BYTES of a layer for throughput.
+    Returns { 'url', 'ok', 'latency' (s), 'throughput' (bytes/s), 'score', 'error' }.
+    """
+    result = {"url": url, "ok": False, "latency": None, "throughput": None, "score": None, "error": None}
+    try:
+        started = time.perf_counter()
+        with registry_request(url, "/v2/", timeout=timeout) as resp:
+            resp.read()
+        with registry_request(url, f"/v2/{SAMPLE_IMAGE}/manifests/latest", MANIFEST_ACCEPT, timeout=timeout) as resp:
+            manifest = json.load(resp)
+        result["latency"] = time.perf_counter() - started
+        if "manifests" in manifest:
+            digest = _pick_platform_manifest(manifest)
+            with registry_request(url, f"/v2/{SAMPLE_IMAGE}/manifests/{digest}", MANIFEST_ACCEPT, timeout=timeout) as resp:
+                manifest = json.load(resp)
+        layer = manifest["layers"][0]["digest"]
+        started = time.perf_counter()
+        received = 0
+        with registry_request(url, f"/v2/{SAMPLE_IMAGE}/blobs/{layer}", timeout=timeout) as resp:
+            while received < SAMPLE_BYTES:
+                chunk = resp.read(64 * 1024)
+                if not chunk:
+                    break
+                received += len(chunk)
+        elapsed = max(time.perf_counter() - started, 1e-3)
+        result["throughput"] = received / elapsed
+        # Time to fetch a manifest plus one sample-sized layer: what a small pull would feel like
+        result["score"] = result["latency"] + SAMPLE_BYTES / result["throughput"]
+        result["ok"] = received > 0
+    except Exception as e:
+        result["error"] = str(e)[:120]
+    return result
+
+def rank_docker_mirrors(mirrors=None):
+    """Probes all mirrors concurrently. Returns the results, healthy mirrors first, best score first."""
+    mirrors = mirrors or DOCKER_MIRRORS
+    Colors.print_info(f"正在并发检测 {len(mirrors)} 个 Docker 镜像源 (/v2/ + manifest + 分层下载)...")
+    with ThreadPoolExecutor(max_workers=len(mirrors)) as pool:
+        results = list(pool.map(probe_mirror, mirrors))
+    results.sort(key=lambda r: (not r["ok"], r["score"] or 0))
+    for r in results:
+        # The pull probe is stricter than the catalog's /v2/ check; keep the rolling score in step
+        record("docker", r["url"], r["score"] if r["ok"] else None, r["error"])
+        if r["ok"]:
+            echo(f"  ✅ {r['url']:<40}{r['latency'] * 1000:6.0f} ms  {r['throughput'] / 1024 / 1024:6.2f} MB/s")
+        else:
+            echo(f"  ❌ {r['url']:<40}{r['error']}")
+    return results
+
+def set_docker_mirror(source="auto"):
+    """
+    Configures Docker registry mirrors with only the mirrors that currently work, best first.
+    source "local" puts the local registry cache (registry_cache) in front of them.
+    """
     config_path = get_docker_config_path()
     if not config_path:
         Colors.print_warning("不支持的操作系统或找不到 Docker 配置文件路径")
         return
 
+    mirrors = [r["url"] for r in rank_docker_mirrors() if r["ok"]]
+    if source == "local":
+        mirrors.insert(0, local_registry_url())
+    if not mirrors:
+        Colors.print_error("没有检测到可用的 Docker 镜像源，保持原有配置不变")
+        return
+
     Colors.print_info(f"正在配置 Docker 镜像源...")
-    
+
     try:
         data = {}
         if config_path.exists():
@@ -36,25 +107,25 @@ def set_docker_mirror(source="aliyun"):
                     data = json.load(f)
             except json.JSONDecodeError:
                 pass
-        
+
         data["registry-mirrors"] = mirrors
-        
+
         # Ensure directory exists (for Windows user config)
         if platform.system() == "Windows":
              config_path.parent.mkdir(parents=True, exist_ok=True)
-             
+
         # On Linux, this usually requires sudo, which we can't easily do from python script without escalation.
         # So we just print instructions for Linux if not root.
         if platform.system() == "Linux" and os.geteuid() != 0:
             Colors.print_warning("Linux 下修改 Docker 配置需要 root 权限。请手动将以下内容写入 /etc/docker/daemon.json:")
-            print(json.dumps(data, indent=4))
+            echo(json.dumps(data, indent=4))
             return
 
         with open(config_path, 'w') as f:
             json.dump(data, f, indent=4)
-            
+
         Colors.print_success(f"Docker 镜像配置已更新: {config_path}")
         Colors.print_info("请重启 Docker 服务以生效 (Windows: 重启 Docker Desktop; Linux: sudo systemctl restart docker)")
-        
+
     except Exception as e:
         Colors.print_error(f"Docker 配置失败: {str(e)}")
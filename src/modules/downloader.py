@@ -0,0 +1,266 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import sysconfig
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ..core.utils import Colors, echo
+
+WHEEL_CACHE_DIR = Path(".cache") / "wheels"
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_WORKERS = 4
+LARGE_FILE_THRESHOLD = 50 * 1024 * 1024
+USER_AGENT = "network-booster"
+
+_HREF_RE = re.compile(r'<a\s+[^>]*href="([^"]+)"[^>]*>([^<]+)</a>', re.IGNORECASE)
+_WHEEL_RE = re.compile(
+    r"^(?P<name>[^-]+)-(?P<version>[^-]+)(?:-\d[^-]*)?-(?P<py>[^-]+)-(?P<abi>[^-]+)-(?P<plat>[^-]+)\.whl$"
+)
+
+def _canonical_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def _version_key(version):
+    # Local versions ("2.3.0+cu121") compare by their public part first
+    public, _, local = version.partition("+")
+    parts = []
+    for piece in re.split(r"[.\-]", public):
+        if piece.isdigit():
+            parts.append((1, int(piece), ""))
+        else:
+            parts.append((0, 0, piece))
+    return (tuple(parts), local)
+
+def _platform_tags():
+    """Returns the wheel platform tag patterns for the running interpreter."""
+    plat = sysconfig.get_platform().replace("-", "_").replace(".", "_")
+    if plat.startswith("linux_"):
+        arch = plat[len("linux_"):]
+        return [re.compile(rf"^(manylinux\w*|musllinux\w*|linux)_{arch}$")]
+    if plat.startswith("macosx_"):
+        arch = plat.rsplit("_", 1)[-1]
+        arches = {arch, "universal2"} if arch in ("arm64", "x86_64") else {arch}
+        return [re.compile(rf"^macosx_\d+_\d+_({'|'.join(sorted(arches))})$")]
+    return [re.compile(rf"^{re.escape(plat)}$")]
+
+def is_compatible_wheel(filename):
+    m = _WHEEL_RE.match(filename)
+    if not m:
+        return False
+    py_tag = f"cp{sys.version_info.major}{sys.version_info.minor}"
+    py_ok = any(t in (py_tag, f"py{sys.version_info.major}", "py2.py3") for t in m.group("py").split("."))
+    if not py_ok:
+        return False
+    plats = m.group("plat").split(".")
+    if "any" in plats:
+        return True
+    return any(p.match(pl) for p in _platform_tags() for pl in plats)
+
+def find_wheel(index_url, project):
+    """
+    Looks up the newest compatible wheel of `project` on a PEP 503 simple index.
+    Returns: { 'url', 'filename', 'sha256', 'version' } or None
+    """
+    page_url = index_url.rstrip("/") + "/" + _canonical_name(project) + "/"
+    req = urllib.request.Request(page_url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=15) as resp:
+        html = resp.read().decode("utf-8", errors="ignore")
+
+    candidates = []
+    for href, text in _HREF_RE.findall(html):
+        filename = text.strip()
+        if not filename.endswith(".whl") or not is_compatible_wheel(filename):
+            continue
+        url, _, fragment = urllib.parse.urljoin(page_url, href.replace("&amp;", "&")).partition("#")
+        sha256 = None
+        if fragment.startswith("sha256="):
+            sha256 = fragment[len("sha256="):]
+        version = _WHEEL_RE.match(filename).group("version")
+        candidates.append({"url": url, "filename": filename, "sha256": sha256, "version": version})
+
+    if not candidates:
+        return None
+    return max(candidates, key=lambda c: _version_key(c["version"]))
+
+class ChunkedDownloader:
+    """
+    Downloads a file with parallel HTTP range requests.
+    Finished chunks are recorded in a `<file>.state.json` next to the `.part`
+    file so an interrupted download resumes where it stopped.
+    """
+    def __init__(self, url, dest, sha256=None, chunk_size=CHUNK_SIZE, workers=MAX_WORKERS, stop_event=None):
+        self.url = url
+        self.dest = Path(dest)
+        self.sha256 = sha256
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.stop_event = stop_event
+        self.part_path = self.dest.with_name(self.dest.name + ".part")
+        self.state_path = self.dest.with_name(self.dest.name + ".state.json")
+        self.state_lock = threading.Lock()
+        self.total = 0
+        self.done_chunks = set()
+        self.downloaded = 0
+
+    def _request(self, headers=None, method="GET"):
+        h = {"User-Agent": USER_AGENT}
+        h.update(headers or {})
+        req = urllib.request.Request(self.url, headers=h, method=method)
+        return urllib.request.urlopen(req, timeout=30)
+
+    def _probe(self):
+        """Returns (size, supports_range)."""
+        with self._request({"Range": "bytes=0-0"}) as resp:
+            if resp.status == 206:
+                content_range = resp.headers.get("Content-Range", "")
+                size = int(content_range.rsplit("/", 1)[-1]) if "/" in content_range else 0
+                return size, size > 0
+            return int(resp.headers.get("Content-Length") or 0), False
+
+    def _load_state(self):
+        if not (self.state_path.exists() and self.part_path.exists()):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if state.get("url") == self.url and state.get("total") == self.total and state.get("chunk_size") == self.chunk_size:
+            self.done_chunks = set(state.get("done") or [])
+
+    def _save_state(self):
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": self.url, "total": self.total, "chunk_size": self.chunk_size, "done": sorted(self.done_chunks)}, f)
+        os.replace(tmp, self.state_path)
+
+    def _fetch_chunk(self, index):
+        if self.stop_event and self.stop_event.is_set():
+            raise InterruptedError("Download stopped by user")
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, self.total) - 1
+        last_error = None
+        for attempt in range(3):
+            try:
+                with self._request({"Range": f"bytes={start}-{end}"}) as resp:
+                    if resp.status != 206:
+                        raise IOError(f"server ignored range request (HTTP {resp.status})")
+                    data = resp.read()
+                if len(data) != end - start + 1:
+                    raise IOError(f"short chunk {index}: {len(data)} bytes")
+                with open(self.part_path, "r+b") as f:
+                    f.seek(start)
+                    f.write(data)
+                with self.state_lock:
+                    self.done_chunks.add(index)
+                    self.downloaded += len(data)
+                    self._save_state()
+                return
+            except (OSError, IOError) as e:
+                last_error = e
+                time.sleep(1 + attempt)
+        raise IOError(f"chunk {index} failed: {last_error}")
+
+    def _download_single_stream(self):
+        with self._request() as resp, open(self.part_path, "wb") as f:
+            while True:
+                if self.stop_event and self.stop_event.is_set():
+                    raise InterruptedError("Download stopped by user")
+                data = resp.read(1024 * 1024)
+                if not data:
+                    break
+                f.write(data)
+
+    def verify(self, path):
+        if not self.sha256:
+            return True
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        return h.hexdigest() == self.sha256
+
+    def run(self):
+        if self.dest.exists() and self.verify(self.dest):
+            Colors.print_info(f"命中本地缓存: {self.dest.name}")
+            return str(self.dest)
+
+        self.dest.parent.mkdir(parents=True, exist_ok=True)
+        self.total, ranged = self._probe()
+
+        if not ranged:
+            Colors.print_warning("服务器不支持断点续传，改为单线程下载")
+            self._download_single_stream()
+        else:
+            self._load_state()
+            if not self.part_path.exists() or self.part_path.stat().st_size != self.total:
+                with open(self.part_path, "wb") as f:
+                    f.truncate(self.total)
+                self.done_chunks = set()
+            n_chunks = (self.total + self.chunk_size - 1) // self.chunk_size
+            pending = [i for i in range(n_chunks) if i not in self.done_chunks]
+            if self.done_chunks:
+                Colors.print_info(f"断点续传: 已完成 {len(self.done_chunks)}/{n_chunks} 个分块")
+            echo(f"正在分块下载 {self.dest.name} ({self.total / 1024 / 1024:.1f} MB, {len(pending)} 个分块, {self.workers} 线程)...")
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for fut in [pool.submit(self._fetch_chunk, i) for i in pending]:
+                    fut.result()
+
+        if not self.verify(self.part_path):
+            # Corrupt data cannot be repaired chunk-wise, start over next time
+            self.part_path.unlink()
+            if self.state_path.exists():
+                self.state_path.unlink()
+            raise IOError(f"sha256 校验失败: {self.dest.name}")
+
+        os.replace(self.part_path, self.dest)
+        if self.state_path.exists():
+            self.state_path.unlink()
+        Colors.print_success(f"下载完成并已校验: {self.dest.name}")
+        return str(self.dest)
+
+def download_file(url, dest, sha256=None, stop_event=None):
+    return ChunkedDownloader(url, dest, sha256=sha256, stop_event=stop_event).run()
+
+def prefetch_wheels(projects, index_url, cache_dir=None, stop_event=None, min_size=LARGE_FILE_THRESHOLD):
+    """
+    Prefetches large wheels (e.g. CUDA torch builds) into the local wheel cache.
+    Returns a dict project -> local wheel path. Projects that could not be
+    resolved, or are below `min_size`, are left for pip to fetch itself.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else WHEEL_CACHE_DIR
+    local = {}
+    for project in projects:
+        if stop_event and stop_event.is_set():
+            raise InterruptedError()
+        try:
+            wheel = find_wheel(index_url, project)
+        except Exception as e:
+            Colors.print_warning(f"无法解析 {project} 的 wheel 地址: {e}")
+            continue
+        if not wheel:
+            continue
+
+        dest = cache_dir / wheel["filename"]
+        if not dest.exists():
+            try:
+                size, _ = ChunkedDownloader(wheel["url"], dest)._probe()
+            except Exception:
+                continue
+            if size < min_size:
+                continue
+
+        try:
+            local[project] = download_file(wheel["url"], dest, sha256=wheel["sha256"], stop_event=stop_event)
+        except InterruptedError:
+            raise
+        except Exception as e:
+            Colors.print_warning(f"预下载 {wheel['filename']} 失败，将由 pip 直接下载: {e}")
+    return local
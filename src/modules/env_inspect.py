@@ -0,0 +1,176 @@
+import os
+import re
+import sys
+import glob
+import json
+import site
+import sysconfig
+import threading
+import importlib.metadata
+from ..core.utils import Colors
+from .project_scanner import canonicalize, parse_requirement
+
+_CACHE = {}   # prefix -> (dir mtimes, index)
+_CACHE_LOCK = threading.Lock()
+_SPEC_RE = re.compile(r"^(~=|===|==|!=|<=|>=|<|>)\s*(.+)$")
+
+def site_packages_dirs(prefix=None):
+    """site-packages directories of an env prefix, or of the running interpreter when prefix is None."""
+    if prefix is None:
+        dirs = [sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]]
+        user = site.getusersitepackages() if site.ENABLE_USER_SITE else None
+        if user:
+            dirs.append(user)
+    elif sys.platform == "win32":
+        dirs = [os.path.join(prefix, "Lib", "site-packages")]
+    else:
+        dirs = glob.glob(os.path.join(prefix, "lib", "python3*", "site-packages"))
+    seen = []
+    for d in dirs:
+        if d and os.path.isdir(d) and d not in seen:
+            seen.append(d)
+    return seen
+
+def _conda_meta(prefix):
+    meta_dir = os.path.join(prefix, "conda-meta")
+    index = {}
+    if not os.path.isdir(meta_dir):
+        return index
+    with os.scandir(meta_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                index[canonicalize(data["name"])] = data["version"]
+            except (OSError, ValueError, KeyError):
+                continue
+    return index
+
+def installed_packages(prefix=None):
+    """
+    Returns {canonical name: version} for an environment, read from
+    *.dist-info / *.egg-info metadata and conda-meta JSON without spawning pip.
+    Cached until one of the metadata directories changes.
+    """
+    key = prefix or sys.prefix
+    dirs = site_packages_dirs(prefix)
+    conda_dir = os.path.join(key, "conda-meta")
+    watched = dirs + ([conda_dir] if os.path.isdir(conda_dir) else [])
+    stamp = tuple(os.stat(d).st_mtime_ns for d in watched)
+
+    with _CACHE_LOCK:
+        hit = _CACHE.get(key)
+    if hit and hit[0] == stamp:
+        return hit[1]
+
+    index = _conda_meta(key)
+    # pip metadata wins over conda-meta: it uses the PyPI project names requirements refer to
+    for dist in importlib.metadata.distributions(path=dirs):
+        name = dist.metadata["Name"]
+        if name:
+            index[canonicalize(name)] = dist.version
+
+    with _CACHE_LOCK:
+        _CACHE[key] = (stamp, index)
+    return index
+
+def _release(version, strip_zeros=True):
+    """'2.1.0+cu121' -> ((2, 1), 'cu121'); pre/post/dev parts are dropped."""
+    public, _, local = version.strip().partition("+")
+    nums = []
+    for piece in public.split("."):
+        m = re.match(r"\d+", piece)
+        if not m:
+            break
+        nums.append(int(m.group()))
+        if m.group() != piece:
+            break
+    while strip_zeros and len(nums) > 1 and nums[-1] == 0:
+        nums.pop()
+    return tuple(nums), local
+
+def _cmp(a, b):
+    return (a > b) - (a < b)
+
+def satisfies(version, spec):
+    """Checks `version` against a PEP 440 specifier set like '>=1.2,<2'. Unknown forms count as unsatisfied."""
+    if not spec:
+        return True
+    have, _ = _release(version)
+    for clause in spec.split(","):
+        clause = clause.strip()
+        if not clause:
+            continue
+        m = _SPEC_RE.match(clause)
+        if not m:
+            return False
+        op, want_s = m.group(1), m.group(2).strip()
+        if op in ("==", "!=") and want_s.endswith(".*"):
+            prefix = _release(want_s[:-2], strip_zeros=False)[0]
+            padded = _release(version, strip_zeros=False)[0] + (0,) * len(prefix)
+            if (op == "==") != (padded[:len(prefix)] == prefix):
+                return False
+            continue
+        if op == "===":
+            if version != want_s:
+                return False
+            continue
+        want, _ = _release(want_s)
+        c = _cmp(have, want)
+        ok = {
+            "==": c == 0, "!=": c != 0, ">=": c >= 0, "<=": c <= 0, ">": c > 0, "<": c < 0,
+        }.get(op)
+        if op == "~=":
+            full = _release(want_s, strip_zeros=False)[0]
+            upper = full[:-1] if len(full) > 1 else full
+            padded = _release(version, strip_zeros=False)[0] + (0,) * len(upper)
+            ok = c >= 0 and padded[:len(upper)] == upper
+        if not ok:
+            return False
+    return True
+
+def split_satisfied(requirements, prefix=None, local_tag=None):
+    """
+    Splits requirement strings into (missing, satisfied) for the env at `prefix`.
+    local_tag (e.g. 'cu121') additionally requires that local version label, so a
+    CPU torch does not count as a CUDA one.
+    """
+    index = installed_packages(prefix)
+    missing, satisfied = [], []
+    for raw in requirements:
+        req = parse_requirement(raw.strip('"'))
+        version = index.get(req["name"]) if req else None
+        ok = version is not None and satisfies(version, req["spec"])
+        if ok and local_tag:
+            ok = _release(version)[1] == local_tag
+        (satisfied if ok else missing).append(raw)
+    return missing, satisfied
+
+def conda_torch_matches(prefix, conda_cmd):
+    """
+    Whether the torch build in a conda env is the variant conda_cmd installs. A 'pytorch-cuda=12.1'
+    request needs that pytorch-cuda package and no cpuonly (or a pip torch labelled cu121);
+    any build satisfies a CPU or Metal request.
+    """
+    m = re.search(r"pytorch-cuda=([\d.]+)", conda_cmd or "")
+    if not m:
+        return True
+    index = installed_packages(prefix)
+    want = _release(m.group(1), strip_zeros=False)[0][:2]
+    if "pytorch-cuda" in index and "cpuonly" not in index:
+        return _release(index["pytorch-cuda"], strip_zeros=False)[0][:2] == want
+    return _release(index.get("torch", ""))[1] == "cu" + "".join(map(str, want))
+
+def skip_satisfied(requirements, prefix=None, local_tag=None):
+    """Returns the requirements still to install and reports how many were skipped."""
+    if not requirements:
+        return []
+    try:
+        missing, satisfied = split_satisfied(requirements, prefix, local_tag)
+    except OSError:
+        return list(requirements)
+    if satisfied:
+        Colors.print_info(f"已满足 {len(satisfied)} 个依赖，跳过: {', '.join(satisfied[:8])}{' ...' if len(satisfied) > 8 else ''}")
+    return missing
@@ -1,51 +1,120 @@
 import os
+import re
 import json
+import types
+import platform
 import subprocess
 import sys
 import time
-from ..core.utils import run_command, Colors
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..core.utils import run_command, Colors, echo, detect_proxy_port, measure_latency
+from ..core.watchdog import StreamWatchdog, StallError
+from ..core.progress import canonical_name
+from .downloader import prefetch_wheels
+from ..core.mirrors import rank, resolve
+from .project_scanner import scan_project, conda_available
+from .env_inspect import skip_satisfied, conda_torch_matches
+from . import catalog
+
+# conda holds a package-cache/prefix lock; concurrent create/install calls on one base block or corrupt each other
+CONDA_LOCK = threading.Lock()
+
+PIP_OFFICIAL_INDEX = "https://pypi.org/simple"
+
+def rank_pip_indexes():
+    """
+    Re-probes all pip index candidates concurrently (mirror catalog health checks).
+    Returns [(label, index_args)] fastest first; the official index goes through the local proxy.
+    """
+    proxy = f"http://127.0.0.1:{detect_proxy_port()}"
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        official = pool.submit(measure_latency, PIP_OFFICIAL_INDEX, proxy)
+        # max_age=0: called after a stall, so the scores from before it are not trusted
+        candidates = [(r["latency"] * 1000, r["name"], f"-i {r['url']}") for r in rank("pip", max_age=0) if r["ok"]]
+        candidates.append((official.result(), "official+proxy", f"-i {PIP_OFFICIAL_INDEX} --proxy {proxy}"))
+    return [(name, args) for _, name, args in sorted(candidates, key=lambda c: c[0])]
+
+_PIP_VERSIONS = {}
+
+def pip_progress_args(pip_cmd):
+    """' --progress-bar raw' when this pip can report download bytes into a pipe (pip >= 24.1), else ''."""
+    if pip_cmd not in _PIP_VERSIONS:
+        res = run_command(f"{pip_cmd} --version")
+        m = re.search(r"pip (\d+)\.(\d+)", res.stdout if res else "")
+        _PIP_VERSIONS[pip_cmd] = (int(m.group(1)), int(m.group(2))) if m else (0, 0)
+    return " --progress-bar raw" if _PIP_VERSIONS[pip_cmd] >= (24, 1) else ""
+
+def pip_install_with_failover(pip_cmd, packages=None, req_file=None, extra_args="", stop_event=None):
+    """
+    Runs `<pip_cmd> install` under a StreamWatchdog.
+    If the index stalls or trickles, pip is cancelled and the packages not yet
+    satisfied are retried against the next-best index. Returns the CompletedProcess.
+    """
+    remaining = list(packages or [])
+    label, url = resolve("pip")
+    index_args = f"-i {url}"
+    tried = []
+    extra_args = pip_progress_args(pip_cmd) + extra_args
+    while True:
+        targets = " ".join(remaining)
+        if req_file:
+            targets = (targets + f" -r \"{req_file}\"").strip()
+        cmd = f"{pip_cmd} install {targets} {index_args}{extra_args}"
+        watchdog = StreamWatchdog()
+        try:
+            return run_command(cmd, stream_output=True, stop_event=stop_event, watchdog=watchdog)
+        except StallError as e:
+            tried.append(label)
+            done = watchdog.finished_packages()
+            remaining = [p for p in remaining if canonical_name(p) not in done]
+            if not remaining and not req_file:
+                return subprocess.CompletedProcess(args=cmd, returncode=0, stdout=e.output, stderr="")
+            ranked = [(n, a) for n, a in rank_pip_indexes() if n not in tried]
+            if not ranked:
+                raise Exception(f"所有索引源均停滞 ({', '.join(tried)}): {e.reason}")
+            label, index_args = ranked[0]
+            Colors.print_warning(f"索引源 {tried[-1]} 停滞: {e.reason}，切换到 {label} 重试剩余 {len(remaining) or '全部'} 个包")
 
 def analyze_project_path(path):
     """
-    Analyzes a project directory for dependency files.
+    Analyzes a project directory (recursively, for monorepos) for dependency files.
     """
     if not os.path.exists(path):
         raise ValueError("路径不存在")
     
-    files = os.listdir(path)
-    deps = []
-    
-    if "requirements.txt" in files:
-        deps.append("requirements.txt (Python)")
-    if "environment.yml" in files:
-        deps.append("environment.yml (Conda)")
-    if "package.json" in files:
-        deps.append("package.json (Node.js)")
-    if "Pipfile" in files:
-        deps.append("Pipfile (Pipenv)")
-    if "pyproject.toml" in files:
-        deps.append("pyproject.toml (Poetry/Flit)")
-
-    # Check for Conda availability
-    has_conda = False
-    try:
-        subprocess.run(["conda", "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        has_conda = True
-    except:
-        pass
+    scan = scan_project(path)
+    top = next((p for p in scan["projects"] if p["rel"] == "."), None)
+    files = [m["file"] for m in top["manifests"]] if top else []
+    deps = [f"{m['file']} ({m['ecosystem']})" for m in top["manifests"]] if top else []
+
+    subprojects = [
+        {
+            "path": p["path"],
+            "rel": p["rel"],
+            "manifests": [{"file": m["file"], "ecosystem": m["ecosystem"], "deps": m["deps"], "error": m["error"]} for m in p["manifests"]],
+        }
+        for p in scan["projects"] if p["rel"] != "."
+    ]
+
+    # Check for Conda availability (PATH lookup, cached; no subprocess per call)
+    has_conda = conda_available()
 
     recommendation = "System Python"
-    if "environment.yml" in files:
+    if "environment.yml" in files or "environment.yaml" in files:
         recommendation = "Conda Environment"
     elif "requirements.txt" in files:
         recommendation = "Venv (Virtualenv)" if not has_conda else "Conda or Venv"
     
     return {
         "path": path,
-        "name": os.path.basename(path),
+        "name": os.path.basename(os.path.abspath(path)),
         "deps": deps,
         "has_conda": has_conda,
-        "recommendation": recommendation
+        "recommendation": recommendation,
+        "manifests": top["manifests"] if top else [],
+        "subprojects": subprojects,
+        "stats": scan["stats"],
     }
 
 def create_venv_and_install(path, stop_event=None):
@@ -56,13 +125,13 @@ def create_venv_and_install(path, stop_event=None):
     
     # 1. Create Venv
     if not os.path.exists(venv_path):
-        print(f"正在创建虚拟环境: {venv_path} ...")
+        echo(f"正在创建虚拟环境: {venv_path} ...")
         # Creating venv is usually fast, but let's stream it just in case
         res = run_command(f"\"{sys.executable}\" -m venv \"{venv_path}\"", stream_output=True, stop_event=stop_event)
         if res.returncode != 0:
             raise subprocess.CalledProcessError(res.returncode, "venv creation", output=res.stdout)
     else:
-        print(f"虚拟环境已存在: {venv_path}")
+        echo(f"虚拟环境已存在: {venv_path}")
 
     if stop_event and stop_event.is_set(): raise InterruptedError()
 
@@ -71,14 +140,11 @@ def create_venv_and_install(path, stop_event=None):
     
     req_file = os.path.join(path, "requirements.txt")
     if os.path.exists(req_file):
-        print("正在安装依赖 (requirements.txt)...")
-        # Use mirror if configured globally? 
-        # Actually, we should force use mirror here for speed
-        mirror_url = "https://pypi.tuna.tsinghua.edu.cn/simple"
-        cmd = f"\"{pip_exe}\" install -r \"{req_file}\" -i {mirror_url}"
-        res = run_command(cmd, stream_output=True, stop_event=stop_event)
+        echo("正在安装依赖 (requirements.txt)...")
+        # Force the mirror here for speed; a stalled mirror fails over to the next-best index
+        res = pip_install_with_failover(f"\"{pip_exe}\"", req_file=req_file, stop_event=stop_event)
         if res.returncode != 0:
-            raise subprocess.CalledProcessError(res.returncode, cmd, output=res.stdout)
+            raise subprocess.CalledProcessError(res.returncode, res.args, output=res.stdout)
         return {"message": f"环境创建成功！依赖已安装。\n激活命令: {os.path.join(venv_path, 'Scripts', 'activate')}", "env_path": venv_path, "type": "venv", "env_name": os.path.basename(path)}
     else:
         return {"message": f"环境创建成功！但未找到 requirements.txt", "env_path": venv_path, "type": "venv", "env_name": os.path.basename(path)}
@@ -93,39 +159,46 @@ def create_conda_and_install(path, stop_event=None):
     yml_file = os.path.join(path, "environment.yml")
     
     if os.path.exists(yml_file):
-        print(f"正在基于 environment.yml 创建 Conda 环境: {env_name} ...")
+        echo(f"正在基于 environment.yml 创建 Conda 环境: {env_name} ...")
         cmd = f"conda env create -f \"{yml_file}\" --name {env_name}"
-        res = run_command(cmd, stream_output=True, stop_event=stop_event)
+        with CONDA_LOCK:
+            res = run_command(cmd, stream_output=True, stop_event=stop_event)
         if res.returncode != 0:
              raise Exception(f"Conda env creation failed: {res.stdout}")
     else:
-        print(f"正在创建通用 Conda 环境: {env_name} ...")
-        res = run_command(f"conda create -n {env_name} python=3.10 -y", stream_output=True, stop_event=stop_event)
+        echo(f"正在创建通用 Conda 环境: {env_name} ...")
+        with CONDA_LOCK:
+            res = run_command(f"conda create -n {env_name} python=3.10 -y", stream_output=True, stop_event=stop_event)
         if res.returncode != 0:
              raise Exception(f"Conda create failed: {res.stdout}")
         
         req_file = os.path.join(path, "requirements.txt")
         if os.path.exists(req_file):
             if stop_event and stop_event.is_set(): raise InterruptedError()
-            print("正在安装 pip 依赖...")
+            echo("正在安装 pip 依赖...")
             # We need to run pip inside the conda env. 
             # Best way is 'conda run -n name pip install ...'
-            mirror_url = "https://pypi.tuna.tsinghua.edu.cn/simple"
-            cmd = f"conda run -n {env_name} pip install -r \"{req_file}\" -i {mirror_url}"
-            res = run_command(cmd, stream_output=True, stop_event=stop_event)
+            res = pip_install_with_failover(f"conda run --no-capture-output -n {env_name} pip", req_file=req_file, stop_event=stop_event)
             if res.returncode != 0:
                 raise Exception(f"Pip install failed: {res.stdout}")
 
     return {"message": f"Conda 环境 {env_name} 创建成功！", "env_name": env_name, "type": "conda"}
 
-import platform
-import re
+_SYS_INFO = None
+_SYS_INFO_LOCK = threading.Lock()
 
-def get_system_info():
+def get_system_info(refresh=False):
     """
-    Detects system hardware and OS information.
+    Detects system hardware and OS information once per process (wmic / nvidia-smi are slow).
     Returns: { 'os': str, 'gpu': str, 'cuda': str|None, 'arch': str }
     """
+    global _SYS_INFO
+    with _SYS_INFO_LOCK:
+        if _SYS_INFO is None or refresh:
+            _SYS_INFO = _detect_system_info()
+        return dict(_SYS_INFO)
+
+def _detect_system_info():
     info = {
         'os': f"{platform.system()} {platform.release()}",
         'arch': platform.machine(),
@@ -187,91 +260,139 @@ def install_suite(suite, target, env_name=None, custom_packages=None):
     mirror_url = "https://pypi.tuna.tsinghua.edu.cn/simple"
     sys_info = get_system_info()
     
-    print(f"检测到系统环境: {sys_info['os']} / {sys_info['arch']} / {sys_info['gpu']} (CUDA: {sys_info['cuda'] or 'N/A'})")
+    echo(f"检测到系统环境: {sys_info['os']} / {sys_info['arch']} / {sys_info['gpu']} (CUDA: {sys_info['cuda'] or 'N/A'})")
 
-def get_all_suites(sys_info=None):
+# (os, arch or None, package lists, {package: replacements})
+PLATFORM_REPLACEMENTS = (
+    # TensorFlow on Apple Silicon ships as tensorflow-macos + tensorflow-metal
+    ('Darwin', 'arm64', ('pip_base',), {'tensorflow': ('tensorflow-macos', 'tensorflow-metal')}),
+    # gunicorn is Unix only; waitress is the usual Windows alternative
+    ('Windows', None, ('pip_base', 'conda_base'), {'gunicorn': ('waitress',)}),
+)
+
+TORCH_PKGS = ('torch', 'torchvision', 'torchaudio')
+TORCH_VARIANTS = {
+    'cu121': {
+        'message': '>>> 推荐: PyTorch CUDA 12.1 版本',
+        'index': 'https://download.pytorch.org/whl/cu121',
+        'conda': 'pytorch torchvision torchaudio pytorch-cuda=12.1 -c pytorch -c nvidia',
+    },
+    'cu118': {
+        'message': '>>> 推荐: PyTorch CUDA 11.8 版本',
+        'index': 'https://download.pytorch.org/whl/cu118',
+        'conda': 'pytorch torchvision torchaudio pytorch-cuda=11.8 -c pytorch -c nvidia',
+    },
+    'cuda-legacy': {
+        'message': '>>> 警告: CUDA 版本过低，推荐使用 CPU 版本或手动安装',
+        'index': 'https://download.pytorch.org/whl/cpu',
+        'conda': 'pytorch torchvision torchaudio cpuonly -c pytorch',
+    },
+    'mps': {
+        'message': '>>> 推荐: PyTorch (Mac M1/M2 Metal 加速)',
+        # Mac uses the default index
+        'index': None,
+        'conda': 'pytorch torchvision torchaudio -c pytorch',
+    },
+    'cpu': {
+        'message': '>>> 推荐: PyTorch CPU 版本 (未检测到 NVIDIA GPU)',
+        'index': 'https://download.pytorch.org/whl/cpu',
+        'conda': 'pytorch torchvision torchaudio cpuonly -c pytorch',
+    },
+}
+
+_PLAN_CACHE = {}   # profile fingerprint -> (catalog version, plans, {suite: JSON bytes})
+_PLAN_LOCK = threading.Lock()
+
+def hardware_profile(sys_info=None):
     """
-    Returns the definition of all available suites, adapted for the hardware.
+    The parts of the hardware that change what a suite installs.
+    Returns: { 'os': 'Linux'|'Darwin'|'Windows', 'arch': str, 'cuda': bucket, 'fingerprint': str }
     """
     if sys_info is None:
         sys_info = get_system_info()
+    os_name = sys_info['os'].split(' ', 1)[0]
+    arch = sys_info['arch']
+    if sys_info['cuda']:
+        # Roughly: 11.x -> cu118, 12.x -> cu121
+        cuda_ver = float(sys_info['cuda'])
+        bucket = 'cu121' if cuda_ver >= 12.0 else 'cu118' if cuda_ver >= 11.0 else 'cuda-legacy'
+    elif os_name == 'Darwin' and arch == 'arm64':
+        bucket = 'mps'
+    else:
+        bucket = 'cpu'
+    return {'os': os_name, 'arch': arch, 'cuda': bucket, 'fingerprint': f"{os_name}-{arch}-{bucket}"}
 
-    # Common base for all DL
-    base_dl = ['numpy', 'pandas', 'matplotlib', 'scikit-learn', 'jupyterlab', 'tqdm', 'seaborn', 'h5py', 'pillow', 'opencv-python']
-    
-    suites = {
-        'dl_torch': {
-            'desc': 'PyTorch 深度学习全家桶',
-            'pip_base': base_dl + ['tensorboard', 'gradio', 'transformers', 'datasets', 'accelerate', 'torchmetrics', 'optuna', 'onnx', 'pytorch-lightning'],
-            'conda_base': base_dl + ['tensorboard', 'gradio', 'transformers', 'datasets', 'accelerate', 'torchmetrics', 'optuna', 'onnx', 'pytorch-lightning'],
-            # PyTorch logic handled separately due to CUDA variants
-        },
-        'dl_tf': {
-            'desc': 'TensorFlow 深度学习全家桶',
-            'pip_base': base_dl + ['tensorflow', 'tensorboard', 'keras', 'tensorflow-datasets'],
-            'conda_base': base_dl + ['tensorflow', 'tensorboard', 'keras', 'tensorflow-datasets'],
-        },
-        'web_dev': {
-            'desc': 'Python Web 开发 (全栈)',
-            'pip_base': ['fastapi', 'uvicorn', 'django', 'flask', 'requests', 'pydantic', 'sqlalchemy', 'python-dotenv', 'redis', 'celery', 'httpx', 'beautifulsoup4', 'gunicorn', 'jinja2', 'marshmallow', 'alembic', 'websockets'],
-            'conda_base': ['fastapi', 'uvicorn', 'django', 'flask', 'requests', 'pydantic', 'sqlalchemy', 'python-dotenv', 'redis', 'celery', 'httpx', 'beautifulsoup4', 'gunicorn', 'jinja2', 'marshmallow', 'alembic', 'websockets'],
-        },
-        'data_science': {
-            'desc': '数据科学与大数据分析',
-            'pip_base': ['numpy', 'pandas', 'scipy', 'matplotlib', 'seaborn', 'scikit-learn', 'statsmodels', 'openpyxl', 'jupyterlab', 'plotly', 'sympy', 'networkx', 'bokeh', 'lxml', 'xlrd', 'fsspec', 'dask'],
-            'conda_base': ['numpy', 'pandas', 'scipy', 'matplotlib', 'seaborn', 'scikit-learn', 'statsmodels', 'openpyxl', 'jupyterlab', 'plotly', 'sympy', 'networkx', 'bokeh', 'lxml', 'xlrd', 'fsspec', 'dask'],
-        },
-        'app_dev': {
-            'desc': '桌面/移动应用开发',
-            'pip_base': ['PyQt6', 'kivy', 'buildozer', 'pyinstaller', 'cx_Freeze', 'pyside6', 'briefcase'],
-            'conda_base': ['pyqt', 'kivy', 'pyside6'] # buildozer/cx_Freeze often better via pip even in conda
-        },
-        'spider': {
-             'desc': '网络爬虫与数据采集',
-             'pip_base': ['requests', 'scrapy', 'beautifulsoup4', 'selenium', 'playwright', 'lxml', 'parsel', 'pyquery', 'aiohttp'],
-             'conda_base': ['requests', 'scrapy', 'beautifulsoup4', 'selenium', 'lxml', 'parsel', 'pyquery', 'aiohttp']
-        }
+def _adapt_packages(pkgs, key, profile):
+    out = []
+    for pkg in pkgs:
+        replacement = (pkg,)
+        for os_name, arch, keys, table in PLATFORM_REPLACEMENTS:
+            if os_name == profile['os'] and arch in (None, profile['arch']) and key in keys and pkg in table:
+                replacement = table[pkg]
+        out.extend(replacement)
+    return tuple(out)
+
+def _compile_plan(name, definition, profile):
+    plan = {
+        'name': name,
+        'title': definition['title'],
+        'desc': definition['desc'],
+        'tags': definition['tags'],
+        'profile': profile['fingerprint'],
+        'pip_base': _adapt_packages(definition.get('pip_base', ()), 'pip_base', profile),
+        'conda_base': _adapt_packages(definition.get('conda_base', ()), 'conda_base', profile),
+        'torch': None,
     }
+    if definition.get('torch'):
+        plan['torch'] = types.MappingProxyType({'variant': profile['cuda'], 'packages': TORCH_PKGS, **TORCH_VARIANTS[profile['cuda']]})
+    return types.MappingProxyType(plan)
+
+def _plan_json(plan):
+    data = {k: (dict(v) if isinstance(v, types.MappingProxyType) else list(v) if isinstance(v, tuple) else v) for k, v in plan.items()}
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+def _compiled(sys_info=None):
+    profile = hardware_profile(sys_info)
+    key = profile['fingerprint']
+    # Suite definitions come from the catalog; an edited or added file recompiles the plans
+    stamp = catalog.version('suites')
+    with _PLAN_LOCK:
+        hit = _PLAN_CACHE.get(key)
+        if hit is None or hit[0] != stamp:
+            plans = {name: _compile_plan(name, d, profile) for name, d in catalog.list_entries('suites').items()}
+            hit = (stamp, types.MappingProxyType(plans), {name: _plan_json(p) for name, p in plans.items()})
+            _PLAN_CACHE[key] = hit
+    return hit[1:]
+
+def get_all_suites(sys_info=None):
+    """
+    Returns all suites adapted for the hardware, as read-only plans compiled once per
+    hardware profile. Package lists are tuples; copy them before modifying.
+    """
+    return _compiled(sys_info)[0]
+
+def get_suite_plan(suite, sys_info=None):
+    return _compiled(sys_info)[0].get(suite)
 
-    # --- Hardware Adaptation Logic ---
-    is_mac_arm = 'Darwin' in sys_info['os'] and 'arm64' in sys_info['arch']
-    is_windows = 'Windows' in sys_info['os']
-
-    # 1. Mac Apple Silicon Adaptations
-    if is_mac_arm:
-        # TensorFlow: Replace 'tensorflow' with 'tensorflow-macos' + 'tensorflow-metal'
-        if 'tensorflow' in suites['dl_tf']['pip_base']:
-            suites['dl_tf']['pip_base'].remove('tensorflow')
-            suites['dl_tf']['pip_base'].extend(['tensorflow-macos', 'tensorflow-metal'])
-
-    # 2. Windows Adaptations
-    if is_windows:
-        # Remove 'uvloop' if present (it's not in my list, but for safety)
-        # Remove 'gunicorn' (Unix only), replace with 'waitress' or just remove
-        if 'gunicorn' in suites['web_dev']['pip_base']:
-            suites['web_dev']['pip_base'].remove('gunicorn')
-            suites['web_dev']['pip_base'].append('waitress') # Compatible alternative
-        if 'gunicorn' in suites['web_dev']['conda_base']:
-            suites['web_dev']['conda_base'].remove('gunicorn')
-            suites['web_dev']['conda_base'].append('waitress')
-
-    return suites
-
-def install_suite(suite, target, env_name=None, custom_packages=None, stop_event=None):
+def suite_details_json(suite, sys_info=None):
+    """Pre-encoded JSON of one suite plan, or None for unknown suites."""
+    return _compiled(sys_info)[1].get(suite)
+
+def install_suite(suite, target, env_name=None, custom_packages=None, stop_event=None, find_links=None):
     """
     Installs a suite of packages.
     target: 'pip_current', 'conda_current', 'conda_new'
     custom_packages: list of strings (optional), overrides the default suite packages.
+    find_links: local wheelhouse (optional) that pip consults before the mirror.
     """
     mirror_url = "https://pypi.tuna.tsinghua.edu.cn/simple"
+    pip_extra = f" --find-links \"{find_links}\"" if find_links else ""
     sys_info = get_system_info()
     
-    print(f"检测到系统环境: {sys_info['os']} / {sys_info['arch']} / {sys_info['gpu']} (CUDA: {sys_info['cuda'] or 'N/A'})")
-    
-    # Pass sys_info to get_all_suites to ensure we get the filtered list
-    suites = get_all_suites(sys_info)
+    echo(f"检测到系统环境: {sys_info['os']} / {sys_info['arch']} / {sys_info['gpu']} (CUDA: {sys_info['cuda'] or 'N/A'})")
     
-    if suite not in suites:
+    plan = get_suite_plan(suite, sys_info)
+    if plan is None:
         raise ValueError(f"未知套件: {suite}")
         
     # Determine packages to install
@@ -279,89 +400,56 @@ def install_suite(suite, target, env_name=None, custom_packages=None, stop_event
         pkgs_pip = list(custom_packages)
         pkgs_conda = list(custom_packages)
     else:
-        pkgs_pip = suites[suite].get('pip_base', [])
-        pkgs_conda = suites[suite].get('conda_base', [])
+        pkgs_pip = list(plan['pip_base'])
+        pkgs_conda = list(plan['conda_base'])
     
     # --- PyTorch Special Logic ---
     torch_extra_index = None
-    # Check if we should install torch (if suite is dl_torch OR 'torch' is in custom packages)
-    should_install_torch = (suite == 'dl_torch')
-    
-    if should_install_torch:
+    torch_plan = plan['torch']
+    if torch_plan:
         # Remove generic torch from list if present to avoid double install with wrong index
-        for p in ['torch', 'torchvision', 'torchaudio']:
-            if p in pkgs_pip: pkgs_pip.remove(p)
-            if p in pkgs_conda: pkgs_conda.remove(p)
-
-        # Determine PyTorch version based on Hardware
-        # If CUDA is detected, we assume NVIDIA GPU is present and usable
-        if sys_info['cuda']:
-            # Mapping CUDA version to PyTorch index
-            # Roughly: 11.x -> cu118, 12.x -> cu121
-            cuda_ver = float(sys_info['cuda'])
-            if cuda_ver >= 12.0:
-                print(">>> 推荐: PyTorch CUDA 12.1 版本")
-                torch_pkgs = ['torch', 'torchvision', 'torchaudio']
-                torch_extra_index = "https://download.pytorch.org/whl/cu121"
-                # Conda needs specific channel/package
-                conda_torch_cmd = "pytorch torchvision torchaudio pytorch-cuda=12.1 -c pytorch -c nvidia"
-            elif cuda_ver >= 11.0:
-                print(">>> 推荐: PyTorch CUDA 11.8 版本")
-                torch_pkgs = ['torch', 'torchvision', 'torchaudio']
-                torch_extra_index = "https://download.pytorch.org/whl/cu118"
-                conda_torch_cmd = "pytorch torchvision torchaudio pytorch-cuda=11.8 -c pytorch -c nvidia"
-            else:
-                print(">>> 警告: CUDA 版本过低，推荐使用 CPU 版本或手动安装")
-                torch_pkgs = ['torch', 'torchvision', 'torchaudio']
-                torch_extra_index = "https://download.pytorch.org/whl/cpu"
-                conda_torch_cmd = "pytorch torchvision torchaudio cpuonly -c pytorch"
-        elif sys.platform == 'darwin' and platform.machine() == 'arm64':
-             print(">>> 推荐: PyTorch (Mac M1/M2 Metal 加速)")
-             torch_pkgs = ['torch', 'torchvision', 'torchaudio']
-             # Mac usually uses default index
-             torch_extra_index = None 
-             conda_torch_cmd = "pytorch torchvision torchaudio -c pytorch"
-        else:
-            print(">>> 推荐: PyTorch CPU 版本 (未检测到 NVIDIA GPU)")
-            torch_pkgs = ['torch', 'torchvision', 'torchaudio']
-            torch_extra_index = "https://download.pytorch.org/whl/cpu"
-            conda_torch_cmd = "pytorch torchvision torchaudio cpuonly -c pytorch"
-            
-        pkgs_pip = torch_pkgs + pkgs_pip
-        # Conda logic handled below
+        pkgs_pip = [p for p in pkgs_pip if p not in torch_plan['packages']]
+        pkgs_conda = [p for p in pkgs_conda if p not in torch_plan['packages']]
+
+        # Index and conda command were chosen for this hardware profile when the plan was compiled
+        echo(torch_plan['message'])
+        torch_extra_index = torch_plan['index']
+        conda_torch_cmd = torch_plan['conda']
+        pkgs_pip = list(torch_plan['packages']) + pkgs_pip
     
     # 1. Handle Target: New Conda Env
     if target == 'conda_new':
         if not env_name:
             env_name = f"env_{suite}_{int(time.time())}"
-        print(f"正在创建新 Conda 环境: {env_name} ...")
-        res = run_command(f"conda create -n {env_name} python=3.10 -y", stream_output=True, stop_event=stop_event)
+        echo(f"正在创建新 Conda 环境: {env_name} ...")
+        with CONDA_LOCK:
+            res = run_command(f"conda create -n {env_name} python=3.10 -y", stream_output=True, stop_event=stop_event)
         if res.returncode != 0: raise Exception("Conda create failed")
         
         # Install logic
-        if suite == 'dl_torch':
+        if torch_plan:
             if stop_event and stop_event.is_set(): raise InterruptedError()
             # Install Torch first via Conda
-            print(f"正在安装 PyTorch (Conda)...")
-            res = run_command(f"conda install -n {env_name} -y {conda_torch_cmd}", stream_output=True, stop_event=stop_event)
+            echo(f"正在安装 PyTorch (Conda)...")
+            with CONDA_LOCK:
+                res = run_command(f"conda install -n {env_name} -y {conda_torch_cmd}", stream_output=True, stop_event=stop_event)
             if res.returncode != 0: raise Exception("PyTorch install failed")
 
             if stop_event and stop_event.is_set(): raise InterruptedError()
             # Install rest via Pip (often faster/more compatible for misc libs)
             # Or install rest via Conda? Mixed is tricky. 
             # Let's try to install rest via Pip inside Conda to be safe with versions like opencv-python
-            print(f"正在安装其他依赖 (Pip)...")
-            pkgs_str = " ".join(pkgs_conda)
+            echo(f"正在安装其他依赖 (Pip)...")
             # Use 'conda run' to ensure we use the env's pip
-            cmd = f"conda run -n {env_name} pip install {pkgs_str} -i {mirror_url}"
-            res = run_command(cmd, stream_output=True, stop_event=stop_event)
+            res = pip_install_with_failover(f"conda run --no-capture-output -n {env_name} pip", pkgs_conda, extra_args=pip_extra, stop_event=stop_event)
             if res.returncode != 0: raise Exception("Pip install failed")
         else:
             if stop_event and stop_event.is_set(): raise InterruptedError()
             # Generic Conda Install
-            print(f"正在安装 Conda 包...")
+            echo(f"正在安装 Conda 包...")
             pkgs_str = " ".join(pkgs_conda)
-            res = run_command(f"conda install -n {env_name} -y {pkgs_str} -c conda-forge", stream_output=True, stop_event=stop_event)
+            with CONDA_LOCK:
+                res = run_command(f"conda install -n {env_name} -y {pkgs_str} -c conda-forge", stream_output=True, stop_event=stop_event)
             if res.returncode != 0: raise Exception("Conda install failed")
 
         # Get env path for user reference
@@ -378,47 +466,65 @@ def install_suite(suite, target, env_name=None, custom_packages=None, stop_event
 
     # 2. Handle Target: Current Conda Env
     elif target == 'conda_current':
-        if suite == 'dl_torch':
-             print(f"正在当前环境安装 PyTorch (Conda)...")
-             res = run_command(f"conda install -y {conda_torch_cmd}", stream_output=True, stop_event=stop_event)
-             if res.returncode != 0: raise Exception("PyTorch install failed")
+        conda_prefix = os.environ.get("CONDA_PREFIX")
+        if torch_plan:
+             # As with the pip local tag check: a CPU build must not satisfy a CUDA request
+             if not conda_torch_matches(conda_prefix, conda_torch_cmd) \
+                     or skip_satisfied(list(torch_plan['packages']), prefix=conda_prefix):
+                 echo(f"正在当前环境安装 PyTorch (Conda)...")
+                 with CONDA_LOCK:
+                     res = run_command(f"conda install -y {conda_torch_cmd}", stream_output=True, stop_event=stop_event)
+                 if res.returncode != 0: raise Exception("PyTorch install failed")
              
              if stop_event and stop_event.is_set(): raise InterruptedError()
-             print(f"正在安装其他依赖 (Pip)...")
-             pkgs_str = " ".join(pkgs_conda)
-             # Assume 'pip' is in path
-             res = run_command(f"pip install {pkgs_str} -i {mirror_url}", stream_output=True, stop_event=stop_event)
-             if res.returncode != 0: raise Exception("Pip install failed")
+             missing = skip_satisfied(pkgs_conda, prefix=conda_prefix)
+             if missing:
+                 echo(f"正在安装其他依赖 (Pip)...")
+                 # Assume 'pip' is in path
+                 res = pip_install_with_failover("pip", missing, extra_args=pip_extra, stop_event=stop_event)
+                 if res.returncode != 0: raise Exception("Pip install failed")
         else:
-             print(f"正在当前 Conda 环境安装...")
-             pkgs_str = " ".join(pkgs_conda)
-             res = run_command(f"conda install -y {pkgs_str} -c conda-forge", stream_output=True, stop_event=stop_event)
-             if res.returncode != 0: raise Exception("Conda install failed")
+             missing = skip_satisfied(pkgs_conda, prefix=conda_prefix)
+             if missing:
+                 echo(f"正在当前 Conda 环境安装...")
+                 pkgs_str = " ".join(missing)
+                 with CONDA_LOCK:
+                     res = run_command(f"conda install -y {pkgs_str} -c conda-forge", stream_output=True, stop_event=stop_event)
+                 if res.returncode != 0: raise Exception("Conda install failed")
         return {"message": "当前 Conda 环境安装成功！", "type": "conda_existing"}
 
     # 3. Handle Target: Current Pip (Global/User)
     elif target == 'pip_current':
-        print(f"正在使用 Pip 安装 ({len(pkgs_pip)}个)...")
+        echo(f"正在使用 Pip 安装 ({len(pkgs_pip)}个)...")
         
         # Install generic packages first
         # Filter out torch pkgs if we need special index
-        if suite == 'dl_torch':
-            generic_pkgs = [p for p in pkgs_pip if p not in ['torch', 'torchvision', 'torchaudio']]
-            torch_related = ['torch', 'torchvision', 'torchaudio']
+        if torch_plan:
+            generic_pkgs = skip_satisfied([p for p in pkgs_pip if p not in torch_plan['packages']])
+            # A CPU build must not satisfy a CUDA request: match the local version label of the index (.../whl/cu121)
+            torch_tag = torch_extra_index.rstrip('/').rsplit('/', 1)[-1] if torch_extra_index else None
+            torch_related = skip_satisfied(list(torch_plan['packages']), local_tag=torch_tag)
             
             # 1. Install Generic
             if generic_pkgs:
-                pkgs_str = " ".join(generic_pkgs)
-                cmd = f"\"{sys.executable}\" -m pip install {pkgs_str} -i {mirror_url}"
-                res = run_command(cmd, stream_output=True, stop_event=stop_event)
+                res = pip_install_with_failover(f"\"{sys.executable}\" -m pip", generic_pkgs, extra_args=pip_extra, stop_event=stop_event)
                 if res.returncode != 0: raise Exception("Pip install failed")
             
             if stop_event and stop_event.is_set(): raise InterruptedError()
 
+            if not torch_related:
+                return {"message": "Pip 安装成功！(依赖均已满足)", "type": "pip"}
+
             # 2. Install Torch with Index
-            print(f"正在安装 PyTorch ({torch_extra_index or 'Default Index'})...")
+            echo(f"正在安装 PyTorch ({torch_extra_index or 'Default Index'})...")
+
+            # Multi-GB CUDA wheels are prefetched in resumable chunks and handed to pip as local files
+            torch_targets = list(torch_related)
+            if torch_extra_index:
+                local_wheels = prefetch_wheels(torch_related, torch_extra_index, stop_event=stop_event)
+                torch_targets = [f"\"{local_wheels[p]}\"" if p in local_wheels else p for p in torch_related]
             
-            cmd_parts = [f"\"{sys.executable}\"", "-m", "pip", "install"] + torch_related
+            cmd_parts = [f"\"{sys.executable}\"", "-m", "pip", "install"] + torch_targets
             if torch_extra_index:
                 cmd_parts += ["--index-url", torch_extra_index]
             else:
@@ -430,10 +536,10 @@ def install_suite(suite, target, env_name=None, custom_packages=None, stop_event
             
         else:
             # Normal install
-            pkgs_str = " ".join(pkgs_pip)
-            cmd = f"\"{sys.executable}\" -m pip install {pkgs_str} -i {mirror_url}"
-            res = run_command(cmd, stream_output=True, stop_event=stop_event)
-            if res.returncode != 0: raise Exception("Pip install failed")
+            missing = skip_satisfied(pkgs_pip)
+            if missing:
+                res = pip_install_with_failover(f"\"{sys.executable}\" -m pip", missing, extra_args=pip_extra, stop_event=stop_event)
+                if res.returncode != 0: raise Exception("Pip install failed")
             
         return {"message": "Pip 安装成功！", "type": "pip"}
 
@@ -446,31 +552,32 @@ def quick_install_pkg(pkg, stop_event=None):
     For this demo, we'll just use the current python's pip but nicely formatted.
     Realistically, user wants a NEW env for this.
     """
-    mirror_url = "https://pypi.tuna.tsinghua.edu.cn/simple"
-    
     if pkg == "pytorch":
-        print("正在安装 PyTorch (CPU版, 适合快速学习)...")
-        cmd = f"\"{sys.executable}\" -m pip install torch torchvision torchaudio -i {mirror_url}"
-        res = run_command(cmd, stream_output=True, stop_event=stop_event)
+        missing = skip_satisfied(["torch", "torchvision", "torchaudio"])
+        if not missing:
+            return {"message": "PyTorch 已安装，无需重复安装", "type": "pip"}
+        echo("正在安装 PyTorch (CPU版, 适合快速学习)...")
+        res = pip_install_with_failover(f"\"{sys.executable}\" -m pip", missing, stop_event=stop_event)
         if res.returncode != 0: raise Exception("PyTorch install failed")
         return {"message": "PyTorch 安装完成", "type": "pip"}
         
     elif pkg == "tensorflow":
-        print("正在安装 TensorFlow...")
-        cmd = f"\"{sys.executable}\" -m pip install tensorflow -i {mirror_url}"
-        res = run_command(cmd, stream_output=True, stop_event=stop_event)
+        if not skip_satisfied(["tensorflow"]):
+            return {"message": "TensorFlow 已安装，无需重复安装", "type": "pip"}
+        echo("正在安装 TensorFlow...")
+        res = pip_install_with_failover(f"\"{sys.executable}\" -m pip", ["tensorflow"], stop_event=stop_event)
         if res.returncode != 0: raise Exception("TensorFlow install failed")
         return {"message": "TensorFlow 安装完成", "type": "pip"}
         
     elif pkg == "react":
-        print("正在创建 React 项目 (create-react-app)...")
+        echo("正在创建 React 项目 (create-react-app)...")
         # Check npm
         res = run_command("npm create vite@latest my-react-app -- --template react", stream_output=True, stop_event=stop_event)
         if res.returncode != 0: raise Exception("React init failed")
         return {"message": "React 项目模板已创建 (当前目录下 my-react-app)", "env_path": os.path.join(os.getcwd(), "my-react-app"), "type": "npm", "env_name": "my-react-app"}
         
     elif pkg == "vue":
-        print("正在创建 Vue 项目...")
+        echo("正在创建 Vue 项目...")
         res = run_command("npm create vite@latest my-vue-app -- --template vue", stream_output=True, stop_event=stop_event)
         if res.returncode != 0: raise Exception("Vue init failed")
         return {"message": "Vue 项目模板已创建 (当前目录下 my-vue-app)", "env_path": os.path.join(os.getcwd(), "my-vue-app"), "type": "npm", "env_name": "my-vue-app"}
@@ -0,0 +1,454 @@
+import os
+import sys
+import json
+import time
+import contextlib
+import sqlite3
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ..core.utils import run_command, Colors
+from ..core.fsutil import dir_size, remove_tree
+from ..core.progress import format_bytes
+from .env_inspect import site_packages_dirs
+from .project_scanner import canonicalize, parse_manifest
+from .env_manager import CONDA_LOCK
+
+REGISTRY_PATH = Path(".cache") / "envs.db"
+STALE_DAYS = 30
+HEALTH_TIMEOUT = 120
+MAX_HEALTH_IMPORTS = 5
+REFRESH_WORKERS = 4
+TRASH_MARKER = ".deleting-"
+# Only envs this tool owns outright are garbage-collected; npm "envs" are the user's project directories
+GC_TYPES = ("venv", "conda")
+
+# Distribution name -> import name where they differ
+IMPORT_NAMES = {
+    "scikit-learn": "sklearn",
+    "opencv-python": "cv2",
+    "pillow": "PIL",
+    "beautifulsoup4": "bs4",
+    "pyyaml": "yaml",
+    "python-dotenv": "dotenv",
+    "pytorch-lightning": "pytorch_lightning",
+    "tensorflow-macos": "tensorflow",
+    "tensorflow-datasets": "tensorflow_datasets",
+    "pyqt6": "PyQt6",
+    "pyside6": "PySide6",
+    "cx-freeze": "cx_Freeze",
+    "jupyterlab": "jupyterlab",
+}
+# Packages that never import cleanly outside their runtime (GUI toolkits, build tools)
+SKIP_IMPORTS = {"buildozer", "briefcase", "pyinstaller", "tensorflow-metal", "gunicorn", "waitress", "uvicorn"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS envs (
+    key TEXT PRIMARY KEY,
+    env_name TEXT,
+    env_path TEXT,
+    type TEXT,
+    suite TEXT,
+    packages TEXT,
+    created_at REAL,
+    last_used REAL,
+    size_bytes INTEGER,
+    healthy INTEGER,
+    health_error TEXT,
+    checked_at REAL
+)
+"""
+_DELETIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deletions (
+    trash_path TEXT PRIMARY KEY,
+    label TEXT,
+    size_bytes INTEGER,
+    started_at REAL
+)
+"""
+_COLUMNS = ("key", "env_name", "env_path", "type", "suite", "packages", "created_at",
+            "last_used", "size_bytes", "healthy", "health_error", "checked_at")
+_WRITE_LOCK = threading.Lock()
+_PURGING = set()
+_PURGING_LOCK = threading.Lock()
+
+@contextlib.contextmanager
+def _connect():
+    """One short-lived connection per call: the registry is touched from job and request threads."""
+    REGISTRY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(REGISTRY_PATH), timeout=10)
+    try:
+        conn.execute(_SCHEMA)
+        conn.execute(_DELETIONS_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def _row_to_entry(row):
+    entry = dict(zip(_COLUMNS, row))
+    entry["packages"] = json.loads(entry["packages"] or "[]")
+    entry["healthy"] = None if entry["healthy"] is None else bool(entry["healthy"])
+    # Older callers (web UI) expect a millisecond timestamp
+    entry["timestamp"] = int((entry["created_at"] or 0) * 1000)
+    return entry
+
+def _env_key(env_name=None, env_path=None):
+    return os.path.abspath(env_path) if env_path else f"conda:{env_name}"
+
+def record_env(ret, suite=None, packages=None):
+    """Records an env returned by install_suite / create_*_and_install / quick_install_pkg."""
+    if not isinstance(ret, dict) or not (ret.get("env_name") or ret.get("env_path")):
+        return None
+    env_path = ret.get("env_path")
+    if packages is None and ret.get("type") == "venv" and env_path:
+        # Project venvs live next to the requirements.txt they were built from
+        req_file = os.path.join(os.path.dirname(env_path), "requirements.txt")
+        if os.path.isfile(req_file):
+            packages = [d["name"] for d in parse_manifest(req_file)["deps"]]
+    key = _env_key(ret.get("env_name"), env_path)
+    now = time.time()
+    with _WRITE_LOCK, _connect() as conn:
+        # A rebuilt env keeps its first created_at but loses stale stats
+        conn.execute(
+            "INSERT INTO envs (key, env_name, env_path, type, suite, packages, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET env_name=excluded.env_name, env_path=excluded.env_path, "
+            "type=excluded.type, suite=COALESCE(excluded.suite, suite), packages=excluded.packages, "
+            "last_used=excluded.last_used, healthy=NULL, health_error=NULL, checked_at=NULL",
+            (key, ret.get("env_name"), env_path, ret.get("type"), suite, json.dumps(list(packages or [])), now, now),
+        )
+    return key
+
+def list_envs():
+    """All registered envs, newest first."""
+    with _connect() as conn:
+        rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM envs ORDER BY created_at DESC").fetchall()
+    return [_row_to_entry(r) for r in rows]
+
+def find_env(env_name=None, env_path=None):
+    for entry in list_envs():
+        if (env_path and entry["env_path"] and os.path.abspath(entry["env_path"]) == os.path.abspath(env_path)) or \
+           (env_name and entry["env_name"] == env_name):
+            return entry
+    return None
+
+def forget_env(key):
+    with _WRITE_LOCK, _connect() as conn:
+        conn.execute("DELETE FROM envs WHERE key = ?", (key,))
+
+def _update(key, **fields):
+    if not fields:
+        return
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with _WRITE_LOCK, _connect() as conn:
+        conn.execute(f"UPDATE envs SET {cols} WHERE key = ?", (*fields.values(), key))
+
+def _conda_env_paths():
+    """env name -> prefix, from `conda env list --json`."""
+    res = run_command("conda env list --json")
+    if not res or res.returncode != 0:
+        return {}
+    try:
+        prefixes = json.loads(res.stdout).get("envs", [])
+    except ValueError:
+        return {}
+    return {os.path.basename(p): p for p in prefixes}
+
+def env_python(entry):
+    """Interpreter of a registered env, or None for non-Python envs (npm templates)."""
+    path = entry.get("env_path")
+    if not path or entry.get("type") not in ("venv", "conda"):
+        return None
+    if sys.platform == "win32":
+        candidates = [os.path.join(path, "Scripts", "python.exe"), os.path.join(path, "python.exe")]
+    else:
+        candidates = [os.path.join(path, "bin", "python")]
+    return next((c for c in candidates if os.path.exists(c)), None)
+
+def _usage_probes(entry):
+    """
+    Interpreter startup reads pyvenv.cfg and lists site-packages (for .pth files),
+    so their atime tracks the last time the env was actually used.
+    Returns {path: (atime, mtime)}.
+    """
+    path = entry["env_path"]
+    probes = [os.path.join(path, "pyvenv.cfg"), os.path.join(path, "conda-meta", "history")]
+    if entry.get("type") in ("venv", "conda"):
+        probes += site_packages_dirs(path)
+    else:
+        probes.append(path)
+    stamps = {}
+    for p in probes:
+        try:
+            st = os.stat(p)
+            stamps[p] = (st.st_atime_ns, st.st_mtime_ns)
+        except OSError:
+            continue
+    return stamps
+
+def _restore_atimes(stamps):
+    # The size walk and the health check touch the same files; do not let them count as usage
+    for p, times in stamps.items():
+        try:
+            os.utime(p, ns=times)
+        except OSError:
+            pass
+
+def _health_imports(packages):
+    names = []
+    for pkg in packages:
+        name = canonicalize(pkg.split("==")[0].split(">")[0].split("<")[0].strip('"'))
+        if name in SKIP_IMPORTS:
+            continue
+        module = IMPORT_NAMES.get(name, name.replace("-", "_"))
+        if module not in names:
+            names.append(module)
+    # torch/tensorflow are the usual reason a suite env exists and the usual thing that breaks
+    names.sort(key=lambda n: n not in ("torch", "tensorflow"))
+    return names[:MAX_HEALTH_IMPORTS]
+
+def check_health(entry):
+    """(healthy, error) — the interpreter starts and the key packages import."""
+    python = env_python(entry)
+    if python is None:
+        if entry.get("type") in ("venv", "conda"):
+            return False, "未找到 Python 解释器"
+        return None, None
+    imports = _health_imports(entry.get("packages") or [])
+    code = f"import {', '.join(imports)}" if imports else "import sys"
+    try:
+        res = subprocess.run([python, "-c", code], capture_output=True, text=True,
+                             encoding="utf-8", errors="ignore", timeout=HEALTH_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return False, f"导入超时 ({HEALTH_TIMEOUT}s)"
+    except OSError as e:
+        return False, str(e)
+    if res.returncode != 0:
+        lines = [l for l in res.stderr.strip().splitlines() if l.strip()]
+        return False, lines[-1] if lines else f"exit {res.returncode}"
+    return True, None
+
+def refresh_env(entry, conda_paths=None, stop_event=None, health=True):
+    """Recomputes disk usage, last-used time and health for one env. Returns the updated entry."""
+    if entry.get("type") == "conda" and not entry.get("env_path"):
+        paths = conda_paths if conda_paths is not None else _conda_env_paths()
+        if entry["env_name"] in paths:
+            entry["env_path"] = paths[entry["env_name"]]
+            _update(entry["key"], env_path=entry["env_path"])
+
+    path = entry.get("env_path")
+    if not path or not os.path.isdir(path):
+        fields = {"size_bytes": 0, "healthy": 0, "health_error": "环境目录不存在", "checked_at": time.time()}
+    else:
+        stamps = _usage_probes(entry)
+        fields = {"checked_at": time.time()}
+        if stamps:
+            fields["last_used"] = max(max(t) for t in stamps.values()) / 1e9
+        try:
+            fields["size_bytes"] = dir_size(path, stop_event=stop_event)
+            if health:
+                healthy, error = check_health(entry)
+                fields["healthy"] = None if healthy is None else int(healthy)
+                fields["health_error"] = error
+        finally:
+            _restore_atimes(stamps)
+    _update(entry["key"], **fields)
+    entry.update(fields)
+    if "healthy" in fields and fields["healthy"] is not None:
+        entry["healthy"] = bool(fields["healthy"])
+    return entry
+
+def refresh_all(stop_event=None, health=True, workers=REFRESH_WORKERS):
+    """Refreshes stats of every registered env in parallel. Returns the refreshed entries."""
+    entries = list_envs()
+    if not entries:
+        return []
+    conda_paths = _conda_env_paths() if any(e["type"] == "conda" and not e["env_path"] for e in entries) else {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(refresh_env, e, conda_paths, stop_event, health) for e in entries]
+        return [f.result() for f in futures]
+
+def stale_envs(days=STALE_DAYS, entries=None):
+    """Venv/conda envs whose directory is gone, or that have not been used for `days` days."""
+    cutoff = time.time() - days * 86400
+    stale = []
+    for entry in entries if entries is not None else list_envs():
+        if entry.get("type") not in GC_TYPES:
+            continue
+        path = entry.get("env_path")
+        if entry["type"] == "conda" and not path:
+            continue  # Not resolved yet; refresh first
+        if not path or not os.path.isdir(path) or (entry["last_used"] or entry["created_at"] or 0) < cutoff:
+            stale.append(entry)
+    return stale
+
+def _is_conda_prefix(path):
+    return bool(path) and os.path.isdir(os.path.join(path, "conda-meta"))
+
+def _conda_remove(target):
+    """`conda env remove` for '-n <name>' or '-p "<prefix>"'. Returns (ok, output)."""
+    with CONDA_LOCK:
+        res = run_command(f"conda env remove {target} -y")
+    return bool(res) and res.returncode == 0, (res.stdout if res else "")
+
+def _unregister_conda_prefix(path):
+    """
+    Drops a moved prefix from conda's environments.txt. conda only removes what it recognizes
+    as an env, so a bare placeholder (conda-meta/history) is left for it to remove at once.
+    """
+    try:
+        os.makedirs(os.path.join(path, "conda-meta"), exist_ok=True)
+        open(os.path.join(path, "conda-meta", "history"), "a").close()
+    except OSError:
+        return
+    ok, output = _conda_remove(f'-p "{path}"')
+    if not ok:
+        Colors.print_warning(f"未能从 conda 环境列表移除 {path}: {output.strip()[-200:]}")
+        remove_tree(path)
+
+def detach_env(entry):
+    """
+    Moves an env out of the way with a single atomic rename and queues the renamed
+    directory for removal, so the env disappears at once however large it is.
+    Returns the trash path, or None when nothing is left on disk.
+    """
+    path = entry.get("env_path")
+    is_conda = entry.get("type") == "conda"
+    if is_conda and not _is_conda_prefix(path):
+        # Missing or placeholder path (e.g. "Unknown" when the prefix lookup failed)
+        path = _conda_env_paths().get(entry["env_name"])
+        if not _is_conda_prefix(path):
+            # Unknown prefix: leave it to conda
+            ok, output = _conda_remove(f"-n {entry['env_name']}")
+            if not ok and "EnvironmentLocationNotFound" not in output:
+                raise OSError(f"Conda remove failed: {output}")
+            forget_env(entry["key"])
+            return None
+    if not path or not os.path.isdir(path):
+        forget_env(entry["key"])
+        return None
+
+    path = os.path.abspath(path)
+    trash = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}{TRASH_MARKER}{int(time.time())}")
+    os.rename(path, trash)  # Fails on Windows while a process still holds files of the env
+    with _WRITE_LOCK, _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO deletions (trash_path, label, size_bytes, started_at) VALUES (?, ?, ?, ?)",
+            (trash, entry.get("env_name") or path, entry.get("size_bytes"), time.time()),
+        )
+    forget_env(entry["key"])
+    if is_conda:
+        _unregister_conda_prefix(path)
+    return trash
+
+def pending_deletions():
+    """Renamed env directories whose removal has not finished (stopped jobs, restarts)."""
+    with _connect() as conn:
+        rows = conn.execute("SELECT trash_path, label, size_bytes, started_at FROM deletions ORDER BY started_at").fetchall()
+    pending = []
+    for trash, label, size, started in rows:
+        if os.path.lexists(trash):
+            pending.append({"trash_path": trash, "label": label, "size_bytes": size, "started_at": started})
+        else:
+            _drop_deletion(trash)
+    return pending
+
+def _drop_deletion(trash):
+    with _WRITE_LOCK, _connect() as conn:
+        conn.execute("DELETE FROM deletions WHERE trash_path = ?", (trash,))
+
+def purge(trash, stop_event=None, on_progress=None):
+    """Removes a detached env directory in parallel. Returns bytes freed (0 if another job owns it)."""
+    with _PURGING_LOCK:
+        if trash in _PURGING:
+            return 0
+        _PURGING.add(trash)
+    try:
+        freed = remove_tree(trash, stop_event=stop_event, on_progress=on_progress)
+        _drop_deletion(trash)
+        return freed
+    finally:
+        with _PURGING_LOCK:
+            _PURGING.discard(trash)
+
+def delete_envs(entries, stop_event=None, on_progress=None, resume=True):
+    """
+    Deletes several envs: all are detached first, then removed one after another with the
+    parallel walker (which already keeps the disk busy). With resume, leftovers of earlier
+    interrupted deletions are finished as well.
+    on_progress(freed_bytes, total_bytes) reports cumulative progress.
+    Returns: { 'deleted': [label], 'failed': [(label, error)], 'freed_bytes': int, 'total_bytes': int }
+    """
+    summary = {"deleted": [], "failed": [], "freed_bytes": 0, "total_bytes": 0}
+    queued = []
+    for entry in entries:
+        label = entry.get("env_name") or entry.get("env_path")
+        try:
+            trash = detach_env(entry)
+        except OSError as e:
+            summary["failed"].append((label, str(e)))
+            continue
+        summary["deleted"].append(label)
+        if trash:
+            queued.append(trash)
+
+    pending = pending_deletions()
+    if not resume:
+        pending = [p for p in pending if p["trash_path"] in queued]
+    for p in pending:
+        if p["size_bytes"] is None:
+            p["size_bytes"] = dir_size(p["trash_path"], stop_event=stop_event)
+    summary["total_bytes"] = sum(p["size_bytes"] for p in pending)
+
+    lock = threading.Lock()
+    def progress(n):
+        with lock:
+            summary["freed_bytes"] += n
+            if on_progress:
+                on_progress(summary["freed_bytes"], summary["total_bytes"])
+
+    for p in pending:
+        if stop_event and stop_event.is_set():
+            raise InterruptedError()
+        Colors.print_info(f"正在删除 {p['label']} ({format_bytes(p['size_bytes'])})...")
+        purge(p["trash_path"], stop_event=stop_event, on_progress=progress)
+    return summary
+
+def delete_env(entry, stop_event=None, on_progress=None):
+    """Removes one env from disk and from the registry. Returns (ok, message)."""
+    summary = delete_envs([entry], stop_event=stop_event, on_progress=on_progress, resume=False)
+    if summary["failed"]:
+        return False, f"Deletion failed: {summary['failed'][0][1]}"
+    return True, "Environment deleted"
+
+def gc_envs(days=STALE_DAYS, dry_run=False, stop_event=None, on_progress=None):
+    """
+    Deletes venv/conda envs unused for `days` days and drops records of those that no longer exist.
+    Returns: { 'deleted': [name], 'forgotten': [name], 'failed': [name], 'freed_bytes': int }
+    """
+    entries = refresh_all(stop_event=stop_event, health=False)
+    summary = {"deleted": [], "forgotten": [], "failed": [], "freed_bytes": 0}
+    doomed = []
+    for entry in stale_envs(days, entries):
+        label = entry["env_name"] or entry["env_path"]
+        if entry["env_path"] and os.path.isdir(entry["env_path"]):
+            doomed.append(entry)
+            summary["deleted"].append(label)
+            summary["freed_bytes"] += entry["size_bytes"] or 0
+        else:
+            if not dry_run:
+                forget_env(entry["key"])
+            summary["forgotten"].append(label)
+    if dry_run or not doomed:
+        return summary
+
+    Colors.print_info(f"删除 {len(doomed)} 个闲置环境 (约 {format_bytes(summary['freed_bytes'])})")
+    result = delete_envs(doomed, stop_event=stop_event, on_progress=on_progress)
+    for label, error in result["failed"]:
+        Colors.print_warning(f"{label}: {error}")
+        summary["deleted"].remove(label)
+        summary["failed"].append(label)
+    summary["freed_bytes"] = result["freed_bytes"]
+    return summary
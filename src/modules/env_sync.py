@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import time
+import select
+import struct
+from ..core.utils import run_command, Colors, echo
+from .project_scanner import parse_manifest, scan_project
+from .env_manager import pip_install_with_failover, CONDA_LOCK
+
+SYNC_KINDS = ("requirements.txt", "environment.yml")
+DEBOUNCE_SECONDS = 0.5
+
+# inotify(7) event masks
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_EVENT_HDR = struct.Struct("iIII")
+
+class _Inotify:
+    """Thin ctypes wrapper over inotify; watches the directories holding the manifests."""
+    def __init__(self, dirs):
+        import ctypes
+        import ctypes.util
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        for d in dirs:
+            if self.libc.inotify_add_watch(self.fd, os.fsencode(d), mask) < 0:
+                self.close()
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {d}")
+
+    def wait(self, timeout):
+        """Blocks until any event or timeout; returns True when something happened."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class ManifestWatcher:
+    """
+    Reports which manifest files changed. Uses inotify on Linux and falls back
+    to polling (mtime_ns, size) signatures elsewhere or when inotify fails.
+    """
+    def __init__(self, paths, interval=1.0):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self.snapshot = self._signatures()
+        self.backend = "polling"
+        self.inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                self.inotify = _Inotify(sorted({os.path.dirname(p) for p in self.paths}))
+                self.backend = "inotify"
+            except (OSError, AttributeError):
+                self.inotify = None
+
+    def _signatures(self):
+        sig = {}
+        for p in self.paths:
+            try:
+                st = os.stat(p)
+                sig[p] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                sig[p] = None
+        return sig
+
+    def poll(self, stop_event=None):
+        """Waits for the next change. Returns the list of changed paths, or [] once stopped."""
+        while not (stop_event and stop_event.is_set()):
+            if self.inotify:
+                # Wake up at least once a second so stop_event is honored
+                if not self.inotify.wait(1.0):
+                    continue
+            elif stop_event:
+                if stop_event.wait(self.interval):
+                    break
+            else:
+                time.sleep(self.interval)
+            # Editors write in several steps (truncate, write, rename); let them settle
+            time.sleep(DEBOUNCE_SECONDS)
+            current = self._signatures()
+            changed = [p for p in self.paths if current[p] != self.snapshot.get(p)]
+            self.snapshot = current
+            if changed:
+                return changed
+        return []
+
+    def close(self):
+        if self.inotify:
+            self.inotify.close()
+
+def _index(deps, manager):
+    return {d["name"]: d for d in deps if d.get("manager", "pip") == manager}
+
+def _requirement_key(dep):
+    # Extras and markers count as well as the version spec; the spelling of the name and whitespace do not
+    rest = re.sub(r"^\s*[A-Za-z0-9._-]+", "", dep.get("raw", dep["spec"]))
+    return "".join(rest.split())
+
+def diff_requirements(old_deps, new_deps, manager="pip"):
+    """
+    Compares two parsed dependency lists (see project_scanner).
+    Returns: { 'added': [dep], 'changed': [dep], 'removed': [dep] }
+    """
+    old, new = _index(old_deps, manager), _index(new_deps, manager)
+    return {
+        "added": [new[n] for n in new if n not in old],
+        "changed": [new[n] for n in new if n in old and _requirement_key(new[n]) != _requirement_key(old[n])],
+        "removed": [old[n] for n in old if n not in new],
+    }
+
+def resolve_sync_target(path, env_type=None):
+    """
+    Finds the env created for `path` by create_venv_and_install / create_conda_and_install.
+    Returns: { 'type', 'pip', 'env_name' }
+    """
+    venv_path = os.path.join(path, ".venv")
+    if env_type in (None, "venv") and os.path.isdir(venv_path):
+        pip_exe = os.path.join(venv_path, "Scripts", "pip") if sys.platform == "win32" else os.path.join(venv_path, "bin", "pip")
+        return {"type": "venv", "pip": f"\"{pip_exe}\"", "env_name": None}
+    if env_type in (None, "conda"):
+        env_name = os.path.basename(os.path.abspath(path)) + "_env"
+        return {"type": "conda", "pip": f"conda run --no-capture-output -n {env_name} pip", "env_name": env_name}
+    raise ValueError(f"未找到可同步的环境: {path}")
+
+def _shell_arg(text):
+    # Requirement lines and match specs accept either quote, so double quotes never need escaping
+    return '"' + text.replace('"', "'") + '"'
+
+def _shell_requirement(dep):
+    """The full requirement line or conda match spec (extras, markers, channel kept) as one shell argument."""
+    return _shell_arg(dep["raw"])
+
+def apply_delta(target, pip_delta, conda_delta=None, uninstall_removed=False, stop_event=None):
+    """Installs added, upgrades changed and optionally removes deleted requirements. Returns a summary dict."""
+    summary = {"installed": [], "upgraded": [], "removed": []}
+
+    if pip_delta["added"]:
+        pkgs = [_shell_requirement(d) for d in pip_delta["added"]]
+        Colors.print_info(f"安装新增依赖: {', '.join(d['raw'] for d in pip_delta['added'])}")
+        res = pip_install_with_failover(target["pip"], pkgs, stop_event=stop_event)
+        if res.returncode != 0:
+            raise Exception("新增依赖安装失败")
+        summary["installed"] = [d["raw"] for d in pip_delta["added"]]
+
+    if pip_delta["changed"]:
+        pkgs = [_shell_requirement(d) for d in pip_delta["changed"]]
+        Colors.print_info(f"更新版本约束: {', '.join(d['raw'] for d in pip_delta['changed'])}")
+        res = pip_install_with_failover(target["pip"], pkgs, extra_args=" --upgrade", stop_event=stop_event)
+        if res.returncode != 0:
+            raise Exception("依赖升级失败")
+        summary["upgraded"] = [d["raw"] for d in pip_delta["changed"]]
+
+    if uninstall_removed and pip_delta["removed"]:
+        names = " ".join(_shell_arg(d["name"]) for d in pip_delta["removed"])
+        Colors.print_info(f"卸载已移除的依赖: {', '.join(d['name'] for d in pip_delta['removed'])}")
+        run_command(f"{target['pip']} uninstall -y {names}", stream_output=True, stop_event=stop_event)
+        summary["removed"] += [d["name"] for d in pip_delta["removed"]]
+
+    if conda_delta and target["type"] == "conda":
+        env = target["env_name"]
+        specs = [_shell_requirement(d) for d in conda_delta["added"] + conda_delta["changed"]]
+        if specs:
+            Colors.print_info(f"同步 Conda 依赖: {' '.join(specs)}")
+            with CONDA_LOCK:
+                res = run_command(f"conda install -n {env} -y {' '.join(specs)}", stream_output=True, stop_event=stop_event)
+            if res.returncode != 0:
+                raise Exception("Conda 依赖同步失败")
+            summary["installed"] += [d["raw"] for d in conda_delta["added"]]
+            summary["upgraded"] += [d["raw"] for d in conda_delta["changed"]]
+        if uninstall_removed and conda_delta["removed"]:
+            names = " ".join(_shell_arg(d["name"]) for d in conda_delta["removed"])
+            with CONDA_LOCK:
+                run_command(f"conda remove -n {env} -y {names}", stream_output=True, stop_event=stop_event)
+            summary["removed"] += [d["name"] for d in conda_delta["removed"]]
+
+    return summary
+
+def _sync_manifests(path):
+    scan = scan_project(path, max_depth=0)
+    top = scan["projects"][0] if scan["projects"] else None
+    return [m["path"] for m in (top["manifests"] if top else []) if m["kind"] in SYNC_KINDS]
+
+def watch_project(path, env_type=None, uninstall_removed=False, stop_event=None, on_sync=None):
+    """
+    Watches the project's requirements/environment manifests and applies only the
+    delta to its existing env until stop_event is set. Returns the list of sync summaries.
+    """
+    manifests = _sync_manifests(path)
+    if not manifests:
+        raise ValueError("未找到 requirements.txt / environment.yml，无法进入监听模式")
+    target = resolve_sync_target(path, env_type)
+
+    state = {p: parse_manifest(p)["deps"] for p in manifests}
+    watcher = ManifestWatcher(manifests)
+    Colors.print_info(f"监听模式已启动 ({watcher.backend}): {', '.join(os.path.basename(p) for p in manifests)} -> {target['type']} 环境")
+    history = []
+    try:
+        while True:
+            changed = watcher.poll(stop_event)
+            if not changed:
+                break
+            for p in changed:
+                started = time.time()
+                old = state.get(p, [])
+                new = parse_manifest(p)["deps"] if os.path.exists(p) else []
+                pip_delta = diff_requirements(old, new, "pip")
+                conda_delta = diff_requirements(old, new, "conda")
+                if not any(pip_delta.values()) and not any(conda_delta.values()):
+                    state[p] = new
+                    echo(f"{os.path.basename(p)} 已变更，但依赖集合无变化")
+                    continue
+                Colors.print_info(f"检测到 {os.path.basename(p)} 变更，正在增量同步...")
+                try:
+                    summary = apply_delta(target, pip_delta, conda_delta, uninstall_removed, stop_event)
+                except Exception as e:
+                    # Keep the last synced state so the same delta is retried on the next change
+                    Colors.print_error(f"增量同步失败，继续监听: {e}")
+                    continue
+                state[p] = new
+                summary.update({"file": os.path.basename(p), "seconds": round(time.time() - started, 1)})
+                history.append(summary)
+                Colors.print_success(f"增量同步完成 ({summary['seconds']}s): +{len(summary['installed'])} ~{len(summary['upgraded'])} -{len(summary['removed'])}")
+                if on_sync:
+                    on_sync(summary)
+    finally:
+        watcher.close()
+    return history
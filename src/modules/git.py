@@ -1,4 +1,4 @@
-from ..core.utils import run_command, Colors
+from ..core.utils import run_command, Colors, echo
 
 def set_git_proxy(port):
     Colors.print_info(f"正在配置 Git 智能分流 (GitHub 走代理 localhost:{port})...")
@@ -31,7 +31,7 @@ def diagnose_git_github(port):
     Colors.print_info("1. 检查 DNS 解析 (github.com)...")
     res_dns = run_command("nslookup github.com")
     if res_dns and "Address" in res_dns.stdout:
-        print(res_dns.stdout.strip())
+        echo(res_dns.stdout.strip())
     else:
         Colors.print_warning("DNS 解析可能存在问题")
 
@@ -39,7 +39,7 @@ def diagnose_git_github(port):
     Colors.print_info("2. 检查 Ping (直连)...")
     res_ping = run_command("ping github.com -n 4") # Windows
     if res_ping:
-        print(res_ping.stdout.strip())
+        echo(res_ping.stdout.strip())
 
     # 3. Check Proxy Connection
     Colors.print_info(f"3. 检查代理连接 (端口 {port})...")
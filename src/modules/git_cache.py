@@ -0,0 +1,148 @@
+import os
+import re
+import time
+import threading
+import subprocess
+import urllib.parse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from ..core.utils import Colors, echo
+from ..core.fsutil import dir_size
+from ..core.progress import format_bytes
+
+REFRESH_MAX_AGE = 600        # a clone refreshes its reference mirror when older than this
+REFRESH_WORKERS = 4
+# Branches and tags only: GitHub's refs/pull/* would multiply the mirror size
+FETCH_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+_LOCKS = {}
+_LOCKS_LOCK = threading.Lock()
+
+def cache_root():
+    """Reference mirrors live here; NETWORK_BOOSTER_GIT_CACHE moves them (e.g. to a shared disk)."""
+    return Path(os.environ.get("NETWORK_BOOSTER_GIT_CACHE") or Path(".cache") / "git").resolve()
+
+def _git(*args, cwd=None, timeout=None):
+    try:
+        return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True,
+                              encoding="utf-8", errors="ignore", timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return subprocess.CompletedProcess(args, 1, "", str(e))
+
+def _lock(path):
+    with _LOCKS_LOCK:
+        return _LOCKS.setdefault(str(path), threading.Lock())
+
+def normalize_url(url):
+    """'https://GitHub.com/a/b.git/' and 'git@github.com:a/b' -> 'github.com/a/b'."""
+    url = url.strip().rstrip("/")
+    m = re.match(r"^[\w.-]+@([^:/]+):(.+)$", url)
+    if m:
+        host, path = m.group(1), m.group(2)
+    else:
+        parts = urllib.parse.urlsplit(url)
+        host, path = parts.hostname or "local", parts.path
+    path = path.strip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    return f"{host.lower()}/{path}"
+
+def mirror_path(url):
+    return cache_root() / (normalize_url(url) + ".git")
+
+def _fetched_at(path):
+    fetch_head = path / "FETCH_HEAD"
+    return fetch_head.stat().st_mtime if fetch_head.exists() else 0
+
+def ensure_mirror(url, max_age=0):
+    """
+    Creates or refreshes the bare reference mirror of url (branches and tags) and returns its path,
+    or None when it could not be created. A mirror fetched within max_age seconds is not fetched again.
+    Clones borrow objects from the mirror through alternates, so it never prunes or repacks them away.
+    """
+    path = mirror_path(url)
+    with _lock(path):
+        if not (path / "HEAD").exists():
+            path.mkdir(parents=True, exist_ok=True)
+            _git("init", "--bare", "--quiet", str(path))
+            _git("remote", "add", "origin", url, cwd=path)
+            _git("config", "--unset-all", "remote.origin.fetch", cwd=path)
+            for refspec in FETCH_REFSPECS:
+                _git("config", "--add", "remote.origin.fetch", refspec, cwd=path)
+            _git("config", "gc.auto", "0", cwd=path)
+            _git("config", "gc.pruneExpire", "never", cwd=path)
+        elif max_age and time.time() - _fetched_at(path) < max_age:
+            return path
+        res = _git("fetch", "--prune", "--quiet", "origin", cwd=path)
+        if res.returncode != 0:
+            Colors.print_warning(f"参考缓存更新失败 ({normalize_url(url)}): {res.stderr.strip()[-200:]}")
+            # An empty mirror is useless; a stale one still saves most of the download
+            if not _fetched_at(path):
+                return None
+        else:
+            # HEAD follows the upstream default branch so `git log` in the mirror is meaningful
+            _git("remote", "set-head", "origin", "--auto", cwd=path)
+        return path
+
+def list_mirrors():
+    """[{'url', 'path', 'fetched_at', 'size_bytes'}] for every reference mirror."""
+    root = cache_root()
+    if not root.exists():
+        return []
+    mirrors = []
+    for head in root.glob("**/*.git/HEAD"):
+        path = head.parent
+        res = _git("config", "--get", "remote.origin.url", cwd=path)
+        mirrors.append({"url": res.stdout.strip(), "path": str(path),
+                        "fetched_at": _fetched_at(path), "size_bytes": dir_size(path)})
+    return mirrors
+
+def refresh_mirrors(max_age=0):
+    """Fetches every reference mirror concurrently. Returns {url: ok}."""
+    urls = [m["url"] for m in list_mirrors() if m["url"]]
+    with ThreadPoolExecutor(max_workers=REFRESH_WORKERS) as pool:
+        paths = list(pool.map(lambda u: ensure_mirror(u, max_age), urls))
+    return {u: p is not None for u, p in zip(urls, paths)}
+
+def clone(url, dest=None, dissociate=False, refresh=True):
+    """
+    Clones url, taking every object the reference mirror already has from local disk
+    (--reference-if-able), so only the missing objects cross the network.
+    dissociate copies the borrowed objects so the clone no longer depends on the mirror.
+    """
+    dest = dest or normalize_url(url).rsplit("/", 1)[-1]
+    started = time.time()
+    mirror = ensure_mirror(url, REFRESH_MAX_AGE) if refresh else mirror_path(url)
+    if mirror:
+        Colors.print_info(f"参考缓存: {mirror} (准备耗时 {time.time() - started:.1f}s)")
+    args = ["clone", "--progress"]
+    if mirror:
+        args += ["--reference-if-able", str(mirror)]
+        if dissociate:
+            args.append("--dissociate")
+    started = time.time()
+    res = subprocess.run(["git", *args, url, dest])
+    if res.returncode == 0:
+        Colors.print_success(f"克隆完成: {dest} ({time.time() - started:.1f}s)")
+        return True
+    Colors.print_error(f"克隆失败 (exit {res.returncode})")
+    return False
+
+def run_git_cache_refresh(interval_minutes=0):
+    """Foreground entry point for `main.py --git-cache-refresh`; loops every interval_minutes when given."""
+    while True:
+        mirrors = list_mirrors()
+        if not mirrors:
+            Colors.print_warning(f"还没有参考缓存，先用 --git-clone 克隆一次 ({cache_root()})")
+            return
+        Colors.print_info(f"正在并发更新 {len(mirrors)} 个参考缓存...")
+        for url, ok in refresh_mirrors().items():
+            echo(f"  {'✅' if ok else '❌'} {url}")
+        total = sum(m["size_bytes"] for m in list_mirrors())
+        Colors.print_success(f"参考缓存已更新: {cache_root()} ({format_bytes(total)})")
+        if not interval_minutes:
+            return
+        try:
+            time.sleep(interval_minutes * 60)
+        except KeyboardInterrupt:
+            return
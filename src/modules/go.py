@@ -1,12 +1,15 @@
 from ..core.utils import run_command, Colors
+from ..core.mirrors import MIRRORS, resolve
 
-def set_go_proxy(source="goproxy.cn"):
-    """Sets GOPROXY environment variable."""
-    proxies = {
-        "goproxy.cn": "https://goproxy.cn,direct",
-        "aliyun": "https://mirrors.aliyun.com/goproxy/,direct",
-    }
-    url = proxies.get(source, proxies["goproxy.cn"])
+GO_PROXIES = MIRRORS["go"]
+
+def set_go_proxy(source="auto"):
+    """Sets GOPROXY environment variable: a GO_PROXIES name, "auto" (currently best) or "local" (go_cache)."""
+    if source == "local":
+        from .go_cache import local_goproxy_url
+        url = f"{local_goproxy_url()},direct"
+    else:
+        url = f"{resolve('go', source)[1]},direct"
     
     Colors.print_info(f"正在配置 Go (GOPROXY) 为 {url}...")
     
@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import time
+import functools
+import urllib.error
+import urllib.parse
+from ..core.utils import Colors, echo, detect_proxy_port
+from ..core.progress import format_bytes
+from ..core.cache_store import CacheStore, CacheServer, CacheRequestHandler, Upstreams, open_url, conditional_get
+from .go import GO_PROXIES
+from .proxy_tools import get_local_ip
+
+GO_CACHE_PORT = 8686
+LISTEN_HOST = "0.0.0.0"
+MAX_BYTES = 10 * 1024 ** 3
+LIST_MAX_AGE = 60   # @v/list, @latest and branch queries move; released versions never do
+OFFICIAL_PROXY = "https://proxy.golang.org"
+
+# <module>/@v/<version>.<ext> for a canonical semantic version (not a branch or commit query)
+_VERSION_RE = re.compile(r"^/.+/@v/v\d+\.\d+\.\d+(?:-[0-9A-Za-z.-]+)?(?:\+incompatible)?\.(?:info|mod|zip)$")
+# Full checksum database tiles are immutable; partial ones (".p/<width>") grow
+_TILE_RE = re.compile(r"^/sumdb/[^/]+/tile/(?!.*\.p/)")
+
+def local_goproxy_url():
+    """GOPROXY entry clients use; NETWORK_BOOSTER_GO_CACHE points them at a cache on another machine."""
+    return os.environ.get("NETWORK_BOOSTER_GO_CACHE") or f"http://127.0.0.1:{GO_CACHE_PORT}"
+
+def is_immutable(path):
+    return bool(_VERSION_RE.match(path) or _TILE_RE.match(path))
+
+class GoCache:
+    def __init__(self, upstream_port=None, max_bytes=MAX_BYTES):
+        self.store = CacheStore("go", max_bytes)
+        candidates = [(url.rstrip("/"), None) for url in GO_PROXIES.values()]
+        if upstream_port:
+            candidates.append((OFFICIAL_PROXY, f"http://127.0.0.1:{upstream_port}"))
+        self.upstreams = Upstreams(candidates, probe_path="github.com/google/uuid/@v/list")
+
+    def mutable(self, path):
+        """
+        Returns (entry, stale) for a list / latest / query / sumdb endpoint, cached LIST_MAX_AGE seconds.
+        Raises KeyError when every upstream answers 404 or 410.
+        """
+        key = f"meta{path}"
+        entry = self.store.get(key)
+        if entry and time.time() - entry["fetched_at"] < LIST_MAX_AGE:
+            return entry, False
+        with self.store.key_lock(key):
+            entry = self.store.get(key)
+            if entry and time.time() - entry["fetched_at"] < LIST_MAX_AGE:
+                return entry, False
+            ranked = self.upstreams.ranked()
+            missing = 0
+            for upstream in ranked:
+                base, proxy = upstream
+                try:
+                    resp = conditional_get(base + path, entry, proxy=proxy)
+                    if resp is None:
+                        self.store.revalidated(key)
+                        return self.store.get(key), False
+                    with resp:
+                        body = resp.read()
+                        content_type = resp.headers.get("Content-Type", "text/plain; charset=utf-8")
+                        validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+                    return self.store.put_bytes(key, body, content_type=content_type, **validators), False
+                except urllib.error.HTTPError as e:
+                    # The GOPROXY protocol reports unknown modules and versions as 404 or 410
+                    if e.code in (404, 410):
+                        missing += 1
+                    else:
+                        self.upstreams.failed(upstream)
+                except OSError:
+                    self.upstreams.failed(upstream)
+            if missing == len(ranked):
+                raise KeyError(path)
+            return entry, True
+
+    def immutable(self, path, on_start, on_chunk):
+        """Downloads a released .info/.mod/.zip or a full sumdb tile once and pins it."""
+        ranked = self.upstreams.ranked()
+        missing = 0
+        for upstream in ranked:
+            base, proxy = upstream
+            try:
+                resp = open_url(base + path, proxy=proxy, timeout=60)
+            except urllib.error.HTTPError as e:
+                if e.code in (404, 410):
+                    missing += 1
+                else:
+                    self.upstreams.failed(upstream)
+                continue
+            except OSError:
+                self.upstreams.failed(upstream)
+                continue
+            with resp:
+                content_type = resp.headers.get("Content-Type", "application/octet-stream")
+                on_start(resp.headers.get("Content-Length"), content_type)
+                return self.store.put_stream(f"mod{path}", resp, content_type=content_type, pinned=True, on_chunk=on_chunk)
+        if missing == len(ranked):
+            raise KeyError(path)
+        return None
+
+class _Handler(CacheRequestHandler):
+    cache = None
+
+    def do_GET(self):
+        # Module paths arrive case-encoded ("!azure") and are passed upstream verbatim
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/_stats":
+            body = json.dumps({"store": self.cache.store.stats(), "upstreams": self.cache.upstreams.latency()})
+            self.send_bytes(200, body.encode("utf-8"), "application/json")
+        elif is_immutable(path):
+            self.pull_through(self.cache.store, f"mod{path}", functools.partial(self.cache.immutable, path))
+        elif "/@v/" in path or path.endswith("/@latest") or path.startswith("/sumdb/"):
+            self._mutable(path)
+        else:
+            self.send_error_text(404, "not found")
+
+    do_HEAD = do_GET
+
+    def _mutable(self, path):
+        try:
+            entry, stale = self.cache.mutable(path)
+        except KeyError:
+            self.send_error_text(404, "not found upstream")
+            return
+        if entry is None:
+            self.send_error_text(502, "all upstream proxies failed")
+            return
+        self.send_entry(entry, {"Warning": '110 - "stale response"'} if stale else None)
+
+def start_go_cache(port=GO_CACHE_PORT, upstream_port=None, max_bytes=MAX_BYTES, host=LISTEN_HOST):
+    """Creates the cache server (not yet serving). Returns (server, GoCache)."""
+    cache = GoCache(upstream_port, max_bytes)
+    handler = type("GoCacheHandler", (_Handler,), {"cache": cache})
+    return CacheServer((host, port), handler), cache
+
+def run_go_cache(port=GO_CACHE_PORT, max_gb=None):
+    """Foreground entry point for `main.py --go-cache`."""
+    upstream_port = detect_proxy_port()
+    max_bytes = int(max_gb * 1024 ** 3) if max_gb else MAX_BYTES
+    try:
+        server, cache = start_go_cache(port, upstream_port, max_bytes)
+    except OSError as e:
+        Colors.print_error(f"Go 模块缓存启动失败: {e}")
+        return
+    latency = cache.upstreams.measure()
+    stats = cache.store.stats()
+    Colors.print_success(f"Go 模块缓存已启动: http://{get_local_ip()}:{port}")
+    for url, lat in latency.items():
+        echo(f"  上游 {url:<50}{'不可用' if lat is None else f'{lat * 1000:.0f} ms'}")
+    Colors.print_info(f"缓存目录: {cache.store.root} ({format_bytes(stats['size_bytes'])} / {format_bytes(max_bytes)})")
+    Colors.print_info("本机使用: python main.py --go-proxy local")
+    Colors.print_info(f"其他机器: 设置环境变量 NETWORK_BOOSTER_GO_CACHE=http://{get_local_ip()}:{port} 后运行同一命令")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        Colors.print_info("Go 模块缓存已停止")
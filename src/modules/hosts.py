@@ -1,13 +1,24 @@
 import os
+import re
+import json
+import time
+import errno
+import shutil
 import platform
+import urllib.error
 import urllib.request
 import ctypes
+from pathlib import Path
 from src.core.utils import Colors
+from src.modules.hosts_resolver import resolve_fastest
 
 # Remote Hosts Source (Using GitHub520)
 HOSTS_URL = "https://raw.githubusercontent.com/521xueweihan/GitHub520/main/hosts"
 START_MARKER = "# Start GitHub520 Host"
 END_MARKER = "# End GitHub520 Host"
+REMOTE_CACHE_PATH = Path(".cache") / "github520.json"
+
+_IP_RE = re.compile(r"^(\d{1,3}(?:\.\d{1,3}){3}|[0-9A-Fa-f:]+:[0-9A-Fa-f:.]*)$")
 
 def is_admin():
     system = platform.system()
@@ -30,21 +41,196 @@ def get_hosts_path():
         # Linux / macOS
         return "/etc/hosts"
 
-def fetch_remote_hosts():
-    """Fetches the latest GitHub hosts from the remote source."""
+# --- parsing ---
+
+def parse_line(line):
+    """
+    '140.82.112.4  github.com  # note' -> {'ip': '140.82.112.4', 'names': ['github.com'], 'comment': 'note'}
+    Returns None for blank lines, comments and malformed lines.
+    """
+    body, _, comment = line.partition("#")
+    fields = body.split()
+    if len(fields) < 2 or not _IP_RE.match(fields[0]):
+        return None
+    return {"ip": fields[0], "names": fields[1:], "comment": comment.strip()}
+
+def parse_entries(lines):
+    """[(hostname, ip)] in file order; a later line for the same hostname wins, as in the resolver."""
+    mapping = {}
+    for line in lines:
+        entry = parse_line(line)
+        if entry:
+            for name in entry["names"]:
+                mapping.pop(name.lower(), None)
+                mapping[name.lower()] = entry["ip"]
+    return list(mapping.items())
+
+def split_managed(content):
+    """Splits hosts content into (before, managed block lines, after). The block is None when absent."""
+    start = content.find(START_MARKER)
+    end = content.find(END_MARKER, start + 1) if start != -1 else -1
+    if start == -1 or end == -1:
+        return content, None, ""
+    block = content[start + len(START_MARKER):end]
+    after = content[end + len(END_MARKER):]
+    return content[:start], block.splitlines(), after
+
+def diff_entries(old, new):
+    """
+    Compares two [(hostname, ip)] lists.
+    Returns: { 'added': [(host, ip)], 'changed': [(host, old_ip, new_ip)], 'removed': [host] }
+    """
+    old_map, new_map = dict(old), dict(new)
+    return {
+        "added": [(h, ip) for h, ip in new if h not in old_map],
+        "changed": [(h, old_map[h], ip) for h, ip in new if h in old_map and old_map[h] != ip],
+        "removed": [h for h, _ in old if h not in new_map],
+    }
+
+def render_block(entries, source, newline="\n"):
+    lines = [START_MARKER, f"# Source: {source}", f"# Update time: {time.strftime('%Y-%m-%dT%H:%M:%S%z')}"]
+    lines += [f"{ip:<30}{host}" for host, ip in entries]
+    lines.append(END_MARKER)
+    return newline.join(lines)
+
+# --- fetching ---
+
+def _load_remote_cache():
+    try:
+        with open(REMOTE_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("etag"), [tuple(e) for e in data.get("entries", [])]
+    except (OSError, ValueError):
+        return None, []
+
+def _save_remote_cache(etag, entries):
+    try:
+        REMOTE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = REMOTE_CACHE_PATH.with_name(REMOTE_CACHE_PATH.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"etag": etag, "entries": entries}, f)
+        os.replace(tmp, REMOTE_CACHE_PATH)
+    except OSError:
+        pass
+
+def fetch_remote_entries():
+    """
+    Fetches the GitHub520 list as [(hostname, ip)], parsing it while it streams in.
+    A conditional request reuses the cached list when the remote file has not changed.
+    """
     Colors.print_info(f"正在获取最新 GitHub Hosts: {HOSTS_URL} ...")
+    etag, cached = _load_remote_cache()
+    headers = {"If-None-Match": etag} if etag and cached else {}
     try:
-        with urllib.request.urlopen(HOSTS_URL, timeout=10) as response:
-            content = response.read().decode('utf-8')
-            return content
+        req = urllib.request.Request(HOSTS_URL, headers=headers)
+        with urllib.request.urlopen(req, timeout=10) as response:
+            entries = parse_entries(raw.decode("utf-8", errors="ignore") for raw in response)
+            new_etag = response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            Colors.print_info("远程 Hosts 未变化 (304)，使用本地缓存")
+            return cached
+        Colors.print_error(f"获取远程 Hosts 失败: {e}")
+        return None
     except Exception as e:
         Colors.print_error(f"获取远程 Hosts 失败: {e}")
         return None
+    if not entries:
+        Colors.print_error("远程 Hosts 内容为空或无法解析")
+        return None
+    _save_remote_cache(new_etag, entries)
+    return entries
+
+def fetch_remote_hosts():
+    """Fetches the latest GitHub hosts from the remote source (rendered as hosts lines)."""
+    entries = fetch_remote_entries()
+    if entries is None:
+        return None
+    return "\n".join(f"{ip:<30}{host}" for host, ip in entries)
 
-def update_github_hosts():
-    """Updates the system hosts file with the latest GitHub hosts."""
+# --- writing ---
+
+def write_atomic(path, content):
+    """
+    Writes through a temp file in the same directory and os.replace, keeping mode and owner,
+    so a crash leaves either the old or the new file. Bind-mounted files (e.g. /etc/hosts in
+    containers) cannot be replaced and are rewritten in place after the temp file is complete.
+    """
+    directory = os.path.dirname(path) or "."
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.tmp-{os.getpid()}")
+    st = os.stat(path)
+    data = content.encode("utf-8")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp)
+        if hasattr(os, "chown"):
+            try:
+                os.chown(tmp, st.st_uid, st.st_gid)
+            except PermissionError:
+                pass
+        try:
+            os.replace(tmp, path)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.EXDEV, errno.EPERM, errno.EACCES):
+                raise
+        with open(path, "r+b") as f:
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def flush_dns():
+    if platform.system() == "Windows":
+        os.system("ipconfig /flushdns")
+    elif platform.system() == "Darwin":
+        os.system("sudo killall -HUP mDNSResponder")
+    # Linux (systemd-resolve or nscd, vary widely, skipping usually ok or just advise user)
+
+def apply_managed_entries(entries, source=HOSTS_URL, hosts_path=None):
+    """
+    Makes the managed block of the hosts file hold exactly `entries` ([(hostname, ip)]).
+    Nothing is written (and DNS is not flushed) when the block already matches.
+    Returns the diff (see diff_entries) plus 'written': bool.
+    """
+    hosts_path = hosts_path or get_hosts_path()
+    with open(hosts_path, "r", encoding="utf-8", newline="") as f:
+        current = f.read()
+    newline = "\r\n" if "\r\n" in current else "\n"
+
+    before, block, after = split_managed(current)
+    old = parse_entries(block) if block is not None else []
+    diff = diff_entries(old, entries)
+    # Same mapping but a different order still counts as unchanged
+    if block is not None and not any(diff.values()):
+        return {**diff, "written": False}
+
+    new_block = render_block(entries, source, newline)
+    if block is None:
+        Colors.print_info("未发现旧配置，正在追加...")
+        sep = "" if not current or current.endswith(("\n", "\r")) else newline
+        final = current + sep + newline + new_block + newline
+    else:
+        Colors.print_info(f"发现已有 GitHub Hosts 配置，变更: +{len(diff['added'])} ~{len(diff['changed'])} -{len(diff['removed'])}")
+        final = before + new_block + after
+    write_atomic(hosts_path, final)
+    flush_dns()
+    return {**diff, "written": True}
+
+def update_github_hosts(mode="github520"):
+    """
+    Updates the system hosts file with GitHub IPs.
+    mode "github520" writes the GitHub520 list as-is; "resolver" resolves the IPs itself
+    (see hosts_resolver) and writes the fastest TLS-verified IP per hostname.
+    """
     hosts_path = get_hosts_path()
-    
+
     if not os.path.exists(hosts_path):
         Colors.print_error(f"找不到系统 Hosts 文件: {hosts_path}")
         return False
@@ -62,47 +248,26 @@ def update_github_hosts():
             Colors.print_info("请尝试使用 sudo 运行此脚本: sudo python main.py")
         return False
 
-    new_hosts_content = fetch_remote_hosts()
-    if not new_hosts_content:
+    if mode == "resolver":
+        # GitHub520 is only one candidate source here, so an unreachable raw.githubusercontent.com is fine
+        entries, _ = resolve_fastest(github520=fetch_remote_entries() or [])
+        if not entries:
+            Colors.print_error("没有任何候选 IP 通过 TLS 校验，请检查网络后重试")
+        source = "local resolver (TCP + TLS verified)"
+    else:
+        entries = fetch_remote_entries()
+        source = HOSTS_URL
+    if not entries:
         return False
 
     try:
-        with open(hosts_path, 'r', encoding='utf-8') as f:
-            current_content = f.read()
-
-        # Construct new content block
-        block = f"\n{START_MARKER}\n{new_hosts_content}\n{END_MARKER}\n"
-
-        # Replace existing block or append
-        if START_MARKER in current_content and END_MARKER in current_content:
-            Colors.print_info("发现已有 GitHub Hosts 配置，正在更新...")
-            # Use regex or simple string manipulation
-            # Simple split approach
-            parts = current_content.split(START_MARKER)
-            pre_part = parts[0]
-            post_part = parts[1].split(END_MARKER)[-1]
-            final_content = pre_part + block.strip() + post_part
-        else:
-            Colors.print_info("未发现旧配置，正在追加...")
-            final_content = current_content + block
-
-        # Write back
-        with open(hosts_path, 'w', encoding='utf-8') as f:
-            f.write(final_content)
-        
-        Colors.print_success("GitHub Hosts 更新成功！")
-        
-        # Flush DNS
-        if platform.system() == "Windows":
-            os.system("ipconfig /flushdns")
-        else:
-            # macOS
-            if platform.system() == "Darwin":
-                os.system("sudo killall -HUP mDNSResponder")
-            # Linux (systemd-resolve or nscd, vary widely, skipping usually ok or just advise user)
-        
-        return True
-
+        result = apply_managed_entries(entries, source=source)
     except Exception as e:
         Colors.print_error(f"写入 Hosts 文件失败: {e}")
         return False
+
+    if result["written"]:
+        Colors.print_success("GitHub Hosts 更新成功！")
+    else:
+        Colors.print_success("GitHub Hosts 已是最新，无需写入")
+    return True
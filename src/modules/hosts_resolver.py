@@ -0,0 +1,142 @@
+import os
+import ssl
+import json
+import time
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from src.core.utils import Colors, echo
+from src.core.dns import query_udp, query_doh, addresses
+
+GITHUB_HOSTNAMES = (
+    "github.com",
+    "api.github.com",
+    "gist.github.com",
+    "codeload.github.com",
+    "raw.githubusercontent.com",
+    "objects.githubusercontent.com",
+    "avatars.githubusercontent.com",
+    "github.githubassets.com",
+    "github-releases.githubusercontent.com",
+)
+UDP_RESOLVERS = ("223.5.5.5", "119.29.29.29", "114.114.114.114", "8.8.8.8", "1.1.1.1", "9.9.9.9")
+# IP-literal endpoints, so DoH itself does not depend on the (possibly poisoned) local DNS
+DOH_RESOLVERS = ("https://223.5.5.5/dns-query", "https://1.12.12.12/dns-query", "https://1.1.1.1/dns-query", "https://8.8.8.8/dns-query")
+KNOWN_GOOD_PATH = Path(".cache") / "github_ips.json"
+KNOWN_GOOD_MAX_AGE = 7 * 86400
+PROBE_TIMEOUT = 3.0
+MAX_WORKERS = 32
+
+def _from_udp(server, host):
+    return [ip for ip, _ in addresses(query_udp(server, host))]
+
+def _from_doh(url, host):
+    return [ip for ip, _ in addresses(query_doh(url, host))]
+
+def _load_known_good():
+    try:
+        with open(KNOWN_GOOD_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    cutoff = time.time() - KNOWN_GOOD_MAX_AGE
+    return {h: [e["ip"] for e in items if e.get("verified_at", 0) >= cutoff] for h, items in data.items()}
+
+def _save_known_good(results):
+    """Keeps every IP that passed verification, fastest first, merged with older entries."""
+    try:
+        with open(KNOWN_GOOD_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    now = time.time()
+    for host, probes in results.items():
+        fresh = [{"ip": ip, "latency_ms": round(lat * 1000, 1), "verified_at": now} for ip, lat in probes]
+        seen = {e["ip"] for e in fresh}
+        data[host] = (fresh + [e for e in data.get(host, []) if e["ip"] not in seen])[:8]
+    KNOWN_GOOD_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = KNOWN_GOOD_PATH.with_name(KNOWN_GOOD_PATH.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, KNOWN_GOOD_PATH)
+
+def gather_candidates(hostnames=GITHUB_HOSTNAMES, github520=None):
+    """
+    Collects candidate IPs per hostname from all UDP and DoH resolvers (queried concurrently),
+    the GitHub520 list ([(host, ip)]) and the cached last-known-good set.
+    Returns: { host: { ip: set(sources) } }
+    """
+    candidates = {h: {} for h in hostnames}
+
+    def add(host, ip, source):
+        # Poisoned answers often point into reserved ranges; skip the obvious ones
+        if ip.startswith(("0.", "127.", "10.", "192.168.")) or ip == "255.255.255.255":
+            return
+        candidates[host].setdefault(ip, set()).add(source)
+
+    for host, ip in github520 or []:
+        if host in candidates:
+            add(host, ip, "github520")
+    for host, ips in _load_known_good().items():
+        if host in candidates:
+            for ip in ips:
+                add(host, ip, "cache")
+
+    jobs = [(_from_udp, s, h, f"udp:{s}") for s in UDP_RESOLVERS for h in hostnames]
+    jobs += [(_from_doh, u, h, f"doh:{u.split('/')[2]}") for u in DOH_RESOLVERS for h in hostnames]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [(pool.submit(fn, server, host), host, label) for fn, server, host, label in jobs]
+        for fut, host, label in futures:
+            try:
+                for ip in fut.result():
+                    add(host, ip, label)
+            except Exception:
+                continue
+    return candidates
+
+def probe_tls(ip, hostname, port=443, timeout=PROBE_TIMEOUT):
+    """
+    TCP connect plus a TLS handshake with SNI=hostname and certificate verification.
+    A poisoned IP fails verification, so success proves the IP really serves the hostname.
+    Returns the total latency in seconds, or None.
+    """
+    ctx = ssl.create_default_context()
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((ip, port), timeout=timeout) as sock:
+            with ctx.wrap_socket(sock, server_hostname=hostname):
+                return time.perf_counter() - started
+    except (OSError, ssl.SSLError):
+        return None
+
+def resolve_fastest(hostnames=GITHUB_HOSTNAMES, github520=None):
+    """
+    Probes every candidate concurrently and picks the fastest verified IP per hostname.
+    Returns ([(host, ip)], { host: [(ip, latency)] sorted by latency }).
+    """
+    candidates = gather_candidates(hostnames, github520)
+    total = sum(len(ips) for ips in candidates.values())
+    Colors.print_info(f"共收集到 {total} 个候选 IP，正在并发测试 TCP + TLS 握手...")
+
+    pairs = [(host, ip) for host, ips in candidates.items() for ip in ips]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        latencies = list(pool.map(lambda p: probe_tls(p[1], p[0]), pairs))
+
+    results = {h: [] for h in hostnames}
+    for (host, ip), latency in zip(pairs, latencies):
+        if latency is not None:
+            results[host].append((ip, latency))
+    entries = []
+    for host in hostnames:
+        results[host].sort(key=lambda x: x[1])
+        if results[host]:
+            ip, latency = results[host][0]
+            sources = ",".join(sorted(candidates[host][ip]))
+            echo(f"  {host:<42}{ip:<18}{latency * 1000:6.0f} ms  ({sources})")
+            entries.append((host, ip))
+        else:
+            Colors.print_warning(f"  {host}: 没有通过 TLS 校验的 IP，保持系统默认解析")
+    verified = {h: r for h, r in results.items() if r}
+    if verified:
+        _save_known_good(verified)
+    return entries, results
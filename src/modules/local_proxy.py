@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import threading
+from collections import deque
+from pathlib import Path
+from src.core.utils import Colors, detect_proxy_port
+
+LISTEN_HOST = "127.0.0.1"
+DEFAULT_PORT = 7899
+RULES_PATH = Path(os.path.expanduser("~")) / ".network-booster" / "proxy_rules.json"
+# Checked in order, first match wins; a rule matches the host itself and all its subdomains.
+# Routes: "direct", "proxy" (the detected upstream proxy) or "mirror:<host[:port]>".
+DEFAULT_RULES = [
+    {"match": "github.com", "route": "proxy"},
+    {"match": "githubusercontent.com", "route": "proxy"},
+    {"match": "githubassets.com", "route": "proxy"},
+    {"match": "pypi.org", "route": "proxy"},
+    {"match": "pythonhosted.org", "route": "proxy"},
+    {"match": "npmjs.org", "route": "proxy"},
+    {"match": "docker.io", "route": "proxy"},
+    {"match": "ghcr.io", "route": "proxy"},
+    {"match": "gcr.io", "route": "proxy"},
+    {"match": "golang.org", "route": "proxy"},
+    {"match": "huggingface.co", "route": "proxy"},
+    {"match": "anaconda.org", "route": "proxy"},
+    {"match": "anaconda.com", "route": "proxy"},
+    {"match": "pytorch.org", "route": "proxy"},
+]
+DEFAULT_ROUTE = "direct"
+CONNECT_TIMEOUT = 10
+HEADER_LIMIT = 64 * 1024
+RELAY_BUFFER = 64 * 1024
+POOL_SIZE = 4           # warm idle connections kept to the upstream proxy
+POOL_IDLE_TIMEOUT = 30  # most proxies drop idle clients after ~60s
+
+_RULES = (None, DEFAULT_RULES)  # (mtime_ns, rules)
+
+def load_rules():
+    """DEFAULT_RULES, or RULES_PATH when it exists (re-read whenever the file changes)."""
+    global _RULES
+    try:
+        mtime = os.stat(RULES_PATH).st_mtime_ns
+    except OSError:
+        return DEFAULT_RULES
+    if _RULES[0] == mtime:
+        return _RULES[1]
+    try:
+        with open(RULES_PATH, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+        if not isinstance(rules, list) or not all(isinstance(r, dict) and "match" in r and "route" in r for r in rules):
+            raise ValueError("应为 [{\"match\": ..., \"route\": ...}] 列表")
+    except (OSError, ValueError) as e:
+        Colors.print_warning(f"忽略无效的代理规则文件 {RULES_PATH}: {e}")
+        rules = DEFAULT_RULES
+    _RULES = (mtime, rules)
+    return rules
+
+def route_for(host, rules=None):
+    host = host.lower().rstrip(".")
+    for rule in rules if rules is not None else load_rules():
+        pattern = rule["match"].lower().lstrip("*.")
+        if host == pattern or host.endswith("." + pattern):
+            return rule["route"]
+    return DEFAULT_ROUTE
+
+def _split_hostport(value, default_port):
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit() and not host.endswith(":"):
+        return host.strip("[]"), int(port)
+    return value.strip("[]"), default_port
+
+def _close_after(headers):
+    """
+    A request header block with its keep-alive headers replaced by 'Connection: close'.
+    The client connection is piped to one origin, so it must not carry a second request.
+    """
+    hop = (b"connection", b"proxy-connection", b"keep-alive")
+    lines = [line for line in headers.split(b"\r\n") if line and line.split(b":", 1)[0].strip().lower() not in hop]
+    return b"\r\n".join(lines + [b"Connection: close", b"", b""])
+
+class LocalProxy:
+    def __init__(self, upstream_port=None, port=DEFAULT_PORT, host=LISTEN_HOST):
+        self.host = host
+        self.port = port
+        self.upstream = ("127.0.0.1", int(upstream_port)) if upstream_port else None
+        self._pool = deque()     # (idle since, socket) to the upstream proxy
+        self._buffers = []       # relay buffers, reused across tunnels
+        self.stats = {"connections": 0, "direct": 0, "proxy": 0, "mirror": 0, "pooled": 0, "errors": 0}
+
+    # --- buffers and upstream pool ---
+
+    def _take_buffer(self):
+        return self._buffers.pop() if self._buffers else bytearray(RELAY_BUFFER)
+
+    def _give_buffer(self, buf):
+        if len(self._buffers) < 64:
+            self._buffers.append(buf)
+
+    async def _connect(self, loop, host, port):
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        last_error = OSError(f"无法解析 {host}")
+        for family, type_, proto, _, addr in infos:
+            sock = socket.socket(family, type_, proto)
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                await asyncio.wait_for(loop.sock_connect(sock, addr), CONNECT_TIMEOUT)
+                return sock
+            except (OSError, asyncio.TimeoutError) as e:
+                sock.close()
+                last_error = e
+        raise last_error
+
+    def _pool_get(self):
+        now = time.monotonic()
+        while self._pool:
+            since, sock = self._pool.popleft()
+            if now - since < POOL_IDLE_TIMEOUT and self._alive(sock):
+                self.stats["pooled"] += 1
+                return sock
+            sock.close()
+        return None
+
+    @staticmethod
+    def _alive(sock):
+        try:
+            # An idle proxy connection has nothing to read; EOF or data means it is unusable
+            sock.recv(1, socket.MSG_PEEK)
+            return False
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    async def _fill_pool(self, loop):
+        """Keeps POOL_SIZE connections to the upstream proxy open so tunnels skip the TCP handshake."""
+        while True:
+            while self.upstream and len(self._pool) < POOL_SIZE:
+                try:
+                    sock = await self._connect(loop, *self.upstream)
+                except (OSError, asyncio.TimeoutError):
+                    break
+                self._pool.append((time.monotonic(), sock))
+            await asyncio.sleep(POOL_IDLE_TIMEOUT / 3)
+            now = time.monotonic()
+            while self._pool and now - self._pool[0][0] >= POOL_IDLE_TIMEOUT:
+                self._pool.popleft()[1].close()
+
+    async def _upstream_connect(self, loop, host, port):
+        """A tunnel to host:port through the upstream proxy via CONNECT."""
+        sock = self._pool_get() or await self._connect(loop, *self.upstream)
+        request = f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode("ascii")
+        await loop.sock_sendall(sock, request)
+        head, rest = await self._read_head(loop, sock)
+        status = head.split(b"\r\n", 1)[0].split()
+        if len(status) < 2 or status[1] != b"200":
+            sock.close()
+            raise OSError(f"上游代理拒绝 CONNECT {host}:{port}: {head[:80]!r}")
+        return sock, rest
+
+    # --- request handling ---
+
+    async def _read_head(self, loop, sock):
+        """Reads up to the end of the HTTP header block. Returns (header bytes, extra bytes after it)."""
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = await loop.sock_recv(sock, 4096)
+            if not chunk:
+                raise ConnectionError("连接在请求头结束前关闭")
+            data += chunk
+            if len(data) > HEADER_LIMIT:
+                raise ConnectionError("请求头过大")
+        head, _, rest = data.partition(b"\r\n\r\n")
+        return head + b"\r\n\r\n", rest
+
+    async def _open(self, loop, host, port):
+        """Connects according to the host's route. Returns (socket, bytes already read, route name)."""
+        route = route_for(host)
+        if route.startswith("mirror:"):
+            # Same service at another address (e.g. a pinned IP): TLS still sees the original SNI
+            mhost, mport = _split_hostport(route[7:], port)
+            return await self._connect(loop, mhost, mport), b"", "mirror"
+        if route == "proxy" and self.upstream:
+            sock, rest = await self._upstream_connect(loop, host, port)
+            return sock, rest, "proxy"
+        return await self._connect(loop, host, port), b"", "direct"
+
+    async def _relay(self, loop, src, dst):
+        buf = self._take_buffer()
+        view = memoryview(buf)
+        try:
+            while True:
+                n = await loop.sock_recv_into(src, buf)
+                if not n:
+                    break
+                await loop.sock_sendall(dst, view[:n])
+        except OSError:
+            pass
+        finally:
+            view.release()
+            self._give_buffer(buf)
+            try:
+                dst.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    async def _pipe(self, loop, client, remote):
+        await asyncio.gather(self._relay(loop, client, remote), self._relay(loop, remote, client))
+
+    async def _handle(self, loop, client):
+        self.stats["connections"] += 1
+        remote = None
+        try:
+            head, body = await self._read_head(loop, client)
+            request_line, _, headers = head.partition(b"\r\n")
+            method, target, version = request_line.decode("latin-1").split(" ", 2)
+            if method == "CONNECT":
+                host, port = _split_hostport(target, 443)
+                remote, rest, route = await self._open(loop, host, port)
+                await loop.sock_sendall(client, b"HTTP/1.1 200 Connection Established\r\n\r\n")
+                if rest:
+                    await loop.sock_sendall(client, rest)
+            else:
+                # Plain HTTP in absolute form: http://host[:port]/path
+                if not target.startswith("http://"):
+                    await loop.sock_sendall(client, b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                    return
+                authority, _, path = target[7:].partition("/")
+                host, port = _split_hostport(authority, 80)
+                route = route_for(host)
+                # One request per connection: a later keep-alive request could be for a host with another route
+                if route == "proxy" and self.upstream:
+                    # The upstream proxy takes the absolute-form request line as-is
+                    remote = self._pool_get() or await self._connect(loop, *self.upstream)
+                    route, forwarded = "proxy", request_line + b"\r\n" + _close_after(headers)
+                else:
+                    remote, _, route = await self._open(loop, host, port)
+                    forwarded = f"{method} /{path} {version}\r\n".encode("latin-1") + _close_after(headers)
+                await loop.sock_sendall(remote, forwarded + body)
+                body = b""
+            self.stats[route] += 1
+            if body:
+                await loop.sock_sendall(remote, body)
+            await self._pipe(loop, client, remote)
+        except (OSError, ValueError, ConnectionError, asyncio.TimeoutError) as e:
+            self.stats["errors"] += 1
+            if remote is None:
+                try:
+                    msg = f"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nX-Error: {str(e)[:100]}\r\n\r\n"
+                    await loop.sock_sendall(client, msg.encode("latin-1", errors="replace"))
+                except OSError:
+                    pass
+        finally:
+            client.close()
+            if remote is not None:
+                remote.close()
+
+    async def serve(self, ready=None):
+        loop = asyncio.get_running_loop()
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(256)
+        listener.setblocking(False)
+        self.port = listener.getsockname()[1]
+        if ready:
+            ready.set()
+        pool_task = loop.create_task(self._fill_pool(loop))
+        try:
+            while True:
+                client, _ = await loop.sock_accept(listener)
+                client.setblocking(False)
+                loop.create_task(self._handle(loop, client))
+        finally:
+            pool_task.cancel()
+            listener.close()
+
+def start_local_proxy(port=DEFAULT_PORT, upstream_port=None):
+    """Runs the proxy on its own event loop in a background thread. Returns the LocalProxy once listening."""
+    proxy = LocalProxy(upstream_port, port)
+    ready = threading.Event()
+    threading.Thread(target=lambda: asyncio.run(proxy.serve(ready)), daemon=True).start()
+    if not ready.wait(5):
+        raise OSError(f"本地代理无法监听 {LISTEN_HOST}:{port}")
+    return proxy
+
+def configure_tools(port=DEFAULT_PORT):
+    """Points pip, conda and npm/yarn/pnpm at the local proxy, so its rules decide the route per host."""
+    from src.modules.python import set_pip_proxy, set_conda_proxy
+    from src.modules.node import set_node_proxy
+    set_pip_proxy(port)
+    set_conda_proxy(port)
+    set_node_proxy(port)
+
+def run_local_proxy(port=DEFAULT_PORT, upstream_port=None):
+    """Foreground entry point for `main.py --local-proxy`."""
+    upstream_port = upstream_port or detect_proxy_port()
+    if upstream_port and int(upstream_port) == port:
+        Colors.print_warning("检测到的上游代理端口就是本地代理自身，已忽略 (请检查 HTTP_PROXY 环境变量)")
+        upstream_port = None
+    proxy = LocalProxy(upstream_port, port)
+    Colors.print_success(f"本地分流代理已启动: http://{LISTEN_HOST}:{port}")
+    if proxy.upstream:
+        Colors.print_info(f"上游代理: http://127.0.0.1:{upstream_port}")
+    else:
+        Colors.print_warning("未检测到上游代理，所有请求都将直连")
+    Colors.print_info(f"分流规则: {RULES_PATH if RULES_PATH.exists() else '内置默认规则'}")
+    Colors.print_info(f"在终端中使用: export http_proxy=http://{LISTEN_HOST}:{port} https_proxy=http://{LISTEN_HOST}:{port}")
+    try:
+        asyncio.run(proxy.serve())
+    except KeyboardInterrupt:
+        Colors.print_info(f"本地代理已停止，统计: {proxy.stats}")
+    except OSError as e:
+        Colors.print_error(f"本地代理启动失败: {e}")
@@ -0,0 +1,220 @@
+import io
+import time
+import queue
+import threading
+import collections
+from ..core.utils import Colors, echo, output_to, detect_proxy_port, measure_latency, run_command
+from ..core import mirrors
+from .python import set_pip_mirror, set_pip_proxy, set_conda_mirror, set_conda_proxy
+from .node import set_node_mirror, set_node_proxy
+
+MIN_INTERVAL = 15          # seconds between probes right after a failure or a pending switch
+MAX_INTERVAL = 300         # ...growing by BACKOFF per quiet cycle up to this
+BACKOFF = 1.5
+HISTORY = 720              # samples kept in the ring buffer
+SWITCH_AFTER = 3           # consecutive cycles favouring the other mode before configs are switched
+SWITCH_RATIO = 0.5         # a working mode is only left for one at least this much faster
+OFFICIAL_INDEX = "https://pypi.org/simple/pip/"
+MIRROR, PROXY = "mirror", "proxy"
+
+# What a mode switch reconfigures; proxy setters take the proxy port
+APPLY = {
+    MIRROR: (set_pip_mirror, set_conda_mirror, set_node_mirror),
+    PROXY: (set_pip_proxy, set_conda_proxy, set_node_proxy),
+}
+
+def _pip_config(key):
+    res = run_command(f"pip config get global.{key}")
+    return res.stdout.strip() if res and res.returncode == 0 else ""
+
+class NetworkMonitor:
+    """
+    Probes the configured mirror and the official index through the proxy on an adaptive schedule,
+    keeps the samples in a ring buffer and switches tool configs between mirror and proxy mode
+    once the other mode has been clearly better for SWITCH_AFTER cycles in a row.
+    Events go to every subscribe()d queue: sample, switch, mirror (re-picked) and error.
+    """
+
+    def __init__(self, auto_switch=True):
+        self.auto_switch = auto_switch
+        self.history = collections.deque(maxlen=HISTORY)
+        self.interval = MIN_INTERVAL
+        self.mode = None
+        self.mirror_url = None
+        self.port = None
+        self.pending = 0            # consecutive cycles favouring the other mode
+        self.mirror_failures = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # --- events ---
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _emit(self, event):
+        event.setdefault("ts_ms", int(time.time() * 1000))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def status(self):
+        return {"mode": self.mode, "mirror": self.mirror_url, "port": self.port, "interval": self.interval,
+                "pending": self.pending, "auto_switch": self.auto_switch, "history": list(self.history)}
+
+    # --- probing ---
+
+    def _load_config(self):
+        with output_to(io.StringIO()):
+            self.mode = PROXY if _pip_config("proxy") else MIRROR
+            self.mirror_url = _pip_config("index-url") or mirrors.resolve("pip")[1]
+            self.port = detect_proxy_port()
+
+    def probe(self):
+        """One measurement of both modes. Returns the sample (latencies in ms, None = failed)."""
+        if not self.history or self.history[-1]["proxy_ms"] is None:
+            # The proxy may have come back on another port
+            with output_to(io.StringIO()):
+                self.port = detect_proxy_port()
+        results = {}
+
+        def probe_mirror():
+            latency, error = mirrors.probe("pip", self.mirror_url)
+            if self.mirror_url in mirrors.MIRRORS["pip"].values():
+                mirrors.record("pip", self.mirror_url, latency, error)
+            results["mirror_ms"] = None if latency is None else latency * 1000
+
+        def probe_proxy():
+            latency = measure_latency(OFFICIAL_INDEX, proxy=f"http://127.0.0.1:{self.port}")
+            results["proxy_ms"] = None if latency == float("inf") else latency
+
+        threads = [threading.Thread(target=fn, daemon=True) for fn in (probe_mirror, probe_proxy)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        sample = {"ts": time.time(), "mode": self.mode, **results}
+        self.history.append(sample)
+        return sample
+
+    def _preferred(self, sample):
+        """The mode this sample argues for, with hysteresis in favour of the current one."""
+        current = sample["mirror_ms"] if self.mode == MIRROR else sample["proxy_ms"]
+        other = sample["proxy_ms"] if self.mode == MIRROR else sample["mirror_ms"]
+        other_mode = PROXY if self.mode == MIRROR else MIRROR
+        if other is None:
+            return self.mode
+        if current is None or other < current * SWITCH_RATIO:
+            return other_mode
+        return self.mode
+
+    def _apply(self, mode):
+        out = io.StringIO()
+        with output_to(out):
+            for fn in APPLY[mode]:
+                try:
+                    fn(self.port) if mode == PROXY else fn()
+                except Exception as e:
+                    Colors.print_error(f"{fn.__name__} 失败: {e}")
+        return [line for line in out.getvalue().splitlines() if line.strip()]
+
+    def step(self):
+        """Runs one probe cycle, switches if warranted, and returns the seconds until the next one."""
+        sample = self.probe()
+        self._emit({"type": "sample", **sample})
+        trouble = sample["mirror_ms"] is None or sample["proxy_ms"] is None
+
+        if sample["mirror_ms"] is None and sample["proxy_ms"] is None:
+            self._emit({"type": "error", "message": "镜像与代理均不可用，保持当前配置"})
+        self.mirror_failures = self.mirror_failures + 1 if sample["mirror_ms"] is None else 0
+
+        preferred = self._preferred(sample)
+        self.pending = self.pending + 1 if preferred != self.mode else 0
+        if self.pending >= SWITCH_AFTER and self.auto_switch:
+            previous, self.mode, self.pending = self.mode, preferred, 0
+            logs = self._apply(preferred)
+            if preferred == MIRROR:
+                with output_to(io.StringIO()):
+                    self.mirror_url = _pip_config("index-url") or self.mirror_url
+            self.mirror_failures = 0
+            self._emit({"type": "switch", "from": previous, "to": preferred, "logs": logs,
+                        "mirror_ms": sample["mirror_ms"], "proxy_ms": sample["proxy_ms"]})
+        elif self.mode == MIRROR and self.mirror_failures >= SWITCH_AFTER and self.auto_switch \
+                and self.mirror_url in mirrors.MIRRORS["pip"].values():
+            # The mirror died but the proxy is no better: move to the next-best mirror instead
+            previous = self.mirror_url
+            logs = self._apply(MIRROR)
+            with output_to(io.StringIO()):
+                self.mirror_url = _pip_config("index-url") or previous
+            self.mirror_failures = 0
+            if self.mirror_url != previous:
+                self._emit({"type": "mirror", "from": previous, "to": self.mirror_url, "logs": logs})
+
+        if trouble or self.pending:
+            self.interval = MIN_INTERVAL
+        else:
+            self.interval = min(self.interval * BACKOFF, MAX_INTERVAL)
+        return self.interval
+
+    def run(self):
+        self._load_config()
+        while not self._stop.is_set():
+            try:
+                delay = self.step()
+            except Exception as e:
+                self._emit({"type": "error", "message": str(e)})
+                delay = MIN_INTERVAL
+            self._stop.wait(delay)
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def _fmt(ms):
+    return "失败" if ms is None else f"{ms:.0f}ms"
+
+def run_daemon(auto_switch=True):
+    """Foreground entry point for `main.py --daemon`."""
+    monitor = NetworkMonitor(auto_switch)
+    events = monitor.subscribe()
+    monitor.start()
+    Colors.print_info(f"网络监控已启动 (探测间隔 {MIN_INTERVAL}-{MAX_INTERVAL}s，连续 {SWITCH_AFTER} 次更优才切换)，Ctrl+C 退出")
+    try:
+        while True:
+            try:
+                # A timeout keeps Ctrl+C responsive on Windows
+                event = events.get(timeout=1)
+            except queue.Empty:
+                continue
+            stamp = time.strftime("%H:%M:%S")
+            if event["type"] == "sample":
+                echo(f"[{stamp}] {event['mode']:<6} 镜像 {_fmt(event['mirror_ms']):>7}  代理 {_fmt(event['proxy_ms']):>7}  "
+                     f"下次 {monitor.interval:.0f}s")
+            elif event["type"] == "switch":
+                Colors.print_success(f"[{stamp}] 已从{'镜像' if event['from'] == MIRROR else '代理'}模式切换到"
+                                     f"{'镜像' if event['to'] == MIRROR else '代理'}模式")
+                for line in event["logs"]:
+                    echo(f"    {line}")
+            elif event["type"] == "mirror":
+                Colors.print_success(f"[{stamp}] 镜像不可用，已切换到 {event['to']}")
+            elif event["type"] == "error":
+                Colors.print_warning(f"[{stamp}] {event['message']}")
+    except KeyboardInterrupt:
+        monitor.stop()
+        Colors.print_info("网络监控已停止")
@@ -1,12 +1,16 @@
 from ..core.utils import run_command, Colors
+from ..core.mirrors import MIRRORS, resolve
 
-def set_node_mirror(source="taobao"):
-    """Sets npm/yarn/pnpm mirror."""
-    mirrors = {
-        "taobao": "https://registry.npmmirror.com",
-        "tencent": "https://mirrors.cloud.tencent.com/npm/",
-    }
-    url = mirrors.get(source, mirrors["taobao"])
+NPM_REGISTRIES = MIRRORS["npm"]
+
+def set_node_mirror(source="auto"):
+    """Sets npm/yarn/pnpm mirror: a NPM_REGISTRIES name, "auto" (currently best) or "local"."""
+    if source == "local":
+        # The pull-through cache (npm_cache) on this or another machine
+        from .npm_cache import local_registry_url
+        url = local_registry_url()
+    else:
+        source, url = resolve("npm", source)
     
     Colors.print_info(f"正在配置 Node.js (npm/yarn/pnpm) 镜像为 {source}...")
     
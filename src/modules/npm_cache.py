@@ -0,0 +1,238 @@
+import os
+import re
+import json
+import functools
+import time
+import base64
+import hashlib
+import urllib.error
+import urllib.parse
+from ..core.utils import Colors, echo, detect_proxy_port
+from ..core.progress import format_bytes
+from ..core.cache_store import CacheStore, CacheServer, CacheRequestHandler, Upstreams, open_url, conditional_get
+from .node import NPM_REGISTRIES
+from .proxy_tools import get_local_ip
+
+NPM_CACHE_PORT = 4873
+LISTEN_HOST = "0.0.0.0"
+MAX_BYTES = 10 * 1024 ** 3
+PACKUMENT_MAX_AGE = 300
+OFFICIAL_REGISTRY = "https://registry.npmjs.org"
+ABBREVIATED_TYPE = "application/vnd.npm.install-v1+json"
+# With --npm-trim packuments keep this many newest versions, plus the newest of every major.minor line
+# and every dist-tag target. Exact pins of other versions then fail (ETARGET), so trimming is opt-in.
+KEEP_VERSIONS = 100
+LOCAL_ORIGIN = b"http://__npm_cache__"   # replaced by the client's Host when served
+
+_SEMVER_RE = re.compile(r"^(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?")
+
+def local_registry_url():
+    """Registry URL clients use; NETWORK_BOOSTER_NPM_CACHE points them at a cache on another machine."""
+    return os.environ.get("NETWORK_BOOSTER_NPM_CACHE") or f"http://127.0.0.1:{NPM_CACHE_PORT}/"
+
+def _semver_key(version):
+    m = _SEMVER_RE.match(version)
+    if not m:
+        return (-1, -1, -1, 0, version)
+    # A release sorts above its prereleases
+    return (int(m.group(1)), int(m.group(2)), int(m.group(3)), 0 if m.group(4) else 1, m.group(4) or "")
+
+def trim_packument(doc, keep=KEEP_VERSIONS):
+    """Drops old versions from a packument (full or abbreviated) in place. Returns doc."""
+    versions = doc.get("versions") or {}
+    if not keep or len(versions) <= keep:
+        return doc
+    ordered = sorted(versions, key=_semver_key, reverse=True)
+    kept = set(ordered[:keep])
+    kept.update(v for v in (doc.get("dist-tags") or {}).values() if v in versions)
+    newest_line = {}
+    for v in ordered:
+        m = _SEMVER_RE.match(v)
+        if m and not m.group(4):
+            newest_line.setdefault((m.group(1), m.group(2)), v)
+    kept.update(newest_line.values())
+    doc["versions"] = {v: versions[v] for v in ordered if v in kept}
+    if isinstance(doc.get("time"), dict):
+        doc["time"] = {k: t for k, t in doc["time"].items() if k in kept or k in ("created", "modified")}
+    return doc
+
+def integrity_alias(integrity):
+    """The strongest hash of an SRI string ('sha512-<base64> sha1-...') as a store alias."""
+    for algo in ("sha512", "sha384", "sha256", "sha1"):
+        for part in (integrity or "").split():
+            if part.startswith(algo + "-"):
+                return part
+    return None
+
+class NpmCache:
+    def __init__(self, upstream_port=None, max_bytes=MAX_BYTES, keep_versions=0):
+        self.store = CacheStore("npm", max_bytes)
+        self.keep_versions = keep_versions
+        candidates = [(url.rstrip("/"), None) for url in NPM_REGISTRIES.values()]
+        if upstream_port:
+            candidates.append((OFFICIAL_REGISTRY, f"http://127.0.0.1:{upstream_port}"))
+        self.upstreams = Upstreams(candidates, probe_path="react")
+        self._integrity = {}   # tarball path -> SRI integrity, learned from packuments
+        self._indexed = set()  # package names whose packument body was seen since startup
+
+    def _prepare(self, body, name):
+        """Trims a packument (with --npm-trim) and points its tarball URLs at this cache."""
+        doc = trim_packument(json.loads(body), self.keep_versions)
+        for meta in (doc.get("versions") or {}).values():
+            dist = meta.get("dist") or {}
+            if not dist.get("tarball"):
+                continue
+            filename = urllib.parse.urlsplit(dist["tarball"]).path.rsplit("/", 1)[-1]
+            local_path = f"/{name}/-/{filename}"
+            dist["tarball"] = LOCAL_ORIGIN.decode() + local_path
+            if dist.get("integrity") or dist.get("shasum"):
+                self._integrity[local_path] = dist.get("integrity") or f"sha1-{base64.b64encode(bytes.fromhex(dist['shasum'])).decode()}"
+        self._indexed.add(name)
+        return json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
+    def packument(self, name, abbreviated):
+        """Returns (entry, stale) for a package document. Raises KeyError when no upstream knows the package."""
+        key = f"packument/{name}/{'abbr' if abbreviated else 'full'}" + (f"@trim{self.keep_versions}" if self.keep_versions else "")
+        entry = self.store.get(key)
+        fresh = lambda e: e and time.time() - e["fetched_at"] < PACKUMENT_MAX_AGE
+        if fresh(entry) and name in self._indexed:
+            return entry, False
+        with self.store.key_lock(key):
+            entry = self.store.get(key)
+            if fresh(entry) and name in self._indexed:
+                return entry, False
+            headers = {"Accept": ABBREVIATED_TYPE if abbreviated else "application/json"}
+            ranked = self.upstreams.ranked()
+            missing = 0
+            for upstream in ranked:
+                base, proxy = upstream
+                url = f"{base}/{urllib.parse.quote(name, safe='@')}"
+                try:
+                    # Revalidation is only useful once the integrity map has been rebuilt from a full body
+                    resp = conditional_get(url, entry if name in self._indexed else None, headers, proxy=proxy)
+                    if resp is None:
+                        self.store.revalidated(key)
+                        return self.store.get(key), False
+                    with resp:
+                        body = resp.read()
+                        validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+                    return self.store.put_bytes(key, self._prepare(body, name), content_type="application/json",
+                                                **validators), False
+                except urllib.error.HTTPError as e:
+                    if e.code == 404:
+                        missing += 1
+                    else:
+                        self.upstreams.failed(upstream)
+                except (OSError, ValueError):
+                    self.upstreams.failed(upstream)
+            if missing == len(ranked):
+                raise KeyError(name)
+            return entry, True
+
+    def tarball(self, path, on_start, on_chunk):
+        """
+        Returns the entry for a tarball ('/name/-/file.tgz'). A tarball whose integrity matches
+        a stored blob is linked without downloading; otherwise it is fetched, verified and stored.
+        """
+        key = f"tarball{path}"
+        integrity = self._integrity.get(path)
+        alias = integrity_alias(integrity)
+        if alias:
+            digest = self.store.find_alias(alias)
+            if digest:
+                return self.store.link(key, digest, content_type="application/octet-stream")
+        expect = None
+        if alias:
+            algo, _, b64 = alias.partition("-")
+            expect = (algo, base64.b64decode(b64).hex())
+        for upstream in self.upstreams.ranked():
+            base, proxy = upstream
+            try:
+                resp = open_url(base + urllib.parse.quote(path, safe="/@"), proxy=proxy, timeout=60)
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    self.upstreams.failed(upstream)
+                continue
+            except OSError:
+                self.upstreams.failed(upstream)
+                continue
+            with resp:
+                on_start(resp.headers.get("Content-Length"), "application/octet-stream")
+                entry = self.store.put_stream(key, resp, content_type="application/octet-stream",
+                                              expect=expect, on_chunk=on_chunk)
+            if not alias:
+                # Lockfile installs skip the packument; index the tarball by its own sha512 for later dedupe
+                with open(entry["path"], "rb") as f:
+                    alias = "sha512-" + base64.b64encode(hashlib.sha512(f.read()).digest()).decode()
+            self.store.add_alias(alias, entry["digest"])
+            return entry
+        return None
+
+class _Handler(CacheRequestHandler):
+    cache = None
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if path == "/_stats":
+            body = json.dumps({"store": self.cache.store.stats(), "upstreams": self.cache.upstreams.latency()})
+            self.send_bytes(200, body.encode("utf-8"), "application/json")
+        elif path.startswith("/-/"):
+            # ping, whoami, audit, search...: not cached
+            self.send_bytes(200, b"{}", "application/json")
+        elif "/-/" in path:
+            self._tarball(path)
+        elif path.strip("/"):
+            self._packument(path.strip("/"))
+        else:
+            self.send_bytes(200, b"{}", "application/json")
+
+    do_HEAD = do_GET
+
+    def _packument(self, name):
+        abbreviated = ABBREVIATED_TYPE in (self.headers.get("Accept") or "")
+        try:
+            entry, stale = self.cache.packument(name, abbreviated)
+        except KeyError:
+            self.send_bytes(404, b'{"error":"Not found"}', "application/json")
+            return
+        if entry is None:
+            self.send_error_text(502, "all upstream registries failed")
+            return
+        with open(entry["path"], "rb") as f:
+            body = f.read().replace(LOCAL_ORIGIN, f"http://{self.headers.get('Host') or f'127.0.0.1:{NPM_CACHE_PORT}'}".encode())
+        headers = {"Warning": '110 - "stale packument"'} if stale else None
+        self.send_bytes(200, body, "application/json", headers)
+
+    def _tarball(self, path):
+        self.pull_through(self.cache.store, f"tarball{path}", functools.partial(self.cache.tarball, path))
+
+def start_npm_cache(port=NPM_CACHE_PORT, upstream_port=None, max_bytes=MAX_BYTES, trim=False, host=LISTEN_HOST):
+    """Creates the cache server (not yet serving). Returns (server, NpmCache)."""
+    cache = NpmCache(upstream_port, max_bytes, KEEP_VERSIONS if trim else 0)
+    handler = type("NpmCacheHandler", (_Handler,), {"cache": cache})
+    return CacheServer((host, port), handler), cache
+
+def run_npm_cache(port=NPM_CACHE_PORT, max_gb=None, trim=False):
+    """Foreground entry point for `main.py --npm-cache`."""
+    upstream_port = detect_proxy_port()
+    max_bytes = int(max_gb * 1024 ** 3) if max_gb else MAX_BYTES
+    try:
+        server, cache = start_npm_cache(port, upstream_port, max_bytes, trim)
+    except OSError as e:
+        Colors.print_error(f"npm 缓存启动失败: {e}")
+        return
+    latency = cache.upstreams.measure()
+    stats = cache.store.stats()
+    Colors.print_success(f"npm 缓存已启动: http://{get_local_ip()}:{port}/")
+    for url, lat in latency.items():
+        echo(f"  上游 {url:<50}{'不可用' if lat is None else f'{lat * 1000:.0f} ms'}")
+    Colors.print_info(f"缓存目录: {cache.store.root} ({format_bytes(stats['size_bytes'])} / {format_bytes(max_bytes)})")
+    if trim:
+        Colors.print_warning(f"packument 仅保留最近 {KEEP_VERSIONS} 个版本，锁定更旧版本的项目会安装失败")
+    Colors.print_info("本机使用: python main.py --node-mirror local")
+    Colors.print_info(f"其他机器: 设置环境变量 NETWORK_BOOSTER_NPM_CACHE=http://{get_local_ip()}:{port}/ 后运行同一命令")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        Colors.print_info("npm 缓存已停止")
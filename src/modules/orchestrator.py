@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ..core.utils import run_command, Colors, get_output, output_to
+from ..core.mirrors import resolve
+from .env_manager import install_suite, get_all_suites, get_system_info, TORCH_PKGS
+
+WHEELHOUSE_DIR = Path(".cache") / "wheelhouse"
+MAX_PARALLEL_ENVS = 4
+VALID_TARGETS = ('pip_current', 'conda_current', 'conda_new')
+CONDA_NEW_PYTHON = "3.10"
+
+def _env_key(item):
+    """Items that write into the same environment must run one after another."""
+    if item['target'] in ('pip_current', 'conda_current'):
+        # Keyed on the prefix itself: inside an activated conda env both targets are the same env
+        prefix = sys.prefix if item['target'] == 'pip_current' else os.environ.get('CONDA_PREFIX') or sys.prefix
+        return f"prefix:{os.path.normcase(os.path.realpath(prefix))}"
+    return f"conda_new:{item['env_name']}"
+
+def _pip_packages(item, suites):
+    """Packages of an item that end up being installed through pip."""
+    suite = suites.get(item['suite']) or {}
+    if item['target'] == 'pip_current':
+        pkgs = item.get('custom_packages') or suite.get('pip_base', [])
+    elif suite.get('torch'):
+        # Torch suites install torch via conda and the rest via pip inside the env
+        pkgs = item.get('custom_packages') or suite.get('conda_base', [])
+    else:
+        return []
+    return [p for p in pkgs if p not in TORCH_PKGS]
+
+def plan_batch(requests, sys_info=None):
+    """
+    Builds an execution plan for a batch of (suite, target, env_name) requests.
+    Returns: { 'items': [...], 'groups': [[idx, ...], ...], 'shared': {python_version: [pkg, ...]} }
+    """
+    if not requests:
+        raise ValueError("批量任务为空")
+    suites = get_all_suites(sys_info or get_system_info())
+
+    items = []
+    ts = int(time.time())
+    for i, req in enumerate(requests):
+        suite = req.get('suite')
+        target = req.get('target') or 'conda_new'
+        if suite not in suites:
+            raise ValueError(f"未知套件: {suite}")
+        if target not in VALID_TARGETS:
+            raise ValueError(f"未知目标环境: {target}")
+        env_name = req.get('env_name')
+        if target == 'conda_new' and not env_name:
+            env_name = f"env_{suite}_{ts}_{i}"
+        items.append({
+            'index': i,
+            'suite': suite,
+            'target': target,
+            'env_name': env_name,
+            'custom_packages': req.get('custom_packages'),
+        })
+
+    names = [it['env_name'] for it in items if it['target'] == 'conda_new']
+    if len(names) != len(set(names)):
+        raise ValueError("批量任务中存在重复的环境名称")
+
+    groups = {}
+    for it in items:
+        groups.setdefault(_env_key(it), []).append(it['index'])
+
+    # Packages requested by more than one env are downloaded once into a shared wheelhouse
+    counts = {}
+    for it in items:
+        py_ver = CONDA_NEW_PYTHON if it['target'] == 'conda_new' else f"{sys.version_info.major}.{sys.version_info.minor}"
+        it['python_version'] = py_ver
+        for pkg in set(_pip_packages(it, suites)):
+            counts.setdefault(py_ver, {}).setdefault(pkg, 0)
+            counts[py_ver][pkg] += 1
+    shared = {v: sorted(p for p, n in pkgs.items() if n > 1) for v, pkgs in counts.items()}
+    shared = {v: pkgs for v, pkgs in shared.items() if pkgs}
+
+    return {'items': items, 'groups': list(groups.values()), 'shared': shared}
+
+def prefetch_shared(shared, stop_event=None):
+    """Downloads shared wheels once per python version. Returns python_version -> wheelhouse dir."""
+    if not shared:
+        return {}
+    # Same index the env installs use: the configured or best-ranked pip mirror
+    _, mirror_url = resolve("pip")
+    houses = {}
+    for py_ver, pkgs in shared.items():
+        if stop_event and stop_event.is_set():
+            raise InterruptedError()
+        house = WHEELHOUSE_DIR / f"py{py_ver.replace('.', '')}"
+        house.mkdir(parents=True, exist_ok=True)
+        Colors.print_info(f"预下载共享依赖 (Python {py_ver}, {len(pkgs)} 个包)...")
+        cmd = (f"\"{sys.executable}\" -m pip download {' '.join(pkgs)} -d \"{house}\" -i {mirror_url}"
+               f" --python-version {py_ver} --only-binary=:all:")
+        res = run_command(cmd, stream_output=True, stop_event=stop_event)
+        if res is None or res.returncode != 0:
+            # pip download resolves the whole set before fetching anything, so one package without a
+            # matching wheel means nothing new was downloaded; wheels from earlier runs are still used
+            Colors.print_warning(f"共享依赖预下载失败 (Python {py_ver})，各环境将直接从镜像下载")
+        houses[py_ver] = str(house.resolve())
+    return houses
+
+class _PrefixedOutput:
+    """
+    Tags every line an env group writes so parallel env logs stay readable.
+    Only whole lines are forwarded, so groups never interleave inside a line.
+    """
+    def __init__(self, parent, prefix):
+        self.parent = parent
+        self.prefix = prefix
+        self.pending = ""
+
+    def write(self, s):
+        pieces = (self.pending + s).splitlines(keepends=True)
+        self.pending = ""
+        if pieces and not pieces[-1].endswith(('\n', '\r')):
+            self.pending = pieces.pop()
+        if pieces:
+            self.parent.write("".join(self.prefix + p for p in pieces))
+
+    def flush(self):
+        self.parent.flush()
+
+def run_batch(requests, stop_event=None, on_event=None, max_workers=MAX_PARALLEL_ENVS):
+    """
+    Installs several suites/envs at once. Downloads are shared, env groups run in
+    parallel and conda create/install steps are serialized by env_manager.CONDA_LOCK.
+    on_event(dict) receives per-env status updates.
+    """
+    emit = on_event or (lambda event: None)
+    plan = plan_batch(requests)
+    items = plan['items']
+
+    for it in items:
+        emit({'type': 'env_progress', 'index': it['index'], 'env_name': it['env_name'], 'suite': it['suite'], 'status': 'queued'})
+
+    houses = prefetch_shared(plan['shared'], stop_event=stop_event) if plan['shared'] else {}
+
+    results = [None] * len(items)
+    results_lock = threading.Lock()
+
+    parent_output = get_output()
+
+    def run_group(indexes):
+        for idx in indexes:
+            it = items[idx]
+            if stop_event and stop_event.is_set():
+                raise InterruptedError()
+            emit({'type': 'env_progress', 'index': idx, 'env_name': it['env_name'], 'suite': it['suite'], 'status': 'running'})
+            label = it['env_name'] or it['target']
+            try:
+                with output_to(_PrefixedOutput(parent_output, f"[{label}] ")):
+                    ret = install_suite(it['suite'], it['target'], it['env_name'], it['custom_packages'],
+                                        stop_event=stop_event, find_links=houses.get(it['python_version']))
+                entry = {'ok': True, 'result': ret}
+                emit({'type': 'env_progress', 'index': idx, 'env_name': it['env_name'], 'suite': it['suite'], 'status': 'done', 'result': ret})
+            except InterruptedError:
+                raise
+            except Exception as e:
+                entry = {'ok': False, 'error': str(e)}
+                emit({'type': 'env_progress', 'index': idx, 'env_name': it['env_name'], 'suite': it['suite'], 'status': 'error', 'error': str(e)})
+            with results_lock:
+                results[idx] = {**entry, 'suite': it['suite'], 'target': it['target'], 'env_name': it['env_name']}
+
+    workers = max(1, min(max_workers, len(plan['groups'])))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Worker threads start with an empty context; each group gets a copy carrying the job's output channel
+        futures = [pool.submit(contextvars.copy_context().run, run_group, g) for g in plan['groups']]
+        for fut in futures:
+            fut.result()
+
+    return results
@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import shutil
+import threading
+import functools
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Directories that never contain first-party manifests but can hold tens of thousands of files
+PRUNE_DIRS = {
+    "node_modules", ".venv", "venv", ".git", ".hg", ".svn", "__pycache__", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", "site-packages", ".idea", ".vscode",
+    ".cache", ".backup", "dist", "build", ".next", ".nuxt", "target",
+}
+MAX_DEPTH = 12
+
+_REQ_FILE_RE = re.compile(r"^requirements(?:[-_.][\w.-]+)?\.txt$", re.IGNORECASE)
+_REQ_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$")
+# Conda match spec: [channel::]name[ version[ build]] or name<op>version, e.g. 'conda-forge::numpy>=1.20', 'scipy 1.11.*'
+_CONDA_SPEC_RE = re.compile(r"^(?:(?P<channel>[^:\s]+)::)?(?P<name>[A-Za-z0-9_][A-Za-z0-9._-]*)\s*(?P<spec>.*)$")
+
+_DIR_CACHE = {}        # dir path -> (mtime_ns, subdirs, manifest names)
+_MANIFEST_CACHE = {}   # file path -> (mtime_ns, size, parsed manifest)
+_CACHE_LOCK = threading.Lock()
+
+def canonicalize(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def parse_requirement(text):
+    """
+    'Django[bcrypt]>=4.0 ; python_version>"3.8"' -> {'name': 'django', 'spec': '>=4.0', 'raw': ...}
+    Returns None for lines that are not plain requirements (URLs, paths).
+    """
+    raw = text.strip()
+    line = raw.split(";", 1)[0].strip()
+    if not line or "://" in line or line.startswith((".", "/")):
+        return None
+    m = _REQ_RE.match(line)
+    if not m:
+        return None
+    spec = re.sub(r"\s+", "", m.group(3) or "")
+    if spec.startswith("@"):
+        return None
+    return {"name": canonicalize(m.group(1)), "spec": spec, "raw": raw}
+
+# --- manifest parsers ---
+
+def _parse_requirements_txt(path, _seen=None):
+    seen = _seen or set()
+    seen.add(os.path.abspath(path))
+    deps = []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.split(" #", 1)[0].strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("-r ", "--requirement ")):
+                inc = os.path.join(os.path.dirname(path), line.split(None, 1)[1].strip())
+                if os.path.isfile(inc) and os.path.abspath(inc) not in seen:
+                    deps.extend(_parse_requirements_txt(inc, seen))
+                continue
+            if line.startswith("-"):
+                continue
+            req = parse_requirement(line)
+            if req:
+                deps.append(req)
+    return deps
+
+def _parse_environment_yml(path):
+    """Minimal reader for the `dependencies:` list (conda entries and the nested `pip:` list)."""
+    deps = []
+    in_deps = False
+    pip_indent = None
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for raw in f:
+            line = raw.split("#", 1)[0].rstrip()
+            if not line.strip():
+                continue
+            indent = len(line) - len(line.lstrip())
+            text = line.strip()
+            if indent == 0:
+                in_deps = text.startswith("dependencies:")
+                pip_indent = None
+                continue
+            if not in_deps or not text.startswith("- "):
+                continue
+            item = text[2:].strip().strip("'\"")
+            if pip_indent is not None and indent <= pip_indent:
+                pip_indent = None
+            if item.rstrip(":") == "pip" and item.endswith(":"):
+                pip_indent = indent
+                continue
+            if pip_indent is not None:
+                req = parse_requirement(item)
+                if req:
+                    deps.append({**req, "manager": "pip"})
+            else:
+                dep = parse_conda_spec(item)
+                if dep:
+                    deps.append(dep)
+    return deps
+
+def parse_conda_spec(text):
+    """
+    'conda-forge::numpy>=1.20' -> {'name': 'numpy', 'spec': '>=1.20', 'channel': 'conda-forge', 'raw': ..., 'manager': 'conda'}
+    The spec keeps conda's own syntax ('=1.20', '1.11.*', '1.26 py311_0'); raw is the whole match spec.
+    """
+    raw = text.strip()
+    m = _CONDA_SPEC_RE.match(raw)
+    if not m:
+        return None
+    return {"name": canonicalize(m.group("name")), "spec": m.group("spec").strip(), "channel": m.group("channel"),
+            "raw": raw, "manager": "conda"}
+
+def _parse_package_json(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        data = json.load(f)
+    deps = []
+    for section in ("dependencies", "devDependencies"):
+        for name, spec in (data.get(section) or {}).items():
+            deps.append({"name": name, "spec": str(spec), "raw": f"{name}@{spec}", "dev": section == "devDependencies"})
+    return deps
+
+def _load_toml(path):
+    if tomllib is None:
+        return None
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+def _parse_pipfile(path):
+    data = _load_toml(path)
+    deps = []
+    if data is None:
+        return deps
+    for section in ("packages", "dev-packages"):
+        for name, spec in (data.get(section) or {}).items():
+            version = spec if isinstance(spec, str) else (spec.get("version", "") if isinstance(spec, dict) else "")
+            deps.append({"name": canonicalize(name), "spec": "" if version == "*" else version, "raw": f"{name}{version}", "dev": section == "dev-packages"})
+    return deps
+
+def _parse_pyproject(path):
+    data = _load_toml(path)
+    deps = []
+    if data is None:
+        return deps
+    for line in (data.get("project") or {}).get("dependencies") or []:
+        req = parse_requirement(line)
+        if req:
+            deps.append(req)
+    poetry = ((data.get("tool") or {}).get("poetry") or {}).get("dependencies") or {}
+    for name, spec in poetry.items():
+        if name.lower() == "python":
+            continue
+        version = spec if isinstance(spec, str) else (spec.get("version", "") if isinstance(spec, dict) else "")
+        deps.append({"name": canonicalize(name), "spec": version, "raw": f"{name} {version}".strip()})
+    return deps
+
+MANIFEST_TYPES = {
+    "requirements.txt": ("Python", _parse_requirements_txt),
+    "environment.yml": ("Conda", _parse_environment_yml),
+    "environment.yaml": ("Conda", _parse_environment_yml),
+    "package.json": ("Node.js", _parse_package_json),
+    "Pipfile": ("Pipenv", _parse_pipfile),
+    "pyproject.toml": ("Poetry/Flit", _parse_pyproject),
+}
+
+def _manifest_kind(name):
+    if name in MANIFEST_TYPES:
+        return name
+    if _REQ_FILE_RE.match(name):
+        return "requirements.txt"
+    return None
+
+def parse_manifest(path):
+    """Parses one manifest, re-reading it only when its mtime or size changed."""
+    st = os.stat(path)
+    with _CACHE_LOCK:
+        hit = _MANIFEST_CACHE.get(path)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+
+    name = os.path.basename(path)
+    kind = _manifest_kind(name)
+    ecosystem, parser = MANIFEST_TYPES[kind]
+    try:
+        deps = parser(path)
+        error = None
+    except Exception as e:
+        deps, error = [], str(e)
+    result = {"file": name, "path": path, "kind": kind, "ecosystem": ecosystem, "deps": deps, "error": error}
+    with _CACHE_LOCK:
+        _MANIFEST_CACHE[path] = (st.st_mtime_ns, st.st_size, result)
+    return result
+
+def _list_dir(path, mtime_ns):
+    """(subdirs, manifest names) of a directory; reused while the directory mtime is unchanged."""
+    with _CACHE_LOCK:
+        hit = _DIR_CACHE.get(path)
+    if hit and hit[0] == mtime_ns:
+        return hit[1], hit[2]
+
+    subdirs, manifests = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in PRUNE_DIRS and not entry.name.endswith(".egg-info"):
+                            subdirs.append(entry.name)
+                    elif _manifest_kind(entry.name) and entry.is_file():
+                        manifests.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return (), ()
+    result = (tuple(sorted(subdirs)), tuple(sorted(manifests)))
+    with _CACHE_LOCK:
+        _DIR_CACHE[path] = (mtime_ns, result[0], result[1])
+    return result
+
+def scan_project(root, max_depth=MAX_DEPTH):
+    """
+    Walks `root` (pruning vendored/virtualenv dirs) and parses every manifest found.
+    Returns: { 'root', 'projects': [{ 'path', 'rel', 'manifests': [...] }], 'stats': {...} }
+    """
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise ValueError("路径不存在")
+
+    projects = []
+    dirs_seen = 0
+    stack = [(root, 0)]
+    while stack:
+        path, depth = stack.pop()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        dirs_seen += 1
+        subdirs, manifest_names = _list_dir(path, mtime_ns)
+        if manifest_names:
+            manifests = []
+            for name in manifest_names:
+                try:
+                    manifests.append(parse_manifest(os.path.join(path, name)))
+                except OSError:
+                    continue
+            if manifests:
+                rel = os.path.relpath(path, root)
+                projects.append({"path": path, "rel": "." if rel == "." else rel.replace(os.sep, "/"), "manifests": manifests})
+        if depth < max_depth:
+            stack.extend((os.path.join(path, d), depth + 1) for d in reversed(subdirs))
+
+    projects.sort(key=lambda p: (p["rel"] != ".", p["rel"]))
+    return {"root": root, "projects": projects, "stats": {"dirs": dirs_seen, "projects": len(projects)}}
+
+@functools.lru_cache(maxsize=1)
+def conda_available():
+    return shutil.which("conda") is not None
@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import functools
+import time
+import urllib.error
+import urllib.parse
+from ..core.utils import Colors, echo, detect_proxy_port
+from ..core.progress import format_bytes
+from ..core.cache_store import CacheStore, CacheServer, CacheRequestHandler, Upstreams, open_url, conditional_get
+from .python import PIP_MIRRORS
+from .proxy_tools import get_local_ip
+
+PYPI_CACHE_PORT = 3141
+LISTEN_HOST = "0.0.0.0"   # other machines on the LAN are the point
+MAX_BYTES = 20 * 1024 ** 3
+PAGE_MAX_AGE = 600        # index pages are revalidated upstream after this many seconds
+OFFICIAL_INDEX = "https://pypi.org/simple"
+OFFICIAL_FILES = "https://files.pythonhosted.org/packages/"
+JSON_TYPE = "application/vnd.pypi.simple.v1+json"
+
+_HREF_RE = re.compile(r'href="([^"]+)"', re.IGNORECASE)
+
+def local_index_url():
+    """Index URL clients use; NETWORK_BOOSTER_PYPI_CACHE points them at a cache on another machine."""
+    return os.environ.get("NETWORK_BOOSTER_PYPI_CACHE") or f"http://127.0.0.1:{PYPI_CACHE_PORT}/simple"
+
+def _files_base(simple_url):
+    """Mirrors keep the files.pythonhosted.org layout under <root>/packages/."""
+    if "pypi.org" in simple_url:
+        return OFFICIAL_FILES
+    return simple_url.rstrip("/").rsplit("/simple", 1)[0] + "/packages/"
+
+def _canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def _local_file_url(url, page_url):
+    """'../../packages/ab/cd/x.whl#sha256=..' -> '/packages/ab/cd/x.whl#sha256=..'; other links unchanged."""
+    absolute = urllib.parse.urljoin(page_url, url)
+    if "/packages/" not in absolute:
+        return url
+    return "/packages/" + absolute.split("/packages/", 1)[1]
+
+def rewrite_page(body, content_type, page_url):
+    """Points file links of a PEP 503 (HTML) or PEP 691 (JSON) project page at this cache."""
+    if "json" in (content_type or ""):
+        data = json.loads(body)
+        for f in data.get("files", []):
+            f["url"] = _local_file_url(f["url"], page_url)
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    html = body.decode("utf-8", errors="replace")
+    html = _HREF_RE.sub(lambda m: f'href="{_local_file_url(m.group(1).replace("&amp;", "&"), page_url)}"', html)
+    return html.encode("utf-8")
+
+class PyPICache:
+    def __init__(self, upstream_port=None, max_bytes=MAX_BYTES):
+        self.store = CacheStore("pypi", max_bytes)
+        candidates = [(url, None) for url in PIP_MIRRORS.values()]
+        if upstream_port:
+            candidates.append((OFFICIAL_INDEX, f"http://127.0.0.1:{upstream_port}"))
+        self.upstreams = Upstreams(candidates, probe_path="pip/")
+
+    def page(self, project, fmt):
+        """
+        Returns (entry, stale) for an index page ("" is the root index).
+        Fresh entries are served directly; older ones are revalidated with ETag / If-Modified-Since.
+        Raises KeyError when no upstream knows the project.
+        """
+        key = f"simple/{project}/{fmt}"
+        entry = self.store.get(key)
+        if entry and time.time() - entry["fetched_at"] < PAGE_MAX_AGE:
+            return entry, False
+        with self.store.key_lock(key):
+            entry = self.store.get(key)
+            if entry and time.time() - entry["fetched_at"] < PAGE_MAX_AGE:
+                return entry, False
+            headers = {"Accept": JSON_TYPE if fmt == "json" else "text/html"}
+            ranked = self.upstreams.ranked()
+            missing = 0
+            for upstream in ranked:
+                base, proxy = upstream
+                url = base.rstrip("/") + "/" + (f"{project}/" if project else "")
+                try:
+                    resp = conditional_get(url, entry, headers, proxy=proxy)
+                    if resp is None:
+                        self.store.revalidated(key)
+                        return self.store.get(key), False
+                    with resp:
+                        body = resp.read()
+                        content_type = resp.headers.get("Content-Type", "text/html")
+                        validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+                    return self.store.put_bytes(key, rewrite_page(body, content_type, url),
+                                                content_type=content_type, **validators), False
+                except urllib.error.HTTPError as e:
+                    # Mirrors lag behind PyPI, so a 404 only counts when every upstream agrees
+                    if e.code == 404:
+                        missing += 1
+                    else:
+                        self.upstreams.failed(upstream)
+                except (OSError, ValueError):
+                    self.upstreams.failed(upstream)
+            if missing == len(ranked):
+                raise KeyError(project)
+            # Every upstream failed: an old page beats no page
+            return entry, True
+
+    def fetch_file(self, rest, on_start, on_chunk):
+        """
+        Downloads packages/<rest> from the fastest upstream, teeing it to the client while it is stored.
+        on_start(size, content_type) is called once the upstream answered. Returns the entry or None.
+        """
+        key = f"packages/{rest}"
+        for upstream in self.upstreams.ranked():
+            base, proxy = upstream
+            try:
+                resp = open_url(_files_base(base) + rest, proxy=proxy, timeout=60)
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    continue
+                self.upstreams.failed(upstream)
+                continue
+            except OSError:
+                self.upstreams.failed(upstream)
+                continue
+            with resp:
+                content_type = resp.headers.get("Content-Type", "application/octet-stream")
+                on_start(resp.headers.get("Content-Length"), content_type)
+                return self.store.put_stream(key, resp, content_type=content_type, on_chunk=on_chunk)
+        return None
+
+class _Handler(CacheRequestHandler):
+    cache = None
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/_stats":
+            body = json.dumps({"store": self.cache.store.stats(), "upstreams": self.cache.upstreams.latency()})
+            self.send_bytes(200, body.encode("utf-8"), "application/json")
+        elif path in ("/simple", "/simple/"):
+            self._page("")
+        elif path.startswith("/simple/"):
+            self._page(_canonical(path[len("/simple/"):].strip("/")))
+        elif path.startswith("/packages/"):
+            self._file(path[len("/packages/"):])
+        else:
+            self.send_error_text(404, "not found")
+
+    do_HEAD = do_GET
+
+    def _page(self, project):
+        fmt = "json" if JSON_TYPE in (self.headers.get("Accept") or "") else "html"
+        try:
+            entry, stale = self.cache.page(project, fmt)
+        except KeyError:
+            self.send_error_text(404, f"project {project} not found")
+            return
+        if entry is None:
+            self.send_error_text(502, "all upstream indexes failed")
+            return
+        self.send_entry(entry, {"Warning": '110 - "stale index page"'} if stale else None)
+
+    def _file(self, rest):
+        self.pull_through(self.cache.store, f"packages/{rest}", functools.partial(self.cache.fetch_file, rest))
+
+def start_pypi_cache(port=PYPI_CACHE_PORT, upstream_port=None, max_bytes=MAX_BYTES, host=LISTEN_HOST):
+    """Creates the cache server (not yet serving). Returns (server, PyPICache)."""
+    cache = PyPICache(upstream_port, max_bytes)
+    handler = type("PyPICacheHandler", (_Handler,), {"cache": cache})
+    return CacheServer((host, port), handler), cache
+
+def run_pypi_cache(port=PYPI_CACHE_PORT, max_gb=None):
+    """Foreground entry point for `main.py --pypi-cache`."""
+    upstream_port = detect_proxy_port()
+    max_bytes = int(max_gb * 1024 ** 3) if max_gb else MAX_BYTES
+    try:
+        server, cache = start_pypi_cache(port, upstream_port, max_bytes)
+    except OSError as e:
+        Colors.print_error(f"PyPI 缓存启动失败: {e}")
+        return
+    latency = cache.upstreams.measure()
+    stats = cache.store.stats()
+    Colors.print_success(f"PyPI 缓存已启动: http://{get_local_ip()}:{port}/simple")
+    for url, lat in latency.items():
+        echo(f"  上游 {url:<50}{'不可用' if lat is None else f'{lat * 1000:.0f} ms'}")
+    Colors.print_info(f"缓存目录: {cache.store.root} ({format_bytes(stats['size_bytes'])} / {format_bytes(max_bytes)})")
+    Colors.print_info("本机使用: python main.py --pip-mirror local")
+    Colors.print_info(f"其他机器: 设置环境变量 NETWORK_BOOSTER_PYPI_CACHE=http://{get_local_ip()}:{port}/simple 后运行同一命令")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        Colors.print_info("PyPI 缓存已停止")
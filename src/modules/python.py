@@ -1,13 +1,25 @@
+import urllib.parse
 from ..core.utils import run_command, Colors
+from ..core.mirrors import MIRRORS, resolve
 
-def set_pip_mirror(source="tsinghua"):
-    mirrors = {
-        "tsinghua": "https://pypi.tuna.tsinghua.edu.cn/simple",
-        "aliyun": "https://mirrors.aliyun.com/pypi/simple/",
-    }
-    url = mirrors.get(source, mirrors["tsinghua"])
+PIP_MIRRORS = MIRRORS["pip"]
+
+# Added in this order, so the last one ends up with the highest priority
+CONDA_CHANNEL_NAMES = ["pkgs/free", "pkgs/main", "cloud/conda-forge"]
+CONDA_CHANNELS = [f"{MIRRORS['conda']['tsinghua']}/{name}/" for name in CONDA_CHANNEL_NAMES]
+
+def set_pip_mirror(source="auto"):
+    """source: a PIP_MIRRORS name, "auto" (currently best-scoring mirror) or "local"."""
+    if source == "local":
+        # The pull-through cache (pypi_cache) on this or another machine
+        from .pypi_cache import local_index_url
+        url = local_index_url()
+    else:
+        source, url = resolve("pip", source)
     Colors.print_info(f"正在配置 Pip 为镜像模式 ({source})...")
     run_command("pip config unset global.proxy") 
+    if url.startswith("http://"):
+        run_command(f"pip config set global.trusted-host {urllib.parse.urlsplit(url).hostname}")
     res = run_command(f"pip config set global.index-url {url}")
     if res and res.returncode == 0:
         Colors.print_success("Pip 镜像模式配置成功")
@@ -23,18 +35,25 @@ def unset_pip_config():
     Colors.print_info("正在恢复 Pip 默认配置...")
     run_command("pip config unset global.index-url")
     run_command("pip config unset global.proxy")
+    run_command("pip config unset global.trusted-host")
     Colors.print_success("Pip 已恢复默认")
 
-def set_conda_mirror():
-    Colors.print_info("正在配置 Conda 为镜像模式 (清华源)...")
+def set_conda_mirror(source="auto"):
+    """source: a conda mirror name, "auto" (currently best-scoring mirror) or "local"."""
+    if source == "local":
+        # The repodata cache (conda_cache) serving the same channels
+        from .conda_cache import local_channel_url
+        channels = [local_channel_url(url) for url in CONDA_CHANNELS]
+        Colors.print_info("正在配置 Conda 为本地缓存镜像模式...")
+    else:
+        source, base = resolve("conda", source)
+        channels = [f"{base}/{name}/" for name in CONDA_CHANNEL_NAMES]
+        Colors.print_info(f"正在配置 Conda 为镜像模式 ({source})...")
     commands = [
         "conda config --set show_channel_urls yes",
         "conda config --remove-key channels",
         "conda config --remove-key proxy_servers", 
-        "conda config --add channels https://mirrors.tuna.tsinghua.edu.cn/anaconda/pkgs/free/",
-        "conda config --add channels https://mirrors.tuna.tsinghua.edu.cn/anaconda/pkgs/main/",
-        "conda config --add channels https://mirrors.tuna.tsinghua.edu.cn/anaconda/cloud/conda-forge/",
-    ]
+    ] + [f"conda config --add channels {url}" for url in channels]
     for cmd in commands:
         run_command(cmd)
     Colors.print_success("Conda 镜像模式配置成功")
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+import threading
+import functools
+import urllib.error
+import urllib.parse
+from ..core.utils import Colors, detect_proxy_port
+from ..core.progress import format_bytes
+from ..core.cache_store import CacheStore, CacheServer, CacheRequestHandler, Upstreams, open_url
+
+REGISTRY_CACHE_PORT = 5050
+LISTEN_HOST = "0.0.0.0"
+MAX_BYTES = 30 * 1024 ** 3
+OFFICIAL_REGISTRY = "https://registry-1.docker.io"
+TAG_MAX_AGE = 60   # tags move; digests never do
+MANIFEST_ACCEPT = ", ".join((
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+))
+
+_MANIFEST_RE = re.compile(r"^/v2/(?P<name>.+)/manifests/(?P<ref>[^/]+)$")
+_BLOB_RE = re.compile(r"^/v2/(?P<name>.+)/blobs/(?P<digest>sha256:[0-9a-f]{64})$")
+_TOKENS = {}   # (base, repository) -> (expires_at, token)
+_TOKENS_LOCK = threading.Lock()
+
+def local_registry_url():
+    return os.environ.get("NETWORK_BOOSTER_REGISTRY_CACHE") or f"http://127.0.0.1:{REGISTRY_CACHE_PORT}"
+
+def _repository(path):
+    m = re.match(r"^/v2/(.+)/(?:manifests|blobs|tags)/", path)
+    return m.group(1) if m else ""
+
+def _fetch_token(challenge, repository, proxy, timeout):
+    params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+    query = {"service": params.get("service", "")}
+    if repository:
+        query["scope"] = f"repository:{repository}:pull"
+    with open_url(params["realm"] + "?" + urllib.parse.urlencode(query), timeout=timeout, proxy=proxy) as resp:
+        data = json.load(resp)
+    token = data.get("token") or data.get("access_token")
+    return token, time.time() + int(data.get("expires_in") or 60) - 10
+
+def registry_request(base, path, accept=None, proxy=None, timeout=15):
+    """
+    GET against a registry v2 endpoint, doing the anonymous Bearer token exchange on 401.
+    Tokens are cached per (registry, repository). Returns the open response.
+    """
+    repository = _repository(path)
+    headers = {"Accept": accept} if accept else {}
+    with _TOKENS_LOCK:
+        cached = _TOKENS.get((base, repository))
+    if cached and cached[0] > time.time():
+        headers["Authorization"] = f"Bearer {cached[1]}"
+    url = base.rstrip("/") + path
+    try:
+        return open_url(url, headers, timeout, proxy)
+    except urllib.error.HTTPError as e:
+        challenge = e.headers.get("WWW-Authenticate", "")
+        if e.code != 401 or not challenge.lower().startswith("bearer"):
+            raise
+    token, expires = _fetch_token(challenge, repository, proxy, timeout)
+    with _TOKENS_LOCK:
+        _TOKENS[(base, repository)] = (expires, token)
+    headers["Authorization"] = f"Bearer {token}"
+    return open_url(url, headers, timeout, proxy)
+
+def _probe_v2(upstream):
+    base, proxy = upstream
+    started = time.perf_counter()
+    try:
+        with registry_request(base, "/v2/", proxy=proxy, timeout=5) as resp:
+            resp.read()
+        return time.perf_counter() - started
+    except Exception:
+        return None
+
+class RegistryCache:
+    def __init__(self, mirrors, upstream_port=None, max_bytes=MAX_BYTES):
+        self.store = CacheStore("registry", max_bytes)
+        candidates = [(url.rstrip("/"), None) for url in mirrors]
+        if upstream_port:
+            candidates.append((OFFICIAL_REGISTRY, f"http://127.0.0.1:{upstream_port}"))
+        self.upstreams = Upstreams(candidates, probe=_probe_v2)
+
+    def manifest(self, name, ref):
+        """Returns the manifest entry for name:ref (tag or digest), or None. Raises KeyError on 404 everywhere."""
+        by_digest = ref.startswith("sha256:")
+        key = f"manifest/{name}/{ref}"
+        entry = self.store.get(key)
+        if entry and (by_digest or time.time() - entry["fetched_at"] < TAG_MAX_AGE):
+            return entry
+        with self.store.key_lock(key):
+            ranked = self.upstreams.ranked()
+            missing = 0
+            for upstream in ranked:
+                base, proxy = upstream
+                try:
+                    with registry_request(base, f"/v2/{name}/manifests/{ref}", MANIFEST_ACCEPT, proxy) as resp:
+                        body = resp.read()
+                        content_type = resp.headers.get("Content-Type")
+                except urllib.error.HTTPError as e:
+                    if e.code == 404:
+                        missing += 1
+                    else:
+                        self.upstreams.failed(upstream)
+                    continue
+                except (OSError, ValueError, KeyError):
+                    self.upstreams.failed(upstream)
+                    continue
+                expect = ("sha256", ref.split(":", 1)[1]) if by_digest else None
+                try:
+                    entry = self.store.put_bytes(key, body, content_type=content_type, expect=expect)
+                except ValueError:
+                    self.upstreams.failed(upstream)
+                    continue
+                # The manifest digest is the sha256 of its bytes, i.e. the blob digest itself
+                self.store.link(f"manifest/{name}/sha256:{entry['digest']}", entry["digest"], content_type=content_type)
+                return entry
+            if missing == len(ranked):
+                raise KeyError(f"{name}:{ref}")
+            return entry   # stale tag beats no tag
+
+    def blob(self, name, digest, on_start, on_chunk):
+        """Downloads a blob from the fastest upstream, verified against its digest."""
+        hex_digest = digest.split(":", 1)[1]
+        if self.store.get_blob(hex_digest):
+            # Layers are shared between images; any repository may have stored it already
+            return self.store.link(f"blob/{digest}", hex_digest, content_type="application/octet-stream")
+        for upstream in self.upstreams.ranked():
+            base, proxy = upstream
+            try:
+                resp = registry_request(base, f"/v2/{name}/blobs/{digest}", proxy=proxy, timeout=60)
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    self.upstreams.failed(upstream)
+                continue
+            except (OSError, KeyError):
+                self.upstreams.failed(upstream)
+                continue
+            with resp:
+                on_start(resp.headers.get("Content-Length"), "application/octet-stream")
+                return self.store.put_stream(f"blob/{digest}", resp, content_type="application/octet-stream",
+                                             expect=("sha256", hex_digest), on_chunk=on_chunk)
+        return None
+
+class _Handler(CacheRequestHandler):
+    cache = None
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path in ("/v2", "/v2/"):
+            self.send_bytes(200, b"{}", "application/json", {"Docker-Distribution-API-Version": "registry/2.0"})
+            return
+        if path == "/_stats":
+            body = json.dumps({"store": self.cache.store.stats(), "upstreams": self.cache.upstreams.latency()})
+            self.send_bytes(200, body.encode("utf-8"), "application/json")
+            return
+        m = _MANIFEST_RE.match(path)
+        if m:
+            self._manifest(m.group("name"), m.group("ref"))
+            return
+        m = _BLOB_RE.match(path)
+        if m:
+            digest = m.group("digest")
+            self.pull_through(self.cache.store, f"blob/{digest}",
+                              functools.partial(self.cache.blob, m.group("name"), digest),
+                              {"Docker-Content-Digest": digest})
+            return
+        self.send_bytes(404, b'{"errors":[{"code":"UNSUPPORTED"}]}', "application/json")
+
+    do_HEAD = do_GET
+
+    def _manifest(self, name, ref):
+        try:
+            entry = self.cache.manifest(name, ref)
+        except KeyError:
+            self.send_bytes(404, b'{"errors":[{"code":"MANIFEST_UNKNOWN"}]}', "application/json")
+            return
+        if entry is None:
+            self.send_error_text(502, "all upstream registries failed")
+            return
+        self.send_entry(entry, {"Docker-Content-Digest": f"sha256:{entry['digest']}"})
+
+def start_registry_cache(mirrors, port=REGISTRY_CACHE_PORT, upstream_port=None, max_bytes=MAX_BYTES, host=LISTEN_HOST):
+    """Creates the cache server (not yet serving). Returns (server, RegistryCache)."""
+    cache = RegistryCache(mirrors, upstream_port, max_bytes)
+    handler = type("RegistryCacheHandler", (_Handler,), {"cache": cache})
+    return CacheServer((host, port), handler), cache
+
+def run_registry_cache(port=REGISTRY_CACHE_PORT, max_gb=None):
+    """Foreground entry point for `main.py --registry-cache`."""
+    from .docker import rank_docker_mirrors
+    upstream_port = detect_proxy_port()
+    max_bytes = int(max_gb * 1024 ** 3) if max_gb else MAX_BYTES
+    healthy = [r["url"] for r in rank_docker_mirrors() if r["ok"]]
+    try:
+        server, cache = start_registry_cache(healthy, port, upstream_port, max_bytes)
+    except OSError as e:
+        Colors.print_error(f"镜像仓库缓存启动失败: {e}")
+        return
+    stats = cache.store.stats()
+    Colors.print_success(f"Docker 镜像仓库缓存已启动: {local_registry_url()}")
+    Colors.print_info(f"缓存目录: {cache.store.root} ({format_bytes(stats['size_bytes'])} / {format_bytes(max_bytes)})")
+    Colors.print_info("让 Docker 使用它: python main.py --docker-mirror local (需要重启 Docker)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        Colors.print_info("镜像仓库缓存已停止")
@@ -4,29 +4,7 @@ from .node import set_node_mirror, set_node_proxy
 from .git import set_git_proxy
 from .go import set_go_proxy
 from .docker import set_docker_mirror
-
-TEMPLATES = {
-    "deep_learning": {
-        "label": "Deep Learning",
-        "description": "Python/Conda + Docker + GitHub 加速（偏科学计算/镜像）",
-        "steps": [
-            ("python", "mirror"),
-            ("docker", "mirror"),
-            ("git", "proxy"),
-            ("go", "mirror"),
-        ],
-    },
-    "web_dev": {
-        "label": "Web Dev",
-        "description": "Node + Python + GitHub 加速（偏前端/镜像）",
-        "steps": [
-            ("node", "mirror"),
-            ("python", "mirror"),
-            ("git", "proxy"),
-            ("go", "mirror"),
-        ],
-    },
-}
+from . import catalog
 
 def _describe_step(module, mode):
     if module == "python" and mode == "mirror":
@@ -47,24 +25,26 @@ def _describe_step(module, mode):
 
 def list_templates():
     items = []
-    for key, meta in TEMPLATES.items():
-        steps = meta.get("steps") or []
+    # Templates live in catalog/templates (plus the user catalog) and are listed in catalog order
+    for key, meta in catalog.list_entries("templates").items():
         items.append(
             {
                 "key": key,
-                "label": meta.get("label") or key,
-                "description": meta.get("description") or "",
-                "steps": [{"module": m, "mode": md, "label": _describe_step(m, md)} for m, md in steps],
+                "label": meta["label"],
+                "description": meta["description"],
+                "tags": list(meta["tags"]),
+                "steps": [{"module": m, "mode": md, "label": _describe_step(m, md)} for m, md in meta["steps"]],
             }
         )
-    return sorted(items, key=lambda x: x["key"])
+    return items
 
 def apply_template(template_key, port=None, mode=None):
-    if template_key not in TEMPLATES:
+    try:
+        meta = catalog.get_entry("templates", template_key)
+    except KeyError:
         raise ValueError("unknown template")
 
-    meta = TEMPLATES[template_key]
-    steps = meta.get("steps") or []
+    steps = meta["steps"]
     mode = (mode or "").strip().lower() or None
     if not port:
         port = detect_proxy_port()
@@ -115,8 +95,8 @@ def apply_template(template_key, port=None, mode=None):
 
     return {
         "template": template_key,
-        "label": meta.get("label") or template_key,
-        "description": meta.get("description") or "",
+        "label": meta["label"],
+        "description": meta["description"],
         "port": str(port) if port is not None else None,
         "applied": applied,
     }
@@ -10,11 +10,10 @@ import uuid
 import queue
 import urllib.parse
 import io
-import contextlib
 import re
 import ctypes
-import shutil
-from ..core.utils import detect_proxy_port
+from ..core.utils import detect_proxy_port, output_to, install_context_stdout
+from ..core.progress import InstallProgress, format_bytes, is_raw_progress
 from ..modules.python import set_pip_mirror, set_pip_proxy, set_conda_mirror, set_conda_proxy
 from ..modules.node import set_node_mirror, set_node_proxy
 from ..modules.git import set_git_proxy
@@ -23,20 +22,26 @@ from ..modules.docker import set_docker_mirror
 from ..modules.hosts import update_github_hosts
 from ..modules.proxy_tools import generate_terminal_proxy_commands, generate_lan_proxy_guide
 from ..modules.templates import list_templates, apply_template
+from ..modules.catalog import find_by_tag
 from ..modules.plugins import list_plugins, run_plugin
 from ..modules.updater import check_for_updates
-from ..modules.env_manager import analyze_project_path, create_venv_and_install, create_conda_and_install, quick_install_pkg, install_suite, get_system_info, get_all_suites
+from ..modules.env_manager import analyze_project_path, create_venv_and_install, create_conda_and_install, quick_install_pkg, install_suite, get_system_info, get_all_suites, suite_details_json
+from ..modules.orchestrator import run_batch
+from ..modules.env_sync import watch_project
+from ..modules.net_monitor import NetworkMonitor
+from ..modules.env_registry import record_env, list_envs, find_env, refresh_env, refresh_all, delete_envs, pending_deletions, gc_envs, STALE_DAYS
 
 PORT = 8000
 WEB_ROOT = os.path.join(os.path.dirname(__file__), 'static')
 APP_VERSION = os.environ.get("APP_VERSION") or "4.0.0"
 UPDATE_INFO = None
+MONITOR = None
 
 JOBS = {}
 JOBS_LOCK = threading.Lock()
-RECENT_ENVS = []
-RECENT_ENVS_LOCK = threading.Lock()
+ENV_REFRESH_INTERVAL = 3600
 ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+LINE_END_RE = re.compile(r'\r\n|\n|\r')
 
 def _is_admin():
     if not sys.platform.startswith("win"):
@@ -110,20 +115,49 @@ def _set_progress(job, value, title=None):
 def _strip_ansi(s):
     return ANSI_RE.sub('', s)
 
+STALL_WARN_SECONDS = 60
+PROGRESS_MIN_INTERVAL = 0.5
+
 class StreamLogger:
-    def __init__(self, job):
+    def __init__(self, job, progress_range=None):
         self.job = job
         self.buf = io.StringIO()
         self.line_buf = ""
+        # Maps InstallProgress.percent (0-100) into this slice of the job bar
+        self.progress_range = progress_range
+        self.progress = InstallProgress() if progress_range else None
+        self.last_progress_push = 0.0
+        # Batch jobs write from several worker threads
+        self.lock = threading.Lock()
 
     def write(self, message):
+        with self.lock:
+            self._write(message)
+
+    def _write(self, message):
         self.buf.write(message)
         self.line_buf += message
-        while '\n' in self.line_buf:
-            line, self.line_buf = self.line_buf.split('\n', 1)
-            line = line.strip()
-            if line:
-                _log(self.job, 'info', _strip_ansi(line))
+        while True:
+            m = LINE_END_RE.search(self.line_buf)
+            if not m:
+                break
+            seg = _strip_ansi(self.line_buf[:m.start()])
+            self.line_buf = self.line_buf[m.end():]
+            self._track(seg)
+            # A bare '\r' ends an in-place progress redraw: it feeds the progress engine but is not logged.
+            # pip's raw byte counter is the same kind of update even when it arrives as a full line
+            if m.group() != '\r' and seg.strip() and not is_raw_progress(seg):
+                _log(self.job, 'info', seg.strip())
+
+    def _track(self, segment):
+        if not self.progress or not self.progress.feed(segment):
+            return
+        now = time.monotonic()
+        if now - self.last_progress_push < PROGRESS_MIN_INTERVAL:
+            return
+        self.last_progress_push = now
+        lo, hi = self.progress_range
+        _set_progress(self.job, lo + (hi - lo) * self.progress.percent / 100.0, self.progress.describe())
 
     def flush(self):
         pass
@@ -131,12 +165,29 @@ class StreamLogger:
     def getvalue(self):
         return self.buf.getvalue()
 
-def _run_with_streaming(job, fn, *args, **kwargs):
-    streamer = StreamLogger(job)
+def _watch_stall(job, streamer, done):
+    warned = False
+    while not done.wait(5):
+        idle = streamer.progress.stalled_for()
+        if idle >= STALL_WARN_SECONDS and not warned:
+            warned = True
+            job['stalled'] = True
+            _log(job, 'warning', f'已 {int(idle)} 秒没有新的输出或下载进度，网络可能停滞')
+            _push_event(job, {'type': 'stall', 'seconds': int(idle), 'title': streamer.progress.title})
+        elif idle < STALL_WARN_SECONDS and warned:
+            warned = False
+            job['stalled'] = False
+            _log(job, 'info', '下载已恢复')
+
+def _run_with_streaming(job, fn, *args, progress_range=None, **kwargs):
+    streamer = StreamLogger(job, progress_range)
     stop_event = job.get('stop_event')
     if stop_event:
         kwargs['stop_event'] = stop_event
-    with contextlib.redirect_stdout(streamer):
+    done = threading.Event()
+    if streamer.progress:
+        threading.Thread(target=_watch_stall, args=(job, streamer, done), daemon=True).start()
+    with output_to(streamer):
         try:
             ret = fn(*args, **kwargs)
         except InterruptedError:
@@ -146,11 +197,13 @@ def _run_with_streaming(job, fn, *args, **kwargs):
              if stop_event and stop_event.is_set():
                  raise InterruptedError("Job stopped by user")
              raise e
+        finally:
+            done.set()
     return ret, streamer.getvalue()
 
 def _capture_stdout(fn, *args, **kwargs):
     buf = io.StringIO()
-    with contextlib.redirect_stdout(buf):
+    with output_to(buf):
         ret = fn(*args, **kwargs)
     return ret, buf.getvalue()
 
@@ -174,20 +227,43 @@ def _fail_job(job, error_message):
     job['error'] = error_message
     _push_event(job, {'type': 'error', 'error': error_message})
 
-def _handle_env_result(job, ret):
+def _remember_env(ret, suite=None, packages=None):
+    key = record_env(ret, suite=suite, packages=packages)
+    if key:
+        # Size and health of a fresh env are filled in without holding up the job
+        entry = next((e for e in list_envs() if e['key'] == key), None)
+        if entry:
+            threading.Thread(target=refresh_env, args=(entry,), daemon=True).start()
+
+def _handle_env_result(job, ret, suite=None, packages=None):
     if isinstance(ret, dict):
         msg = ret.get('message', '操作完成')
-        if 'env_name' in ret or 'env_path' in ret:
-            with RECENT_ENVS_LOCK:
-                # Add to beginning, keep max 20
-                entry = {**ret, 'timestamp': _now_ms()}
-                RECENT_ENVS.insert(0, entry)
-                while len(RECENT_ENVS) > 20:
-                    RECENT_ENVS.pop()
+        _remember_env(ret, suite=suite, packages=packages)
         _finish_job(job, {'message': msg, 'data': ret})
     else:
         _finish_job(job, {'message': ret})
 
+def _deletion_progress(job):
+    """on_progress callback for env deletion: bytes freed as job progress, throttled."""
+    last = [0.0]
+    def on_progress(freed, total):
+        now = time.time()
+        if now - last[0] < PROGRESS_MIN_INTERVAL and freed < total:
+            return
+        last[0] = now
+        _set_progress(job, 10 + 88 * min(freed, total) // max(total, 1), f'已释放 {format_bytes(freed)} / {format_bytes(total)}')
+        _push_event(job, {'type': 'delete_progress', 'freed': freed, 'total': total})
+    return on_progress
+
+def _env_stats_loop():
+    """Keeps disk usage, last-used time and health of registered envs current."""
+    while True:
+        try:
+            refresh_all()
+        except Exception:
+            pass
+        time.sleep(ENV_REFRESH_INTERVAL)
+
 def _run_job(job_id):
     with JOBS_LOCK:
         job = JOBS.get(job_id)
@@ -207,9 +283,10 @@ def _run_job(job_id):
             return
 
         if action == 'update_hosts':
-            _log(job, 'info', '准备更新 GitHub Hosts')
-            _set_progress(job, 20, '拉取远端 Hosts')
-            ok, output = _capture_stdout(update_github_hosts)
+            mode = params.get('mode') or 'github520'
+            _log(job, 'info', '准备更新 GitHub Hosts' + ('（本地解析 + TLS 测速）' if mode == 'resolver' else ''))
+            _set_progress(job, 20, '解析并测速候选 IP' if mode == 'resolver' else '拉取远端 Hosts')
+            ok, output = _capture_stdout(update_github_hosts, mode=mode)
             _log_captured_output(job, output)
             _set_progress(job, 80, '写入 Hosts')
             if not ok:
@@ -298,18 +375,35 @@ def _run_job(job_id):
             _set_progress(job, 10, '初始化环境')
             
             if env_type == 'conda':
-                ret, output = _run_with_streaming(job, create_conda_and_install, path)
+                ret, output = _run_with_streaming(job, create_conda_and_install, path, progress_range=(10, 98))
             else:
-                ret, output = _run_with_streaming(job, create_venv_and_install, path)
+                ret, output = _run_with_streaming(job, create_venv_and_install, path, progress_range=(10, 98))
             
             _handle_env_result(job, ret)
             return
 
+        if action == 'watch_project':
+            path = params.get('path')
+            _log(job, 'info', f'进入依赖监听模式: {path}')
+            _set_progress(job, 50, '监听中')
+
+            def on_sync(summary):
+                _push_event(job, {'type': 'sync', 'summary': summary})
+
+            history, output = _run_with_streaming(
+                job, watch_project, path,
+                env_type=params.get('envType'),
+                uninstall_removed=bool(params.get('uninstall_removed')),
+                on_sync=on_sync,
+            )
+            _finish_job(job, {'message': f'监听已停止，共完成 {len(history)} 次增量同步', 'history': history})
+            return
+
         if action == 'quick_install':
             pkg = params.get('pkg')
             _log(job, 'info', f'快速安装: {pkg}')
             _set_progress(job, 10, '下载安装中')
-            ret, output = _run_with_streaming(job, quick_install_pkg, pkg)
+            ret, output = _run_with_streaming(job, quick_install_pkg, pkg, progress_range=(10, 98))
             _handle_env_result(job, ret)
             return
 
@@ -324,8 +418,75 @@ def _run_job(job_id):
                 _log(job, 'info', f'自定义包列表 ({len(custom_packages)}个): {", ".join(custom_packages[:5])}...')
                  
             _set_progress(job, 10, '初始化环境与依赖')
-            ret, output = _run_with_streaming(job, install_suite, suite, target, env_name, custom_packages)
-            _handle_env_result(job, ret)
+            ret, output = _run_with_streaming(job, install_suite, suite, target, env_name, custom_packages, progress_range=(10, 98))
+            packages = custom_packages or (get_all_suites().get(suite) or {}).get('pip_base')
+            _handle_env_result(job, ret, suite=suite, packages=packages)
+            return
+
+        if action == 'install_batch':
+            items = params.get('items') or []
+            _log(job, 'info', f'批量安装: {len(items)} 个环境')
+            _set_progress(job, 5, '规划批量任务')
+            finished = []
+
+            def on_event(event):
+                status = event.get('status')
+                label = event.get('env_name') or event.get('suite')
+                if status == 'done':
+                    finished.append(event['index'])
+                    if isinstance(event.get('result'), dict):
+                        _remember_env(event['result'], suite=event.get('suite'))
+                    _log(job, 'success', f'[{label}] 安装完成')
+                elif status == 'error':
+                    finished.append(event['index'])
+                    _log(job, 'error', f'[{label}] 安装失败: {event.get("error")}')
+                elif status == 'running':
+                    _log(job, 'info', f'[{label}] 开始安装')
+                _push_event(job, {k: v for k, v in event.items() if k != 'result'})
+                if finished:
+                    _set_progress(job, 10 + 85 * len(finished) // max(1, len(items)), f'已完成 {len(finished)}/{len(items)}')
+
+            results, output = _run_with_streaming(job, run_batch, items, on_event=on_event)
+            failed = [r for r in results if r and not r['ok']]
+            if failed:
+                _fail_job(job, f'{len(failed)}/{len(results)} 个环境安装失败')
+                return
+            _finish_job(job, {'message': f'{len(results)} 个环境全部安装成功', 'results': results})
+            return
+
+        if action == 'refresh_envs':
+            _log(job, 'info', '正在统计环境占用空间与健康状态')
+            _set_progress(job, 20, '扫描环境')
+            entries, output = _run_with_streaming(job, refresh_all)
+            unhealthy = [e for e in entries if e['healthy'] is False]
+            for e in unhealthy:
+                _log(job, 'warning', f"{e['env_name'] or e['env_path']}: {e['health_error']}")
+            _finish_job(job, {'message': f'已刷新 {len(entries)} 个环境，{len(unhealthy)} 个异常', 'envs': entries})
+            return
+
+        if action == 'delete_envs':
+            keys = params.get('keys') or []
+            entries = [e for e in list_envs() if e['key'] in keys]
+            _log(job, 'info', f"删除环境: {', '.join(e['env_name'] or e['env_path'] for e in entries) or '继续未完成的删除'}")
+            _set_progress(job, 10, '移出环境目录')
+            summary, output = _run_with_streaming(job, delete_envs, entries, on_progress=_deletion_progress(job))
+            for label, error in summary['failed']:
+                _log(job, 'error', f'{label}: {error}')
+            if summary['failed'] and not summary['deleted']:
+                _fail_job(job, f"删除失败: {summary['failed'][0][1]}")
+                return
+            _finish_job(job, {'message': f"已删除 {len(summary['deleted'])} 个环境，释放 {format_bytes(summary['freed_bytes'])}", 'summary': summary})
+            return
+
+        if action == 'gc_envs':
+            days = int(params.get('days') or STALE_DAYS)
+            dry_run = bool(params.get('dry_run'))
+            _log(job, 'info', f'清理超过 {days} 天未使用的环境' + (' (预览)' if dry_run else ''))
+            _set_progress(job, 10, '扫描闲置环境')
+            summary, output = _run_with_streaming(job, gc_envs, days=days, dry_run=dry_run, on_progress=_deletion_progress(job))
+            freed = summary['freed_bytes'] / 1024 / 1024 / 1024
+            verb = '可释放' if dry_run else '已释放'
+            _finish_job(job, {'message': f"{len(summary['deleted'])} 个闲置环境，{verb} {freed:.2f} GB", 'summary': summary})
             return
 
         if action == 'apply_config':
@@ -429,9 +590,21 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             return
 
         if self.path.startswith('/api/recent_envs'):
-            with RECENT_ENVS_LOCK:
-                data = list(RECENT_ENVS)
-            body = json.dumps({'envs': data}, ensure_ascii=False).encode('utf-8')
+            data = list_envs()
+            body = json.dumps({'envs': data, 'pending_deletions': pending_deletions()}, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path.startswith('/api/suites'):
+            qs = urllib.parse.urlparse(self.path).query
+            tag = (urllib.parse.parse_qs(qs).get('tag') or [''])[0]
+            suites = get_all_suites()
+            names = find_by_tag('suites', tag) if tag else list(suites)
+            data = [{'name': n, 'title': suites[n]['title'], 'desc': suites[n]['desc'], 'tags': list(suites[n]['tags'])} for n in names if n in suites]
+            body = json.dumps({'suites': data}, ensure_ascii=False).encode('utf-8')
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.end_headers()
@@ -443,13 +616,8 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             params = urllib.parse.parse_qs(qs)
             suite_name = (params.get('suite') or [''])[0]
             
-            suites = get_all_suites()
-            if suite_name and suite_name in suites:
-                data = suites[suite_name]
-            else:
-                data = {'error': 'suite not found'}
-                
-            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            # Plans are compiled once per hardware profile; this is a dict lookup
+            body = suite_details_json(suite_name) or json.dumps({'error': 'suite not found'}).encode('utf-8')
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.end_headers()
@@ -472,6 +640,44 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             self.wfile.write(body)
             return
 
+        if self.path.startswith('/api/monitor/stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'keep-alive')
+            self.end_headers()
+            monitor = MONITOR
+            # The keep-alive header above reopened the connection; end it with the stream
+            self.close_connection = True
+            if not monitor:
+                self.wfile.write(b"data: {\"type\":\"disabled\"}\n\n")
+                self.wfile.flush()
+                return
+            events = monitor.subscribe()
+            try:
+                while MONITOR is monitor:
+                    try:
+                        event = events.get(timeout=15)
+                        payload = json.dumps(event, ensure_ascii=False).encode('utf-8')
+                        self.wfile.write(b"data: " + payload + b"\n\n")
+                    except queue.Empty:
+                        self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+            except Exception:
+                pass
+            finally:
+                monitor.unsubscribe(events)
+            return
+
+        if self.path.startswith('/api/monitor'):
+            status = MONITOR.status() if MONITOR else {'mode': None}
+            body = json.dumps({'enabled': MONITOR is not None, **status}, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
         if self.path.startswith('/api/stream'):
             qs = urllib.parse.urlparse(self.path).query
             params = urllib.parse.parse_qs(qs)
@@ -570,7 +776,7 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         if action == 'start_job':
             job_action = data.get('action')
             params = data.get('params') or {}
-            allowed = {'detect_port', 'apply_config', 'update_hosts', 'terminal_proxy', 'lan_guide', 'apply_template', 'plugin_run', 'analyze_project', 'install_project', 'quick_install', 'install_suite'}
+            allowed = {'detect_port', 'apply_config', 'update_hosts', 'terminal_proxy', 'lan_guide', 'apply_template', 'plugin_run', 'analyze_project', 'install_project', 'quick_install', 'install_suite', 'install_batch', 'watch_project', 'refresh_envs', 'gc_envs', 'delete_envs'}
             if job_action not in allowed:
                 return {'status': 'error', 'error': 'unsupported action'}
 
@@ -597,51 +803,11 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             return {'message': 'Stop signal sent'}
 
         if action == 'delete_recent_env':
-            env_path = data.get('env_path')
-            env_name = data.get('env_name')
-            env_type = data.get('type')
-            
-            # Remove from memory list
-            with RECENT_ENVS_LOCK:
-                to_remove = -1
-                for i, env in enumerate(RECENT_ENVS):
-                     if (env_path and env.get('env_path') == env_path) or \
-                        (env_name and env.get('env_name') == env_name):
-                         to_remove = i
-                         break
-                if to_remove != -1:
-                    RECENT_ENVS.pop(to_remove)
-            
-            # Physical deletion
-            success = False
-            errors = []
-            
-            # 1. Try Conda Remove if applicable
-            if env_type == 'conda' and env_name:
-                 from ..core.utils import run_command
-                 cmd = f"conda env remove -n {env_name} -y"
-                 res = run_command(cmd)
-                 if res.returncode == 0:
-                     success = True
-                 else:
-                     errors.append(f"Conda remove failed: {res.stdout}")
-            
-            # 2. Try removing by path (for venv or failed conda)
-            if not success and env_path and os.path.exists(env_path):
-                 try:
-                     shutil.rmtree(env_path)
-                     success = True
-                 except Exception as e:
-                     errors.append(f"File delete failed: {e}")
-            
-            if success:
-                 return {'message': 'Environment deleted'}
-            else:
-                 if not errors:
-                     return {'message': 'Environment not found or already deleted'}
-                 return {'message': f"Deletion failed: {'; '.join(errors)}"}
-
-
+            # Deleting a multi-GB env takes minutes; run it as a job instead of inside this request
+            entry = find_env(env_name=data.get('env_name'), env_path=data.get('env_path'))
+            if not entry:
+                return {'message': 'Environment not found or already deleted'}
+            return self.handle_api('/api/start_job', {'action': 'delete_envs', 'params': {'keys': [entry['key']]}})
 
         if action == 'relaunch_admin':
             if not sys.platform.startswith("win"):
@@ -654,6 +820,15 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                 return {'status': 'ok', 'message': 'relaunching'}
             return {'status': 'error', 'error': 'failed to relaunch as admin'}
 
+        if action == 'monitor':
+            global MONITOR
+            if data.get('enable') and not MONITOR:
+                MONITOR = NetworkMonitor(auto_switch=data.get('auto_switch', True)).start()
+            elif not data.get('enable') and MONITOR:
+                MONITOR.stop()
+                MONITOR = None
+            return {'status': 'ok', 'enabled': MONITOR is not None}
+
         if action == 'detect_port':
             port = detect_proxy_port()
             return {'status': 'success', 'port': port}
@@ -699,7 +874,8 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
 class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     pass
 
-def launch_web_ui():
+def launch_web_ui(monitor=False):
+    global MONITOR
     Handler = RequestHandler
     print(f"正在启动 Web 界面: http://localhost:{PORT}")
     print("请在浏览器中查看...")
@@ -708,6 +884,11 @@ def launch_web_ui():
     webbrowser.open(f"http://localhost:{PORT}")
 
     threading.Thread(target=_refresh_update_info, daemon=True).start()
+    threading.Thread(target=_env_stats_loop, daemon=True).start()
+    if monitor:
+        MONITOR = NetworkMonitor().start()
+    # Job threads bind their own output channel; bare print() in plugins is routed through it as well
+    install_context_stdout()
     
     with ThreadingTCPServer(("", PORT), Handler) as httpd:
         try:
@@ -0,0 +1,109 @@
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+from src.core import cache_store
+from src.core.cache_store import CacheStore
+
+class FakeTime:
+    """time module stand-in whose clock only moves when told to, so LRU order is deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic_ns(self):
+        return time.monotonic_ns()
+
+class CacheStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        self.addCleanup(os.chdir, cwd)
+        self.clock = FakeTime()
+        patcher = mock.patch.object(cache_store, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = CacheStore("test", max_bytes=250)
+
+    def put(self, key, data, **kwargs):
+        self.clock.now += 1
+        return self.store.put_bytes(key, data, **kwargs)
+
+    def test_round_trip_and_dedupe(self):
+        a = self.put("a", b"x" * 10, content_type="text/plain", etag='"1"')
+        b = self.put("b", b"x" * 10)
+        self.assertEqual(a["digest"], hashlib.sha256(b"x" * 10).hexdigest())
+        self.assertEqual(a["digest"], b["digest"])
+        self.assertEqual(self.store.stats()["blobs"], 1)
+        got = self.store.get("a")
+        self.assertEqual((got["etag"], got["content_type"], got["path"].read_bytes()), ('"1"', "text/plain", b"x" * 10))
+
+    def test_least_recently_used_is_evicted(self):
+        self.put("a", b"a" * 100)
+        self.put("b", b"b" * 100)
+        self.clock.now += 1
+        self.store.get("a")
+        self.put("c", b"c" * 100)
+        self.assertIsNotNone(self.store.get("a"))
+        self.assertIsNone(self.store.get("b"))
+        self.assertIsNotNone(self.store.get("c"))
+        self.assertLessEqual(self.store.stats()["size_bytes"], 250)
+
+    def test_pinned_blobs_stay(self):
+        self.put("pinned", b"p" * 200, pinned=True)
+        self.put("a", b"a" * 100)
+        self.assertIsNotNone(self.store.get("pinned"))
+        self.assertIsNone(self.store.get("a"))
+
+    def test_unreferenced_blobs_go_first(self):
+        self.put("page", b"1" * 100)
+        self.put("other", b"o" * 100)
+        self.put("page", b"2" * 100)   # the first page body is now referenced by nothing
+        self.assertIsNotNone(self.store.get("other"))
+        self.assertIsNone(self.store.get_blob(hashlib.sha256(b"1" * 100).hexdigest()))
+
+    def test_aliases_follow_their_blob(self):
+        entry = self.put("a", b"a" * 100)
+        self.store.add_alias("sha512-abc", entry["digest"])
+        self.assertEqual(self.store.find_alias("sha512-abc"), entry["digest"])
+        self.assertEqual(self.store.link("b", entry["digest"])["size"], 100)
+        self.put("c", b"c" * 100)
+        self.put("d", b"d" * 100)
+        self.assertIsNone(self.store.find_alias("sha512-abc"))
+
+    def test_checksum_mismatch_keeps_nothing(self):
+        with self.assertRaises(ValueError):
+            self.put("a", b"data", expect=("sha256", "0" * 64))
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+        self.assertEqual(self.store.stats()["blobs"], 0)
+
+    def test_missing_blob_file_drops_the_entry(self):
+        entry = self.put("a", b"a")
+        os.unlink(entry["path"])
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(self.store.stats()["entries"], 0)
+
+    def test_revalidated_refreshes_validators(self):
+        self.put("a", b"a", etag='"1"')
+        self.clock.now += 50
+        self.store.revalidated("a", etag='"2"')
+        got = self.store.get("a")
+        self.assertEqual((got["etag"], got["fetched_at"]), ('"2"', self.clock.now))
+
+    def test_key_locks_are_released(self):
+        with self.store.key_lock("k"):
+            with self.store.key_lock("other"):
+                pass
+        self.assertEqual(self.store._key_locks, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.modules import catalog
+from src.modules.catalog import CatalogError, get_entry, list_entries, find_by_tag
+
+class BuiltinCatalogTest(unittest.TestCase):
+    def test_every_shipped_entry_is_valid(self):
+        for kind in catalog.KINDS:
+            names = [os.path.splitext(f)[0] for f in os.listdir(os.path.join(catalog.CATALOG_DIR, kind))]
+            with mock.patch.object(catalog, "catalog_dirs", lambda: [catalog.CATALOG_DIR]):
+                for name in names:
+                    get_entry(kind, name)
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.builtin = tempfile.mkdtemp()
+        self.user = tempfile.mkdtemp()
+        for d in (self.builtin, self.user):
+            self.addCleanup(shutil.rmtree, d)
+            for kind in catalog.KINDS:
+                os.makedirs(os.path.join(d, kind))
+        patcher = mock.patch.object(catalog, "catalog_dirs", lambda: [self.builtin, self.user])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        catalog._VERSIONS.clear()
+        self._write(self.builtin, "groups.json", {"web": ["flask", "requests"]})
+
+    def _write(self, root, rel, data):
+        with open(os.path.join(root, rel), "w", encoding="utf-8") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+
+    def test_groups_expand_without_duplicates(self):
+        self._write(self.builtin, "suites/web.json", {"desc": "Web", "packages": ["@web", "flask", "uvicorn"]})
+        entry = get_entry("suites", "web")
+        self.assertEqual(entry["pip_base"], ("flask", "requests", "uvicorn"))
+        self.assertEqual(entry["conda_base"], entry["pip_base"])
+        self.assertEqual(entry["title"], "Web")
+
+    def test_per_installer_lists_override_packages(self):
+        self._write(self.builtin, "suites/s.json", {"desc": "S", "packages": ["a"], "conda_base": ["b"]})
+        entry = get_entry("suites", "s")
+        self.assertEqual((entry["pip_base"], entry["conda_base"]), (("a",), ("b",)))
+
+    def test_invalid_entries(self):
+        bad = {
+            "nodesc": {"packages": ["a"]},
+            "nopkgs": {"desc": "x"},
+            "badgroup": {"desc": "x", "packages": ["@missing"]},
+            "badtorch": {"desc": "x", "packages": ["a"], "torch": "yes"},
+            "badtags": {"desc": "x", "packages": ["a"], "tags": "web"},
+        }
+        for name, data in bad.items():
+            self._write(self.builtin, f"suites/{name}.json", data)
+        self._write(self.builtin, "suites/broken.json", "{not json")
+        for name in list(bad) + ["broken"]:
+            with self.assertRaises(CatalogError, msg=name):
+                get_entry("suites", name)
+        self.assertEqual(list_entries("suites"), {})
+        with self.assertRaises(KeyError):
+            get_entry("suites", "absent")
+
+    def test_template_steps(self):
+        self._write(self.builtin, "templates/ok.json", {"steps": [["python", "mirror"], ["git", "proxy"]]})
+        self._write(self.builtin, "templates/bad.json", {"steps": [["rust", "mirror"]]})
+        self.assertEqual(get_entry("templates", "ok")["steps"], (("python", "mirror"), ("git", "proxy")))
+        with self.assertRaises(CatalogError):
+            get_entry("templates", "bad")
+
+    def test_user_catalog_overrides_and_orders(self):
+        self._write(self.builtin, "suites/a.json", {"desc": "built-in", "packages": ["x"], "order": 5, "tags": ["t"]})
+        self._write(self.builtin, "suites/b.json", {"desc": "b", "packages": ["x"], "order": 1, "tags": ["t"]})
+        self._write(self.user, "suites/a.json", {"desc": "mine", "packages": ["y"], "order": 5, "tags": ["t"]})
+        self.assertEqual(get_entry("suites", "a")["desc"], "mine")
+        self.assertEqual(list(list_entries("suites")), ["b", "a"])
+        self.assertEqual(find_by_tag("suites", "t"), ["b", "a"])
+
+    def test_changed_file_is_reloaded(self):
+        self._write(self.builtin, "suites/a.json", {"desc": "one", "packages": ["x"]})
+        self.assertEqual(get_entry("suites", "a")["desc"], "one")
+        self._write(self.builtin, "suites/a.json", {"desc": "second", "packages": ["x"]})
+        self.assertEqual(get_entry("suites", "a")["desc"], "second")
+
+if __name__ == "__main__":
+    unittest.main()
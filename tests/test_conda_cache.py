@@ -0,0 +1,50 @@
+import json
+import unittest
+from unittest import mock
+from src.modules.conda_cache import trim_repodata, channel_name, conda_subdir, local_channel_url, CondaCache
+
+class TrimRepodataTest(unittest.TestCase):
+    def test_drops_only_tar_bz2_with_a_conda_twin(self):
+        doc = {
+            "info": {"subdir": "linux-64"},
+            "packages": {"a-1.0-0.tar.bz2": {"v": 1}, "b-1.0-0.tar.bz2": {"v": 2}},
+            "packages.conda": {"a-1.0-0.conda": {"v": 3}},
+            "removed": [],
+        }
+        trimmed = json.loads(trim_repodata(json.dumps(doc).encode()))
+        self.assertEqual(trimmed["packages"], {"b-1.0-0.tar.bz2": {"v": 2}})
+        self.assertEqual(trimmed["packages.conda"], doc["packages.conda"])
+        self.assertEqual(trimmed["info"], doc["info"])
+
+    def test_legacy_repodata_without_conda_section(self):
+        doc = {"packages": {"a-1.0-0.tar.bz2": {}}}
+        self.assertEqual(json.loads(trim_repodata(json.dumps(doc))), doc)
+
+class ChannelTest(unittest.TestCase):
+    def test_channel_name(self):
+        self.assertEqual(channel_name("https://mirrors.tuna.tsinghua.edu.cn/anaconda/cloud/conda-forge/"), "cloud/conda-forge")
+        self.assertEqual(channel_name("https://mirrors.ustc.edu.cn/anaconda/pkgs/main"), "pkgs/main")
+        self.assertEqual(channel_name("https://example.com/x/pkgs/main/"), "pkgs/main")
+
+    def test_local_channel_url(self):
+        with mock.patch.dict("os.environ", {"NETWORK_BOOSTER_CONDA_CACHE": "http://10.0.0.2:8765/"}):
+            self.assertEqual(local_channel_url("https://mirrors.bfsu.edu.cn/anaconda/cloud/pytorch"),
+                             "http://10.0.0.2:8765/cloud/pytorch/")
+
+    def test_subdir(self):
+        with mock.patch("platform.system", return_value="Darwin"), mock.patch("platform.machine", return_value="arm64"):
+            self.assertEqual(conda_subdir(), "osx-arm64")
+        with mock.patch("platform.system", return_value="Linux"), mock.patch("platform.machine", return_value="aarch64"):
+            self.assertEqual(conda_subdir(), "linux-aarch64")
+        with mock.patch("platform.system", return_value="Windows"), mock.patch("platform.machine", return_value="AMD64"):
+            self.assertEqual(conda_subdir(), "win-64")
+
+    def test_split_prefers_the_longest_channel(self):
+        cache = CondaCache.__new__(CondaCache)
+        cache.channels = {"pkgs/main": None, "cloud/conda-forge": None, "cloud/conda-forge-extra": None}
+        self.assertEqual(cache.split("/cloud/conda-forge-extra/noarch/x.conda"), ("cloud/conda-forge-extra", "noarch/x.conda"))
+        self.assertEqual(cache.split("/pkgs/main/linux-64/repodata.json"), ("pkgs/main", "linux-64/repodata.json"))
+        self.assertEqual(cache.split("/unknown/x"), (None, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import struct
+import unittest
+from src.core import dns
+
+def answer(query, records, extra=b""):
+    """A response to query with [(rtype, ttl, rdata)] answers pointing back at the question name."""
+    qid, flags, qdcount = struct.unpack_from("!HHH", query, 0)
+    body = b"".join(b"\xc0\x0c" + struct.pack("!HHIH", rtype, dns.CLASS_IN, ttl, len(rdata)) + rdata
+                    for rtype, ttl, rdata in records)
+    header = struct.pack("!HHHHHH", qid, 0x8180, qdcount, len(records), 0, 1 if extra else 0)
+    return header + query[12:] + body + extra
+
+# EDNS OPT pseudo-record: its "TTL" field carries flags and must never be rewritten
+OPT = b"\x00" + struct.pack("!HHIH", dns.QTYPE_OPT, 1232, 0x8000, 0)
+
+class BuildParseTest(unittest.TestCase):
+    def test_query_round_trip(self):
+        qid, query = dns.build_query("api.github.com", dns.QTYPE_AAAA, query_id=0x1234)
+        self.assertEqual(qid, 0x1234)
+        self.assertEqual(dns.read_question(query), ("api.github.com", dns.QTYPE_AAAA))
+        self.assertEqual(dns.question_end(query), len(query))
+
+    def test_encode_name_rejects_bad_labels(self):
+        with self.assertRaises(dns.DNSError):
+            dns.encode_name("a..b")
+        with self.assertRaises(dns.DNSError):
+            dns.encode_name("x" * 64 + ".com")
+
+    def test_parse_a_aaaa_and_cname(self):
+        _, query = dns.build_query("github.com", query_id=7)
+        cname = dns.encode_name("lb.github.com")
+        data = answer(query, [(dns.QTYPE_CNAME, 30, cname), (dns.QTYPE_A, 60, bytes([140, 82, 112, 3])),
+                              (dns.QTYPE_AAAA, 90, bytes(15) + b"\x01")])
+        parsed = dns.parse_response(data, query_id=7)
+        self.assertEqual(parsed["question"], ("github.com", dns.QTYPE_A))
+        self.assertEqual([a["data"] for a in parsed["answers"]], ["lb.github.com", "140.82.112.3", "::1"])
+        self.assertEqual(dns.addresses(parsed), [("140.82.112.3", 60)])
+
+    def test_id_mismatch_and_short_messages(self):
+        _, query = dns.build_query("github.com", query_id=7)
+        with self.assertRaises(dns.DNSError):
+            dns.parse_response(answer(query, []), query_id=8)
+        with self.assertRaises(dns.DNSError):
+            dns.parse_response(b"\x00" * 5)
+
+    def test_compression_loop_is_rejected(self):
+        looped = struct.pack("!HHHHHH", 1, 0x8180, 1, 0, 0, 0) + b"\xc0\x0c" + b"\x00\x01\x00\x01"
+        with self.assertRaises(dns.DNSError):
+            dns.parse_response(looped)
+
+class RewriteTest(unittest.TestCase):
+    def test_min_ttl_skips_opt(self):
+        _, query = dns.build_query("github.com")
+        data = answer(query, [(dns.QTYPE_A, 300, bytes(4)), (dns.QTYPE_A, 45, bytes(4))], OPT)
+        self.assertEqual(dns.min_ttl(data), 45)
+        self.assertIsNone(dns.min_ttl(answer(query, [])))
+
+    def test_rewrite_takes_the_new_id_and_casing_and_ages_ttls(self):
+        _, stored_query = dns.build_query("github.com", query_id=1)
+        stored = answer(stored_query, [(dns.QTYPE_A, 60, bytes([1, 2, 3, 4]))], OPT)
+        _, query = dns.build_query("GitHub.COM", query_id=99)
+        parsed = dns.parse_response(dns.rewrite_response(stored, query, elapsed=20), query_id=99)
+        self.assertEqual(parsed["question"][0], "GitHub.COM")
+        self.assertEqual(dns.addresses(parsed), [("1.2.3.4", 40)])
+        aged = dns.rewrite_response(stored, query, elapsed=500)
+        self.assertEqual(dns.min_ttl(aged), 0)
+        # The OPT flags survived
+        self.assertTrue(aged.endswith(OPT))
+
+    def test_build_response(self):
+        _, query = dns.build_query("github.com", query_id=5)
+        parsed = dns.parse_response(dns.build_response(query, [(dns.QTYPE_A, "20.205.243.166")], ttl=300))
+        self.assertEqual((parsed["id"], parsed["rcode"]), (5, 0))
+        self.assertEqual(dns.addresses(parsed), [("20.205.243.166", 300)])
+        failed = dns.parse_response(dns.build_response(query, rcode=dns.RCODE_SERVFAIL, truncated=True))
+        self.assertEqual((failed["rcode"], failed["truncated"], failed["answers"]), (dns.RCODE_SERVFAIL, True, []))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from src.core import dns
+from src.modules import dns_forwarder
+from src.modules.dns_forwarder import Forwarder, TTLCache, is_dev_domain, resolver_config, FALLBACK_PORT
+
+class ScriptedForwarder(Forwarder):
+    """Answers from a fixed address instead of racing real upstreams."""
+
+    def __init__(self, ttl=120):
+        super().__init__(upstreams=())
+        self.ttl = ttl
+        self.forwarded = 0
+
+    def forward(self, packet):
+        self.forwarded += 1
+        return dns.build_response(packet, [(dns.QTYPE_A, "140.82.112.3")], ttl=self.ttl)
+
+class ForwarderTest(unittest.TestCase):
+    def setUp(self):
+        original = dns_forwarder.load_overrides
+        dns_forwarder.load_overrides = lambda: {"pinned.github.com": ["20.205.243.166", "::1"]}
+        self.addCleanup(setattr, dns_forwarder, "load_overrides", original)
+
+    def test_dev_domains_are_cached_and_rewritten_per_query(self):
+        fwd = ScriptedForwarder()
+        fwd.resolve(dns.build_query("github.com", query_id=1)[1])
+        reply = fwd.resolve(dns.build_query("GitHub.com", query_id=2)[1])
+        parsed = dns.parse_response(reply, query_id=2)
+        self.assertEqual(fwd.forwarded, 1)
+        self.assertEqual(parsed["question"][0], "GitHub.com")
+        self.assertEqual(dns.addresses(parsed), [("140.82.112.3", 120)])
+
+    def test_other_domains_are_not_cached(self):
+        fwd = ScriptedForwarder()
+        for _ in range(2):
+            fwd.resolve(dns.build_query("example.com")[1])
+        self.assertEqual(fwd.forwarded, 2)
+
+    def test_overrides_answer_locally_by_family(self):
+        fwd = ScriptedForwarder()
+        a = dns.parse_response(fwd.resolve(dns.build_query("pinned.github.com")[1]))
+        aaaa = dns.parse_response(fwd.resolve(dns.build_query("pinned.github.com", dns.QTYPE_AAAA)[1]))
+        self.assertEqual([x for x, _ in dns.addresses(a)], ["20.205.243.166"])
+        self.assertEqual([x for x, _ in dns.addresses(aaaa, dns.QTYPE_AAAA)], ["::1"])
+        self.assertEqual(fwd.forwarded, 0)
+
+    def test_ttl_zero_is_raised_to_the_floor(self):
+        fwd = ScriptedForwarder(ttl=0)
+        for _ in range(2):
+            fwd.resolve(dns.build_query("pypi.org")[1])
+        self.assertEqual(fwd.forwarded, 1)
+
+    def test_garbage_is_dropped(self):
+        self.assertIsNone(ScriptedForwarder().resolve(b"\x00\x01"))
+
+class TTLCacheTest(unittest.TestCase):
+    def test_expiry_and_lru(self):
+        cache = TTLCache(size=2)
+        cache.put("a", b"A", 60)
+        cache.put("b", b"B", 0)
+        self.assertIsNone(cache.get("b"))
+        cache.put("c", b"C", 60)
+        cache.put("d", b"D", 60)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("d")[1], b"D")
+
+    def test_dev_domain_suffixes(self):
+        self.assertTrue(is_dev_domain("objects.githubusercontent.com."))
+        self.assertFalse(is_dev_domain("notgithub.com"))
+
+class ResolverConfigTest(unittest.TestCase):
+    def test_fallback_port_is_not_mdns(self):
+        self.assertNotEqual(FALLBACK_PORT, 5353)
+
+    def test_linux_lines_carry_the_port(self):
+        self.assertEqual(resolver_config("127.0.0.1", 53, "Linux"), [("/etc/resolv.conf", "nameserver 127.0.0.1")])
+        self.assertEqual(resolver_config("127.0.0.1", FALLBACK_PORT, "Linux")[0][1], f"DNS=127.0.0.1:{FALLBACK_PORT}")
+
+    def test_macos_uses_per_domain_resolvers(self):
+        where, line = resolver_config("127.0.0.1", FALLBACK_PORT, "Darwin")[0]
+        self.assertEqual(where, "/etc/resolver/github.com")
+        self.assertEqual(line, f"nameserver 127.0.0.1\nport {FALLBACK_PORT}")
+
+    def test_windows_cannot_use_another_port(self):
+        self.assertEqual(resolver_config("127.0.0.1", FALLBACK_PORT, "Windows"), [])
+
+if __name__ == "__main__":
+    unittest.main()
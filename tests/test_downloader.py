@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.modules.downloader import ChunkedDownloader, find_wheel, is_compatible_wheel, _version_key
+
+PAYLOAD = bytes(range(256)) * 40   # 10240 bytes
+
+class _Files(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support (unless ranges=False) and a one-project simple index."""
+    ranges = True
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Range")))
+        if self.path.startswith("/simple/"):
+            body = self.server.index_html.encode()
+            self._send(200, body)
+            return
+        rng = self.headers.get("Range")
+        if rng and self.ranges:
+            start, end = (int(x) for x in rng[len("bytes="):].split("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            self.wfile.write(PAYLOAD[start:end + 1])
+        else:
+            self._send(200, PAYLOAD)
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class DownloaderTestCase(unittest.TestCase):
+    ranges = True
+
+    def setUp(self):
+        handler = type("Handler", (_Files,), {"ranges": self.ranges, "requests": []})
+        self.requests = handler.requests
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.index_html = ""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.dest = os.path.join(self.dir, "big.whl")
+
+    def downloader(self, **kwargs):
+        return ChunkedDownloader(f"{self.base}/big.whl", self.dest, chunk_size=4096, **kwargs)
+
+class ChunkedDownloadTest(DownloaderTestCase):
+    def test_parallel_chunks_are_assembled_and_verified(self):
+        path = self.downloader(sha256=hashlib.sha256(PAYLOAD).hexdigest()).run()
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertEqual(sorted(os.listdir(self.dir)), ["big.whl"])
+
+    def test_resume_skips_finished_chunks(self):
+        d = self.downloader()
+        with open(d.part_path, "wb") as f:
+            f.write(PAYLOAD[:4096] + bytes(len(PAYLOAD) - 4096))
+        with open(d.state_path, "w") as f:
+            json.dump({"url": d.url, "total": len(PAYLOAD), "chunk_size": 4096, "done": [0]}, f)
+        d.run()
+        ranges = [r for _, r in self.requests if r and r != "bytes=0-0"]
+        self.assertEqual(sorted(ranges), ["bytes=4096-8191", "bytes=8192-10239"])
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+    def test_checksum_failure_discards_the_partial_file(self):
+        with self.assertRaises(IOError):
+            self.downloader(sha256="0" * 64).run()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_verified_file_is_not_downloaded_again(self):
+        with open(self.dest, "wb") as f:
+            f.write(PAYLOAD)
+        self.downloader(sha256=hashlib.sha256(PAYLOAD).hexdigest()).run()
+        self.assertEqual(self.requests, [])
+
+class NoRangeTest(DownloaderTestCase):
+    ranges = False
+
+    def test_falls_back_to_a_single_stream(self):
+        self.downloader().run()
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+class WheelSelectionTest(DownloaderTestCase):
+    def test_newest_compatible_wheel_wins(self):
+        plat = "win_amd64" if sys.platform == "win32" else "musllinux_1_1_s390x"
+        self.server.index_html = "".join(f'<a href="{self.base}/f/{n}#sha256=ab">{n}</a>' for n in (
+            "demo-2.2.0-py3-none-any.whl",
+            "demo-2.10.0-py3-none-any.whl",
+            f"demo-2.11.0-cp27-cp27m-{plat}.whl",
+            "demo-3.0.0.tar.gz",
+        ))
+        wheel = find_wheel(self.base + "/simple", "Demo")
+        self.assertEqual((wheel["version"], wheel["sha256"]), ("2.10.0", "ab"))
+        self.assertEqual(self.requests[0][0], "/simple/demo/")
+
+    def test_compatibility(self):
+        self.assertTrue(is_compatible_wheel("six-1.16.0-py2.py3-none-any.whl"))
+        self.assertFalse(is_compatible_wheel("x-1.0-cp27-cp27m-any.whl"))
+        self.assertFalse(is_compatible_wheel("not-a-wheel.zip"))
+
+    def test_version_order(self):
+        versions = ["2.9.0", "2.10.0", "2.10.0+cu121", "2.10.0rc1"]
+        self.assertEqual(max(versions, key=_version_key), "2.10.0+cu121")
+        self.assertEqual(sorted(versions, key=_version_key)[:2], ["2.9.0", "2.10.0rc1"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+from src.core.fsutil import remove_tree
+from src.modules import env_registry
+
+def _fill(root, dirs=3, files=4, size=256):
+    for d in range(dirs):
+        sub = os.path.join(root, f"pkg{d}", "sub")
+        os.makedirs(sub)
+        for i in range(files):
+            for where in (os.path.dirname(sub), sub):
+                with open(os.path.join(where, f"f{i}.py"), "wb") as f:
+                    f.write(b"x" * size)
+    return dirs * files * 2 * size
+
+class RemoveTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+
+    def test_tree_is_removed_and_freed_bytes_reported(self):
+        target = os.path.join(self.root, "env")
+        total = _fill(target)
+        reported = []
+        self.assertEqual(remove_tree(target, workers=3, on_progress=reported.append), total)
+        self.assertFalse(os.path.exists(target))
+        self.assertEqual(sum(reported), total)
+
+    def test_stopped_removal_is_finished_by_a_later_call(self):
+        target = os.path.join(self.root, "env")
+        _fill(target)
+        stop = threading.Event()
+        stop.set()
+        with self.assertRaises(InterruptedError):
+            remove_tree(target, stop_event=stop)
+        self.assertTrue(os.path.isdir(target))
+        remove_tree(target)
+        self.assertFalse(os.path.exists(target))
+
+    def test_symlinked_dir_is_unlinked_not_followed(self):
+        real = os.path.join(self.root, "real")
+        _fill(real, dirs=1)
+        link = os.path.join(self.root, "link")
+        os.symlink(real, link)
+        remove_tree(link)
+        self.assertFalse(os.path.lexists(link))
+        self.assertTrue(os.path.isdir(real))
+
+class DeleteEnvsTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        patcher = mock.patch.object(env_registry, "REGISTRY_PATH", Path(self.root) / "envs.db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _env(self, name):
+        path = os.path.join(self.root, name)
+        _fill(path, dirs=2)
+        env_registry.record_env({"type": "venv", "env_path": path})
+        return env_registry.find_env(env_path=path)
+
+    def test_detach_renames_at_once_and_queues_the_trash(self):
+        entry = self._env("a")
+        trash = env_registry.detach_env(entry)
+        self.assertFalse(os.path.exists(entry["env_path"]))
+        self.assertIn(env_registry.TRASH_MARKER, trash)
+        self.assertEqual([p["trash_path"] for p in env_registry.pending_deletions()], [trash])
+        self.assertEqual(env_registry.list_envs(), [])
+
+    def test_interrupted_deletion_is_resumed_by_the_next_job(self):
+        leftover = env_registry.detach_env(self._env("a"))
+        entry = self._env("b")
+        summary = env_registry.delete_envs([entry])
+        self.assertEqual(summary["deleted"], [entry["env_path"]])
+        self.assertFalse(os.path.exists(leftover))
+        self.assertEqual(env_registry.pending_deletions(), [])
+        self.assertEqual(summary["freed_bytes"], summary["total_bytes"])
+
+    def test_single_delete_leaves_other_pending_trash_alone(self):
+        leftover = env_registry.detach_env(self._env("a"))
+        ok, _ = env_registry.delete_env(self._env("b"))
+        self.assertTrue(ok)
+        self.assertTrue(os.path.isdir(leftover))
+
+    def test_missing_env_is_only_forgotten(self):
+        env_registry.record_env({"type": "venv", "env_path": os.path.join(self.root, "gone")})
+        self.assertIsNone(env_registry.detach_env(env_registry.list_envs()[0]))
+        self.assertEqual(env_registry.list_envs(), [])
+
+class CondaDetachTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        patcher = mock.patch.object(env_registry, "REGISTRY_PATH", Path(self.root) / "envs.db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.commands = []
+        self.listed = {}
+        self.remove_output = (0, "")
+        patcher = mock.patch.object(env_registry, "run_command", self._run)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        if cmd.startswith("conda env list"):
+            return mock.Mock(returncode=0, stdout=json.dumps({"envs": list(self.listed.values())}))
+        if ' -p "' in cmd:
+            # conda removes the placeholder prefix it was pointed at
+            shutil.rmtree(cmd.split('"')[1])
+        code, out = self.remove_output
+        return mock.Mock(returncode=code, stdout=out)
+
+    def _entry(self, env_path):
+        env_registry.record_env({"type": "conda", "env_name": "dl", "env_path": env_path})
+        return env_registry.list_envs()[0]
+
+    def test_unknown_prefix_is_removed_by_name(self):
+        self.assertIsNone(env_registry.detach_env(self._entry("Unknown")))
+        self.assertEqual(self.commands[-1], "conda env remove -n dl -y")
+        self.assertEqual(env_registry.list_envs(), [])
+
+    def test_failed_remove_keeps_the_record(self):
+        self.remove_output = (1, "CondaError: env is active")
+        with self.assertRaises(OSError):
+            env_registry.detach_env(self._entry("Unknown"))
+        self.assertEqual(len(env_registry.list_envs()), 1)
+
+    def test_env_conda_no_longer_knows_is_forgotten(self):
+        self.remove_output = (1, "EnvironmentLocationNotFound: Not a conda environment")
+        self.assertIsNone(env_registry.detach_env(self._entry("Unknown")))
+        self.assertEqual(env_registry.list_envs(), [])
+
+    def test_moved_prefix_is_unregistered_from_conda(self):
+        prefix = os.path.join(self.root, "envs", "dl")
+        _fill(prefix, dirs=1)
+        os.makedirs(os.path.join(prefix, "conda-meta"))
+        self.listed = {"dl": prefix}
+        trash = env_registry.detach_env(self._entry("Unknown"))
+        self.assertTrue(os.path.isdir(trash))
+        self.assertEqual(self.commands[-1], f'conda env remove -p "{prefix}" -y')
+        self.assertFalse(os.path.exists(prefix))
+
+if __name__ == "__main__":
+    unittest.main()
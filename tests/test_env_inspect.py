@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from src.modules.env_inspect import satisfies, split_satisfied, conda_torch_matches, site_packages_dirs
+
+class SatisfiesTest(unittest.TestCase):
+    def test_comparisons(self):
+        self.assertTrue(satisfies("2.31.0", ">=2.0,<3"))
+        self.assertFalse(satisfies("3.0", ">=2.0,<3"))
+        self.assertTrue(satisfies("1.0", "==1.0.0"))
+        self.assertTrue(satisfies("1.5", "!=1.4"))
+        self.assertTrue(satisfies("anything", ""))
+
+    def test_wildcards(self):
+        self.assertTrue(satisfies("1.4.2", "==1.4.*"))
+        self.assertFalse(satisfies("1.5", "==1.4.*"))
+        self.assertTrue(satisfies("1.5", "!=1.4.*"))
+
+    def test_compatible_release(self):
+        self.assertTrue(satisfies("1.4.5", "~=1.4.2"))
+        self.assertFalse(satisfies("1.5.0", "~=1.4.2"))
+        self.assertTrue(satisfies("1.9", "~=1.4"))
+        self.assertFalse(satisfies("2.0", "~=1.4"))
+
+    def test_local_label_is_ignored_for_ordering(self):
+        self.assertTrue(satisfies("2.1.0+cu121", ">=2.1"))
+
+    def test_unknown_forms_are_unsatisfied(self):
+        self.assertFalse(satisfies("1.0", "@ https://x/y.whl"))
+
+class FakePrefixTest(unittest.TestCase):
+    """A conda env laid out on disk: conda-meta records plus pip dist-info metadata."""
+
+    def setUp(self):
+        self.prefix = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.prefix)
+        os.makedirs(os.path.join(self.prefix, "conda-meta"))
+        os.makedirs(os.path.join(self.prefix, "lib", "python3.11", "site-packages"))
+        os.makedirs(os.path.join(self.prefix, "Lib", "site-packages"))
+
+    def conda(self, name, version):
+        with open(os.path.join(self.prefix, "conda-meta", f"{name}-{version}-0.json"), "w") as f:
+            json.dump({"name": name, "version": version}, f)
+
+    def dist(self, name, version):
+        for site_dir in site_packages_dirs(self.prefix):
+            info = os.path.join(site_dir, f"{name}-{version}.dist-info")
+            os.makedirs(info)
+            with open(os.path.join(info, "METADATA"), "w") as f:
+                f.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+
+    def test_split_satisfied(self):
+        self.dist("requests", "2.31.0")
+        self.conda("numpy", "1.26.4")
+        missing, satisfied = split_satisfied(['"requests>=2"', "numpy<1.26", "six"], self.prefix)
+        self.assertEqual(satisfied, ['"requests>=2"'])
+        self.assertEqual(missing, ["numpy<1.26", "six"])
+
+    def test_local_tag(self):
+        self.dist("torch", "2.1.0+cpu")
+        self.assertEqual(split_satisfied(["torch"], self.prefix, local_tag="cu121")[0], ["torch"])
+
+    def test_cpu_conda_torch_does_not_satisfy_cuda(self):
+        self.conda("pytorch", "2.1.0")
+        self.conda("cpuonly", "2.0")
+        self.dist("torch", "2.1.0")
+        self.assertFalse(conda_torch_matches(self.prefix, "pytorch pytorch-cuda=12.1 -c pytorch -c nvidia"))
+        self.assertTrue(conda_torch_matches(self.prefix, "pytorch cpuonly -c pytorch"))
+
+    def test_cuda_conda_torch_matches_its_version(self):
+        self.conda("pytorch", "2.1.0")
+        self.conda("pytorch-cuda", "12.1")
+        self.dist("torch", "2.1.0")
+        self.assertTrue(conda_torch_matches(self.prefix, "pytorch pytorch-cuda=12.1 -c pytorch -c nvidia"))
+        self.assertFalse(conda_torch_matches(self.prefix, "pytorch pytorch-cuda=11.8 -c pytorch -c nvidia"))
+
+    def test_pip_cuda_torch_in_a_conda_env(self):
+        self.dist("torch", "2.1.0+cu121")
+        self.assertTrue(conda_torch_matches(self.prefix, "pytorch pytorch-cuda=12.1 -c pytorch -c nvidia"))
+
+if __name__ == "__main__":
+    unittest.main()
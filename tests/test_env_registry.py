@@ -0,0 +1,98 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from src.core.fsutil import dir_size
+from src.modules import env_registry
+
+class DirSizeTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+
+    def test_nested_files_are_summed_and_hard_links_counted_once(self):
+        os.makedirs(os.path.join(self.root, "a", "b"))
+        for rel, size in (("top.bin", 10), ("a/one.bin", 100), ("a/b/two.bin", 1000)):
+            with open(os.path.join(self.root, rel), "wb") as f:
+                f.write(b"x" * size)
+        os.link(os.path.join(self.root, "a/b/two.bin"), os.path.join(self.root, "linked.bin"))
+        self.assertEqual(dir_size(self.root, workers=2), 1110)
+
+    def test_missing_directory_is_empty(self):
+        self.assertEqual(dir_size(os.path.join(self.root, "nope")), 0)
+
+class RegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        patcher = mock.patch.object(env_registry, "REGISTRY_PATH", Path(self.root) / "envs.db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _venv(self, name):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.join(path, "lib"))
+        with open(os.path.join(path, "pyvenv.cfg"), "w") as f:
+            f.write("home = /usr/bin\n")
+        with open(os.path.join(path, "lib", "big.bin"), "wb") as f:
+            f.write(b"x" * 4096)
+        return path
+
+    def test_record_is_keyed_by_path_and_rebuild_resets_stats(self):
+        path = self._venv("proj")
+        key = env_registry.record_env({"type": "venv", "env_path": path}, suite="web", packages=["flask"])
+        env_registry._update(key, size_bytes=123, healthy=1)
+        self.assertEqual(env_registry.record_env({"type": "venv", "env_path": path}, packages=["flask"]), key)
+        (entry,) = env_registry.list_envs()
+        self.assertEqual((entry["suite"], entry["size_bytes"], entry["healthy"]), ("web", 123, None))
+        self.assertEqual(env_registry.find_env(env_path=path)["key"], key)
+        self.assertIsNone(env_registry.record_env({"success": True}))
+
+    def test_refresh_measures_size_without_touching_usage(self):
+        path = self._venv("proj")
+        cfg = os.path.join(path, "pyvenv.cfg")
+        os.utime(cfg, (1_000_000, 1_000_000))
+        env_registry.record_env({"type": "venv", "env_path": path})
+        entry = env_registry.refresh_env(env_registry.list_envs()[0], health=False)
+        self.assertEqual(entry["size_bytes"], dir_size(path))
+        self.assertEqual(os.stat(cfg).st_atime, 1_000_000)
+        self.assertEqual(env_registry.list_envs()[0]["size_bytes"], entry["size_bytes"])
+
+    def test_missing_env_is_marked_unhealthy_and_stale(self):
+        env_registry.record_env({"type": "venv", "env_path": os.path.join(self.root, "gone")})
+        entry = env_registry.refresh_env(env_registry.list_envs()[0])
+        self.assertIs(entry["healthy"], False)
+        self.assertEqual(env_registry.stale_envs(entries=[entry]), [entry])
+
+    def test_stale_uses_last_used_and_skips_unresolved_conda(self):
+        path = self._venv("old")
+        now = time.time()
+        old = {"type": "venv", "env_path": path, "last_used": now - 40 * 86400, "created_at": now - 60 * 86400}
+        fresh = dict(old, last_used=now)
+        conda = {"type": "conda", "env_path": None, "env_name": "x", "last_used": 0, "created_at": 0}
+        self.assertEqual(env_registry.stale_envs(30, [old, fresh, conda]), [old])
+
+    def test_project_directories_are_never_stale(self):
+        path = self._venv("my-react-app")
+        old = {"type": "npm", "env_path": path, "last_used": 0, "created_at": 0}
+        gone = dict(old, env_path=os.path.join(self.root, "gone"))
+        self.assertEqual(env_registry.stale_envs(30, [old, gone]), [])
+
+    def test_gc_leaves_npm_projects_alone(self):
+        path = self._venv("my-react-app")
+        env_registry.record_env({"type": "npm", "env_path": path})
+        env_registry._update(env_registry.list_envs()[0]["key"], created_at=0, last_used=0)
+        with mock.patch.object(env_registry, "_usage_probes", return_value={}):
+            summary = env_registry.gc_envs(30)
+        self.assertEqual((summary["deleted"], summary["forgotten"]), ([], []))
+        self.assertTrue(os.path.isdir(path))
+
+    def test_health_imports_map_names_and_put_frameworks_first(self):
+        imports = env_registry._health_imports(["numpy", "scikit-learn>=1", "gunicorn", "torch==2.1", "PyYAML"])
+        self.assertEqual(imports, ["torch", "numpy", "sklearn", "yaml"])
+
+if __name__ == "__main__":
+    unittest.main()
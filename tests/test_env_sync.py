@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.modules import env_sync
+from src.modules.env_sync import diff_requirements, _shell_requirement
+from src.modules.project_scanner import parse_requirement, parse_conda_spec
+
+def reqs(*lines):
+    return [parse_requirement(line) for line in lines]
+
+class DiffRequirementsTest(unittest.TestCase):
+    def test_added_changed_removed(self):
+        delta = diff_requirements(reqs("requests>=2.0", "six"), reqs("requests>=2.31", "numpy"))
+        self.assertEqual([d["name"] for d in delta["added"]], ["numpy"])
+        self.assertEqual([d["name"] for d in delta["changed"]], ["requests"])
+        self.assertEqual([d["name"] for d in delta["removed"]], ["six"])
+
+    def test_names_are_canonical(self):
+        delta = diff_requirements(reqs("Typing_Extensions>=4"), reqs("typing-extensions >= 4"))
+        self.assertFalse(any(delta.values()))
+
+    def test_marker_and_extras_changes_count(self):
+        delta = diff_requirements(reqs("uvloop>=0.19"), reqs('uvloop>=0.19; sys_platform != "win32"'))
+        self.assertEqual([d["name"] for d in delta["changed"]], ["uvloop"])
+        delta = diff_requirements(reqs("django>=4"), reqs("django[bcrypt]>=4"))
+        self.assertEqual([d["name"] for d in delta["changed"]], ["django"])
+
+    def test_managers_are_separate(self):
+        conda = [{"name": "numpy", "spec": "=1.26", "raw": "numpy=1.26", "manager": "conda"}]
+        self.assertFalse(any(diff_requirements([], conda, "pip").values()))
+        self.assertEqual(len(diff_requirements([], conda, "conda")["added"]), 1)
+
+    def test_shell_requirement_keeps_extras_and_markers(self):
+        dep = parse_requirement('Django[bcrypt]>=4.0 ; python_version>"3.8"')
+        self.assertEqual(_shell_requirement(dep), "\"Django[bcrypt]>=4.0 ; python_version>'3.8'\"")
+
+class ApplyDeltaTest(unittest.TestCase):
+    def test_conda_specs_and_names_are_quoted(self):
+        commands = []
+        def run(cmd, **kwargs):
+            commands.append(cmd)
+            return mock.Mock(returncode=0)
+        old = [parse_conda_spec("numpy>=1.20"), parse_conda_spec("scipy 1.10.*")]
+        new = [parse_conda_spec("scipy 1.11.*"), parse_conda_spec("conda-forge::pandas==2.1")]
+        conda_delta = diff_requirements(old, new, "conda")
+        pip_delta = {"added": [], "changed": [], "removed": []}
+        target = {"type": "conda", "env_name": "proj_env", "pip": "pip"}
+        with mock.patch.object(env_sync, "run_command", run):
+            summary = env_sync.apply_delta(target, pip_delta, conda_delta, uninstall_removed=True)
+        self.assertEqual(commands, [
+            'conda install -n proj_env -y "conda-forge::pandas==2.1" "scipy 1.11.*"',
+            'conda remove -n proj_env -y "numpy"',
+        ])
+        self.assertEqual(summary["removed"], ["numpy"])
+
+class FakeWatcher:
+    """Each poll() runs the next edit and reports the manifest as changed."""
+    backend = "test"
+
+    def __init__(self, path, edits):
+        self.path = path
+        self.edits = edits
+
+    def poll(self, stop_event=None):
+        if not self.edits:
+            return []
+        self.edits.pop(0)()
+        return [self.path]
+
+    def close(self):
+        pass
+
+class WatchProjectTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.manifest = os.path.join(self.dir, "requirements.txt")
+        self._write("six\n")
+
+    def _write(self, text):
+        with open(self.manifest, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_failed_sync_is_retried_on_the_next_change(self):
+        path = os.path.abspath(self.manifest)
+        calls = []
+
+        def apply(target, pip_delta, *args):
+            calls.append(sorted(d["name"] for d in pip_delta["added"]))
+            if len(calls) == 1:
+                raise Exception("新增依赖安装失败")
+            return {"installed": [], "upgraded": [], "removed": []}
+
+        edits = [lambda: self._write("six\nnumpy\n"), lambda: self._write("six\nnumpy\nrequests\n")]
+        with mock.patch.object(env_sync, "ManifestWatcher", lambda paths: FakeWatcher(path, edits)), \
+             mock.patch.object(env_sync, "resolve_sync_target", lambda *a: {"type": "venv", "pip": "pip", "env_name": None}), \
+             mock.patch.object(env_sync, "apply_delta", apply):
+            history = env_sync.watch_project(self.dir)
+        self.assertEqual(calls, [["numpy"], ["numpy", "requests"]])
+        self.assertEqual(len(history), 1)
+
+if __name__ == "__main__":
+    unittest.main()
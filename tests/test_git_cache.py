@@ -0,0 +1,58 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from src.modules import git_cache
+from src.modules.git_cache import normalize_url, mirror_path
+
+class NormalizeUrlTest(unittest.TestCase):
+    def test_forms_of_one_repository_agree(self):
+        forms = [
+            "https://github.com/psf/requests",
+            "https://GitHub.com/psf/requests.git/",
+            "git@github.com:psf/requests.git",
+            "ssh://git@github.com/psf/requests",
+            "http://github.com:80/psf/requests",
+        ]
+        self.assertEqual({normalize_url(u) for u in forms}, {"github.com/psf/requests"})
+
+    def test_path_case_is_kept(self):
+        self.assertEqual(normalize_url("https://gitee.com/Org/Repo"), "gitee.com/Org/Repo")
+
+    def test_local_paths(self):
+        self.assertEqual(normalize_url("file:///srv/git/tool.git"), "local/srv/git/tool")
+
+    def test_mirror_path_honours_the_cache_env(self):
+        with mock.patch.dict(os.environ, {"NETWORK_BOOSTER_GIT_CACHE": "/tmp/gitcache"}):
+            self.assertEqual(mirror_path("git@github.com:a/b"), Path("/tmp/gitcache").resolve() / "github.com" / "a" / "b.git")
+
+@unittest.skipUnless(shutil.which("git"), "git not installed")
+class CloneTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        patcher = mock.patch.dict(os.environ, {"NETWORK_BOOSTER_GIT_CACHE": os.path.join(self.dir, "cache"),
+                                               "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+                                               "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.origin = os.path.join(self.dir, "origin")
+        subprocess.run(["git", "init", "-q", self.origin], check=True)
+        with open(os.path.join(self.origin, "f"), "w") as f:
+            f.write("x")
+        subprocess.run(["git", "-C", self.origin, "add", "f"], check=True)
+        subprocess.run(["git", "-C", self.origin, "commit", "-qm", "init"], check=True)
+
+    def test_clone_borrows_objects_from_the_mirror(self):
+        url = "file://" + self.origin
+        dest = os.path.join(self.dir, "work")
+        self.assertTrue(git_cache.clone(url, dest))
+        with open(os.path.join(dest, ".git", "objects", "info", "alternates")) as f:
+            self.assertEqual(f.read().strip(), str(mirror_path(url) / "objects"))
+        self.assertEqual([m["url"] for m in git_cache.list_mirrors()], [url])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.core.cache_store import Upstreams
+from src.modules.go_cache import GoCache, is_immutable
+
+class IsImmutableTest(unittest.TestCase):
+    def test_released_versions_and_full_tiles(self):
+        for path in ("/github.com/!azure/sdk/@v/v1.2.3.zip", "/golang.org/x/net/@v/v0.0.0-20240101000000-abcdef123456.mod",
+                     "/example.com/m/@v/v2.0.0+incompatible.info", "/sumdb/sum.golang.org/tile/8/0/001"):
+            self.assertTrue(is_immutable(path), path)
+
+    def test_lists_queries_and_partial_tiles_move(self):
+        for path in ("/example.com/m/@v/list", "/example.com/m/@latest", "/example.com/m/@v/master.info",
+                     "/sumdb/sum.golang.org/tile/8/0/001.p/5", "/sumdb/sum.golang.org/latest"):
+            self.assertFalse(is_immutable(path), path)
+
+class FakeProxy(BaseHTTPRequestHandler):
+    hits = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        body, code = {"/m/@v/list": (b"v1.0.0\nv1.1.0\n", 200), "/m/@v/v1.0.0.zip": (b"PK-zip", 200)}.get(self.path, (b"gone", 410))
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class GoCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        self.addCleanup(os.chdir, cwd)
+        self.hits = []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), type("Handler", (FakeProxy,), {"hits": self.hits}))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.cache = GoCache()
+        self.cache.upstreams = Upstreams([(f"http://127.0.0.1:{server.server_address[1]}", None)], probe_path="m/@v/list")
+
+    def test_list_is_cached_for_a_short_while(self):
+        entry, stale = self.cache.mutable("/m/@v/list")
+        self.assertEqual((entry["path"].read_bytes(), stale), (b"v1.0.0\nv1.1.0\n", False))
+        before = len(self.hits)
+        self.cache.mutable("/m/@v/list")
+        self.assertEqual(len(self.hits), before)
+
+    def test_gone_everywhere_is_key_error(self):
+        with self.assertRaises(KeyError):
+            self.cache.mutable("/unknown/@v/list")
+        with self.assertRaises(KeyError):
+            self.cache.immutable("/unknown/@v/v1.0.0.zip", lambda *a: None, lambda c: None)
+
+    def test_released_zip_is_pinned(self):
+        entry = self.cache.immutable("/m/@v/v1.0.0.zip", lambda *a: None, lambda c: None)
+        self.assertEqual(entry["path"].read_bytes(), b"PK-zip")
+        # Over the size cap the unpinned list is evicted, the release zip stays
+        self.cache.mutable("/m/@v/list")
+        self.cache.store.max_bytes = 1
+        self.cache.store.put_bytes("meta/other", b"x" * 10)
+        self.assertIsNone(self.cache.store.get("meta/m/@v/list"))
+        self.assertIsNotNone(self.cache.store.get("mod/m/@v/v1.0.0.zip"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.modules import hosts
+from src.modules.hosts import parse_line, parse_entries, split_managed, diff_entries, apply_managed_entries, START_MARKER, END_MARKER
+
+class ParseTest(unittest.TestCase):
+    def test_parse_line(self):
+        self.assertEqual(parse_line("140.82.112.4  github.com www.github.com # note"),
+                         {"ip": "140.82.112.4", "names": ["github.com", "www.github.com"], "comment": "note"})
+        self.assertEqual(parse_line("::1 localhost")["ip"], "::1")
+        for line in ("", "# 1.2.3.4 x", "github.com 1.2.3.4", "1.2.3.4"):
+            self.assertIsNone(parse_line(line))
+
+    def test_later_line_wins(self):
+        lines = ["1.1.1.1 GitHub.com", "2.2.2.2 api.github.com", "3.3.3.3 github.com"]
+        self.assertEqual(parse_entries(lines), [("api.github.com", "2.2.2.2"), ("github.com", "3.3.3.3")])
+
+    def test_split_managed(self):
+        content = f"127.0.0.1 localhost\n{START_MARKER}\n1.1.1.1 a\n{END_MARKER}\n# tail\n"
+        before, block, after = split_managed(content)
+        self.assertEqual(before, "127.0.0.1 localhost\n")
+        self.assertEqual(block, ["", "1.1.1.1 a"])
+        self.assertEqual(after, "\n# tail\n")
+        self.assertEqual(split_managed("x\n"), ("x\n", None, ""))
+
+class DiffEntriesTest(unittest.TestCase):
+    def test_added_changed_removed(self):
+        old = [("a", "1.1.1.1"), ("b", "2.2.2.2"), ("c", "3.3.3.3")]
+        new = [("b", "2.2.2.2"), ("a", "9.9.9.9"), ("d", "4.4.4.4")]
+        self.assertEqual(diff_entries(old, new), {"added": [("d", "4.4.4.4")], "changed": [("a", "1.1.1.1", "9.9.9.9")],
+                                                  "removed": ["c"]})
+
+    def test_order_does_not_matter(self):
+        self.assertFalse(any(diff_entries([("a", "1"), ("b", "2")], [("b", "2"), ("a", "1")]).values()))
+
+class ApplyTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "hosts")
+        patcher = mock.patch.object(hosts, "flush_dns")
+        self.flush = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write(self, text):
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+    def _read(self):
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def test_append_then_unchanged_then_replace(self):
+        self._write("127.0.0.1 localhost\r\n")
+        first = apply_managed_entries([("github.com", "1.1.1.1")], hosts_path=self.path)
+        self.assertTrue(first["written"])
+        content = self._read()
+        self.assertTrue(content.startswith("127.0.0.1 localhost\r\n"))
+        self.assertNotIn("\n", content.replace("\r\n", ""))   # CRLF kept throughout
+
+        second = apply_managed_entries([("github.com", "1.1.1.1")], hosts_path=self.path)
+        self.assertFalse(second["written"])
+        self.assertEqual(self._read(), content)
+        self.assertEqual(self.flush.call_count, 1)
+
+        third = apply_managed_entries([("github.com", "2.2.2.2")], hosts_path=self.path)
+        self.assertEqual(third["changed"], [("github.com", "1.1.1.1", "2.2.2.2")])
+        _, block, _ = split_managed(self._read())
+        self.assertEqual(parse_entries(block), [("github.com", "2.2.2.2")])
+        self.assertEqual(self._read().count(START_MARKER), 1)
+        self.assertEqual(os.listdir(self.dir), ["hosts"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import sys
+import unittest
+from src.core.utils import LineSplitter, run_command
+
+class LineSplitterTest(unittest.TestCase):
+    def setUp(self):
+        self.splitter = LineSplitter()
+
+    def test_complete_lines(self):
+        self.assertEqual(self.splitter.feed("a\nb\n"), (["a\n", "b\n"], None))
+
+    def test_partial_line_waits_for_its_newline(self):
+        self.assertEqual(self.splitter.feed("Collec"), ([], None))
+        self.assertEqual(self.splitter.feed("ting six\n"), (["Collecting six\n"], None))
+
+    def test_crlf_is_normalized(self):
+        self.assertEqual(self.splitter.feed("a\r\nb\r\n"), (["a\n", "b\n"], None))
+
+    def test_crlf_split_across_chunks(self):
+        self.assertEqual(self.splitter.feed("a\r"), ([], None))
+        self.assertEqual(self.splitter.feed("\nb\n"), (["a\n", "b\n"], None))
+
+    def test_carriage_return_is_a_redraw(self):
+        lines, progress = self.splitter.feed(" 10%\r 20%\r 30%\rx")
+        self.assertEqual(lines, [])
+        self.assertEqual(progress, " 30%")
+
+    def test_line_after_redraw_clears_progress(self):
+        lines, progress = self.splitter.feed(" 50%\r100%\rdone\n")
+        self.assertEqual(lines, ["done\n"])
+        self.assertIsNone(progress)
+
+    def test_flush_returns_the_unterminated_tail(self):
+        self.splitter.feed("last line")
+        self.assertEqual(self.splitter.flush(), ["last line\n"])
+        self.assertEqual(self.splitter.flush(), [])
+
+    def test_flush_drops_a_trailing_carriage_return(self):
+        self.splitter.feed("x\r")
+        self.assertEqual(self.splitter.flush(), ["x\n"])
+
+class StreamCommandTest(unittest.TestCase):
+    def test_output_and_progress_reach_the_callback(self):
+        code = r"import sys; sys.stdout.write('one\n 50%\r100%\rtwo\n'); sys.stdout.write('tail')"
+        seen = []
+        res = run_command(f'"{sys.executable}" -c "{code}"', stream_output=True,
+                          on_output=lambda lines, progress: seen.extend(lines))
+        self.assertEqual(res.returncode, 0)
+        self.assertEqual(seen, ["one\n", "two\n", "tail\n"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.modules.local_proxy import route_for, _split_hostport, _close_after, DEFAULT_ROUTE
+from src.modules import local_proxy
+
+RULES = [
+    {"match": "github.com", "route": "proxy"},
+    {"match": "*.example.org", "route": "mirror:10.0.0.1:8443"},
+]
+
+class RouteForTest(unittest.TestCase):
+    def test_host_and_subdomains_match(self):
+        self.assertEqual(route_for("github.com", RULES), "proxy")
+        self.assertEqual(route_for("API.GitHub.com.", RULES), "proxy")
+        self.assertEqual(route_for("cdn.example.org", RULES), "mirror:10.0.0.1:8443")
+
+    def test_suffix_without_dot_does_not_match(self):
+        self.assertEqual(route_for("notgithub.com", RULES), DEFAULT_ROUTE)
+
+    def test_first_match_wins(self):
+        rules = [{"match": "a.github.com", "route": "direct"}] + RULES
+        self.assertEqual(route_for("a.github.com", rules), "direct")
+        self.assertEqual(route_for("b.github.com", rules), "proxy")
+
+    def test_split_hostport(self):
+        self.assertEqual(_split_hostport("example.com:8080", 80), ("example.com", 8080))
+        self.assertEqual(_split_hostport("example.com", 443), ("example.com", 443))
+        self.assertEqual(_split_hostport("[::1]:8443", 443), ("::1", 8443))
+
+    def test_close_after(self):
+        headers = b"Host: a\r\nProxy-Connection: keep-alive\r\nconnection: Keep-Alive\r\nKeep-Alive: 5\r\nX: y\r\n\r\n"
+        self.assertEqual(_close_after(headers), b"Host: a\r\nX: y\r\nConnection: close\r\n\r\n")
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = f"{self.server.name} {self.headers.get('Connection')}".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class PlainHttpTest(unittest.TestCase):
+    def setUp(self):
+        self.origins = []
+        for name in ("first", "second"):
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+            server.name = name
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+            self.origins.append(server)
+        original = local_proxy.load_rules
+        local_proxy.load_rules = lambda: []
+        self.addCleanup(setattr, local_proxy, "load_rules", original)
+        self.proxy = local_proxy.start_local_proxy(port=0)
+
+    def _request(self, sock, origin):
+        url = f"http://127.0.0.1:{origin.server_address[1]}/"
+        sock.sendall(f"GET {url} HTTP/1.1\r\nHost: 127.0.0.1\r\nProxy-Connection: keep-alive\r\n\r\n".encode())
+
+    def test_direct_request_closes_instead_of_reusing_the_origin(self):
+        with socket.create_connection(("127.0.0.1", self.proxy.port), timeout=5) as sock:
+            self._request(sock, self.origins[0])
+            data = b""
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+        self.assertIn(b"200 OK", data)
+        self.assertTrue(data.endswith(b"first close"))
+
+    def test_each_connection_reaches_its_own_origin(self):
+        for origin in self.origins:
+            with socket.create_connection(("127.0.0.1", self.proxy.port), timeout=5) as sock:
+                self._request(sock, origin)
+                data = b""
+                while not data.endswith(b" close"):
+                    chunk = sock.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+            self.assertTrue(data.endswith(f"{origin.name} close".encode()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from src.core import mirrors
+
+CATALOG = {"pip": {"a": "https://a.example/simple", "b": "https://b.example/simple", "c": "https://c.example/simple"}}
+
+class ProbeTest(unittest.TestCase):
+    def test_failed_check_reports_the_error(self):
+        def check(url):
+            raise ValueError("x" * 500)
+        with mock.patch.dict(mirrors.CHECKS, {"pip": check}):
+            latency, error = mirrors.probe("pip", "https://a.example/simple")
+        self.assertIsNone(latency)
+        self.assertEqual(len(error), 120)
+
+    def test_passing_check_reports_latency(self):
+        with mock.patch.dict(mirrors.CHECKS, {"pip": lambda url: None}):
+            latency, error = mirrors.probe("pip", "https://a.example/simple")
+        self.assertIsNone(error)
+        self.assertGreaterEqual(latency, 0)
+
+class MirrorScoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for name, value in (("SCORES_PATH", Path(self.dir) / "scores.json"), ("MIRRORS", CATALOG)):
+            patcher = mock.patch.object(mirrors, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.latency = {"https://a.example/simple": 0.3, "https://b.example/simple": 0.1, "https://c.example/simple": None}
+        self.probes = []
+        patcher = mock.patch.object(mirrors, "probe", self._probe)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _probe(self, ecosystem, url):
+        # Reports the configured latency instead of wall time
+        self.probes.append(url)
+        latency = self.latency[url]
+        return (latency, None) if latency is not None else (None, "down")
+
+    def test_rolling_score_is_an_ewma_and_failures_count(self):
+        scores = {}
+        mirrors._update(scores, "pip", "u", 1.0, None)
+        mirrors._update(scores, "pip", "u", 2.0, None)
+        self.assertAlmostEqual(scores["pip"]["u"]["score"], mirrors.EWMA_ALPHA * 2.0 + (1 - mirrors.EWMA_ALPHA) * 1.0)
+        mirrors._update(scores, "pip", "u", None, "timeout")
+        mirrors._update(scores, "pip", "u", None, "timeout")
+        entry = scores["pip"]["u"]
+        self.assertEqual((entry["ok"], entry["failures"], entry["error"]), (False, 2, "timeout"))
+        mirrors._update(scores, "pip", "u", 1.0, None)
+        self.assertEqual(scores["pip"]["u"]["failures"], 0)
+
+    def test_rank_puts_healthy_fast_mirrors_first(self):
+        ranked = mirrors.rank("pip")
+        self.assertEqual([r["name"] for r in ranked], ["b", "a", "c"])
+        self.assertEqual([r["ok"] for r in ranked], [True, True, False])
+
+    def test_fresh_scores_are_not_reprobed(self):
+        mirrors.rank("pip")
+        self.probes.clear()
+        mirrors.rank("pip")
+        self.assertEqual(self.probes, [])
+        mirrors.rank("pip", max_age=-1)
+        self.assertEqual(len(self.probes), 3)
+
+    def test_one_slow_probe_does_not_flip_an_established_ranking(self):
+        for _ in range(5):
+            mirrors.measure()
+        self.latency["https://b.example/simple"] = 0.6
+        mirrors.measure()
+        self.assertEqual(mirrors.rank("pip")[0]["name"], "b")
+
+    def test_resolve(self):
+        self.assertEqual(mirrors.resolve("pip", "a"), ("a", CATALOG["pip"]["a"]))
+        self.assertEqual(mirrors.resolve("pip", "unknown"), ("b", CATALOG["pip"]["b"]))
+        self.latency = dict.fromkeys(self.latency)
+        mirrors.SCORES_PATH.unlink()
+        self.assertEqual(mirrors.resolve("pip"), ("a", CATALOG["pip"]["a"]))
+
+    def test_corrupt_scores_file_is_ignored(self):
+        mirrors.SCORES_PATH.write_text("{oops", encoding="utf-8")
+        self.assertEqual(mirrors.load_scores(), {})
+
+if __name__ == "__main__":
+    unittest.main()
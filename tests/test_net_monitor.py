@@ -0,0 +1,99 @@
+import unittest
+from src.modules import net_monitor
+from src.modules.net_monitor import NetworkMonitor, MIRROR, PROXY, SWITCH_AFTER, MIN_INTERVAL, MAX_INTERVAL
+
+class ScriptedMonitor(NetworkMonitor):
+    """Replays fixed samples instead of probing and records mode switches instead of applying them."""
+
+    def __init__(self, samples, mode=MIRROR, **kwargs):
+        super().__init__(**kwargs)
+        self.samples = list(samples)
+        self.mode = mode
+        self.mirror_url = "https://mirror.example/simple"
+        self.applied = []
+
+    def probe(self):
+        mirror_ms, proxy_ms = self.samples.pop(0)
+        sample = {"ts": 0, "mode": self.mode, "mirror_ms": mirror_ms, "proxy_ms": proxy_ms}
+        self.history.append(sample)
+        return sample
+
+    def _apply(self, mode):
+        self.applied.append(mode)
+        return []
+
+def sample(mirror_ms, proxy_ms):
+    return {"mirror_ms": mirror_ms, "proxy_ms": proxy_ms}
+
+class PreferredTest(unittest.TestCase):
+    def test_stays_unless_the_other_mode_is_much_faster(self):
+        m = ScriptedMonitor([])
+        self.assertEqual(m._preferred(sample(100, 60)), MIRROR)
+        self.assertEqual(m._preferred(sample(100, 40)), PROXY)
+
+    def test_leaves_a_failed_mode_for_any_working_one(self):
+        m = ScriptedMonitor([], mode=PROXY)
+        self.assertEqual(m._preferred(sample(900, None)), MIRROR)
+
+    def test_never_moves_to_a_failed_mode(self):
+        m = ScriptedMonitor([])
+        self.assertEqual(m._preferred(sample(None, None)), MIRROR)
+        self.assertEqual(m._preferred(sample(100, None)), MIRROR)
+
+class StepTest(unittest.TestCase):
+    def test_switches_only_after_consecutive_cycles(self):
+        m = ScriptedMonitor([(100, 10)] * SWITCH_AFTER)
+        events = m.subscribe()
+        for _ in range(SWITCH_AFTER - 1):
+            m.step()
+        self.assertEqual((m.mode, m.applied), (MIRROR, []))
+        m.step()
+        self.assertEqual((m.mode, m.applied, m.pending), (PROXY, [PROXY], 0))
+        kinds = [events.get_nowait()["type"] for _ in range(events.qsize())]
+        self.assertEqual(kinds.count("switch"), 1)
+
+    def test_a_single_good_cycle_resets_the_count(self):
+        m = ScriptedMonitor([(100, 10), (100, 10), (100, 90), (100, 10), (100, 10)])
+        for _ in range(5):
+            m.step()
+        self.assertEqual(m.mode, MIRROR)
+        self.assertEqual(m.pending, 2)
+
+    def test_no_switch_when_auto_switch_is_off(self):
+        m = ScriptedMonitor([(100, 10)] * (SWITCH_AFTER + 1), auto_switch=False)
+        for _ in range(SWITCH_AFTER + 1):
+            m.step()
+        self.assertEqual((m.mode, m.applied), (MIRROR, []))
+
+    def test_both_down_reports_an_error(self):
+        m = ScriptedMonitor([(None, None)], mode=PROXY)
+        events = m.subscribe()
+        m.step()
+        kinds = [events.get_nowait()["type"] for _ in range(events.qsize())]
+        self.assertEqual(kinds, ["sample", "error"])
+        self.assertEqual(m.mode, PROXY)
+
+    def test_interval_backs_off_when_quiet_and_resets_on_trouble(self):
+        m = ScriptedMonitor([(100, 150)] * 20 + [(None, 150)])
+        intervals = [m.step() for _ in range(20)]
+        self.assertGreater(intervals[1], intervals[0])
+        self.assertEqual(intervals[-1], MAX_INTERVAL)
+        self.assertEqual(m.step(), MIN_INTERVAL)
+
+    def test_dead_catalog_mirror_is_replaced(self):
+        url = next(iter(net_monitor.mirrors.MIRRORS["pip"].values()))
+        m = ScriptedMonitor([(None, None)] * SWITCH_AFTER)
+        m.mirror_url = url
+        original = net_monitor._pip_config
+        net_monitor._pip_config = lambda key: "https://other.example/simple"
+        try:
+            for _ in range(SWITCH_AFTER):
+                m.step()
+        finally:
+            net_monitor._pip_config = original
+        self.assertEqual(m.mode, MIRROR)
+        self.assertEqual(m.applied, [MIRROR])
+        self.assertEqual(m.mirror_url, "https://other.example/simple")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from src.modules.npm_cache import trim_packument, integrity_alias, _semver_key
+
+def packument(versions, latest=None):
+    return {
+        "name": "pkg",
+        "dist-tags": {"latest": latest or versions[-1]},
+        "versions": {v: {"version": v} for v in versions},
+        "time": {"created": "t", "modified": "t", **{v: "t" for v in versions}},
+    }
+
+class TrimPackumentTest(unittest.TestCase):
+    def test_keep_zero_keeps_everything(self):
+        doc = packument([f"1.0.{i}" for i in range(200)])
+        self.assertEqual(len(trim_packument(doc, keep=0)["versions"]), 200)
+
+    def test_small_documents_are_untouched(self):
+        doc = packument(["1.0.0", "1.0.1"])
+        self.assertEqual(list(trim_packument(doc, keep=5)["versions"]), ["1.0.0", "1.0.1"])
+
+    def test_keeps_newest_tags_and_line_heads(self):
+        versions = [f"1.{minor}.{patch}" for minor in range(3) for patch in range(10)] + ["2.0.0-beta.1"]
+        doc = trim_packument(packument(versions, latest="1.0.3"), keep=5)
+        kept = set(doc["versions"])
+        self.assertTrue({"2.0.0-beta.1", "1.2.9", "1.2.8", "1.2.7", "1.2.6"} <= kept)
+        self.assertIn("1.0.3", kept)                      # dist-tag target
+        self.assertTrue({"1.1.9", "1.0.9"} <= kept)      # newest of each major.minor
+        self.assertNotIn("1.0.0", kept)
+        self.assertEqual(set(doc["time"]) - {"created", "modified"}, kept)
+
+    def test_semver_order(self):
+        ordered = sorted(["1.10.0", "1.9.0", "1.10.0-rc.1", "junk"], key=_semver_key, reverse=True)
+        self.assertEqual(ordered, ["1.10.0", "1.10.0-rc.1", "1.9.0", "junk"])
+
+class IntegrityAliasTest(unittest.TestCase):
+    def test_strongest_hash_wins(self):
+        self.assertEqual(integrity_alias("sha1-AAAA sha512-BBBB"), "sha512-BBBB")
+        self.assertIsNone(integrity_alias(None))
+
+if __name__ == "__main__":
+    unittest.main()
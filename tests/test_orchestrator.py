@@ -0,0 +1,101 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from pathlib import Path
+from src.modules import catalog, env_manager, orchestrator
+from src.modules.orchestrator import _env_key, plan_batch, run_batch
+
+SYS_INFO = {'os': 'Linux 6.1', 'arch': 'x86_64', 'gpu': 'test', 'cuda': None}
+
+def item(target, env_name=None):
+    return {'target': target, 'env_name': env_name}
+
+class EnvKeyTest(unittest.TestCase):
+    def test_active_conda_env_is_shared_by_both_current_targets(self):
+        with mock.patch.dict(os.environ, {'CONDA_PREFIX': sys.prefix + os.sep}):
+            self.assertEqual(_env_key(item('pip_current')), _env_key(item('conda_current')))
+
+    def test_different_prefixes_run_in_parallel(self):
+        with mock.patch.dict(os.environ, {'CONDA_PREFIX': os.path.join(sys.prefix, 'envs', 'other')}):
+            self.assertNotEqual(_env_key(item('pip_current')), _env_key(item('conda_current')))
+
+    def test_new_envs_are_keyed_by_name(self):
+        self.assertEqual(_env_key(item('conda_new', 'a')), _env_key(item('conda_new', 'a')))
+        self.assertNotEqual(_env_key(item('conda_new', 'a')), _env_key(item('conda_new', 'b')))
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        for target, name, value in ((catalog, 'catalog_dirs', lambda: [catalog.CATALOG_DIR]),
+                                    (orchestrator, 'get_system_info', lambda: SYS_INFO)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        env_manager._PLAN_CACHE.clear()
+        self.addCleanup(env_manager._PLAN_CACHE.clear)
+
+class PlanBatchTest(BatchTestCase):
+    def test_packages_requested_by_several_envs_are_shared(self):
+        plan = plan_batch([
+            {'suite': 'dl_torch', 'env_name': 'a', 'custom_packages': ['numpy', 'pandas', 'torch']},
+            {'suite': 'dl_torch', 'env_name': 'b', 'custom_packages': ['numpy', 'pandas', 'scipy']},
+            {'suite': 'web_dev', 'env_name': 'c', 'custom_packages': ['numpy']},   # conda installs, no pip
+        ])
+        self.assertEqual(plan['shared'], {'3.10': ['numpy', 'pandas']})
+        self.assertEqual(plan['groups'], [[0], [1], [2]])
+
+    def test_python_versions_are_not_mixed(self):
+        current = f"{sys.version_info.major}.{sys.version_info.minor}"
+        plan = plan_batch([
+            {'suite': 'web_dev', 'target': 'pip_current', 'custom_packages': ['flask']},
+            {'suite': 'dl_torch', 'env_name': 'a', 'custom_packages': ['flask']},
+        ])
+        expected = {} if current != '3.10' else {'3.10': ['flask']}
+        self.assertEqual(plan['shared'], expected)
+
+    def test_invalid_batches_are_rejected(self):
+        for requests in ([], [{'suite': 'nope'}], [{'suite': 'web_dev', 'target': 'elsewhere'}],
+                         [{'suite': 'web_dev', 'env_name': 'x'}, {'suite': 'spider', 'env_name': 'x'}]):
+            with self.assertRaises(ValueError):
+                plan_batch(requests)
+
+class RunBatchTest(BatchTestCase):
+    def test_failed_item_does_not_stop_the_others(self):
+        def install(suite, target, env_name, *args, **kwargs):
+            if env_name == 'bad':
+                raise Exception('conda create failed')
+            return {'env_name': env_name}
+        events = []
+        with mock.patch.object(orchestrator, 'install_suite', install):
+            results = run_batch([{'suite': 'web_dev', 'env_name': 'bad'}, {'suite': 'spider', 'env_name': 'good'}],
+                                on_event=events.append)
+        self.assertEqual([r['ok'] for r in results], [False, True])
+        self.assertEqual(results[0]['error'], 'conda create failed')
+        self.assertIn(('bad', 'error'), [(e['env_name'], e['status']) for e in events])
+
+    def test_stop_event_cancels_pending_items(self):
+        stop = threading.Event()
+        stop.set()
+        install = mock.Mock()
+        with mock.patch.object(orchestrator, 'install_suite', install):
+            with self.assertRaises(InterruptedError):
+                run_batch([{'suite': 'web_dev', 'env_name': 'a'}], stop_event=stop)
+        install.assert_not_called()
+
+    def test_shared_wheels_come_from_the_resolved_mirror(self):
+        house = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, house)
+        commands = []
+        run = lambda cmd, **kw: commands.append(cmd) or mock.Mock(returncode=0)
+        with mock.patch.object(orchestrator, 'resolve', return_value=('m', 'https://mirror.example/simple')), \
+             mock.patch.object(orchestrator, 'run_command', run), \
+             mock.patch.object(orchestrator, 'WHEELHOUSE_DIR', Path(house)):
+            houses = orchestrator.prefetch_shared({'3.10': ['numpy']})
+        self.assertIn('-i https://mirror.example/simple', commands[0])
+        self.assertEqual(houses, {'3.10': str((Path(house) / 'py310').resolve())})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import io
+import sys
+import threading
+import contextvars
+import unittest
+from src.core.utils import output_to, get_output, echo, Colors, ContextStdout
+from src.modules.orchestrator import _PrefixedOutput
+
+class OutputChannelTest(unittest.TestCase):
+    def test_echo_and_colors_follow_the_channel(self):
+        out = io.StringIO()
+        with output_to(out):
+            echo("a", 1)
+            Colors.print_info("b")
+        self.assertEqual(out.getvalue(), f"a 1\n{Colors.BLUE}ℹ b{Colors.ENDC}\n")
+        self.assertIs(get_output(), sys.stdout)
+
+    def test_concurrent_jobs_do_not_mix(self):
+        outs = [io.StringIO() for _ in range(4)]
+        barrier = threading.Barrier(len(outs))
+
+        def job(i):
+            with output_to(outs[i]):
+                barrier.wait()
+                for _ in range(50):
+                    echo(f"job{i}")
+
+        threads = [threading.Thread(target=job, args=(i,)) for i in range(len(outs))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for i, out in enumerate(outs):
+            self.assertEqual(set(out.getvalue().split()), {f"job{i}"})
+
+    def test_copied_context_carries_the_channel_into_workers(self):
+        out = io.StringIO()
+        with output_to(out):
+            ctx = contextvars.copy_context()
+        t = threading.Thread(target=ctx.run, args=(echo, "from worker"))
+        t.start()
+        t.join()
+        self.assertEqual(out.getvalue(), "from worker\n")
+
+    def test_context_stdout_redirects_bare_print(self):
+        fallback, job = io.StringIO(), io.StringIO()
+        stdout = ContextStdout(fallback)
+        print("cli", file=stdout)
+        with output_to(job):
+            print("job", file=stdout)
+        self.assertEqual((fallback.getvalue(), job.getvalue()), ("cli\n", "job\n"))
+
+class PrefixedOutputTest(unittest.TestCase):
+    def test_only_whole_lines_are_forwarded_with_the_tag(self):
+        parent = io.StringIO()
+        out = _PrefixedOutput(parent, "[env] ")
+        out.write("one\ntw")
+        self.assertEqual(parent.getvalue(), "[env] one\n")
+        out.write("o\n 50%\r")
+        self.assertEqual(parent.getvalue(), "[env] one\n[env] two\n[env]  50%\r")
+
+if __name__ == "__main__":
+    unittest.main()
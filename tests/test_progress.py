@@ -0,0 +1,74 @@
+import unittest
+from src.core.progress import InstallProgress, canonical_name
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class InstallProgressTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.p = InstallProgress(clock=self.clock)
+
+    def test_canonical_name(self):
+        self.assertEqual(canonical_name("Foo_Bar.baz>=1.0"), "foo-bar-baz")
+        self.assertEqual(canonical_name("pkg[extra]; python_version<'3.9'"), "pkg")
+
+    def test_piped_download_claims_no_bytes_or_eta(self):
+        self.p.feed("Collecting torch")
+        self.p.feed("  Downloading torch-2.3.0-cp311-cp311-linux_x86_64.whl (2.3 GB)")
+        self.clock.now = 60
+        self.p.feed("")
+        self.assertTrue(self.p.download_quiet)
+        self.assertIsNone(self.p.eta)
+        self.assertIn("0/1", self.p.describe())
+        self.assertNotIn("剩余", self.p.describe())
+
+    def test_quiet_download_completes_on_next_line(self):
+        self.p.feed("  Downloading a-1.0-py3-none-any.whl (10 MB)")
+        self.p.feed("Installing collected packages: a")
+        self.assertFalse(self.p.download_quiet)
+        self.assertEqual(self.p.bytes_done, self.p.bytes_total)
+        self.assertEqual(self.p.phase, "install")
+
+    def test_raw_progress_bar_reports_bytes(self):
+        self.p.feed("  Downloading torch-2.3.0-cp311-cp311-linux_x86_64.whl (2.3 GB)")
+        for i in range(1, 5):
+            self.clock.now = i
+            self.p.feed(f"Progress {i * 1000000} of 100000000")
+        self.assertFalse(self.p.download_quiet)
+        self.assertEqual(self.p.bytes_done, 4000000)
+        self.assertEqual(self.p.bytes_total, 100000000)
+        self.assertGreater(self.p.rate, 0)
+        self.assertIsNotNone(self.p.eta)
+
+    def test_redrawn_bar_without_new_bytes_is_not_activity(self):
+        self.p.feed("  Downloading a-1.0-py3-none-any.whl (10 MB)")
+        self.p.feed("Progress 100 of 1000")
+        self.clock.now = 30
+        self.p.feed("Progress 100 of 1000")
+        self.assertEqual(self.p.stalled_for(), 30)
+
+    def test_percent_never_goes_backwards(self):
+        self.p.feed("Collecting a")
+        self.p.feed("Installing collected packages: a")
+        high = self.p.percent
+        self.p.feed("Collecting b")
+        self.assertGreaterEqual(self.p.percent, high)
+
+    def test_satisfied_and_installed_names(self):
+        self.p.feed("Requirement already satisfied: Numpy in ./venv")
+        self.p.feed("Successfully installed requests-2.31.0 charset_normalizer-3.3.2")
+        self.assertEqual(self.p.satisfied, {"numpy"})
+        self.assertEqual(self.p.installed_names, {"requests", "charset-normalizer"})
+
+    def test_conda_package_table(self):
+        self.p.feed("Downloading and Extracting Packages")
+        self.p.feed("pytorch-2.3.0        | 1.2 GB    | #####      |  50%")
+        self.assertAlmostEqual(self.p.bytes_done, 0.6 * 1024 ** 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.modules import project_scanner
+from src.modules.project_scanner import parse_requirement, parse_conda_spec, parse_manifest, scan_project
+
+class ParseRequirementTest(unittest.TestCase):
+    def test_name_is_canonicalized_and_spec_compacted(self):
+        req = parse_requirement('Django_Rest.Framework[bcrypt] >= 4.0, <5 ; python_version>"3.8"')
+        self.assertEqual(req["name"], "django-rest-framework")
+        self.assertEqual(req["spec"], ">=4.0,<5")
+        self.assertIn("python_version", req["raw"])
+
+    def test_urls_paths_and_direct_references_are_skipped(self):
+        for line in ("https://example.com/pkg.whl", "./local", "/abs/path", "pkg @ git+https://x/y", ""):
+            self.assertIsNone(parse_requirement(line), line)
+
+class ParseCondaSpecTest(unittest.TestCase):
+    def test_operators_spaces_and_channels(self):
+        cases = {
+            "numpy>=1.20": ("numpy", ">=1.20", None),
+            "scipy 1.11.*": ("scipy", "1.11.*", None),
+            "conda-forge::pandas==2.1": ("pandas", "==2.1", "conda-forge"),
+            "python=3.10": ("python", "=3.10", None),
+            "numpy 1.26 py311_0": ("numpy", "1.26 py311_0", None),
+            "PyTorch-CUDA": ("pytorch-cuda", "", None),
+        }
+        for text, expected in cases.items():
+            dep = parse_conda_spec(text)
+            self.assertEqual((dep["name"], dep["spec"], dep["channel"]), expected, text)
+            self.assertEqual(dep["raw"], text)
+
+    def test_garbage_is_skipped(self):
+        self.assertIsNone(parse_conda_spec("::"))
+
+class ManifestParserTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+
+    def _write(self, rel, text):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_requirements_includes_comments_and_options(self):
+        self._write("base.txt", "numpy==1.26\n")
+        path = self._write("requirements.txt", "-r base.txt\n# comment\n-i https://mirror\nrequests>=2 # inline\n")
+        deps = parse_manifest(path)["deps"]
+        self.assertEqual([(d["name"], d["spec"]) for d in deps], [("numpy", "==1.26"), ("requests", ">=2")])
+
+    def test_environment_yml_splits_conda_and_pip(self):
+        path = self._write("environment.yml", (
+            "name: demo\n"
+            "channels:\n  - conda-forge\n"
+            "dependencies:\n"
+            "  - python=3.10\n"
+            "  - conda-forge::numpy>=1.20\n"
+            "  - pip:\n"
+            "    - requests==2.31\n"
+            "  - scipy\n"))
+        deps = [(d["name"], d["spec"], d["manager"]) for d in parse_manifest(path)["deps"]]
+        self.assertEqual(deps, [("python", "=3.10", "conda"), ("numpy", ">=1.20", "conda"),
+                                ("requests", "==2.31", "pip"), ("scipy", "", "conda")])
+
+    def test_package_json_marks_dev_dependencies(self):
+        path = self._write("package.json", '{"dependencies": {"react": "^18"}, "devDependencies": {"vite": "5"}}')
+        deps = parse_manifest(path)["deps"]
+        self.assertEqual([(d["name"], d["dev"]) for d in deps], [("react", False), ("vite", True)])
+
+    def test_broken_manifest_reports_error(self):
+        result = parse_manifest(self._write("package.json", "{not json"))
+        self.assertEqual(result["deps"], [])
+        self.assertTrue(result["error"])
+
+    def test_manifest_is_reparsed_only_after_a_change(self):
+        path = self._write("requirements.txt", "flask\n")
+        first = parse_manifest(path)
+        self.assertIs(parse_manifest(path), first)
+        self._write("requirements.txt", "flask\nclick\n")
+        self.assertEqual([d["name"] for d in parse_manifest(path)["deps"]], ["flask", "click"])
+
+    def test_scan_prunes_vendored_dirs_and_respects_depth(self):
+        self._write("requirements.txt", "flask\n")
+        self._write("web/package.json", "{}")
+        self._write("web/node_modules/lib/package.json", "{}")
+        self._write(".venv/lib/requirements.txt", "x\n")
+        self._write("a/b/requirements-dev.txt", "pytest\n")
+        scan = scan_project(self.root)
+        self.assertEqual([p["rel"] for p in scan["projects"]], [".", "a/b", "web"])
+        self.assertEqual(scan["projects"][1]["manifests"][0]["kind"], "requirements.txt")
+        self.assertEqual([p["rel"] for p in scan_project(self.root, max_depth=1)["projects"]], [".", "web"])
+
+    def test_unchanged_directory_listing_is_reused(self):
+        self._write("requirements.txt", "flask\n")
+        scan_project(self.root)
+        with mock.patch.object(project_scanner.os, "scandir", side_effect=AssertionError("rescanned")):
+            self.assertEqual(len(scan_project(self.root)["projects"]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
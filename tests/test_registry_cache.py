@@ -0,0 +1,100 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.modules import registry_cache
+from src.modules.registry_cache import RegistryCache, registry_request
+
+LAYER = b"layer-bytes" * 100
+LAYER_DIGEST = "sha256:" + hashlib.sha256(LAYER).hexdigest()
+MANIFEST = json.dumps({"schemaVersion": 2, "layers": [{"digest": LAYER_DIGEST}]}).encode()
+MANIFEST_DIGEST = "sha256:" + hashlib.sha256(MANIFEST).hexdigest()
+
+class FakeRegistry(BaseHTTPRequestHandler):
+    """Registry v2 that demands an anonymous Bearer token, like Docker Hub."""
+    hits = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=b"", headers=None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        if self.path.startswith("/token"):
+            self._send(200, json.dumps({"token": "t0k", "expires_in": 300}).encode())
+        elif self.headers.get("Authorization") != "Bearer t0k":
+            self._send(401, headers={"WWW-Authenticate": f'Bearer realm="{host}/token",service="fake"'})
+        elif self.path == "/v2/":
+            self._send(200, b"{}")
+        elif self.path in ("/v2/library/app/manifests/latest", f"/v2/library/app/manifests/{MANIFEST_DIGEST}"):
+            self._send(200, MANIFEST, {"Content-Type": "application/vnd.oci.image.manifest.v1+json"})
+        elif "/blobs/" in self.path:
+            self._send(200, LAYER)
+        else:
+            self._send(404)
+
+class RegistryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        self.addCleanup(os.chdir, cwd)
+        self.hits = []
+        handler = type("Handler", (FakeRegistry,), {"hits": self.hits})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base = f"http://127.0.0.1:{server.server_address[1]}"
+        registry_cache._TOKENS.clear()
+        self.addCleanup(registry_cache._TOKENS.clear)
+        self.cache = RegistryCache([self.base])
+
+    def test_token_exchange_is_cached_per_repository(self):
+        for _ in range(2):
+            with registry_request(self.base, "/v2/library/app/manifests/latest") as resp:
+                self.assertEqual(resp.read(), MANIFEST)
+        self.assertEqual(sum(p.startswith("/token") for p in self.hits), 1)
+        self.assertIn("scope=repository%3Alibrary%2Fapp%3Apull", next(p for p in self.hits if p.startswith("/token")))
+
+    def test_tag_manifest_is_also_stored_under_its_digest(self):
+        entry = self.cache.manifest("library/app", "latest")
+        self.assertEqual(f"sha256:{entry['digest']}", MANIFEST_DIGEST)
+        self.hits.clear()
+        self.assertEqual(self.cache.manifest("library/app", MANIFEST_DIGEST)["digest"], entry["digest"])
+        self.assertEqual(self.hits, [])
+
+    def test_unknown_manifest_raises_key_error(self):
+        with self.assertRaises(KeyError):
+            self.cache.manifest("library/missing", "latest")
+
+    def test_blobs_are_verified_and_shared_across_repositories(self):
+        started = []
+        entry = self.cache.blob("library/app", LAYER_DIGEST, lambda *a: started.append(a), lambda n: None)
+        self.assertEqual(entry["path"].read_bytes(), LAYER)
+        self.hits.clear()
+        other = self.cache.blob("library/other", LAYER_DIGEST, lambda *a: started.append(a), lambda n: None)
+        self.assertEqual(other["digest"], entry["digest"])
+        self.assertEqual((self.hits, len(started)), ([], 1))
+
+    def test_blob_with_wrong_digest_is_not_stored(self):
+        bad = "sha256:" + "0" * 64
+        with self.assertRaises(ValueError):
+            self.cache.blob("library/app", bad, lambda *a: None, lambda n: None)
+        self.assertIsNone(self.cache.store.get(f"blob/{bad}"))
+
+if __name__ == "__main__":
+    unittest.main()
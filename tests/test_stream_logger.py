@@ -0,0 +1,30 @@
+import queue
+import unittest
+from src.web.server import StreamLogger
+
+def _job():
+    return {'logs': [], 'events': queue.Queue(), 'progress': 0}
+
+class StreamLoggerTest(unittest.TestCase):
+    def test_raw_progress_is_tracked_but_not_logged(self):
+        job = _job()
+        logger = StreamLogger(job, progress_range=(0, 100))
+        logger.write("  Downloading torch-2.3.0-cp311-cp311-linux_x86_64.whl (2.3 GB)\n")
+        for i in range(1, 500):
+            logger.write(f"Progress {i * 1024 * 1024} of 2469606195\n")
+        logger.write("Progress 7 of 9\r")
+        logger.write("Successfully installed torch-2.3.0\n")
+        messages = [e['message'] for e in job['logs']]
+        self.assertEqual(len(messages), 2)
+        self.assertFalse(any(m.startswith("Progress") for m in messages))
+        self.assertIn("torch-2.3.0-cp311-cp311-linux_x86_64.whl", logger.progress.metered)
+
+    def test_plain_lines_are_logged_once(self):
+        job = _job()
+        logger = StreamLogger(job)
+        logger.write("Collecting flask\nCollecting cl")
+        logger.write("ick\n")
+        self.assertEqual([e['message'] for e in job['logs']], ["Collecting flask", "Collecting click"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.modules import catalog, env_manager
+from src.modules.env_manager import hardware_profile, get_all_suites, suite_details_json
+
+def _info(os_name="Linux 6.1", arch="x86_64", cuda=None):
+    return {"os": os_name, "arch": arch, "gpu": "test", "cuda": cuda}
+
+class SuitePlanTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(catalog, "catalog_dirs", lambda: [catalog.CATALOG_DIR])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        env_manager._PLAN_CACHE.clear()
+        self.addCleanup(env_manager._PLAN_CACHE.clear)
+
+    def test_cuda_versions_map_to_torch_buckets(self):
+        cases = {"12.4": "cu121", "11.8": "cu118", "10.2": "cuda-legacy", None: "cpu"}
+        for cuda, bucket in cases.items():
+            self.assertEqual(hardware_profile(_info(cuda=cuda))["cuda"], bucket, cuda)
+        self.assertEqual(hardware_profile(_info("Darwin 23", "arm64"))["fingerprint"], "Darwin-arm64-mps")
+
+    def test_plans_are_compiled_once_per_profile(self):
+        first = get_all_suites(_info(cuda="12.2"))
+        self.assertIs(get_all_suites(_info(cuda="12.6")), first)
+        self.assertIsNot(get_all_suites(_info()), first)
+
+    def test_plans_are_read_only(self):
+        plan = get_all_suites(_info())["web_dev"]
+        with self.assertRaises(TypeError):
+            plan["pip_base"] = ()
+        self.assertIsInstance(plan["pip_base"], tuple)
+
+    def test_platform_replacements(self):
+        windows = get_all_suites(_info("Windows 10", "AMD64"))["web_dev"]["pip_base"]
+        self.assertIn("waitress", windows)
+        self.assertNotIn("gunicorn", windows)
+        mac = get_all_suites(_info("Darwin 23", "arm64"))["dl_tf"]["pip_base"]
+        self.assertIn("tensorflow-macos", mac)
+        self.assertNotIn("tensorflow", mac)
+
+    def test_torch_variant_is_resolved_in_the_plan(self):
+        torch = get_all_suites(_info(cuda="11.8"))["dl_torch"]["torch"]
+        self.assertEqual(torch["variant"], "cu118")
+        self.assertTrue(torch["index"].endswith("/cu118"))
+        self.assertIsNone(get_all_suites(_info())["web_dev"]["torch"])
+
+    def test_details_json_matches_the_plan(self):
+        data = json.loads(suite_details_json("dl_torch", _info(cuda="12.1")))
+        self.assertEqual(data["torch"]["variant"], "cu121")
+        self.assertEqual(data["pip_base"], list(get_all_suites(_info(cuda="12.1"))["dl_torch"]["pip_base"]))
+        self.assertIsNone(suite_details_json("nope", _info()))
+
+class CustomTorchSuiteTest(unittest.TestCase):
+    """A user catalog suite with "torch": true is installed like dl_torch."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for kind in catalog.KINDS:
+            os.makedirs(os.path.join(self.dir, kind))
+        with open(os.path.join(self.dir, "suites", "my_vision.json"), "w", encoding="utf-8") as f:
+            json.dump({"desc": "vision", "packages": ["numpy", "torch"], "torch": True}, f)
+        self.commands = []
+        run = lambda cmd, **kw: self.commands.append(cmd) or mock.Mock(returncode=0, stdout="/envs/v")
+        pip = lambda pip_cmd, pkgs, **kw: self.commands.append(f"{pip_cmd} install {' '.join(pkgs)}") or mock.Mock(returncode=0)
+        for target, name, value in ((catalog, "catalog_dirs", lambda: [catalog.CATALOG_DIR, self.dir]),
+                                    (env_manager, "run_command", run), (env_manager, "pip_install_with_failover", pip),
+                                    (env_manager, "get_system_info", lambda refresh=False: _info(cuda="12.2")),
+                                    (env_manager, "skip_satisfied", lambda pkgs, **kw: list(pkgs)),
+                                    (env_manager, "conda_torch_matches", lambda *a: False)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        env_manager._PLAN_CACHE.clear()
+        self.addCleanup(env_manager._PLAN_CACHE.clear)
+
+    def test_conda_new_installs_the_cuda_build_via_conda(self):
+        env_manager.install_suite("my_vision", "conda_new", "v")
+        self.assertIn("conda install -n v -y pytorch torchvision torchaudio pytorch-cuda=12.1 -c pytorch -c nvidia", self.commands)
+        self.assertIn("conda run --no-capture-output -n v pip install numpy", self.commands)
+
+    def test_conda_current_installs_torch(self):
+        env_manager.install_suite("my_vision", "conda_current")
+        self.assertTrue(any(c.startswith("conda install -y pytorch") for c in self.commands))
+
+    def test_shared_packages_exclude_torch(self):
+        from src.modules.orchestrator import _pip_packages
+        suites = env_manager.get_all_suites()
+        item = {"suite": "my_vision", "target": "conda_new", "custom_packages": None}
+        self.assertEqual(_pip_packages(item, suites), ["numpy"])
+
+class SystemInfoTest(unittest.TestCase):
+    def test_detection_runs_once_unless_refreshed(self):
+        with mock.patch.object(env_manager, "_SYS_INFO", None), \
+             mock.patch.object(env_manager, "_detect_system_info", return_value=_info()) as detect:
+            info = env_manager.get_system_info()
+            info["os"] = "changed"
+            self.assertEqual(env_manager.get_system_info()["os"], "Linux 6.1")
+            env_manager.get_system_info(refresh=True)
+        self.assertEqual(detect.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import sys
+import unittest
+from src.core.utils import run_command
+from src.core.watchdog import StreamWatchdog, StallError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class StreamWatchdogTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.wd = StreamWatchdog(stall_seconds=90, window_seconds=120, clock=self.clock)
+
+    def test_silence_during_piped_download_is_not_a_stall(self):
+        self.wd.feed("Collecting torch\n  Downloading torch-2.3.0-cp311-cp311-linux_x86_64.whl (2.3 GB)\n")
+        for t in range(0, 1200, 10):
+            self.clock.now = t
+            self.assertIsNone(self.wd.check())
+
+    def test_silence_outside_a_download_trips(self):
+        self.wd.feed("Collecting torch\n")
+        self.clock.now = 91
+        self.assertIn("无任何进度", self.wd.check())
+
+    def test_frozen_byte_counter_trips(self):
+        self.wd.feed("  Downloading torch-2.3.0-cp311-cp311-linux_x86_64.whl (2.3 GB)\nProgress 1000 of 2000000000\n")
+        self.clock.now = 91
+        self.assertIsNotNone(self.wd.check())
+
+    def test_trickling_download_trips_after_a_full_window(self):
+        self.wd.feed("  Downloading a-1.0-py3-none-any.whl (100 MB)\n")
+        done = 0
+        for t in range(1, 130):
+            self.clock.now = t
+            done += 1024
+            self.wd.feed(f"Progress {done} of 104857600\n")
+        self.assertIn("下载速度过低", self.wd.check())
+
+    def test_healthy_download_does_not_trip(self):
+        self.wd.feed("  Downloading a-1.0-py3-none-any.whl (100 MB)\n")
+        for t in range(1, 130):
+            self.clock.now = t
+            self.wd.feed(f"Progress {t * 512 * 1024} of 104857600\n")
+        self.assertIsNone(self.wd.check())
+
+    def test_resolve_phase_does_not_count_against_the_download(self):
+        self.wd.feed("Collecting torch\n")
+        for t in range(0, 200, 2):
+            self.clock.now = t
+            self.wd.feed("  Collecting dep\n")
+            self.wd.check()
+        self.wd.feed("  Downloading torch-2.3.0-cp311-cp311-linux_x86_64.whl (2.3 GB)\n")
+        for t in range(200, 260, 2):
+            self.clock.now = t
+            self.wd.feed(f"Progress {(t - 199) * 1024 * 1024} of 2469606195\n")
+            self.assertIsNone(self.wd.check(), t)
+
+    def test_finished_packages(self):
+        self.wd.feed("Requirement already satisfied: numpy in x\nSuccessfully installed six-1.16.0\n")
+        self.assertEqual(self.wd.finished_packages(), {"numpy", "six"})
+
+class SilentProcessTest(unittest.TestCase):
+    def test_silent_but_alive_download_is_not_killed(self):
+        # Prints a "Downloading" line, then nothing for longer than stall_seconds, then exits cleanly
+        code = "import time; print('  Downloading big-1.0-py3-none-any.whl (2.3 GB)', flush=True); time.sleep(4.5); print('done')"
+        wd = StreamWatchdog(stall_seconds=1)
+        try:
+            res = run_command(f'"{sys.executable}" -c "{code}"', stream_output=True, watchdog=wd,
+                              on_output=lambda lines, progress: None)
+        except StallError as e:
+            self.fail(f"watchdog killed a live download: {e.reason}")
+        self.assertEqual(res.returncode, 0)
+        self.assertIn("done", res.stdout)
+        self.assertIsNone(wd.tripped)
+
+    def test_lines_split_across_reads_are_parsed_whole(self):
+        code = ("import sys, time; sys.stdout.write('  Downlo'); sys.stdout.flush(); time.sleep(0.3); "
+                "print('ading big-1.0-py3-none-any.whl (2.3 GB)', flush=True)")
+        wd = StreamWatchdog()
+        run_command(f'"{sys.executable}" -c "{code}"', stream_output=True, watchdog=wd,
+                    on_output=lambda lines, progress: None)
+        self.assertEqual(wd.lines, 1)
+        self.assertIn("big-1.0-py3-none-any.whl", wd.progress.downloads)
+
+    def test_raw_progress_lines_are_delivered_as_redraws(self):
+        code = "print('  Downloading big-1.0-py3-none-any.whl (1 MB)'); [print(f'Progress {i} of 3') for i in range(4)]; print('done')"
+        batches = []
+        wd = StreamWatchdog()
+        run_command(f'"{sys.executable}" -c "{code}"', stream_output=True, watchdog=wd,
+                    on_output=lambda lines, progress: batches.append(("".join(lines), progress)))
+        text = "".join(lines for lines, _ in batches)
+        self.assertNotIn("Progress 3 of 3\n", text)
+        self.assertIn("Progress 3 of 3\rdone\n", text)
+        self.assertEqual(wd.progress.downloads["big-1.0-py3-none-any.whl"], [3.0, 3.0])
+
+    def test_silent_process_outside_download_is_killed(self):
+        code = "import time; print('Collecting big', flush=True); time.sleep(30)"
+        wd = StreamWatchdog(stall_seconds=1)
+        with self.assertRaises(StallError):
+            run_command(f'"{sys.executable}" -c "{code}"', stream_output=True, watchdog=wd,
+                        on_output=lambda lines, progress: None)
+
+if __name__ == "__main__":
+    unittest.main()